@@ -7,6 +7,8 @@ from rest_framework import status
 
 from ee.models.license import License, LicenseManager
 from ee.models.property_definition import EnterprisePropertyDefinition
+from posthog.hogql.schema_version import get_team_schema_version
+from posthog.hogql.transforms.property_types import get_team_property_types
 from posthog.models import EventProperty, Tag, ActivityLog
 from posthog.models.property_definition import PropertyDefinition
 from posthog.test.base import APIBaseTest
@@ -195,6 +197,41 @@ class TestPropertyDefinitionEnterpriseAPI(APIBaseTest):
         self.assertEqual(response_data["is_numerical"], True)
         self.assertEqual(response_data["updated_by"]["first_name"], self.user.first_name)
 
+    def test_update_property_definition_property_type_changes_the_schema_version(self):
+        super(LicenseManager, cast(LicenseManager, License.objects)).create(
+            plan="enterprise", valid_until=timezone.datetime(2038, 1, 19, 3, 14, 7)
+        )
+        property = EnterprisePropertyDefinition.objects.create(team=self.team, name="property", property_type="String")
+        schema_version = get_team_schema_version(self.team.pk)
+
+        response = self.client.patch(
+            f"/api/projects/@current/property_definitions/{str(property.id)}/",
+            {"property_type": "Numeric"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(get_team_schema_version(self.team.pk), schema_version)
+
+    def test_update_property_definition_property_type_updates_cached_property_types(self):
+        super(LicenseManager, cast(LicenseManager, License.objects)).create(
+            plan="enterprise", valid_until=timezone.datetime(2038, 1, 19, 3, 14, 7)
+        )
+        property = EnterprisePropertyDefinition.objects.create(team=self.team, name="property", property_type="String")
+        key = (PropertyDefinition.Type.EVENT, None, "property")
+        property_types = get_team_property_types(self.team.pk)
+        assert isinstance(property_types, dict)
+        self.assertEqual(property_types[key], "String")
+
+        response = self.client.patch(
+            f"/api/projects/@current/property_definitions/{str(property.id)}/",
+            {"property_type": "Numeric"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        property_types = get_team_property_types(self.team.pk)
+        assert isinstance(property_types, dict)
+        self.assertEqual(property_types[key], "Numeric")
+
     def test_update_property_definition_non_numeric(self):
         super(LicenseManager, cast(LicenseManager, License.objects)).create(
             plan="enterprise", valid_until=timezone.datetime(2038, 1, 19, 3, 14, 7)
@@ -1,7 +1,10 @@
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 
+from posthog.hogql.schema_version import invalidate_team_schema
 from posthog.models.property_definition import PropertyDefinition
+from posthog.models.signals import mutable_receiver
 
 
 class EnterprisePropertyDefinition(PropertyDefinition):
@@ -28,3 +31,9 @@ class EnterprisePropertyDefinition(PropertyDefinition):
         default=None,
         db_column="tags",
     )
+
+
+# Django sends signals for the concrete class only, so saves of this subclass don't reach PropertyDefinition's receiver
+@mutable_receiver([post_save, post_delete], sender=EnterprisePropertyDefinition)
+def enterprise_property_definition_changed(sender, instance: EnterprisePropertyDefinition, **kwargs):
+    invalidate_team_schema(instance.team_id)
@@ -5,6 +5,7 @@ from datetime import timedelta, datetime
 from typing import Optional, cast
 
 import structlog
+from django.core.cache import cache
 from django.utils import timezone
 from prometheus_client import Histogram
 from sentry_sdk import capture_exception, capture_message
@@ -111,6 +112,8 @@ def persist_recording(recording_id: str, team_id: int) -> None:
         recording.storage_version = "2023-08-01"
         recording.object_storage_path = target_prefix
         recording.save()
+        # the cached blob listing is of the ingestion storage the recording was just moved from
+        cache.delete(recording.build_blob_sources_cache_key())
         logger.info(
             "Persisting recording: done!",
             recording_id=recording_id,
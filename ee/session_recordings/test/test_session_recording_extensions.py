@@ -6,6 +6,7 @@ from uuid import uuid4
 
 from boto3 import resource
 from botocore.config import Config
+from django.core.cache import cache
 from freezegun import freeze_time
 
 from ee.session_recordings.session_recording_extensions import (
@@ -109,9 +110,13 @@ class TestSessionRecordingExtensions(ClickhouseTestMixin, APIBaseTest):
 
                 assert recording.created_at == two_minutes_ago
 
+            cache.set(recording.build_blob_sources_cache_key(), ["the blobs before persisting"])
+
             persist_recording(recording.session_id, recording.team_id)
             recording.refresh_from_db()
 
+            assert cache.get(recording.build_blob_sources_cache_key()) is None
+
             assert (
                 recording.object_storage_path
                 == f"session_recordings_lts/team_id/{self.team.pk}/session_id/{recording.session_id}/data"
@@ -115,6 +115,22 @@ export function Modifiers<Q extends { response?: Record<string, any>; modifiers?
                     value={query.modifiers?.optimizeJoinedFilters ?? response?.modifiers?.optimizeJoinedFilters}
                 />
             </LemonLabel>
+            <LemonLabel className={labelClassName}>
+                <div>Batch trends series:</div>
+                <LemonSelect
+                    options={[
+                        { value: true, label: 'true' },
+                        { value: false, label: 'false' },
+                    ]}
+                    onChange={(value) =>
+                        setQuery({
+                            ...query,
+                            modifiers: { ...query.modifiers, batchTrendsSeries: value },
+                        })
+                    }
+                    value={query.modifiers?.batchTrendsSeries ?? response?.modifiers?.batchTrendsSeries}
+                />
+            </LemonLabel>
         </div>
     )
 }
@@ -0,0 +1,417 @@
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Optional
+from collections.abc import Callable
+
+from hogvm.python.decode import Program, decode_bytecode
+from hogvm.python.execute import BytecodeResult, execute_bytecode, get_nested_value, like
+from hogvm.python.operation import Operation
+from hogvm.python.stl import STL
+from hogvm.python.vm_utils import HogVMException, compile_regex
+from posthog.models import Team
+
+# Compiled programs, keyed by their bytecode, like decoded ones
+COMPILE_CACHE_MAX_SIZE = 1024
+
+# Python expressions of the operations that pop two values, `a` being the first popped and `b` the second
+BINARY_EXPRESSIONS = {
+    Operation.PLUS: "{a} + {b}",
+    Operation.MINUS: "{a} - {b}",
+    Operation.MULTIPLY: "{a} * {b}",
+    Operation.DIVIDE: "{a} / {b}",
+    Operation.MOD: "{a} % {b}",
+    Operation.EQ: "{a} == {b}",
+    Operation.NOT_EQ: "{a} != {b}",
+    Operation.GT: "{a} > {b}",
+    Operation.GT_EQ: "{a} >= {b}",
+    Operation.LT: "{a} < {b}",
+    Operation.LT_EQ: "{a} <= {b}",
+    Operation.LIKE: "like({a}, {b})",
+    Operation.ILIKE: "like({a}, {b}, IGNORECASE)",
+    Operation.NOT_LIKE: "not like({a}, {b})",
+    Operation.NOT_ILIKE: "not like({a}, {b}, IGNORECASE)",
+    Operation.IN: "{a} in {b}",
+    Operation.NOT_IN: "{a} not in {b}",
+    Operation.REGEX: "bool(compile_regex({b}).search({a}))",
+    Operation.NOT_REGEX: "not bool(compile_regex({b}).search({a}))",
+    Operation.IREGEX: "bool(compile_regex({b}, IGNORECASE).search({a}))",
+    Operation.NOT_IREGEX: "not bool(compile_regex({b}, IGNORECASE).search({a}))",
+}
+
+CONSTANT_OPERATIONS = {Operation.STRING, Operation.INTEGER, Operation.FLOAT}
+
+
+class UncompilableBytecode(Exception):
+    """Raised for bytecode that the compiler can't guarantee to run like the interpreter does, which then runs it."""
+
+    pass
+
+
+# Signature of compiled programs: (fields, stack, declared functions, call, check timeout) -> result
+CompiledProgram = Callable[
+    [Optional[dict[str, Any]], list[Any], dict[str, Callable[..., Any]], Callable[..., Any], Callable[[], None]],
+    Any,
+]
+
+
+def execute_compiled_bytecode(
+    bytecode: list[Any],
+    fields: Optional[dict[str, Any]] = None,
+    functions: Optional[dict[str, Callable[..., Any]]] = None,
+    timeout=10,
+    team: Team | None = None,
+) -> BytecodeResult:
+    """
+    Like `execute_bytecode`, but runs the bytecode compiled to a Python function, so that instructions aren't
+    dispatched one by one. Falls back to the interpreter for bytecode that can't be compiled.
+
+    Each call of a declared function is a Python call, so deep recursion fails with an error instead of running
+    until the timeout.
+    """
+    program = compile_bytecode(bytecode)
+    if program is None:
+        return execute_bytecode(bytecode, fields, functions, timeout, team)
+
+    stdout: list[str] = []
+    start_time = time.time()
+
+    def check_timeout():
+        if time.time() - start_time > timeout:
+            raise HogVMException(f"Execution timed out after {timeout} seconds")
+
+    def call(name: str, args: list[Any]) -> Any:
+        if functions is not None and name in functions:
+            return functions[name](*args)
+        if name not in STL:
+            raise HogVMException(f"Unsupported function call: {name}")
+        return STL[name](name, args, team, stdout, timeout)
+
+    try:
+        result = program(fields, [], {}, call, check_timeout)
+    except IndexError:
+        raise HogVMException("Unexpected end of bytecode")
+    except RecursionError:
+        raise HogVMException("Maximum recursion depth exceeded")
+    return BytecodeResult(result=result, stdout=stdout, bytecode=bytecode)
+
+
+def compile_bytecode(bytecode: list[Any]) -> Optional[CompiledProgram]:
+    """Compiles bytecode to a Python function, or returns None if it can't be compiled."""
+    try:
+        return _compile_bytecode_cached(tuple(bytecode))
+    except TypeError:
+        # unhashable constants can't be cached
+        return _compile_bytecode(bytecode)
+
+
+@lru_cache(maxsize=COMPILE_CACHE_MAX_SIZE)
+def _compile_bytecode_cached(bytecode: tuple[Any, ...]) -> Optional[CompiledProgram]:
+    return _compile_bytecode(bytecode)
+
+
+def _compile_bytecode(bytecode: list[Any] | tuple[Any, ...]) -> Optional[CompiledProgram]:
+    program = decode_bytecode(list(bytecode))
+    try:
+        return _ProgramCompiler(program).compile()
+    except UncompilableBytecode:
+        return None
+
+
+@dataclass
+class _Value:
+    """A value on the stack at compile time, as the Python expression that evaluates to it."""
+
+    code: str
+    is_constant: bool = False
+    constant: Any = None
+
+
+@dataclass
+class _Unit:
+    """The main program or a declared function, which compiles to a Python function of its own."""
+
+    name: str
+    start: int
+    end: int
+    arg_len: Optional[int] = None  # None for the main program
+    lines: list[str] = field(default_factory=list)
+
+
+class _ProgramCompiler:
+    """
+    Compiles a decoded program to Python source, one Python function per unit, and runs it to get the main function.
+
+    Within a basic block, the values on the stack are kept in Python variables, and only moved to the `stack` list
+    when the block ends or when locals are read or written. Blocks are run in a `while` loop, jumps set the next one.
+    """
+
+    def __init__(self, program: Program):
+        self.operations = program.operations
+        self.operands = program.operands
+        self.namespace: dict[str, Any] = {
+            "like": like,
+            "compile_regex": compile_regex,
+            "get_nested_value": get_nested_value,
+            "HogVMException": HogVMException,
+            "IGNORECASE": re.IGNORECASE,
+        }
+        self.declared_names = {
+            operand[0]
+            for symbol, operand in zip(self.operations, self.operands)
+            if symbol == Operation.DECLARE_FN and isinstance(operand[0], str)
+        }
+
+    def compile(self) -> CompiledProgram:
+        units = [_Unit(name="main", start=0, end=len(self.operations))]
+        sources = []
+        # compiling a unit adds the functions declared in it to `units`
+        for unit in units:
+            sources.append(self._compile_unit(unit, units))
+        source = "\n".join(sources)
+        exec(compile(source, "<hog>", "exec"), self.namespace)  # noqa: S102
+        return self.namespace["main"]
+
+    def _constant(self, value: Any) -> _Value:
+        if value is None or (
+            value.__class__ in (bool, int, float, str) and (value.__class__ is not float or math.isfinite(value))
+        ):
+            return _Value(code=repr(value), is_constant=True, constant=value)
+        name = f"c{len(self.namespace)}"
+        self.namespace[name] = value
+        return _Value(code=name, is_constant=True, constant=value)
+
+    def _unit_instructions(self, unit: _Unit, units: list[_Unit]) -> list[int]:
+        """Indexes of the instructions of a unit, without the bodies of functions declared in it."""
+        indexes = []
+        index = unit.start
+        while index < unit.end:
+            indexes.append(index)
+            if self.operations[index] == Operation.DECLARE_FN:
+                name, arg_len, end = self.operands[index]
+                if not isinstance(name, str) or not isinstance(arg_len, int) or not index < end <= unit.end:
+                    raise UncompilableBytecode()
+                units.append(_Unit(name=f"fn_{index}", start=index + 1, end=end, arg_len=arg_len))
+                index = end
+            else:
+                index += 1
+        return indexes
+
+    def _compile_unit(self, unit: _Unit, units: list[_Unit]) -> str:
+        instructions = self._unit_instructions(unit, units)
+        targets = set()
+        for index in instructions:
+            if self.operations[index] in (Operation.JUMP, Operation.JUMP_IF_FALSE):
+                target = self.operands[index]
+                # jumps into other units can't be compiled, and functions must return instead of reaching their end
+                if target != unit.end and target not in instructions:
+                    raise UncompilableBytecode()
+                targets.add(target)
+        if unit.arg_len is not None:
+            last = self.operations[instructions[-1]] if instructions else None
+            if unit.end in targets or last not in (Operation.RETURN, Operation.JUMP):
+                raise UncompilableBytecode()
+
+        # blocks start at jump targets, and are only needed when the unit jumps
+        blocks = {unit.start, *targets} - {unit.end} if targets - {unit.end} else set()
+        self.unit = unit
+        self.lines = unit.lines
+        self.stack: list[_Value] = []
+        self.temp_count = 0
+        # the main program starts with an empty `stack` list, which stays empty until values are moved to it
+        self.stack_list_empty = unit.arg_len is None
+
+        if unit.arg_len is None:
+            self.lines.append("def main(fields, stack, declared_functions, call, check_timeout):")
+        else:
+            self.lines.append(f"def {unit.name}(stack, fields, declared_functions, call, check_timeout):")
+            self.lines.append(f"    stack_start = len(stack) - {unit.arg_len}")
+        self.indent = 1
+        if any(self.operations[index] == Operation.JUMP and self.operands[index] <= index for index in instructions):
+            self._emit("backward_jumps = 0")
+        if blocks:
+            self._emit(f"block = {unit.start}")
+            self._emit("while True:")
+
+        for index in instructions:
+            if index in blocks:
+                if index != unit.start:
+                    self._flush()
+                    self._emit(f"block = {index}")
+                self._start_block(index)
+            self._compile_instruction(index)
+
+        self._flush()
+        self._emit_end()
+        return "\n".join(self.lines)
+
+    def _start_block(self, index: int):
+        self.indent = 2
+        self._emit(f"if block == {index}:")
+        self.indent = 3
+        self.stack_list_empty = False
+
+    def _emit(self, line: str):
+        self.lines.append("    " * self.indent + line)
+
+    def _temp(self, code: str) -> _Value:
+        name = f"t{self.temp_count}"
+        self.temp_count += 1
+        self._emit(f"{name} = {code}")
+        return _Value(code=name)
+
+    def _push(self, value: _Value):
+        self.stack.append(value)
+
+    def _pop(self) -> _Value:
+        if self.stack:
+            return self.stack.pop()
+        return self._temp("stack.pop()")
+
+    def _flush(self):
+        """Moves the values kept in variables to the `stack` list."""
+        if len(self.stack) == 1:
+            self._emit(f"stack.append({self.stack[0].code})")
+        elif self.stack:
+            self._emit(f"stack.extend(({', '.join(value.code for value in self.stack)}))")
+        if self.stack:
+            self.stack_list_empty = False
+        self.stack = []
+
+    def _local(self, operand: Any) -> str:
+        if not isinstance(operand, int):
+            raise UncompilableBytecode()
+        return f"stack[{operand}]" if self.unit.arg_len is None else f"stack[stack_start + {operand}]"
+
+    def _emit_end(self):
+        """Ends the main program, with the values left on the stack."""
+        if self.unit.arg_len is not None:
+            # functions are checked to return before their end
+            return
+        if self.stack_list_empty:
+            if len(self.stack) > 1:
+                self._emit('raise HogVMException("Invalid bytecode. More than one value left on stack")')
+            else:
+                self._emit(f"return {self.stack[0].code if self.stack else None}")
+            return
+        self._flush()
+        self._emit("if len(stack) > 1:")
+        self._emit('    raise HogVMException("Invalid bytecode. More than one value left on stack")')
+        self._emit("return stack.pop() if stack else None")
+
+    def _jump(self, target: int):
+        if target == self.unit.end:
+            self._emit_end()
+        else:
+            self._emit(f"block = {target}")
+            self._emit("continue")
+
+    def _compile_instruction(self, index: int):
+        symbol = self.operations[index]
+        operand = self.operands[index]
+
+        if symbol in CONSTANT_OPERATIONS:
+            self._push(self._constant(operand))
+        elif symbol == Operation.TRUE:
+            self._push(self._constant(True))
+        elif symbol == Operation.FALSE:
+            self._push(self._constant(False))
+        elif symbol == Operation.NULL:
+            self._push(self._constant(None))
+        elif symbol in BINARY_EXPRESSIONS:
+            a = self._pop()
+            b = self._pop()
+            self._push(self._temp(BINARY_EXPRESSIONS[symbol].format(a=a.code, b=b.code)))
+        elif symbol == Operation.NOT:
+            self._push(self._temp(f"not {self._pop().code}"))
+        elif symbol == Operation.AND or symbol == Operation.OR:
+            if not isinstance(operand, int):
+                raise UncompilableBytecode()
+            values = [self._pop().code for _ in range(operand)]
+            if not values:
+                self._push(self._constant(symbol == Operation.AND))
+            else:
+                joined = (" and " if symbol == Operation.AND else " or ").join(values)
+                self._push(self._temp(f"bool({joined})"))
+        elif symbol == Operation.FIELD:
+            if not isinstance(operand, int):
+                raise UncompilableBytecode()
+            self._push(self._temp(self._field([self._pop() for _ in range(operand)])))
+        elif symbol == Operation.POP:
+            if self.stack:
+                self.stack.pop()
+            else:
+                self._emit("stack.pop()")
+        elif symbol == Operation.RETURN:
+            value = self._pop()
+            if self.unit.arg_len is not None:
+                self._emit("del stack[stack_start:]")
+            self._emit(f"return {value.code}")
+            self.stack = []
+        elif symbol == Operation.GET_LOCAL:
+            self._flush()
+            self._push(self._temp(self._local(operand)))
+        elif symbol == Operation.SET_LOCAL:
+            value = self._pop()
+            self._flush()
+            self._emit(f"{self._local(operand)} = {value.code}")
+        elif symbol == Operation.JUMP:
+            self._flush()
+            if operand <= index:
+                self._emit("backward_jumps += 1")
+                self._emit("if (backward_jumps & 127) == 0:  # every 128th backward jump")
+                self._emit("    check_timeout()")
+            self._jump(operand)
+        elif symbol == Operation.JUMP_IF_FALSE:
+            condition = self._pop()
+            self._flush()
+            self._emit(f"if not {condition.code}:")
+            self.indent += 1
+            self._jump(operand)
+            self.indent -= 1
+        elif symbol == Operation.DECLARE_FN:
+            name, _, _ = operand
+            self._emit(f"declared_functions[{name!r}] = fn_{index}")
+        elif symbol == Operation.CALL:
+            self._call(operand)
+        elif symbol is None:
+            if self.unit.arg_len is not None:
+                # ends the whole program from within a function
+                raise UncompilableBytecode()
+            self._flush()
+            self._emit_end()
+        else:
+            self._emit(f'raise HogVMException("Unexpected node while running bytecode: {symbol}")')
+
+    def _field(self, chain: list[_Value]) -> str:
+        if not all(value.is_constant and type(value.constant) in (bool, int, str) for value in chain):
+            return f"get_nested_value(fields, ({''.join(value.code + ', ' for value in chain)}))"
+        # like `get_nested_value`, but without looping over the chain
+        accessors = "".join(
+            f"[{value.code}]" if isinstance(value.constant, int) else f".get({value.code}, None)" for value in chain
+        )
+        return f"None if fields is None else fields{accessors}"
+
+    def _call(self, operand: Any):
+        name, arg_count = operand
+        if not isinstance(name, str) or not isinstance(arg_count, int):
+            raise UncompilableBytecode()
+        self._emit("check_timeout()")
+        if name not in self.declared_names:
+            args = ", ".join(self._pop().code for _ in range(arg_count))
+            self._push(self._temp(f"call({name!r}, [{args}])"))
+            return
+
+        # declared functions read their arguments from the `stack` list
+        self._flush()
+        result = f"t{self.temp_count}"
+        self.temp_count += 1
+        self._emit(f"if {name!r} in declared_functions:")
+        self._emit(f"    {result} = declared_functions[{name!r}](")
+        self._emit("        stack, fields, declared_functions, call, check_timeout")
+        self._emit("    )")
+        self._emit("else:")
+        self._emit(f"    {result} = call({name!r}, [stack.pop() for _ in range({arg_count})])")
+        self._push(_Value(code=result))
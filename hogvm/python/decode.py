@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from hogvm.python.operation import Operation, HOGQL_BYTECODE_IDENTIFIER
+from hogvm.python.vm_utils import HogVMException
+
+# Decoded programs, keyed by their bytecode. The same filters are evaluated against many events.
+DECODE_CACHE_MAX_SIZE = 1024
+
+# Operations followed by a single operand. Jumps and function declarations and calls are decoded separately.
+OPERATIONS_WITH_OPERAND = {
+    Operation.STRING,
+    Operation.INTEGER,
+    Operation.FLOAT,
+    Operation.AND,
+    Operation.OR,
+    Operation.FIELD,
+    Operation.GET_LOCAL,
+    Operation.SET_LOCAL,
+}
+
+
+@dataclass(frozen=True)
+class Program:
+    """
+    Bytecode decoded into instructions, the operation of each in `operations` and its operand in `operands`.
+
+    Jumps are resolved from relative token counts to the index of the instruction they jump to, `CALL` operands are
+    `(name, arg count)` and `DECLARE_FN` operands `(name, arg count, index of the instruction after the body)`.
+    """
+
+    operations: list[Any]
+    operands: list[Any]
+
+
+def decode_bytecode(bytecode: list[Any]) -> Program:
+    try:
+        return _decode_bytecode_cached(tuple(bytecode))
+    except TypeError:
+        # unhashable constants can't be cached
+        return _decode_bytecode(bytecode)
+
+
+@lru_cache(maxsize=DECODE_CACHE_MAX_SIZE)
+def _decode_bytecode_cached(bytecode: tuple[Any, ...]) -> Program:
+    return _decode_bytecode(bytecode)
+
+
+def _decode_bytecode(bytecode: list[Any] | tuple[Any, ...]) -> Program:
+    if len(bytecode) == 0 or bytecode[0] != HOGQL_BYTECODE_IDENTIFIER:
+        raise HogVMException(f"Invalid bytecode. Must start with '{HOGQL_BYTECODE_IDENTIFIER}'")
+
+    operations: list[Any] = []
+    operands: list[Any] = []
+    # index of the token each instruction starts at -> index of the instruction, to resolve jumps with
+    instruction_indexes: dict[int, int] = {}
+    # (instruction index, index of the token the jump goes to), resolved once all instructions are known
+    jumps: list[tuple[int, int]] = []
+    token_count = len(bytecode)
+
+    def operand(index: int) -> Any:
+        # like when reading bytecode token by token, missing operands at the end of bytecode are None
+        return bytecode[index] if index < token_count else None
+
+    index = 1
+    while index < token_count:
+        symbol = bytecode[index]
+        instruction_indexes[index] = len(operations)
+        operations.append(symbol)
+
+        if symbol in OPERATIONS_WITH_OPERAND:
+            operands.append(operand(index + 1))
+            index += 2
+        elif symbol == Operation.JUMP or symbol == Operation.JUMP_IF_FALSE:
+            # counts are relative to the token after the count
+            jumps.append((len(operands), index + 2 + (operand(index + 1) or 0)))
+            operands.append(None)
+            index += 2
+        elif symbol == Operation.CALL:
+            operands.append((operand(index + 1), operand(index + 2)))
+            index += 3
+        elif symbol == Operation.DECLARE_FN:
+            name, arg_len, body_len = operand(index + 1), operand(index + 2), operand(index + 3)
+            jumps.append((len(operands), index + 4 + (body_len or 0)))
+            operands.append((name, arg_len))
+            index += 4
+        else:
+            operands.append(None)
+            index += 1
+
+    for instruction_index, target in jumps:
+        if target >= token_count:
+            # jumping past the end ends the program
+            target_index = len(operations)
+        elif target in instruction_indexes:
+            target_index = instruction_indexes[target]
+        else:
+            raise HogVMException(f"Invalid bytecode. Jump to token {target}, which is not an operation")
+
+        if operations[instruction_index] == Operation.DECLARE_FN:
+            operands[instruction_index] = (*operands[instruction_index], target_index)
+        else:
+            operands[instruction_index] = target_index
+
+    return Program(operations=operations, operands=operands)
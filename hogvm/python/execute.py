@@ -1,19 +1,18 @@
 import re
 from typing import Any, Optional
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 import time
 
-from hogvm.python.operation import Operation, HOGQL_BYTECODE_IDENTIFIER
-from hogvm.python.stl import STL
-from hogvm.python.vm_utils import HogVMException
+from hogvm.python.decode import Program, decode_bytecode
+from hogvm.python.operation import Operation
+from hogvm.python.stl import STL, PURE_FUNCTIONS
+from hogvm.python.vm_utils import HogVMException, compile_like, compile_regex
 from posthog.models import Team
 from dataclasses import dataclass
 
 
 def like(string, pattern, flags=0):
-    pattern = re.escape(pattern).replace("%", ".*")
-    re_pattern = re.compile(pattern, flags)
-    return re_pattern.search(string) is not None
+    return compile_like(pattern, flags).search(string) is not None
 
 
 def get_nested_value(obj, chain) -> Any:
@@ -34,6 +33,146 @@ class BytecodeResult:
     stdout: list[str]
 
 
+@dataclass
+class BatchBytecodeResult:
+    results: list[Any]
+    bytecode: list[Any]
+    stdout: list[str]
+
+
+CONSTANT_OPERATIONS = {
+    Operation.STRING,
+    Operation.INTEGER,
+    Operation.FLOAT,
+    Operation.TRUE,
+    Operation.FALSE,
+    Operation.NULL,
+}
+
+# Operations that only depend on the two values they pop
+BINARY_OPERATIONS = {
+    Operation.PLUS,
+    Operation.MINUS,
+    Operation.MULTIPLY,
+    Operation.DIVIDE,
+    Operation.MOD,
+    Operation.EQ,
+    Operation.NOT_EQ,
+    Operation.GT,
+    Operation.GT_EQ,
+    Operation.LT,
+    Operation.LT_EQ,
+    Operation.LIKE,
+    Operation.ILIKE,
+    Operation.NOT_LIKE,
+    Operation.NOT_ILIKE,
+    Operation.IN,
+    Operation.NOT_IN,
+    Operation.REGEX,
+    Operation.NOT_REGEX,
+    Operation.IREGEX,
+    Operation.NOT_IREGEX,
+}
+
+
+def hoist_constants(program: Program, functions: Optional[dict[str, Callable[..., Any]]] = None) -> Program:
+    """
+    Evaluates the expressions of a program that only depend on constants, e.g. `concat('a', 'b')` or `1 + 2`,
+    and replaces them with their result. Used when running a program many times, to evaluate those only once.
+
+    Expressions that fail are left as they are, so that they fail when the program is run. So are calls to functions
+    that have side effects, or that `functions` or the program itself (re)define.
+    """
+    operations = program.operations
+    operands = program.operands
+    declared_names = {operand[0] for symbol, operand in zip(operations, operands) if symbol == Operation.DECLARE_FN}
+
+    # instructions can jump here, so expressions can't span them
+    jump_targets = set()
+    for index, (symbol, operand) in enumerate(zip(operations, operands)):
+        if symbol == Operation.JUMP or symbol == Operation.JUMP_IF_FALSE:
+            jump_targets.add(operand)
+        elif symbol == Operation.DECLARE_FN:
+            jump_targets.update([index + 1, operand[2]])
+
+    new_operations: list[Any] = []
+    new_operands: list[Any] = []
+    new_indexes = list(range(len(operations) + 1))
+    constant_count = 0  # how many of the last new instructions push constants
+
+    for index, (symbol, operand) in enumerate(zip(operations, operands)):
+        new_indexes[index] = len(new_operations)
+        if index in jump_targets:
+            constant_count = 0
+
+        arg_count: Optional[int] = None
+        if symbol in BINARY_OPERATIONS:
+            arg_count = 2
+        elif symbol == Operation.NOT:
+            arg_count = 1
+        elif symbol == Operation.AND or symbol == Operation.OR:
+            arg_count = operand
+        elif (
+            symbol == Operation.CALL
+            and operand[0] in PURE_FUNCTIONS
+            and operand[0] not in declared_names
+            and (functions is None or operand[0] not in functions)
+        ):
+            arg_count = operand[1]
+
+        if isinstance(arg_count, int) and 0 <= arg_count <= constant_count:
+            start = len(new_operations) - arg_count
+            constant = _evaluate_constant(
+                Program(
+                    operations=[*new_operations[start:], symbol],
+                    operands=[*new_operands[start:], operand],
+                )
+            )
+            if constant is not None:
+                del new_operations[start:]
+                del new_operands[start:]
+                new_operations.append(constant[0])
+                new_operands.append(constant[1])
+                new_indexes[index] = start
+                constant_count = constant_count - arg_count + 1
+                continue
+
+        new_operations.append(symbol)
+        new_operands.append(operand)
+        constant_count = constant_count + 1 if symbol in CONSTANT_OPERATIONS else 0
+    new_indexes[len(operations)] = len(new_operations)
+
+    for index, (symbol, operand) in enumerate(zip(new_operations, new_operands)):
+        if symbol == Operation.JUMP or symbol == Operation.JUMP_IF_FALSE:
+            new_operands[index] = new_indexes[operand]
+        elif symbol == Operation.DECLARE_FN:
+            new_operands[index] = (operand[0], operand[1], new_indexes[operand[2]])
+
+    return Program(operations=new_operations, operands=new_operands)
+
+
+def _evaluate_constant(program: Program) -> Optional[tuple[Operation, Any]]:
+    """The instruction that pushes the result of a program without fields, or None if it can't be evaluated."""
+    try:
+        value = _run_program(program, None, None, 10, None, [], stack=[], call_stack=[], declared_functions={})
+    except Exception:
+        return None
+
+    if value is True:
+        return Operation.TRUE, None
+    if value is False:
+        return Operation.FALSE, None
+    if value is None:
+        return Operation.NULL, None
+    if isinstance(value, int):
+        return Operation.INTEGER, value
+    if isinstance(value, float):
+        return Operation.FLOAT, value
+    if isinstance(value, str):
+        return Operation.STRING, value
+    return None
+
+
 def execute_bytecode(
     bytecode: list[Any],
     fields: Optional[dict[str, Any]] = None,
@@ -41,159 +180,212 @@ def execute_bytecode(
     timeout=10,
     team: Team | None = None,
 ) -> BytecodeResult:
+    stdout: list[str] = []
     try:
-        start_time = time.time()
-        stack = []
-        call_stack: list[tuple[int, int, int]] = []  # (ip, stack_start, arg_len)
-        declared_functions: dict[str, tuple[int, int]] = {}
-        ip = -1
-        ops = 0
-        stdout: list[str] = []
-
-        def next_token():
-            nonlocal ip
-            if ip >= len(bytecode) - 1:
-                return None
-            ip += 1
-            return bytecode[ip]
-
-        if next_token() != HOGQL_BYTECODE_IDENTIFIER:
-            raise HogVMException(f"Invalid bytecode. Must start with '{HOGQL_BYTECODE_IDENTIFIER}'")
-
-        def check_timeout():
-            if time.time() - start_time > timeout:
-                raise HogVMException(f"Execution timed out after {timeout} seconds")
-
-        while True:
-            ops += 1
-            if (ops & 127) == 0:  # every 128th operation
-                check_timeout()
-            symbol = next_token()
-            match symbol:
-                case None:
-                    break
-                case Operation.STRING:
-                    stack.append(next_token())
-                case Operation.INTEGER:
-                    stack.append(next_token())
-                case Operation.FLOAT:
-                    stack.append(next_token())
-                case Operation.TRUE:
-                    stack.append(True)
-                case Operation.FALSE:
-                    stack.append(False)
-                case Operation.NULL:
-                    stack.append(None)
-                case Operation.NOT:
-                    stack.append(not stack.pop())
-                case Operation.AND:
-                    stack.append(all([stack.pop() for _ in range(next_token())]))  # noqa: C419
-                case Operation.OR:
-                    stack.append(any([stack.pop() for _ in range(next_token())]))  # noqa: C419
-                case Operation.PLUS:
-                    stack.append(stack.pop() + stack.pop())
-                case Operation.MINUS:
-                    stack.append(stack.pop() - stack.pop())
-                case Operation.DIVIDE:
-                    stack.append(stack.pop() / stack.pop())
-                case Operation.MULTIPLY:
-                    stack.append(stack.pop() * stack.pop())
-                case Operation.MOD:
-                    stack.append(stack.pop() % stack.pop())
-                case Operation.EQ:
-                    stack.append(stack.pop() == stack.pop())
-                case Operation.NOT_EQ:
-                    stack.append(stack.pop() != stack.pop())
-                case Operation.GT:
-                    stack.append(stack.pop() > stack.pop())
-                case Operation.GT_EQ:
-                    stack.append(stack.pop() >= stack.pop())
-                case Operation.LT:
-                    stack.append(stack.pop() < stack.pop())
-                case Operation.LT_EQ:
-                    stack.append(stack.pop() <= stack.pop())
-                case Operation.LIKE:
-                    stack.append(like(stack.pop(), stack.pop()))
-                case Operation.ILIKE:
-                    stack.append(like(stack.pop(), stack.pop(), re.IGNORECASE))
-                case Operation.NOT_LIKE:
-                    stack.append(not like(stack.pop(), stack.pop()))
-                case Operation.NOT_ILIKE:
-                    stack.append(not like(stack.pop(), stack.pop(), re.IGNORECASE))
-                case Operation.IN:
-                    stack.append(stack.pop() in stack.pop())
-                case Operation.NOT_IN:
-                    stack.append(stack.pop() not in stack.pop())
-                case Operation.REGEX:
-                    args = [stack.pop(), stack.pop()]
-                    stack.append(bool(re.search(re.compile(args[1]), args[0])))
-                case Operation.NOT_REGEX:
-                    args = [stack.pop(), stack.pop()]
-                    stack.append(not bool(re.search(re.compile(args[1]), args[0])))
-                case Operation.IREGEX:
-                    args = [stack.pop(), stack.pop()]
-                    stack.append(bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0])))
-                case Operation.NOT_IREGEX:
-                    args = [stack.pop(), stack.pop()]
-                    stack.append(not bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0])))
-                case Operation.FIELD:
-                    chain = [stack.pop() for _ in range(next_token())]
-                    stack.append(get_nested_value(fields, chain))
-                case Operation.POP:
-                    stack.pop()
-                case Operation.RETURN:
-                    if call_stack:
-                        ip, stack_start, arg_len = call_stack.pop()
-                        response = stack.pop()
-                        stack = stack[0:stack_start]
-                        stack.append(response)
-                    else:
-                        return BytecodeResult(result=stack.pop(), stdout=stdout, bytecode=bytecode)
-                case Operation.GET_LOCAL:
-                    stack_start = 0 if not call_stack else call_stack[-1][1]
-                    stack.append(stack[next_token() + stack_start])
-                case Operation.SET_LOCAL:
-                    stack_start = 0 if not call_stack else call_stack[-1][1]
-                    stack[next_token() + stack_start] = stack.pop()
-                case Operation.JUMP:
-                    count = next_token()
-                    ip += count
-                case Operation.JUMP_IF_FALSE:
-                    count = next_token()
-                    if not stack.pop():
-                        ip += count
-                case Operation.DECLARE_FN:
-                    name = next_token()
-                    arg_len = next_token()
-                    body_len = next_token()
-                    declared_functions[name] = (ip, arg_len)
-                    ip += body_len
-                case Operation.CALL:
-                    check_timeout()
-                    name = next_token()
-                    if name in declared_functions:
-                        func_ip, arg_len = declared_functions[name]
-                        call_stack.append((ip + 1, len(stack) - arg_len, arg_len))
-                        ip = func_ip
-                    else:
-                        args = [stack.pop() for _ in range(next_token())]
-
-                        if functions is not None and name in functions:
-                            stack.append(functions[name](*args))
-                            continue
-
-                        if name not in STL:
-                            raise HogVMException(f"Unsupported function call: {name}")
-
-                        stack.append(STL[name](name, args, team, stdout, timeout))
-                case _:
-                    raise HogVMException(f"Unexpected node while running bytecode: {symbol}")
-
-        if len(stack) > 1:
-            raise HogVMException("Invalid bytecode. More than one value left on stack")
-        result = None
-        if len(stack) == 1:
-            result = stack.pop()
-        return BytecodeResult(result=result, stdout=stdout, bytecode=bytecode)
+        result = _run_program(
+            decode_bytecode(bytecode),
+            fields,
+            functions,
+            timeout,
+            team,
+            stdout,
+            stack=[],
+            call_stack=[],
+            declared_functions={},
+        )
+    except IndexError:
+        raise HogVMException("Unexpected end of bytecode")
+    return BytecodeResult(result=result, stdout=stdout, bytecode=bytecode)
+
+
+def execute_bytecode_batch(
+    bytecode: list[Any],
+    records: Iterable[Optional[dict[str, Any]]],
+    functions: Optional[dict[str, Callable[..., Any]]] = None,
+    timeout=10,
+    team: Team | None = None,
+) -> BatchBytecodeResult:
+    """
+    Runs the bytecode with each of the records as its `fields`, and returns the results in the same order.
+
+    `records` can be any iterable of dicts, or a columnar batch that converts to them with `to_pylist`, like a pyarrow
+    RecordBatch or Table. The program is decoded and its constant expressions are evaluated once for the whole batch,
+    and the stacks are reused between records. The timeout applies to each record.
+    """
+    if hasattr(records, "to_pylist"):
+        records = records.to_pylist()
+
+    program = hoist_constants(decode_bytecode(bytecode), functions)
+    stdout: list[str] = []
+    stack: list[Any] = []
+    call_stack: list[tuple[int, int, int]] = []
+    declared_functions: dict[str, tuple[int, int]] = {}
+    results = []
+    try:
+        for fields in records:
+            stack.clear()
+            call_stack.clear()
+            declared_functions.clear()
+            results.append(
+                _run_program(program, fields, functions, timeout, team, stdout, stack, call_stack, declared_functions)
+            )
     except IndexError:
         raise HogVMException("Unexpected end of bytecode")
+    return BatchBytecodeResult(results=results, stdout=stdout, bytecode=bytecode)
+
+
+def _run_program(
+    program: Program,
+    fields: Optional[dict[str, Any]],
+    functions: Optional[dict[str, Callable[..., Any]]],
+    timeout: float,
+    team: Team | None,
+    stdout: list[str],
+    stack: list[Any],
+    call_stack: list[tuple[int, int, int]],  # (ip, stack_start, arg_len)
+    declared_functions: dict[str, tuple[int, int]],
+) -> Any:
+    """Runs a program with empty stacks, and returns its result. Raises IndexError if the bytecode ends too early."""
+    start_time = time.time()
+    operations = program.operations
+    operands = program.operands
+    instruction_count = len(operations)
+    stack_start = 0  # where the locals of the function being run start
+    ip = 0
+    backward_jumps = 0
+
+    def check_timeout():
+        if time.time() - start_time > timeout:
+            raise HogVMException(f"Execution timed out after {timeout} seconds")
+
+    # Without jumping back or calling functions, a program runs each of its instructions at most once. So it's
+    # enough to check the timeout on calls and every 128th backward jump.
+    while ip < instruction_count:
+        symbol = operations[ip]
+        operand = operands[ip]
+        ip += 1
+        match symbol:
+            case None:
+                break
+            case Operation.STRING:
+                stack.append(operand)
+            case Operation.INTEGER:
+                stack.append(operand)
+            case Operation.FLOAT:
+                stack.append(operand)
+            case Operation.TRUE:
+                stack.append(True)
+            case Operation.FALSE:
+                stack.append(False)
+            case Operation.NULL:
+                stack.append(None)
+            case Operation.NOT:
+                stack.append(not stack.pop())
+            case Operation.AND:
+                stack.append(all([stack.pop() for _ in range(operand)]))  # noqa: C419
+            case Operation.OR:
+                stack.append(any([stack.pop() for _ in range(operand)]))  # noqa: C419
+            case Operation.PLUS:
+                stack.append(stack.pop() + stack.pop())
+            case Operation.MINUS:
+                stack.append(stack.pop() - stack.pop())
+            case Operation.DIVIDE:
+                stack.append(stack.pop() / stack.pop())
+            case Operation.MULTIPLY:
+                stack.append(stack.pop() * stack.pop())
+            case Operation.MOD:
+                stack.append(stack.pop() % stack.pop())
+            case Operation.EQ:
+                stack.append(stack.pop() == stack.pop())
+            case Operation.NOT_EQ:
+                stack.append(stack.pop() != stack.pop())
+            case Operation.GT:
+                stack.append(stack.pop() > stack.pop())
+            case Operation.GT_EQ:
+                stack.append(stack.pop() >= stack.pop())
+            case Operation.LT:
+                stack.append(stack.pop() < stack.pop())
+            case Operation.LT_EQ:
+                stack.append(stack.pop() <= stack.pop())
+            case Operation.LIKE:
+                stack.append(like(stack.pop(), stack.pop()))
+            case Operation.ILIKE:
+                stack.append(like(stack.pop(), stack.pop(), re.IGNORECASE))
+            case Operation.NOT_LIKE:
+                stack.append(not like(stack.pop(), stack.pop()))
+            case Operation.NOT_ILIKE:
+                stack.append(not like(stack.pop(), stack.pop(), re.IGNORECASE))
+            case Operation.IN:
+                stack.append(stack.pop() in stack.pop())
+            case Operation.NOT_IN:
+                stack.append(stack.pop() not in stack.pop())
+            case Operation.REGEX:
+                args = [stack.pop(), stack.pop()]
+                stack.append(bool(compile_regex(args[1]).search(args[0])))
+            case Operation.NOT_REGEX:
+                args = [stack.pop(), stack.pop()]
+                stack.append(not bool(compile_regex(args[1]).search(args[0])))
+            case Operation.IREGEX:
+                args = [stack.pop(), stack.pop()]
+                stack.append(bool(compile_regex(args[1], re.RegexFlag.IGNORECASE).search(args[0])))
+            case Operation.NOT_IREGEX:
+                args = [stack.pop(), stack.pop()]
+                stack.append(not bool(compile_regex(args[1], re.RegexFlag.IGNORECASE).search(args[0])))
+            case Operation.FIELD:
+                chain = [stack.pop() for _ in range(operand)]
+                stack.append(get_nested_value(fields, chain))
+            case Operation.POP:
+                stack.pop()
+            case Operation.RETURN:
+                if call_stack:
+                    ip, stack_start, arg_len = call_stack.pop()
+                    response = stack.pop()
+                    del stack[stack_start:]
+                    stack.append(response)
+                    stack_start = call_stack[-1][1] if call_stack else 0
+                else:
+                    return stack.pop()
+            case Operation.GET_LOCAL:
+                stack.append(stack[operand + stack_start])
+            case Operation.SET_LOCAL:
+                stack[operand + stack_start] = stack.pop()
+            case Operation.JUMP:
+                if operand < ip:
+                    backward_jumps += 1
+                    if (backward_jumps & 127) == 0:  # every 128th backward jump
+                        check_timeout()
+                ip = operand
+            case Operation.JUMP_IF_FALSE:
+                if not stack.pop():
+                    ip = operand
+            case Operation.DECLARE_FN:
+                name, arg_len, end = operand
+                declared_functions[name] = (ip, arg_len)
+                ip = end
+            case Operation.CALL:
+                check_timeout()
+                name, arg_count = operand
+                if name in declared_functions:
+                    func_ip, arg_len = declared_functions[name]
+                    stack_start = len(stack) - arg_len
+                    call_stack.append((ip, stack_start, arg_len))
+                    ip = func_ip
+                else:
+                    args = [stack.pop() for _ in range(arg_count)]
+
+                    if functions is not None and name in functions:
+                        stack.append(functions[name](*args))
+                        continue
+
+                    if name not in STL:
+                        raise HogVMException(f"Unsupported function call: {name}")
+
+                    stack.append(STL[name](name, args, team, stdout, timeout))
+            case _:
+                raise HogVMException(f"Unexpected node while running bytecode: {symbol}")
+
+    if len(stack) > 1:
+        raise HogVMException("Invalid bytecode. More than one value left on stack")
+    if len(stack) == 1:
+        return stack.pop()
+    return None
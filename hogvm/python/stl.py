@@ -1,8 +1,8 @@
 import time
 from typing import Any, Optional
 from collections.abc import Callable
-import re
 
+from hogvm.python.vm_utils import compile_regex
 from posthog.hogql.query import execute_hogql_query
 from posthog.models import Team
 
@@ -21,7 +21,7 @@ def concat(name: str, args: list[Any], team: Optional[Team], stdout: Optional[li
 
 
 def match(name: str, args: list[Any], team: Optional[Team], stdout: Optional[list[str]], timeout: int):
-    return bool(re.search(re.compile(args[1]), args[0]))
+    return bool(compile_regex(args[1]).search(args[0]))
 
 
 def toString(name: str, args: list[Any], team: Optional[Team], stdout: Optional[list[str]], timeout: int):
@@ -109,3 +109,20 @@ STL: dict[str, Callable[[str, list[Any], Team | None, list[str] | None, int], An
     "print": print,
     "run": run,
 }
+
+# Functions without side effects, whose results only depend on their arguments
+PURE_FUNCTIONS = {
+    "concat",
+    "match",
+    "toString",
+    "toUUID",
+    "toInt",
+    "toFloat",
+    "ifNull",
+    "length",
+    "empty",
+    "notEmpty",
+    "lower",
+    "upper",
+    "reverse",
+}
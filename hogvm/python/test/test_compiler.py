@@ -0,0 +1,127 @@
+from typing import Any, Optional
+from collections.abc import Callable
+
+from django.test import SimpleTestCase
+
+from hogvm.python.compiler import compile_bytecode, execute_compiled_bytecode
+from hogvm.python.execute import execute_bytecode
+from hogvm.python.operation import Operation as op, HOGQL_BYTECODE_IDENTIFIER as _H
+from hogvm.python.test.test_execute import BytecodeExecuteTests
+from hogvm.python.vm_utils import HogVMException
+from posthog.hogql.bytecode import create_bytecode
+from posthog.hogql.parser import parse_expr, parse_program
+
+
+class TestCompiledBytecodeExecute(BytecodeExecuteTests, SimpleTestCase):
+    # the interpreter tests, with the bytecode compiled
+
+    def _run(self, expr: str) -> Any:
+        fields = {
+            "properties": {"foo": "bar", "nullValue": None},
+        }
+        bytecode = create_bytecode(parse_expr(expr))
+        assert compile_bytecode(bytecode) is not None
+        return execute_compiled_bytecode(bytecode, fields).result
+
+    def _run_program(self, code: str, functions: Optional[dict[str, Callable[..., Any]]] = None) -> Any:
+        fields = {
+            "properties": {"foo": "bar", "nullValue": None},
+        }
+        program = parse_program(code)
+        bytecode = create_bytecode(program, supported_functions=set(functions.keys()) if functions else None)
+        return execute_compiled_bytecode(bytecode, fields, functions).result
+
+
+class TestCompileBytecode(SimpleTestCase):
+    def assertSameResult(self, bytecode: list[Any], fields: Optional[dict[str, Any]] = None):
+        assert compile_bytecode(bytecode) is not None
+        self.assertEqual(
+            execute_compiled_bytecode(bytecode, fields).result,
+            execute_bytecode(bytecode, fields).result,
+        )
+
+    def test_expressions(self):
+        fields = {"properties": {"a": "abc", "b": 2}}
+        # properties.a ilike '%B%' and properties.b > 1
+        self.assertSameResult(
+            [
+                _H,
+                op.STRING,
+                "%B%",
+                op.STRING,
+                "a",
+                op.STRING,
+                "properties",
+                op.FIELD,
+                2,
+                op.ILIKE,
+                op.INTEGER,
+                1,
+                op.STRING,
+                "b",
+                op.STRING,
+                "properties",
+                op.FIELD,
+                2,
+                op.GT,
+                op.AND,
+                2,
+            ],
+            fields,
+        )
+        self.assertSameResult([_H, op.STRING, "y", op.STRING, "x", op.CALL, "concat", 2], fields)
+        self.assertSameResult([_H, op.STRING, "c", op.STRING, "properties", op.FIELD, 2], fields)
+        self.assertSameResult([_H, op.STRING, "c", op.STRING, "properties", op.FIELD, 2], None)
+
+    def test_jumps_and_locals(self):
+        # let i := 0; while (i < 10) { i := i + 1 } return i
+        bytecode = [
+            _H,
+            op.INTEGER,
+            0,
+            op.INTEGER,
+            10,
+            op.GET_LOCAL,
+            0,
+            op.LT,
+            op.JUMP_IF_FALSE,
+            9,
+            op.INTEGER,
+            1,
+            op.GET_LOCAL,
+            0,
+            op.PLUS,
+            op.SET_LOCAL,
+            0,
+            op.JUMP,
+            -16,
+            op.GET_LOCAL,
+            0,
+            op.RETURN,
+        ]
+        self.assertSameResult(bytecode)
+        self.assertEqual(execute_compiled_bytecode(bytecode).result, 10)
+
+    def test_errors(self):
+        with self.assertRaises(HogVMException) as e:
+            execute_compiled_bytecode([_H, op.TRUE, op.TRUE, op.NOT], {})
+        self.assertEqual(str(e.exception), "Invalid bytecode. More than one value left on stack")
+
+        with self.assertRaises(HogVMException) as e:
+            execute_compiled_bytecode([_H, op.PLUS], {})
+        self.assertEqual(str(e.exception), "Unexpected end of bytecode")
+
+        with self.assertRaises(HogVMException) as e:
+            execute_compiled_bytecode([_H, op.CALL, "notAFunction", 0], {})
+        self.assertEqual(str(e.exception), "Unsupported function call: notAFunction")
+
+        # while (true) {}
+        with self.assertRaises(HogVMException) as e:
+            execute_compiled_bytecode([_H, op.TRUE, op.JUMP_IF_FALSE, 2, op.JUMP, -5], {}, timeout=0.1)
+        self.assertEqual(str(e.exception), "Execution timed out after 0.1 seconds")
+
+    def test_falls_back_to_the_interpreter(self):
+        # the body of `f` doesn't return, so calling it goes on with the code after its declaration
+        bytecode = [_H, op.DECLARE_FN, "f", 0, 1, op.NULL, op.INTEGER, 1, op.RETURN]
+        assert compile_bytecode(bytecode) is None
+        self.assertEqual(execute_compiled_bytecode(bytecode).result, 1)
@@ -0,0 +1,71 @@
+from django.test import SimpleTestCase
+
+from hogvm.python.decode import Program, decode_bytecode
+from hogvm.python.operation import Operation as op, HOGQL_BYTECODE_IDENTIFIER as _H
+from hogvm.python.vm_utils import HogVMException, compile_like, compile_regex
+
+
+class TestDecodeBytecode(SimpleTestCase):
+    def test_decodes_operands(self):
+        program = decode_bytecode([_H, op.STRING, "bla", op.STRING, "properties", op.FIELD, 2, op.TRUE, op.AND, 2])
+
+        assert program.operations == [op.STRING, op.STRING, op.FIELD, op.TRUE, op.AND]
+        assert program.operands == ["bla", "properties", 2, None, 2]
+
+    def test_resolves_jumps_to_instructions(self):
+        # if (true) { 1 } else { 2 }
+        program = decode_bytecode([_H, op.TRUE, op.JUMP_IF_FALSE, 4, op.INTEGER, 1, op.JUMP, 2, op.INTEGER, 2])
+
+        assert program.operations == [op.TRUE, op.JUMP_IF_FALSE, op.INTEGER, op.JUMP, op.INTEGER]
+        assert program.operands == [None, 4, 1, 5, 2]
+
+    def test_resolves_functions(self):
+        program = decode_bytecode(
+            [
+                _H,
+                op.DECLARE_FN,
+                "add",
+                2,
+                6,
+                op.GET_LOCAL,
+                0,
+                op.GET_LOCAL,
+                1,
+                op.PLUS,
+                op.RETURN,
+                op.INTEGER,
+                4,
+                op.INTEGER,
+                3,
+                op.CALL,
+                "add",
+                2,
+                op.RETURN,
+            ]
+        )
+
+        assert program.operands[0] == ("add", 2, 5)
+        assert program.operations[5:] == [op.INTEGER, op.INTEGER, op.CALL, op.RETURN]
+        assert program.operands[7] == ("add", 2)
+
+    def test_caches_decoded_programs(self):
+        bytecode = [_H, op.INTEGER, 2, op.INTEGER, 1, op.PLUS]
+
+        assert decode_bytecode(bytecode) is decode_bytecode(list(bytecode))
+        assert decode_bytecode(bytecode) == Program(operations=[op.INTEGER, op.INTEGER, op.PLUS], operands=[2, 1, None])
+
+    def test_errors(self):
+        with self.assertRaises(HogVMException) as e:
+            decode_bytecode([op.TRUE])
+        self.assertEqual(str(e.exception), "Invalid bytecode. Must start with '_h'")
+
+        with self.assertRaises(HogVMException) as e:
+            decode_bytecode([_H, op.JUMP, 1, op.STRING, "a"])
+        self.assertEqual(str(e.exception), "Invalid bytecode. Jump to token 4, which is not an operation")
+
+    def test_caches_compiled_patterns(self):
+        assert compile_regex("^e.*") is compile_regex("^e.*")
+        assert compile_like("%a%", 0) is compile_like("%a%", 0)
+        assert compile_like("%A%", 0) is not compile_like("%A%", 2)
+        assert compile_like("b.%").search("b.aa") is not None
+        assert compile_like("b.%").search("bxaa") is None
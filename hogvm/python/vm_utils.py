@@ -1,2 +1,19 @@
+import re
+from functools import lru_cache
+
+# Compiled regex and LIKE patterns. Patterns are almost always constants, so the same ones are compiled over and over.
+PATTERN_CACHE_MAX_SIZE = 1024
+
+
 class HogVMException(Exception):
     pass
+
+
+@lru_cache(maxsize=PATTERN_CACHE_MAX_SIZE)
+def compile_regex(pattern: str, flags: int = 0) -> re.Pattern:
+    return re.compile(pattern, flags)
+
+
+@lru_cache(maxsize=PATTERN_CACHE_MAX_SIZE)
+def compile_like(pattern: str, flags: int = 0) -> re.Pattern:
+    return re.compile(re.escape(pattern).replace("%", ".*"), flags)
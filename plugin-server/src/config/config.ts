@@ -158,6 +158,7 @@ export function getDefaultConfig(): PluginsServerConfig {
         SESSION_RECORDING_MAX_BUFFER_SIZE_KB: 1024 * 50, // 50MB
         SESSION_RECORDING_REMOTE_FOLDER: 'session_recordings',
         SESSION_RECORDING_REDIS_PREFIX: '@posthog/replay/',
+        SESSION_RECORDING_REALTIME_COMPRESSION: false,
         SESSION_RECORDING_PARTITION_REVOKE_OPTIMIZATION: false,
         SESSION_RECORDING_PARALLEL_CONSUMPTION: false,
         POSTHOG_SESSION_RECORDING_REDIS_HOST: undefined,
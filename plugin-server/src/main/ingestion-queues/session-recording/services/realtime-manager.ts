@@ -2,6 +2,7 @@ import { captureException } from '@sentry/node'
 import { randomUUID } from 'crypto'
 import { Redis } from 'ioredis'
 import { EventEmitter } from 'node:events'
+import { gzipSync } from 'zlib'
 
 import { PluginsServerConfig, RedisPool } from '../../../../types'
 import { timeoutGuard } from '../../../../utils/db/utils'
@@ -94,9 +95,10 @@ export class RealtimeManager extends EventEmitter {
         const key = Keys.snapshots(this.serverConfig.SESSION_RECORDING_REDIS_PREFIX, teamId, sesssionId)
 
         try {
+            const member = this.serverConfig.SESSION_RECORDING_REALTIME_COMPRESSION ? gzipSync(messages) : messages
             await this.run(`addMessage ${key} `, async (client) => {
                 const pipeline = client.pipeline()
-                pipeline.zadd(key, timestamp, messages)
+                pipeline.zadd(key, timestamp, member)
                 pipeline.expire(key, this.ttlSeconds)
                 return pipeline.exec()
             })
@@ -228,6 +228,8 @@ export interface PluginsServerConfig {
     SESSION_RECORDING_BUFFER_AGE_JITTER: number
     SESSION_RECORDING_REMOTE_FOLDER: string
     SESSION_RECORDING_REDIS_PREFIX: string
+    // gzip the snapshots synced to Redis for realtime playback, which the API decompresses when reading them
+    SESSION_RECORDING_REALTIME_COMPRESSION: boolean
     SESSION_RECORDING_PARTITION_REVOKE_OPTIMIZATION: boolean
     SESSION_RECORDING_PARALLEL_CONSUMPTION: boolean
     SESSION_RECORDING_CONSOLE_LOGS_INGESTION_ENABLED: boolean
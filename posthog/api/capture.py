@@ -1,12 +1,19 @@
-import json
+import asyncio
 import re
 import structlog
 import time
 from collections.abc import Iterator
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from aiokafka.errors import (
+    KafkaError as AIOKafkaError,
+    KafkaTimeoutError as AIOKafkaTimeoutError,
+    MessageSizeTooLargeError as AIOKafkaMessageSizeTooLargeError,
+)
+from asgiref.sync import sync_to_async
 from dateutil import parser
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from enum import Enum
@@ -24,7 +31,8 @@ from ee.billing.quota_limiting import QuotaLimitingCaches
 from posthog.api.utils import get_data, get_token, safe_clickhouse_string
 from posthog.cache_utils import cache_for
 from posthog.exceptions import generate_exception_response
-from posthog.kafka_client.client import KafkaProducer, sessionRecordingKafkaProducer
+from posthog.kafka_client.async_client import asyncKafkaProducer, asyncSessionRecordingKafkaProducer
+from posthog.kafka_client.client import KafkaProducer, json_dumps, sessionRecordingKafkaProducer
 from posthog.kafka_client.topics import (
     KAFKA_EVENTS_PLUGIN_INGESTION_HISTORICAL,
     KAFKA_SESSION_RECORDING_EVENTS,
@@ -97,6 +105,15 @@ OVERFLOWING_KEYS_LOADED_GAUGE = Gauge(
     labelnames=[LABEL_RESOURCE_TYPE],
 )
 
+PRODUCE_FAILURE_MESSAGE = (
+    "Unable to store event. Please try again. "
+    "If you are the owner of this app you can check the logs for further details."
+)
+ACK_FAILURE_MESSAGE = (
+    "Unable to store some events. Please try again. "
+    "If you are the owner of this app you can check the logs for further details."
+)
+
 # This is a heuristic of ids we have seen used as anonymous. As they frequently
 # have significantly more traffic than non-anonymous distinct_ids, and likely
 # don't refer to the same underlying person we prefer to partition them randomly
@@ -147,7 +164,8 @@ def build_kafka_event_data(
         "distinct_id": safe_clickhouse_string(distinct_id),
         "ip": safe_clickhouse_string(ip) if ip else ip,
         "site_url": safe_clickhouse_string(site_url),
-        "data": json.dumps(data),
+        # The event is a JSON string within the envelope, encoded with the same serializer as the envelope itself
+        "data": json_dumps(data).decode("utf-8"),
         "now": now.isoformat(),
         "sent_at": sent_at.isoformat() if sent_at else "",
         "token": token,
@@ -202,6 +220,55 @@ def log_event(
         raise e
 
 
+@dataclass
+class CaptureMessage:
+    """An event as it is produced to Kafka, see `build_capture_message`."""
+
+    data: dict
+    event_name: str
+    partition_key: Optional[str]
+    headers: Optional[list] = None
+    historical: bool = False
+    overflowing: bool = False
+
+
+def log_capture_message(message: CaptureMessage) -> FutureRecordMetadata:
+    return log_event(
+        message.data,
+        message.event_name,
+        partition_key=message.partition_key,
+        headers=message.headers,
+        historical=message.historical,
+        overflowing=message.overflowing,
+    )
+
+
+async def async_log_capture_message(message: CaptureMessage) -> asyncio.Future:
+    """`log_capture_message` for the asyncio producer.
+
+    Returns as soon as the message is batched, await the returned future for its ack.
+    """
+    kafka_topic = _kafka_topic(message.event_name, historical=message.historical, overflowing=message.overflowing)
+
+    logger.debug("logging_event", event_name=message.event_name, kafka_topic=kafka_topic)
+
+    try:
+        if message.event_name in SESSION_RECORDING_DEDICATED_KAFKA_EVENTS:
+            producer = asyncSessionRecordingKafkaProducer()
+        else:
+            producer = asyncKafkaProducer()
+
+        future = await producer.produce(
+            topic=kafka_topic, data=message.data, key=message.partition_key, headers=message.headers
+        )
+        statsd.incr("posthog_cloud_plugin_server_ingestion")
+        return future
+    except Exception as e:
+        statsd.incr("capture_endpoint_log_event_error")
+        logger.exception("Failed to produce event to Kafka topic %s with error", kafka_topic)
+        raise e
+
+
 def _datetime_from_seconds_or_millis(timestamp: str) -> datetime:
     if len(timestamp) > 11:  # assuming milliseconds / update "11" to "12" if year > 5138 (set a reminder!)
         timestamp_number = float(timestamp) / 1000
@@ -325,32 +392,40 @@ def lib_version_from_query_params(request) -> str:
     return request.GET.get("ver", "unknown")
 
 
-@csrf_exempt
-@timed("posthog_cloud_event_endpoint")
-def get_event(request):
-    structlog.contextvars.unbind_contextvars("team_id")
+@dataclass
+class _CaptureRequest:
+    """A parsed capture request, with its events ready to be produced, see `_parse_capture_request`."""
 
-    # handle cors request
-    if request.method == "OPTIONS":
-        return cors_response(request, JsonResponse({"status": 1}))
+    data: Any
+    token: str
+    now: datetime
+    sent_at: Optional[datetime]
+    historical: bool
+    site_url: str
+    ip: Optional[str]
+    lib_version: str
+    processed_events: list[tuple[dict[str, Any], UUIDT, str]]
+    replay_events: list[Any]
 
+
+def _parse_capture_request(request) -> tuple[Optional[_CaptureRequest], Optional[HttpResponse]]:
     now = timezone.now()
 
     data, error_response = get_data(request)
 
     if error_response:
-        return error_response
+        return None, error_response
 
     sent_at, error_response = _get_sent_at(data, request)
 
     if error_response:
-        return error_response
+        return None, error_response
 
     with start_span(op="request.authenticate"):
         token = get_token(data, request)
 
         if not token:
-            return cors_response(
+            return None, cors_response(
                 request,
                 generate_exception_response(
                     "capture",
@@ -375,7 +450,7 @@ def get_event(request):
         if invalid_token_reason:
             TOKEN_SHAPE_INVALID_COUNTER.labels(reason=invalid_token_reason).inc()
             logger.warning("capture_token_shape_invalid", token=token, reason=invalid_token_reason)
-            return cors_response(
+            return None, cors_response(
                 request,
                 generate_exception_response(
                     "capture",
@@ -411,7 +486,7 @@ def get_event(request):
             events = [data]
 
         if not all(data):  # Check that all items are truthy (not null, not empty dict)
-            return cors_response(
+            return None, cors_response(
                 request,
                 generate_exception_response(
                     "capture", f"Invalid payload: some events are null", code="invalid_payload"
@@ -435,7 +510,7 @@ def get_event(request):
             events = other_events
 
         except ValueError as e:
-            return cors_response(
+            return None, cors_response(
                 request,
                 generate_exception_response("capture", f"Invalid payload: {e}", code="invalid_payload"),
             )
@@ -447,36 +522,129 @@ def get_event(request):
         try:
             processed_events = list(preprocess_events(events))
         except ValueError as e:
-            return cors_response(
+            return None, cors_response(
                 request,
                 generate_exception_response("capture", f"Invalid payload: {e}", code="invalid_payload"),
             )
 
+    return (
+        _CaptureRequest(
+            data=data,
+            token=token,
+            now=now,
+            sent_at=sent_at,
+            historical=historical,
+            site_url=site_url,
+            ip=ip,
+            lib_version=lib_version_from_query_params(request),
+            processed_events=processed_events,
+            replay_events=replay_events,
+        ),
+        None,
+    )
+
+
+def _preprocess_replay_events(capture_request: _CaptureRequest) -> list[tuple[dict[str, Any], UUIDT, str]]:
+    if not capture_request.replay_events:
+        return []
+
+    alternative_replay_events = preprocess_replay_events_for_blob_ingestion(
+        capture_request.replay_events, settings.SESSION_RECORDING_KAFKA_MAX_REQUEST_SIZE_BYTES
+    )
+    if not alternative_replay_events:
+        return []
+
+    return list(preprocess_events(alternative_replay_events))
+
+
+def _capture_messages(capture_request: _CaptureRequest) -> list[CaptureMessage]:
+    return [
+        build_capture_message(
+            event,
+            distinct_id,
+            capture_request.ip,
+            capture_request.site_url,
+            capture_request.now,
+            capture_request.sent_at,
+            event_uuid,
+            capture_request.token,
+            historical=capture_request.historical,
+        )
+        for event, event_uuid, distinct_id in capture_request.processed_events
+    ]
+
+
+def _replay_capture_messages(capture_request: _CaptureRequest) -> list[CaptureMessage]:
+    return [
+        build_capture_message(
+            event,
+            distinct_id,
+            capture_request.ip,
+            capture_request.site_url,
+            capture_request.now,
+            capture_request.sent_at,
+            event_uuid,
+            capture_request.token,
+            extra_headers=[("lib_version", capture_request.lib_version)],
+        )
+        for event, event_uuid, distinct_id in _preprocess_replay_events(capture_request)
+    ]
+
+
+def _produce_failure_response(request, message: str) -> HttpResponse:
+    return cors_response(
+        request,
+        generate_exception_response(
+            "capture",
+            message,
+            code="server_error",
+            type="server_error",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        ),
+    )
+
+
+@csrf_exempt
+@timed("posthog_cloud_event_endpoint")
+def get_event(request):
+    structlog.contextvars.unbind_contextvars("team_id")
+
+    # handle cors request
+    if request.method == "OPTIONS":
+        return cors_response(request, JsonResponse({"status": 1}))
+
+    capture_request, error_response = _parse_capture_request(request)
+
+    if error_response:
+        return error_response
+
+    assert capture_request is not None
+    data = capture_request.data
+
     futures: list[FutureRecordMetadata] = []
 
     with start_span(op="kafka.produce") as span:
-        span.set_tag("event.count", len(processed_events))
-        for event, event_uuid, distinct_id in processed_events:
+        span.set_tag("event.count", len(capture_request.processed_events))
+        for event, event_uuid, distinct_id in capture_request.processed_events:
             try:
                 futures.append(
                     capture_internal(
-                        event, distinct_id, ip, site_url, now, sent_at, event_uuid, token, historical=historical
+                        event,
+                        distinct_id,
+                        capture_request.ip,
+                        capture_request.site_url,
+                        capture_request.now,
+                        capture_request.sent_at,
+                        event_uuid,
+                        capture_request.token,
+                        historical=capture_request.historical,
                     )
                 )
             except Exception as exc:
                 capture_exception(exc, {"data": data})
                 statsd.incr("posthog_cloud_raw_endpoint_failure", tags={"endpoint": "capture"})
                 logger.error("kafka_produce_failure", exc_info=exc)
-                return cors_response(
-                    request,
-                    generate_exception_response(
-                        "capture",
-                        "Unable to store event. Please try again. If you are the owner of this app you can check the logs for further details.",
-                        code="server_error",
-                        type="server_error",
-                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    ),
-                )
+                return _produce_failure_response(request, PRODUCE_FAILURE_MESSAGE)
 
     with start_span(op="kafka.wait"):
         span.set_tag("future.count", len(futures))
@@ -498,59 +666,108 @@ def get_event(request):
                     # but we do want to include it for some errors to aid debugging
                     data=data if isinstance(exc, MessageSizeTooLargeError) else None,
                 )
-                return cors_response(
-                    request,
-                    generate_exception_response(
-                        "capture",
-                        "Unable to store some events. Please try again. If you are the owner of this app you can check the logs for further details.",
-                        code="server_error",
-                        type="server_error",
-                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    ),
-                )
+                return _produce_failure_response(request, ACK_FAILURE_MESSAGE)
 
     try:
-        if replay_events:
-            lib_version = lib_version_from_query_params(request)
+        # We want to be super careful with our new ingestion flow for now so the whole thing is separated
+        # This is mostly a copy of above except we only log, we don't error out
+        futures = [log_capture_message(message) for message in _replay_capture_messages(capture_request)]
 
-            alternative_replay_events = preprocess_replay_events_for_blob_ingestion(
-                replay_events, settings.SESSION_RECORDING_KAFKA_MAX_REQUEST_SIZE_BYTES
-            )
+        start_time = time.monotonic()
+        for future in futures:
+            future.get(timeout=settings.KAFKA_PRODUCE_ACK_TIMEOUT_SECONDS - (time.monotonic() - start_time))
 
-            futures = []
-
-            # We want to be super careful with our new ingestion flow for now so the whole thing is separated
-            # This is mostly a copy of above except we only log, we don't error out
-            if alternative_replay_events:
-                processed_events = list(preprocess_events(alternative_replay_events))
-                for event, event_uuid, distinct_id in processed_events:
-                    futures.append(
-                        capture_internal(
-                            event,
-                            distinct_id,
-                            ip,
-                            site_url,
-                            now,
-                            sent_at,
-                            event_uuid,
-                            token,
-                            extra_headers=[("lib_version", lib_version)],
-                        )
-                    )
+    except Exception as exc:
+        capture_exception(exc, {"data": data})
+        logger.error("kafka_session_recording_produce_failure", exc_info=exc)
+        pass
+
+    statsd.incr("posthog_cloud_raw_endpoint_success", tags={"endpoint": "capture"})
+    return cors_response(request, JsonResponse({"status": 1}))
+
+
+@timed("posthog_cloud_event_endpoint")
+async def get_event_async(request):
+    """
+    `get_event` for ASGI servers, see CAPTURE_ASYNC_ENABLED.
+
+    Parsing the request and building the Kafka messages still runs in a thread, but waiting for Kafka to acknowledge
+    them doesn't hold one. Meanwhile the event loop serves other requests, whose messages are batched together with
+    these ones per partition, see `_AsyncKafkaProducer`.
+    """
+    structlog.contextvars.unbind_contextvars("team_id")
+
+    # handle cors request
+    if request.method == "OPTIONS":
+        return cors_response(request, JsonResponse({"status": 1}))
+
+    # Capture doesn't use the database, so there's no need to run in the single thread Django keeps for sync code
+    capture_request, error_response = await sync_to_async(_parse_capture_request, thread_sensitive=False)(request)
+
+    if error_response:
+        return error_response
+
+    assert capture_request is not None
+    data = capture_request.data
+
+    futures: list[asyncio.Future] = []
+
+    with start_span(op="kafka.produce") as span:
+        span.set_tag("event.count", len(capture_request.processed_events))
+        try:
+            messages = await sync_to_async(_capture_messages, thread_sensitive=False)(capture_request)
+            # One at a time, so that events with the same partition key keep their order
+            for message in messages:
+                futures.append(await async_log_capture_message(message))
+        except Exception as exc:
+            capture_exception(exc, {"data": data})
+            statsd.incr("posthog_cloud_raw_endpoint_failure", tags={"endpoint": "capture"})
+            logger.error("kafka_produce_failure", exc_info=exc)
+            return _produce_failure_response(request, PRODUCE_FAILURE_MESSAGE)
 
-                start_time = time.monotonic()
-                for future in futures:
-                    future.get(timeout=settings.KAFKA_PRODUCE_ACK_TIMEOUT_SECONDS - (time.monotonic() - start_time))
+    with start_span(op="kafka.wait"):
+        span.set_tag("future.count", len(futures))
+        try:
+            await _wait_for_acks(futures)
+        except AIOKafkaError as exc:
+            logger.error(
+                "kafka_produce_failure",
+                exc_info=exc,
+                name=exc.__class__.__name__,
+                data=data if isinstance(exc, AIOKafkaMessageSizeTooLargeError) else None,
+            )
+            return _produce_failure_response(request, ACK_FAILURE_MESSAGE)
 
+    try:
+        replay_messages = await sync_to_async(_replay_capture_messages, thread_sensitive=False)(capture_request)
+        futures = [await async_log_capture_message(message) for message in replay_messages]
+        await _wait_for_acks(futures)
     except Exception as exc:
         capture_exception(exc, {"data": data})
         logger.error("kafka_session_recording_produce_failure", exc_info=exc)
-        pass
 
     statsd.incr("posthog_cloud_raw_endpoint_success", tags={"endpoint": "capture"})
     return cors_response(request, JsonResponse({"status": 1}))
 
 
+# Not `@csrf_exempt`, which wraps views in a sync function before Django 5.0
+get_event_async.csrf_exempt = True  # type: ignore
+
+
+async def _wait_for_acks(futures: list[asyncio.Future]) -> None:
+    """Wait for Kafka to acknowledge the messages, raising the first error, like `FutureRecordMetadata.get` does."""
+    if not futures:
+        return
+
+    # Not `wait_for`, which would cancel the futures of messages that may still be delivered
+    _, pending = await asyncio.wait(futures, timeout=settings.KAFKA_PRODUCE_ACK_TIMEOUT_SECONDS)
+    if pending:
+        raise AIOKafkaTimeoutError(f"{len(pending)} of {len(futures)} messages were not acknowledged in time")
+
+    for future in futures:
+        future.result()
+
+
 def preprocess_events(events: list[dict[str, Any]]) -> Iterator[tuple[dict[str, Any], UUIDT, str]]:
     for event in events:
         event_uuid = UUIDT()
@@ -585,7 +802,7 @@ def parse_event(event):
     return event
 
 
-def capture_internal(
+def build_capture_message(
     event,
     distinct_id,
     ip,
@@ -596,7 +813,7 @@ def capture_internal(
     token=None,
     historical=False,
     extra_headers: list[tuple[str, str]] | None = None,
-):
+) -> CaptureMessage:
     if event_uuid is None:
         event_uuid = UUIDT()
 
@@ -624,8 +841,12 @@ def capture_internal(
         elif settings.REPLAY_OVERFLOW_SESSIONS_ENABLED:
             overflowing = session_id in _list_overflowing_keys(InputType.REPLAY)
 
-        return log_event(
-            parsed_event, event["event"], partition_key=session_id, headers=headers, overflowing=overflowing
+        return CaptureMessage(
+            data=parsed_event,
+            event_name=event["event"],
+            partition_key=session_id,
+            headers=headers,
+            overflowing=overflowing,
         )
 
     # We aim to always partition by {team_id}:{distinct_id} but allow
@@ -641,7 +862,36 @@ def capture_internal(
     else:
         kafka_partition_key = candidate_partition_key
 
-    return log_event(parsed_event, event["event"], partition_key=kafka_partition_key, historical=historical)
+    return CaptureMessage(
+        data=parsed_event, event_name=event["event"], partition_key=kafka_partition_key, historical=historical
+    )
+
+
+def capture_internal(
+    event,
+    distinct_id,
+    ip,
+    site_url,
+    now,
+    sent_at,
+    event_uuid=None,
+    token=None,
+    historical=False,
+    extra_headers: list[tuple[str, str]] | None = None,
+):
+    message = build_capture_message(
+        event,
+        distinct_id,
+        ip,
+        site_url,
+        now,
+        sent_at,
+        event_uuid,
+        token,
+        historical=historical,
+        extra_headers=extra_headers,
+    )
+    return log_capture_message(message)
 
 
 def is_randomly_partitioned(candidate_partition_key: str) -> bool:
@@ -20,7 +20,7 @@ from posthog.exceptions import RequestParsingError, generate_exception_response
 from posthog.logging.timing import timed
 from posthog.metrics import LABEL_TEAM_ID
 from posthog.models import Team, User
-from posthog.models.feature_flag import get_all_feature_flags
+from posthog.models.feature_flag import get_all_feature_flags, get_all_feature_flags_for_distinct_ids
 from posthog.models.feature_flag.flag_analytics import increment_request_count
 from posthog.models.filters.mixins.utils import process_bool
 from posthog.models.utils import execute_with_timeout
@@ -123,36 +123,9 @@ def get_decide(request: HttpRequest):
                 generate_exception_response("decide", f"Malformed request data: {error}", code="malformed_data"),
             )
 
-        token = get_token(data, request)
-        team = Team.objects.get_team_from_cache_or_token(token)
-        if team is None and token:
-            project_id = get_project_id(data, request)
-
-            if not project_id:
-                return cors_response(
-                    request,
-                    generate_exception_response(
-                        "decide",
-                        "Project API key invalid. You can find your project API key in PostHog project settings.",
-                        code="invalid_api_key",
-                        type="authentication_error",
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                    ),
-                )
-
-            user = User.objects.get_from_personal_api_key(token)
-            if user is None:
-                return cors_response(
-                    request,
-                    generate_exception_response(
-                        "decide",
-                        "Invalid Personal API key.",
-                        code="invalid_personal_key",
-                        type="authentication_error",
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                    ),
-                )
-            team = user.teams.get(id=project_id)
+        team, error_response = _get_team_from_request(data, request)
+        if error_response is not None:
+            return cors_response(request, error_response)
 
         if team:
             structlog.contextvars.bind_contextvars(team_id=team.id)
@@ -297,6 +270,168 @@ def get_decide(request: HttpRequest):
     return cors_response(request, JsonResponse(response))
 
 
+def _get_team_from_request(data: dict, request: HttpRequest) -> tuple[Optional[Team], Optional[JsonResponse]]:
+    """Resolves the team from a project API key, or a personal API key plus project ID."""
+    token = get_token(data, request)
+    team = Team.objects.get_team_from_cache_or_token(token)
+    if team is None and token:
+        project_id = get_project_id(data, request)
+
+        if not project_id:
+            return None, generate_exception_response(
+                "decide",
+                "Project API key invalid. You can find your project API key in PostHog project settings.",
+                code="invalid_api_key",
+                type="authentication_error",
+                status_code=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        user = User.objects.get_from_personal_api_key(token)
+        if user is None:
+            return None, generate_exception_response(
+                "decide",
+                "Invalid Personal API key.",
+                code="invalid_personal_key",
+                type="authentication_error",
+                status_code=status.HTTP_401_UNAUTHORIZED,
+            )
+        team = user.teams.get(id=project_id)
+
+    return team, None
+
+
+@csrf_exempt
+@timed("posthog_cloud_decide_bulk_endpoint")
+def get_bulk_decide(request: HttpRequest):
+    """
+    Evaluates all flags for many distinct_ids in one request, for server-side SDKs and backend jobs.
+
+    Expects `distinct_ids`, and optionally `groups` mapping each distinct_id to its groups. Responds with the v3
+    decide flag fields keyed by distinct_id.
+    """
+    if request.method == "OPTIONS":
+        return cors_response(request, JsonResponse({"status": 1}))
+
+    if request.method != "POST":
+        return cors_response(
+            request,
+            generate_exception_response(
+                "decide",
+                "Bulk decide only supports POST requests.",
+                code="method_not_allowed",
+                type="validation_error",
+                status_code=status.HTTP_405_METHOD_NOT_ALLOWED,
+            ),
+        )
+
+    try:
+        data = load_data_from_request(request)
+    except RequestParsingError as error:
+        capture_exception(error)  # We still capture this on Sentry to identify actual potential bugs
+        return cors_response(
+            request,
+            generate_exception_response("decide", f"Malformed request data: {error}", code="malformed_data"),
+        )
+
+    team, error_response = _get_team_from_request(data, request)
+    if error_response is not None:
+        return cors_response(request, error_response)
+    if team is None:
+        return cors_response(
+            request,
+            generate_exception_response(
+                "decide",
+                "No project API key provided. You can find your project API key in PostHog project settings.",
+                code="no_api_key",
+                type="authentication_error",
+                status_code=status.HTTP_401_UNAUTHORIZED,
+            ),
+        )
+
+    structlog.contextvars.bind_contextvars(team_id=team.id)
+
+    distinct_ids = data.get("distinct_ids")
+    if not isinstance(distinct_ids, list) or len(distinct_ids) == 0:
+        return cors_response(
+            request,
+            generate_exception_response(
+                "decide",
+                "Bulk decide requires a list of distinct_ids.",
+                code="missing_distinct_ids",
+                type="validation_error",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            ),
+        )
+    if len(distinct_ids) > settings.DECIDE_BULK_MAX_DISTINCT_IDS:
+        return cors_response(
+            request,
+            generate_exception_response(
+                "decide",
+                f"Bulk decide accepts at most {settings.DECIDE_BULK_MAX_DISTINCT_IDS} distinct_ids per request.",
+                code="too_many_distinct_ids",
+                type="validation_error",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            ),
+        )
+    groups = data.get("groups") or {}
+    if not isinstance(groups, dict) or not all(
+        isinstance(distinct_id_groups, dict)
+        and all(isinstance(key, str) and isinstance(value, str) for key, value in distinct_id_groups.items())
+        for distinct_id_groups in groups.values()
+    ):
+        return cors_response(
+            request,
+            generate_exception_response(
+                "decide",
+                "Bulk decide groups must map each distinct_id to its groups.",
+                code="invalid_groups",
+                type="validation_error",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            ),
+        )
+    distinct_ids = list(dict.fromkeys(str(distinct_id) for distinct_id in distinct_ids))
+    groups = {str(distinct_id): distinct_id_groups for distinct_id, distinct_id_groups in groups.items()}
+
+    all_flags = get_all_feature_flags_for_distinct_ids(team.pk, distinct_ids, groups)
+
+    feature_flags = {}
+    feature_flag_payloads = {}
+    errors = False
+    for distinct_id, (flags, _, payloads, errors_computing) in all_flags.items():
+        feature_flags[distinct_id] = flags
+        feature_flag_payloads[distinct_id] = payloads
+        errors = errors or errors_computing
+
+    FLAG_EVALUATION_COUNTER.labels(
+        team_id=label_for_team_id_to_track(team.pk),
+        errors_computing=errors,
+        has_hash_key_override=False,
+    ).inc(len(distinct_ids))
+
+    # Billing analytics, each distinct_id with feature flags counts like a decide request with feature flags
+    # Don't count distinct_ids whose flags are all survey targeting flags.
+    billable_count = sum(
+        1
+        for flags in feature_flags.values()
+        if flags and not all(flag.startswith(SURVEY_TARGETING_FLAG_PREFIX) for flag in flags.keys())
+    )
+    # Sample no. of bulk decide requests, weighted by their distinct_ids
+    if billable_count and settings.DECIDE_BILLING_SAMPLING_RATE and random() < settings.DECIDE_BILLING_SAMPLING_RATE:
+        increment_request_count(team.pk, billable_count * int(1 / settings.DECIDE_BILLING_SAMPLING_RATE))
+
+    statsd.incr(f"posthog_cloud_raw_endpoint_success", tags={"endpoint": "decide_bulk"})
+    return cors_response(
+        request,
+        JsonResponse(
+            {
+                "featureFlags": feature_flags,
+                "featureFlagPayloads": feature_flag_payloads,
+                "errorsWhileComputingFlags": errors,
+            }
+        ),
+    )
+
+
 def _session_recording_config_response(request: HttpRequest, team: Team) -> bool | dict:
     session_recording_config_response: bool | dict = False
 
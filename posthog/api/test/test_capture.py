@@ -1,6 +1,7 @@
 from collections import Counter
 from unittest import mock
 
+import asyncio
 import base64
 import gzip
 import json
@@ -15,9 +16,10 @@ import zlib
 from datetime import datetime, timedelta
 from datetime import timezone as tz
 from django.http import HttpResponse
-from django.test.client import MULTIPART_CONTENT, Client
+from django.test.client import MULTIPART_CONTENT, AsyncRequestFactory, Client
 from django.utils import timezone
 from freezegun import freeze_time
+from aiokafka.errors import KafkaError as AIOKafkaError
 from kafka.errors import KafkaError
 from kafka.producer.future import FutureProduceResult, FutureRecordMetadata
 from kafka.structs import TopicPartition
@@ -2039,3 +2041,79 @@ class TestCapture(BaseTest):
             kafka_produce.call_args_list[0][1]["topic"],
             KAFKA_EVENTS_PLUGIN_INGESTION_HISTORICAL,
         )
+
+
+class TestCaptureAsync(BaseTest):
+    """
+    The async capture view, which is only routed to under ASGI (see CAPTURE_ASYNC_ENABLED), so it's called directly.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+
+    def _post(self, data: Union[dict, list]):
+        return self.factory.post(
+            "/e/", data=json.dumps(data), content_type="application/json", HTTP_ORIGIN="https://localhost"
+        )
+
+    @staticmethod
+    async def _acked(**kwargs) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future
+
+    @patch("posthog.kafka_client.async_client._AsyncKafkaProducer.produce")
+    async def test_capture_event_async(self, kafka_produce):
+        kafka_produce.side_effect = self._acked
+        data = {"event": "$pageview", "distinct_id": "user-1", "api_key": self.team.api_token, "properties": {}}
+
+        response = await capture.get_event_async(self._post(data))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get("access-control-allow-origin"), "https://localhost")
+        self.assertEqual(kafka_produce.call_count, 1)
+        produce_kwargs = kafka_produce.call_args[1]
+        self.assertEqual(produce_kwargs["topic"], KAFKA_EVENTS_PLUGIN_INGESTION_TOPIC)
+        self.assertEqual(produce_kwargs["key"], f"{self.team.api_token}:user-1")
+        self.assertEqual(produce_kwargs["data"]["distinct_id"], "user-1")
+        self.assertEqual(json.loads(produce_kwargs["data"]["data"])["event"], "$pageview")
+
+    @patch("posthog.kafka_client.async_client._AsyncKafkaProducer.produce")
+    async def test_capture_batch_async_keeps_event_order(self, kafka_produce):
+        kafka_produce.side_effect = self._acked
+        data = {
+            "api_key": self.team.api_token,
+            "batch": [{"event": f"event {index}", "distinct_id": "user-1", "properties": {}} for index in range(5)],
+        }
+
+        response = await capture.get_event_async(self._post(data))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [json.loads(call[1]["data"]["data"])["event"] for call in kafka_produce.call_args_list],
+            [f"event {index}" for index in range(5)],
+        )
+
+    @patch("posthog.kafka_client.async_client._AsyncKafkaProducer.produce")
+    async def test_capture_async_returns_503_when_kafka_fails(self, kafka_produce):
+        async def failed(**kwargs) -> asyncio.Future:
+            future = asyncio.get_running_loop().create_future()
+            future.set_exception(AIOKafkaError("broker unavailable"))
+            return future
+
+        kafka_produce.side_effect = failed
+        data = {"event": "$pageview", "distinct_id": "user-1", "api_key": self.team.api_token, "properties": {}}
+
+        response = await capture.get_event_async(self._post(data))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(json.loads(response.content)["code"], "server_error")
+
+    @patch("posthog.kafka_client.async_client._AsyncKafkaProducer.produce")
+    async def test_capture_async_without_token(self, kafka_produce):
+        response = await capture.get_event_async(self._post({"event": "$pageview", "distinct_id": "user-1"}))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(json.loads(response.content)["code"], "missing_api_key")
+        kafka_produce.assert_not_called()
@@ -3499,6 +3499,118 @@ class TestDatabaseCheckForDecide(BaseTest, QueryMatchingTest):
     "decide" not in settings.READ_REPLICA_OPT_IN,
     reason="This test requires READ_REPLICA_OPT_IN=decide",
 )
+@patch(
+    "posthog.models.feature_flag.flag_matching.postgres_healthcheck.is_connected",
+    return_value=True,
+)
+class TestBulkDecide(BaseTest, QueryMatchingTest):
+    def setUp(self, *args):
+        cache.clear()
+        super().setUp()
+        self.client = Client(enforce_csrf_checks=True)
+
+    def _post_bulk_decide(self, data: dict):
+        return self.client.post(
+            "/decide/bulk/",
+            {"data": base64.b64encode(json.dumps(data).encode("utf-8")).decode("utf-8")},
+        )
+
+    def test_bulk_decide_returns_flags_per_distinct_id(self, *args):
+        Person.objects.create(team=self.team, distinct_ids=["example_id"], properties={"email": "tim@posthog.com"})
+        GroupTypeMapping.objects.create(team=self.team, group_type="organization", group_type_index=0)
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="email-flag",
+            created_by=self.user,
+            filters={"groups": [{"properties": [{"key": "email", "value": "tim@posthog.com", "type": "person"}]}]},
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="group-flag",
+            created_by=self.user,
+            filters={
+                "aggregation_group_type_index": 0,
+                "groups": [{"properties": [], "rollout_percentage": 100}],
+                "payloads": {"true": '{"plan": "enterprise"}'},
+            },
+        )
+
+        response = self._post_bulk_decide(
+            {
+                "token": self.team.api_token,
+                "distinct_ids": ["example_id", "other_id"],
+                "groups": {"example_id": {"organization": "posthog"}},
+            }
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                "featureFlags": {
+                    "example_id": {"email-flag": True, "group-flag": True},
+                    "other_id": {"email-flag": False, "group-flag": False},
+                },
+                "featureFlagPayloads": {"example_id": {"group-flag": '{"plan": "enterprise"}'}, "other_id": {}},
+                "errorsWhileComputingFlags": False,
+            },
+        )
+
+    @patch("posthog.models.feature_flag.flag_analytics.CACHE_BUCKET_SIZE", 10)
+    def test_bulk_decide_analytics_count_each_distinct_id(self, *args):
+        FeatureFlag.objects.create(team=self.team, rollout_percentage=50, key="beta-feature", created_by=self.user)
+        data = {"token": self.team.api_token, "distinct_ids": ["a", "b", "c", "a"]}
+
+        with self.settings(DECIDE_BILLING_SAMPLING_RATE=0):
+            response = self._post_bulk_decide(data)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(redis.get_client().hgetall(f"posthog:decide_requests:{self.team.pk}"), {})
+
+        with self.settings(DECIDE_BILLING_SAMPLING_RATE=1), freeze_time("2022-05-07 12:23:07"):
+            response = self._post_bulk_decide(data)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                redis.get_client().hgetall(f"posthog:decide_requests:{self.team.pk}"),
+                {b"165192618": b"3"},
+            )
+
+    def test_bulk_decide_validates_distinct_ids(self, *args):
+        response = self._post_bulk_decide({"token": self.team.api_token})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["code"], "missing_distinct_ids")
+
+        with self.settings(DECIDE_BULK_MAX_DISTINCT_IDS=2):
+            response = self._post_bulk_decide({"token": self.team.api_token, "distinct_ids": ["a", "b", "c"]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["code"], "too_many_distinct_ids")
+
+    def test_bulk_decide_validates_groups(self, *args):
+        for groups in [["acme"], {"example_id": "acme"}, {"example_id": {"organization": 1}}]:
+            with self.subTest(groups=groups):
+                response = self._post_bulk_decide(
+                    {"token": self.team.api_token, "distinct_ids": ["example_id"], "groups": groups}
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.json()["code"], "invalid_groups")
+
+    def test_bulk_decide_rate_limits(self, *args):
+        with self.settings(
+            DECIDE_RATE_LIMIT_ENABLED="y", DECIDE_BULK_BUCKET_REPLENISH_RATE=0.1, DECIDE_BULK_BUCKET_CAPACITY=2
+        ):
+            for _ in range(2):
+                response = self._post_bulk_decide({"token": self.team.api_token, "distinct_ids": ["example_id"]})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            response = self._post_bulk_decide({"token": self.team.api_token, "distinct_ids": ["example_id"]})
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response.json()["code"], "rate_limit_exceeded")
+
+    def test_bulk_decide_requires_token(self, *args):
+        response = self._post_bulk_decide({"distinct_ids": ["example_id"]})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()["code"], "no_api_key")
+
+
 class TestDecideUsesReadReplica(TransactionTestCase):
     """
     A cheat sheet for creating a READ-ONLY fake replica when local testing:
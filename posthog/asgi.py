@@ -7,11 +7,27 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "posthog.settings")
 os.environ.setdefault("SERVER_GATEWAY_INTERFACE", "ASGI")
 
 
+async def lifespan(receive, send):
+    # Producers of the async capture view batch messages in memory, so they're flushed before the server exits
+    from posthog.kafka_client.async_client import close_async_kafka_producers
+
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_kafka_producers()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
 # Django doesn't support lifetime requests and raises an exception
 # when it receives them. This creates a lot of noise in sentry so
-# intercept these requests and return a 501 error without raising an exception
+# handle the lifespan protocol here, and return a 501 error without raising an exception for anything else
 def lifetime_wrapper(func):
     async def inner(scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await lifespan(receive, send)
         if scope["type"] != "http":
             return HttpResponse(status=501)
         return await func(scope, receive, send)
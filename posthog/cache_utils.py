@@ -1,4 +1,5 @@
 import threading
+import zlib
 from datetime import timedelta
 from functools import wraps
 from typing import no_type_check, Any
@@ -7,9 +8,12 @@ import orjson
 from rest_framework.utils.encoders import JSONEncoder
 from django.utils.timezone import now
 from django_redis.serializers.base import BaseSerializer
+import structlog
 
 from posthog.settings import TEST
 
+logger = structlog.get_logger(__name__)
+
 
 def cache_for(cache_time: timedelta, background_refresh=False):
     def wrapper(fn):
@@ -73,3 +77,54 @@ class OrjsonJsonSerializer(BaseSerializer):
 
     def loads(self, value: bytes) -> Any:
         return orjson.loads(value)
+
+
+class CompressedOrjsonSerializer(OrjsonJsonSerializer):
+    """
+    Orjson with a small versioned envelope, compressing payloads above `min_length` bytes.
+
+    Envelope: `magic (3 bytes) | version (1 byte) | codec (1 byte) | payload`. Plain orjson written before the
+    envelope existed starts with `{` or `[`, so it's still read as-is. Values from an unknown envelope version (e.g.
+    written by a newer deploy during a rollout) or that can't be decoded load as `None`, which callers treat as a
+    cache miss.
+    """
+
+    MAGIC = b"PHC"
+    VERSION = 1
+    CODEC_NONE = 0
+    CODEC_ZLIB = 1
+
+    # zlib at a low level gets most of the size reduction on repetitive JSON at a fraction of the CPU of higher levels
+    min_length = 4096
+    preset = 1
+
+    def dumps(self, value: Any) -> bytes:
+        payload = super().dumps(value)
+        if len(payload) > self.min_length:
+            return self._header(self.CODEC_ZLIB) + zlib.compress(payload, self.preset)
+        return self._header(self.CODEC_NONE) + payload
+
+    def loads(self, value: bytes) -> Any:
+        try:
+            return self._loads(value)
+        except (orjson.JSONDecodeError, zlib.error, IndexError) as error:
+            logger.warning("cache_envelope_undecodable", error=str(error))
+            return None
+
+    def _loads(self, value: bytes) -> Any:
+        if not value.startswith(self.MAGIC):
+            return super().loads(value)
+        version, codec = value[len(self.MAGIC)], value[len(self.MAGIC) + 1]
+        payload = memoryview(value)[len(self.MAGIC) + 2 :]
+        if version != self.VERSION:
+            logger.warning("cache_envelope_unknown_version", version=version)
+            return None
+        if codec == self.CODEC_ZLIB:
+            return super().loads(zlib.decompress(payload))
+        if codec == self.CODEC_NONE:
+            return super().loads(payload)
+        logger.warning("cache_envelope_unknown_codec", codec=codec)
+        return None
+
+    def _header(self, codec: int) -> bytes:
+        return self.MAGIC + bytes((self.VERSION, codec))
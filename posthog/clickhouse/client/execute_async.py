@@ -128,7 +128,7 @@ class QueryStatusManager:
 
 def execute_process_query(
     team_id: int,
-    user_id: int,
+    user_id: Optional[int],
     query_id: str,
     query_json: dict,
     limit_context: Optional[LimitContext],
@@ -141,9 +141,10 @@ def execute_process_query(
     from posthog.models.user import User
 
     team = Team.objects.get(pk=team_id)
-    user = User.objects.get(pk=user_id)
-
-    sentry_sdk.set_user({"email": user.email, "id": user_id, "username": user.email})
+    if user_id is not None:
+        # Background refreshes of stale results aren't triggered by any particular user
+        user = User.objects.get(pk=user_id)
+        sentry_sdk.set_user({"email": user.email, "id": user_id, "username": user.email})
     sentry_sdk.set_tag("team_id", team_id)
 
     query_status = manager.get_query_status()
@@ -198,7 +199,7 @@ def kick_off_task(
     query_status: QueryStatus,
     refresh_requested: bool,
     team_id: int,
-    user_id: int,
+    user_id: Optional[int],
 ):
     task = process_query_task.delay(
         team_id,
@@ -214,7 +215,7 @@ def kick_off_task(
 
 def enqueue_process_query_task(
     team: "Team",
-    user: "User",
+    user: Optional["User"],
     query_json: dict,
     query_id: Optional[str] = None,
     refresh_requested: bool = False,
@@ -268,7 +269,7 @@ def enqueue_process_query_task(
     if _test_only_bypass_celery:
         process_query_task(
             team.id,
-            user.id,
+            user.id if user else None,
             query_id,
             query_json,
             limit_context=LimitContext.QUERY_ASYNC,
@@ -276,7 +277,16 @@ def enqueue_process_query_task(
         )
     else:
         transaction.on_commit(
-            partial(kick_off_task, manager, query_id, query_json, query_status, refresh_requested, team.id, user.id)
+            partial(
+                kick_off_task,
+                manager,
+                query_id,
+                query_json,
+                query_status,
+                refresh_requested,
+                team.id,
+                user.id if user else None,
+            )
         )
 
     return query_status
@@ -1,5 +1,6 @@
 import re
 from dataclasses import dataclass, field
+from functools import cache
 
 from typing import TYPE_CHECKING, Literal, Optional
 
@@ -13,6 +14,18 @@ if TYPE_CHECKING:
 camel_case_pattern = re.compile(r"(?<!^)(?<![A-Z])(?=[A-Z])")
 
 
+@cache
+def _visit_method_name(node_class: type) -> str:
+    # accept() is called for every node of every visitor, so the name is only worked out once per class
+    name = camel_case_pattern.sub("_", node_class.__name__).lower()
+
+    # NOTE: Sync with ./test/test_visitor.py#test_hogql_visitor_naming_exceptions
+    replacements = {"hog_qlxtag": "hogqlx_tag", "hog_qlxattribute": "hogqlx_attribute", "uuidtype": "uuid_type"}
+    for old, new in replacements.items():
+        name = name.replace(old, new)
+    return f"visit_{name}"
+
+
 @dataclass(kw_only=True)
 class AST:
     start: Optional[int] = field(default=None)
@@ -20,15 +33,9 @@ class AST:
 
     # This is part of the visitor pattern from visitor.py.
     def accept(self, visitor):
-        name = camel_case_pattern.sub("_", self.__class__.__name__).lower()
-
-        # NOTE: Sync with ./test/test_visitor.py#test_hogql_visitor_naming_exceptions
-        replacements = {"hog_qlxtag": "hogqlx_tag", "hog_qlxattribute": "hogqlx_attribute", "uuidtype": "uuid_type"}
-        for old, new in replacements.items():
-            name = name.replace(old, new)
-        method_name = f"visit_{name}"
-        if hasattr(visitor, method_name):
-            visit = getattr(visitor, method_name)
+        method_name = _visit_method_name(self.__class__)
+        visit = getattr(visitor, method_name, None)
+        if visit is not None:
             return visit(self)
         if hasattr(visitor, "visit_unknown"):
             return visitor.visit_unknown(self)
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Generic, Optional, TypeVar
+from collections.abc import Callable, Hashable
+
+T = TypeVar("T")
+
+
+class LRUCache(Generic[T]):
+    """
+    Bounded, thread-safe, process-local LRU cache. Entries optionally expire after `ttl` seconds.
+
+    `max_size` bounds the number of entries, or their total weight when `weigh` is given, e.g. for values whose sizes
+    vary by orders of magnitude. Values that weigh more than `max_size` on their own aren't cached.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None, weigh: Optional[Callable[[T], int]] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.weigh = weigh
+        self._entries: OrderedDict[Hashable, tuple[float, T, int]] = OrderedDict()
+        self._weight = 0
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, value, _ = entry
+            if self.ttl is not None and monotonic() - created_at > self.ttl:
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: T) -> None:
+        if self.max_size <= 0:
+            return
+        weight = self.weigh(value) if self.weigh is not None else 1
+        with self._lock:
+            self._pop(key)
+            if weight > self.max_size:
+                return
+            self._entries[key] = (monotonic(), value, weight)
+            self._weight += weight
+            while self._weight > self.max_size:
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._weight -= entry[2]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
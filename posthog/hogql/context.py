@@ -51,6 +51,8 @@ class HogQLContext:
     modifiers: HogQLQueryModifiers = field(default_factory=HogQLQueryModifiers)
     # Enables more verbose output for debugging
     debug: bool = False
+    # Unset when printing inlines Postgres state the schema version doesn't cover, like cohort versions or actions
+    printed_query_cacheable: bool = True
 
     def add_value(self, value: Any) -> str:
         key = f"hogql_val_{len(self.values)}"
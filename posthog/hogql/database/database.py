@@ -1,10 +1,12 @@
 import dataclasses
 from typing import TYPE_CHECKING, Any, ClassVar, Optional, TypeAlias, cast
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from prometheus_client import Counter
 from pydantic import ConfigDict, BaseModel
 from sentry_sdk import capture_exception
 from django.db.models import Q
 from posthog.hogql import ast
+from posthog.hogql.cache import LRUCache
 from posthog.hogql.context import HogQLContext
 from posthog.hogql.database.models import (
     FieldTraverser,
@@ -58,6 +60,7 @@ from posthog.hogql.database.schema.sessions import RawSessionsTable, SessionsTab
 from posthog.hogql.database.schema.static_cohort_people import StaticCohortPeople
 from posthog.hogql.errors import QueryError, ResolutionError
 from posthog.hogql.parser import parse_expr
+from posthog.hogql.schema_version import get_team_schema_version
 from posthog.models.group_type_mapping import GroupTypeMapping
 from posthog.models.team.team import WeekStartDay
 from posthog.schema import (
@@ -214,19 +217,52 @@ def _use_person_id_from_person_overrides(database: Database, use_distinct_id_ove
         )
 
 
+# Built databases, keyed by team, schema version and modifiers. The schema version is bumped by signals on the
+# models read below. The TTL covers changes that don't go through Django signals (e.g. queryset updates).
+DATABASE_CACHE: LRUCache[Database] = LRUCache(max_size=256, ttl=10 * 60)
+
+DATABASE_CACHE_COUNTER = Counter(
+    "hogql_database_cache_total",
+    "Whether create_hogql_database could reuse an already built database",
+    labelnames=["cache_hit"],
+)
+
+
 def create_hogql_database(
     team_id: int, modifiers: Optional[HogQLQueryModifiers] = None, team_arg: Optional["Team"] = None
 ) -> Database:
+    """
+    Returns the HogQL database for the team. Databases are shared between queries in the same process,
+    so treat the result as read-only.
+    """
     from posthog.models import Team
     from posthog.hogql.query import create_default_modifiers_for_team
+
+    team = team_arg or Team.objects.get(pk=team_id)
+    modifiers = create_default_modifiers_for_team(team, modifiers)
+
+    cache_key = (
+        team.pk,
+        get_team_schema_version(team.pk),
+        team.timezone,
+        team.week_start_day,
+        modifiers.model_dump_json(),
+    )
+    database = DATABASE_CACHE.get(cache_key)
+    DATABASE_CACHE_COUNTER.labels(cache_hit=database is not None).inc()
+    if database is None:
+        database = _build_hogql_database(team, modifiers)
+        DATABASE_CACHE.set(cache_key, database)
+    return database
+
+
+def _build_hogql_database(team: "Team", modifiers: HogQLQueryModifiers) -> Database:
     from posthog.warehouse.models import (
         DataWarehouseTable,
         DataWarehouseSavedQuery,
         DataWarehouseJoin,
     )
 
-    team = team_arg or Team.objects.get(pk=team_id)
-    modifiers = create_default_modifiers_for_team(team, modifiers)
     database = Database(timezone=team.timezone, week_start_day=team.week_start_day)
 
     if modifiers.personsOnEventsMode == PersonsOnEventsMode.disabled:
@@ -263,7 +299,11 @@ def create_hogql_database(
     warehouse_tables: dict[str, Table] = {}
     views: dict[str, Table] = {}
 
-    for table in DataWarehouseTable.objects.filter(team_id=team.pk).exclude(deleted=True):
+    for table in (
+        DataWarehouseTable.objects.filter(team_id=team.pk)
+        .exclude(deleted=True)
+        .select_related("credential", "external_data_source")
+    ):
         warehouse_tables[table.name] = table.hogql_definition(modifiers)
 
     if modifiers.dataWarehouseEventsModifiers:
@@ -347,13 +387,13 @@ def create_hogql_database(
                     for chain in person_field.chain:
                         if isinstance(table_or_field, ast.LazyJoin):
                             table_or_field = table_or_field.resolve_table(
-                                HogQLContext(team_id=team_id, database=database)
+                                HogQLContext(team_id=team.pk, database=database)
                             )
                             if table_or_field.has_field(chain):
                                 table_or_field = table_or_field.get_field(chain)
                                 if isinstance(table_or_field, ast.LazyJoin):
                                     table_or_field = table_or_field.resolve_table(
-                                        HogQLContext(team_id=team_id, database=database)
+                                        HogQLContext(team_id=team.pk, database=database)
                                     )
                         elif isinstance(table_or_field, ast.Table):
                             table_or_field = table_or_field.get_field(chain)
@@ -3,7 +3,9 @@ from typing import Any, cast
 
 from unittest.mock import patch
 import pytest
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from parameterized import parameterized
 
 from posthog.hogql.database.database import create_hogql_database, serialize_database
@@ -482,3 +484,62 @@ class TestDatabase(BaseTest):
             "ifNull(less(argMax(person.created_at, person.version), plus(now64(6, %(hogql_val_0)s), toIntervalDay(1)))"
             in query
         ), query
+
+    def test_database_is_cached_per_team(self):
+        database = create_hogql_database(team_id=self.team.pk, team_arg=self.team)
+
+        with self.assertNumQueries(0):
+            cached_database = create_hogql_database(team_id=self.team.pk, team_arg=self.team)
+
+        self.assertIs(cached_database, database)
+        self.assertIsNot(
+            create_hogql_database(
+                team_id=self.team.pk,
+                team_arg=self.team,
+                modifiers=HogQLQueryModifiers(
+                    personsOnEventsMode=PersonsOnEventsMode.person_id_no_override_properties_on_events
+                ),
+            ),
+            database,
+        )
+
+    def test_database_cache_is_invalidated_on_schema_change(self):
+        database = create_hogql_database(team_id=self.team.pk, team_arg=self.team)
+        self.assertIsNone(database.events.fields.get("organization"))
+
+        GroupTypeMapping.objects.create(team=self.team, group_type="organization", group_type_index=0)
+        database = create_hogql_database(team_id=self.team.pk, team_arg=self.team)
+        self.assertEqual(database.events.fields["organization"], FieldTraverser(chain=["group_0"]))
+
+        credentials = DataWarehouseCredential.objects.create(access_key="key", access_secret="secret", team=self.team)
+        DataWarehouseTable.objects.create(
+            name="whatever",
+            team=self.team,
+            columns={"id": "String"},
+            credential=credentials,
+            url_pattern="",
+        )
+        database = create_hogql_database(team_id=self.team.pk, team_arg=self.team)
+        self.assertTrue(database.has_table("whatever"))
+
+    def test_database_cache_postgres_queries(self):
+        GroupTypeMapping.objects.create(team=self.team, group_type="organization", group_type_index=0)
+        credentials = DataWarehouseCredential.objects.create(access_key="key", access_secret="secret", team=self.team)
+        for name in ("table_1", "table_2", "table_3"):
+            DataWarehouseTable.objects.create(
+                name=name,
+                team=self.team,
+                columns={"id": "String"},
+                credential=credentials,
+                url_pattern="",
+            )
+
+        with CaptureQueriesContext(connection) as cold_queries:
+            create_hogql_database(team_id=self.team.pk, team_arg=self.team)
+        with CaptureQueriesContext(connection) as warm_queries:
+            for _ in range(10):
+                create_hogql_database(team_id=self.team.pk, team_arg=self.team)
+
+        # At least group type mappings, warehouse tables (with credentials), saved queries and joins
+        self.assertGreaterEqual(len(cold_queries), 4)
+        self.assertEqual(len(warm_queries), 0)
@@ -30,6 +30,8 @@ def cohort(node: ast.Expr, args: list[ast.Expr], context: HogQLContext) -> ast.E
 
     from posthog.models import Cohort
 
+    context.printed_query_cacheable = False
+
     if (isinstance(arg.value, int) or isinstance(arg.value, float)) and not isinstance(arg.value, bool):
         cohorts1 = Cohort.objects.filter(id=int(arg.value), team_id=context.team_id).values_list(
             "id", "is_static", "version", "name"
@@ -47,6 +47,9 @@ def set_default_modifier_values(modifiers: HogQLQueryModifiers, team: "Team"):
     if modifiers.optimizeJoinedFilters is None:
         modifiers.optimizeJoinedFilters = False
 
+    if modifiers.batchTrendsSeries is None:
+        modifiers.batchTrendsSeries = False
+
 
 def set_default_in_cohort_via(modifiers: HogQLQueryModifiers) -> HogQLQueryModifiers:
     if modifiers.inCohortVia is None or modifiers.inCohortVia == InCohortVia.auto:
@@ -1,12 +1,13 @@
-from typing import Literal, Optional, cast
+from typing import Any, Literal, Optional, cast
 from collections.abc import Callable
 
 from antlr4 import CommonTokenStream, InputStream, ParseTreeVisitor, ParserRuleContext
 from antlr4.error.ErrorListener import ErrorListener
-from prometheus_client import Histogram
+from prometheus_client import Counter, Histogram
 
 from posthog.hogql import ast
 from posthog.hogql.base import AST
+from posthog.hogql.cache import LRUCache
 from posthog.hogql.constants import RESERVED_KEYWORDS
 from posthog.hogql.errors import BaseHogQLError, NotImplementedError, SyntaxError
 from posthog.hogql.grammar.HogQLLexer import HogQLLexer
@@ -14,6 +15,7 @@ from posthog.hogql.grammar.HogQLParser import HogQLParser
 from posthog.hogql.parse_string import parse_string_literal_text, parse_string_literal_ctx, parse_string_text_ctx
 from posthog.hogql.placeholders import replace_placeholders
 from posthog.hogql.timings import HogQLTimings
+from posthog.hogql.visitor import clone_expr
 from hogql_parser import (
     parse_expr as _parse_expr_cpp,
     parse_order_expr as _parse_order_expr_cpp,
@@ -47,6 +49,45 @@ RULE_TO_HISTOGRAM: dict[Literal["expr", "order_expr", "select", "full_template_s
     for rule in ("expr", "order_expr", "select", "full_template_string")
 }
 
+PARSE_CACHE_HIT_COUNTER = Counter(
+    "hogql_parse_cache_hit_total",
+    "Parse calls served from the process-local parsed AST cache",
+    labelnames=["rule", "backend"],
+)
+PARSE_CACHE_MISS_COUNTER = Counter(
+    "hogql_parse_cache_miss_total",
+    "Parse calls that had to run the parser",
+    labelnames=["rule", "backend"],
+)
+
+PARSE_CACHE_MAX_SIZE = 2048
+
+# Parsed ASTs, keyed by (rule, backend, text, start). Cached nodes are never handed out directly.
+# Callers always get a clone, so the cached tree can't be mutated.
+PARSE_CACHE: LRUCache[AST] = LRUCache(max_size=PARSE_CACHE_MAX_SIZE)
+
+
+def _parse_cached(
+    rule: Literal["expr", "order_expr", "select", "full_template_string"],
+    backend: Literal["python", "cpp"],
+    string: str,
+    *args: Any,
+    clone: bool = True,
+) -> Any:
+    """Run the parser for `rule`, or return a copy of a previous parse of the same text.
+
+    Pass `clone=False` only if the caller will copy the node itself (e.g. when replacing placeholders)."""
+    key = (rule, backend, string, *args)
+    node = PARSE_CACHE.get(key)
+    if node is not None:
+        PARSE_CACHE_HIT_COUNTER.labels(rule=rule, backend=backend).inc()
+        return clone_expr(node) if clone else node
+    PARSE_CACHE_MISS_COUNTER.labels(rule=rule, backend=backend).inc()
+    with RULE_TO_HISTOGRAM[rule].labels(backend=backend).time():
+        node = RULE_TO_PARSE_FUNCTION[backend][rule](string, *args)
+    PARSE_CACHE.set(key, node)
+    return clone_expr(node) if clone else node
+
 
 def parse_program(
     program: str, placeholders: Optional[dict[str, ast.Expr]] = None, start: Optional[int] = 0
@@ -69,8 +110,7 @@ def parse_string_template(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_full_template_string_{backend}"):
-        with RULE_TO_HISTOGRAM["full_template_string"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["full_template_string"]("F'" + string)
+        node = _parse_cached("full_template_string", backend, "F'" + string, clone=not placeholders)
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -88,8 +128,7 @@ def parse_expr(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_expr_{backend}"):
-        with RULE_TO_HISTOGRAM["expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["expr"](expr, start)
+        node = _parse_cached("expr", backend, expr, start, clone=not placeholders)
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -106,8 +145,7 @@ def parse_order_expr(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_order_expr_{backend}"):
-        with RULE_TO_HISTOGRAM["order_expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["order_expr"](order_expr)
+        node = _parse_cached("order_expr", backend, order_expr, clone=not placeholders)
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -124,8 +162,7 @@ def parse_select(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_select_{backend}"):
-        with RULE_TO_HISTOGRAM["select"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["select"](statement)
+        node = _parse_cached("select", backend, statement, clone=not placeholders)
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -1,9 +1,13 @@
 import dataclasses
+import hashlib
 from typing import Optional, Union, cast
 
+from prometheus_client import Counter
+
 from posthog.clickhouse.client.connection import Workload
 from posthog.errors import ExposedCHQueryError
 from posthog.hogql import ast
+from posthog.hogql.cache import LRUCache
 from posthog.hogql.constants import HogQLGlobalSettings, LimitContext, get_default_limit_for_context
 from posthog.hogql.errors import ExposedHogQLError
 from posthog.hogql.hogql import HogQLContext
@@ -16,6 +20,7 @@ from posthog.hogql.printer import (
     print_prepared_ast,
 )
 from posthog.hogql.filters import replace_filters
+from posthog.hogql.schema_version import get_team_schema_version
 from posthog.hogql.timings import HogQLTimings
 from posthog.hogql.visitor import clone_expr
 from posthog.models.team import Team
@@ -24,6 +29,46 @@ from posthog.client import sync_execute
 from posthog.schema import HogQLQueryResponse, HogQLFilters, HogQLQueryModifiers, HogQLMetadata, HogQLMetadataResponse
 from posthog.settings import HOGQL_INCREASED_MAX_EXECUTION_TIME
 
+PRINTED_QUERY_CACHE_COUNTER = Counter(
+    "hogql_printed_query_cache_total",
+    "Whether execute_hogql_query could reuse previously printed SQL",
+    labelnames=["cache_hit"],
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class PrintedQuery:
+    hogql: str
+    columns: list[str]
+    clickhouse: str
+    values: dict
+
+
+# Property definitions are mostly written by the plugin server, which doesn't bump the schema version.
+# The TTL bounds how long a newly typed property can be printed with a stale type.
+PRINTED_QUERY_CACHE: LRUCache[PrintedQuery] = LRUCache(max_size=1024, ttl=5 * 60)
+
+
+def get_printed_query_cache_key(
+    select_query: ast.SelectQuery | ast.SelectUnionQuery,
+    team: Team,
+    modifiers: HogQLQueryModifiers,
+    settings: HogQLGlobalSettings,
+    pretty: bool,
+) -> str:
+    normalized_query = clone_expr(select_query, clear_types=True, clear_locations=True)
+    key_parts = (
+        repr(normalized_query),
+        team.pk,
+        team.timezone,
+        team.week_start_day,
+        get_team_schema_version(team.pk),
+        modifiers.model_dump_json(),
+        settings.model_dump_json(),
+        pretty,
+    )
+    return hashlib.sha256(repr(key_parts).encode()).hexdigest()
+
 
 def execute_hogql_query(
     query: Union[str, ast.SelectQuery, ast.SelectUnionQuery],
@@ -43,11 +88,13 @@ def execute_hogql_query(
     if timings is None:
         timings = HogQLTimings()
 
-    if context is None:
-        context = HogQLContext(team_id=team.pk)
-
     query_modifiers = create_default_modifiers_for_team(team, modifiers)
     debug = modifiers is not None and modifiers.debug
+
+    # Callers passing their own context may depend on its side effects (database, values), so only cache without one
+    use_printed_query_cache = context is None and not debug
+    if context is None:
+        context = HogQLContext(team_id=team.pk)
     error: Optional[str] = None
     explain: Optional[list[str]] = None
     results = None
@@ -88,81 +135,113 @@ def execute_hogql_query(
             if one_query.limit is None:
                 one_query.limit = ast.Constant(value=get_default_limit_for_context(limit_context))
 
-    # Get printed HogQL query, and returned columns. Using a cloned query.
-    with timings.measure("hogql"):
-        with timings.measure("prepare_ast"):
-            hogql_query_context = dataclasses.replace(
-                context,
-                # set the team.pk here so someone can't pass a context for a different team 🤷‍️
-                team_id=team.pk,
-                team=team,
-                enable_select_queries=True,
-                timings=timings,
-                modifiers=query_modifiers,
-            )
+    settings = settings or HogQLGlobalSettings()
+    if limit_context in (LimitContext.EXPORT, LimitContext.COHORT_CALCULATION, LimitContext.QUERY_ASYNC):
+        settings.max_execution_time = HOGQL_INCREASED_MAX_EXECUTION_TIME
 
-            with timings.measure("clone"):
-                cloned_query = clone_expr(select_query, True)
-            select_query_hogql = cast(
-                ast.SelectQuery,
-                prepare_ast_for_printing(node=cloned_query, context=hogql_query_context, dialect="hogql"),
-            )
+    hogql_query_context = dataclasses.replace(
+        context,
+        # set the team.pk here so someone can't pass a context for a different team 🤷‍️
+        team_id=team.pk,
+        team=team,
+        enable_select_queries=True,
+        timings=timings,
+        modifiers=query_modifiers,
+    )
+    clickhouse_context = dataclasses.replace(
+        context,
+        # set the team.pk here so someone can't pass a context for a different team 🤷‍️
+        team_id=team.pk,
+        team=team,
+        enable_select_queries=True,
+        timings=timings,
+        modifiers=query_modifiers,
+    )
 
-        with timings.measure("print_ast"):
-            hogql = print_prepared_ast(
-                select_query_hogql, hogql_query_context, "hogql", pretty=pretty if pretty is not None else True
-            )
-            print_columns = []
-            columns_query = (
-                select_query_hogql.select_queries[0]
-                if isinstance(select_query_hogql, ast.SelectUnionQuery)
-                else select_query_hogql
+    printed_query_cache_key: Optional[str] = None
+    printed_query: Optional[PrintedQuery] = None
+    if use_printed_query_cache:
+        with timings.measure("printed_query_cache"):
+            printed_query_cache_key = get_printed_query_cache_key(
+                select_query, team, query_modifiers, settings, pretty=pretty if pretty is not None else True
             )
-            for node in columns_query.select:
-                if isinstance(node, ast.Alias):
-                    print_columns.append(node.alias)
-                else:
-                    print_columns.append(
-                        print_prepared_ast(
-                            node=node,
-                            context=hogql_query_context,
-                            dialect="hogql",
-                            stack=[select_query_hogql],
+            printed_query = PRINTED_QUERY_CACHE.get(printed_query_cache_key)
+        PRINTED_QUERY_CACHE_COUNTER.labels(cache_hit=printed_query is not None).inc()
+
+    if printed_query is not None:
+        hogql = printed_query.hogql
+        print_columns = list(printed_query.columns)
+        clickhouse_sql: Optional[str] = printed_query.clickhouse
+        clickhouse_context.values.update(printed_query.values)
+    else:
+        # Get printed HogQL query, and returned columns. Using a cloned query.
+        with timings.measure("hogql"):
+            with timings.measure("prepare_ast"):
+                with timings.measure("clone"):
+                    cloned_query = clone_expr(select_query, True)
+                select_query_hogql = cast(
+                    ast.SelectQuery,
+                    prepare_ast_for_printing(node=cloned_query, context=hogql_query_context, dialect="hogql"),
+                )
+
+            with timings.measure("print_ast"):
+                hogql = print_prepared_ast(
+                    select_query_hogql, hogql_query_context, "hogql", pretty=pretty if pretty is not None else True
+                )
+                print_columns = []
+                columns_query = (
+                    select_query_hogql.select_queries[0]
+                    if isinstance(select_query_hogql, ast.SelectUnionQuery)
+                    else select_query_hogql
+                )
+                for node in columns_query.select:
+                    if isinstance(node, ast.Alias):
+                        print_columns.append(node.alias)
+                    else:
+                        print_columns.append(
+                            print_prepared_ast(
+                                node=node,
+                                context=hogql_query_context,
+                                dialect="hogql",
+                                stack=[select_query_hogql],
+                            )
                         )
-                    )
 
-    settings = settings or HogQLGlobalSettings()
-    if limit_context in (LimitContext.EXPORT, LimitContext.COHORT_CALCULATION, LimitContext.QUERY_ASYNC):
-        settings.max_execution_time = HOGQL_INCREASED_MAX_EXECUTION_TIME
+        # Print the ClickHouse SQL query
+        with timings.measure("print_ast"):
+            try:
+                clickhouse_sql = print_ast(
+                    select_query,
+                    context=clickhouse_context,
+                    dialect="clickhouse",
+                    settings=settings,
+                    pretty=pretty if pretty is not None else True,
+                )
+            except Exception as e:
+                if debug:
+                    clickhouse_sql = None
+                    if isinstance(e, ExposedCHQueryError | ExposedHogQLError):
+                        error = str(e)
+                    else:
+                        error = "Unknown error"
+                else:
+                    raise e
 
-    # Print the ClickHouse SQL query
-    with timings.measure("print_ast"):
-        try:
-            clickhouse_context = dataclasses.replace(
-                context,
-                # set the team.pk here so someone can't pass a context for a different team 🤷‍️
-                team_id=team.pk,
-                team=team,
-                enable_select_queries=True,
-                timings=timings,
-                modifiers=query_modifiers,
-            )
-            clickhouse_sql = print_ast(
-                select_query,
-                context=clickhouse_context,
-                dialect="clickhouse",
-                settings=settings,
-                pretty=pretty if pretty is not None else True,
+        if (
+            printed_query_cache_key is not None
+            and clickhouse_sql is not None
+            and hogql_query_context.printed_query_cacheable
+            and clickhouse_context.printed_query_cacheable
+        ):
+            PRINTED_QUERY_CACHE.set(
+                printed_query_cache_key,
+                PrintedQuery(
+                    hogql=hogql,
+                    columns=list(print_columns),
+                    clickhouse=clickhouse_sql,
+                    values=dict(clickhouse_context.values),
+                ),
             )
-        except Exception as e:
-            if debug:
-                clickhouse_sql = None
-                if isinstance(e, ExposedCHQueryError | ExposedHogQLError):
-                    error = str(e)
-                else:
-                    error = "Unknown error"
-            else:
-                raise e
 
     if clickhouse_sql is not None:
         timings_dict = timings.to_dict()
@@ -0,0 +1,32 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+# The version only has to outlive the caches that depend on it. If it expires, a new one is created and those
+# caches simply miss.
+SCHEMA_VERSION_TTL = 60 * 60 * 24 * 7
+
+
+def _schema_version_cache_key(team_id: int) -> str:
+    return f"hogql_schema_version_{team_id}"
+
+
+def get_team_schema_version(team_id: int) -> str:
+    """
+    Opaque token that changes whenever anything HogQL reads to build a team's schema changes: group type mappings,
+    data warehouse tables, views, joins and credentials, or property definitions.
+
+    Use it as part of the key for anything cached from a team's HogQL database.
+    """
+    key = _schema_version_cache_key(team_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version, SCHEMA_VERSION_TTL):
+            # Another process created the version between our get and add
+            version = cache.get(key) or version
+    return version
+
+
+def invalidate_team_schema(team_id: int) -> None:
+    cache.set(_schema_version_cache_key(team_id), uuid4().hex, SCHEMA_VERSION_TTL)
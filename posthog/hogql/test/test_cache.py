@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from posthog.hogql.cache import LRUCache
+from posthog.test.base import BaseTest
+
+
+class TestLRUCache(BaseTest):
+    def test_least_recently_used_entries_are_evicted(self):
+        cache: LRUCache[str] = LRUCache(max_size=2)
+        cache.set("a", "a")
+        cache.set("b", "b")
+        cache.get("a")
+        cache.set("c", "c")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), "a")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "c")
+
+    def test_entries_are_evicted_by_weight(self):
+        cache: LRUCache[str] = LRUCache(max_size=5, weigh=len)
+        cache.set("a", "aa")
+        cache.set("b", "bbb")
+        self.assertEqual(len(cache), 2)
+        cache.set("c", "c")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "bbb")
+        self.assertEqual(cache.get("c"), "c")
+
+        # values heavier than the whole cache aren't cached, and don't evict anything else
+        cache.set("c", "cccccc")
+        self.assertIsNone(cache.get("c"))
+        self.assertEqual(cache.get("b"), "bbb")
+
+    def test_zero_size_disables_cache(self):
+        cache: LRUCache[str] = LRUCache(max_size=0)
+        cache.set("a", "a")
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get("a"))
+
+    def test_entries_expire_after_ttl(self):
+        cache: LRUCache[str] = LRUCache(max_size=2, ttl=10)
+        with patch("posthog.hogql.cache.monotonic", return_value=100):
+            cache.set("a", "a")
+        with patch("posthog.hogql.cache.monotonic", return_value=105):
+            self.assertEqual(cache.get("a"), "a")
+        with patch("posthog.hogql.cache.monotonic", return_value=111):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
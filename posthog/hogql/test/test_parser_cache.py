@@ -0,0 +1,46 @@
+from posthog.hogql import ast
+from posthog.hogql.parser import PARSE_CACHE, parse_expr, parse_select
+from posthog.test.base import BaseTest
+
+
+class TestParseCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        PARSE_CACHE.clear()
+
+    def test_repeated_parse_returns_equal_copies(self):
+        first = parse_select("select event from events where timestamp > now()")
+        second = parse_select("select event from events where timestamp > now()")
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual(len(PARSE_CACHE), 1)
+
+    def test_mutating_result_does_not_affect_cache(self):
+        first = parse_expr("1 + 2")
+        assert isinstance(first, ast.ArithmeticOperation)
+        first.left = ast.Constant(value=100)
+        self.assertEqual(
+            parse_expr("1 + 2"),
+            ast.ArithmeticOperation(
+                left=ast.Constant(value=1, start=0, end=1),
+                right=ast.Constant(value=2, start=4, end=5),
+                op=ast.ArithmeticOperationOp.Add,
+                start=0,
+                end=5,
+            ),
+        )
+
+    def test_placeholders_are_not_cached(self):
+        first = parse_expr("{foo} + 1", placeholders={"foo": ast.Constant(value=1)})
+        second = parse_expr("{foo} + 1", placeholders={"foo": ast.Constant(value=2)})
+        assert isinstance(first, ast.ArithmeticOperation) and isinstance(second, ast.ArithmeticOperation)
+        self.assertEqual(first.left, ast.Constant(value=1, start=0, end=5))
+        self.assertEqual(second.left, ast.Constant(value=2, start=0, end=5))
+        self.assertEqual(parse_expr("{foo} + 1").left, ast.Placeholder(field="foo", start=0, end=5))  # type: ignore
+
+    def test_backend_and_start_are_part_of_the_key(self):
+        parse_expr("1", backend="cpp")
+        parse_expr("1", backend="python")
+        parse_expr("1", start=None)
+        self.assertEqual(len(PARSE_CACHE), 3)
+        self.assertEqual(parse_expr("1", start=None), ast.Constant(value=1))
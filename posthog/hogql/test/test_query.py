@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import patch
 from uuid import UUID
 
 from zoneinfo import ZoneInfo
@@ -9,16 +10,23 @@ from freezegun import freeze_time
 from posthog import datetime
 from posthog.hogql import ast
 from posthog.hogql.errors import SyntaxError, QueryError
+from posthog.hogql.printer import print_ast
 from posthog.hogql.property import property_to_expr
 from posthog.hogql.query import execute_hogql_query
 from posthog.hogql.test.utils import pretty_print_in_tests, pretty_print_response_in_tests
-from posthog.models import Cohort
+from posthog.models import Cohort, GroupTypeMapping
 from posthog.models.cohort.util import recalculate_cohortpeople
 from posthog.models.utils import UUIDT
 from posthog.session_recordings.queries.test.session_replay_sql import (
     produce_replay_summary,
 )
-from posthog.schema import HogQLFilters, EventPropertyFilter, DateRange, QueryTiming
+from posthog.schema import (
+    HogQLFilters,
+    EventPropertyFilter,
+    DateRange,
+    QueryTiming,
+    HogQLQueryModifiers,
+)
 from posthog.settings import HOGQL_INCREASED_MAX_EXECUTION_TIME
 from posthog.test.base import (
     APIBaseTest,
@@ -1464,3 +1472,62 @@ class TestQuery(ClickhouseTestMixin, APIBaseTest):
             (random_uuid, 600),
             (random_uuid, 600),
         ]
+
+    def test_printed_query_is_cached(self):
+        random_uuid = self._create_random_events()
+        query = "select count(), event from events where properties.random_uuid = {random_uuid} group by event"
+        placeholders: dict[str, ast.Expr] = {"random_uuid": ast.Constant(value=random_uuid)}
+
+        with patch("posthog.hogql.query.print_ast", wraps=print_ast) as print_ast_spy:
+            response = execute_hogql_query(query, placeholders=placeholders, team=self.team)
+            cached_response = execute_hogql_query(query, placeholders=placeholders, team=self.team)
+
+        self.assertEqual(print_ast_spy.call_count, 1)
+        self.assertEqual(cached_response.clickhouse, response.clickhouse)
+        self.assertEqual(cached_response.hogql, response.hogql)
+        self.assertEqual(cached_response.columns, response.columns)
+        self.assertEqual(cached_response.results, [(2, "random event")])
+
+    def test_printed_query_cache_is_keyed_on_values_and_modifiers(self):
+        random_uuid = self._create_random_events()
+        query = "select count() from events where properties.random_uuid = {random_uuid}"
+
+        with patch("posthog.hogql.query.print_ast", wraps=print_ast) as print_ast_spy:
+            response = execute_hogql_query(
+                query, placeholders={"random_uuid": ast.Constant(value=random_uuid)}, team=self.team
+            )
+            other_response = execute_hogql_query(
+                query, placeholders={"random_uuid": ast.Constant(value="other")}, team=self.team
+            )
+            execute_hogql_query(
+                query,
+                placeholders={"random_uuid": ast.Constant(value=random_uuid)},
+                team=self.team,
+                modifiers=HogQLQueryModifiers(optimizeJoinedFilters=True),
+            )
+
+        self.assertEqual(print_ast_spy.call_count, 3)
+        self.assertEqual(response.results, [(2,)])
+        self.assertEqual(other_response.results, [(0,)])
+
+    def test_printed_query_cache_is_invalidated_on_schema_change(self):
+        query = "select count() from events"
+
+        with patch("posthog.hogql.query.print_ast", wraps=print_ast) as print_ast_spy:
+            execute_hogql_query(query, team=self.team)
+            GroupTypeMapping.objects.create(team=self.team, group_type="organization", group_type_index=0)
+            execute_hogql_query(query, team=self.team)
+
+        self.assertEqual(print_ast_spy.call_count, 2)
+
+    def test_printed_query_is_not_cached_when_it_resolves_cohorts(self):
+        cohort = Cohort.objects.create(team=self.team, groups=[], is_static=False, name="cohort")
+        query = f"select count() from events where person_id in cohort {cohort.pk}"
+
+        with patch("posthog.hogql.query.print_ast", wraps=print_ast) as print_ast_spy:
+            response = execute_hogql_query(query, team=self.team)
+            Cohort.objects.filter(pk=cohort.pk).update(version=1)
+            new_response = execute_hogql_query(query, team=self.team)
+
+        self.assertEqual(print_ast_spy.call_count, 2)
+        self.assertNotEqual(new_response.clickhouse, response.clickhouse)
@@ -1,8 +1,10 @@
+from typing import cast
+
 from posthog.hogql import ast
 from posthog.hogql.ast import UUIDType, HogQLXTag, HogQLXAttribute
 from posthog.hogql.errors import InternalHogQLError
 from posthog.hogql.parser import parse_expr
-from posthog.hogql.visitor import CloningVisitor, Visitor, TraversingVisitor
+from posthog.hogql.visitor import CloningVisitor, Visitor, TraversingVisitor, clone_expr
 from posthog.test.base import BaseTest
 
 
@@ -154,3 +156,44 @@ class TestVisitor(BaseTest):
         assert NamingCheck().visit(UUIDType()) == "visit_uuid_type"
         assert NamingCheck().visit(HogQLXAttribute(name="a", value="a")) == "visit_hogqlx_attribute"
         assert NamingCheck().visit(HogQLXTag(kind="", attributes=[])) == "visit_hogqlx_tag"
+
+    def test_clone_expr_copies_every_node(self):
+        node = parse_expr("concat(properties.a, 'b') = 'c' and not f(1 + 2, [3], (4, 5))")
+        clone = clone_expr(node)
+        self.assertEqual(clone, node)
+
+        originals = {id(child) for child in _all_nodes(node)}
+        self.assertTrue(all(id(child) not in originals for child in _all_nodes(clone)))
+        field, cloned_field = (next(n for n in _all_nodes(expr) if isinstance(n, ast.Field)) for expr in (node, clone))
+        self.assertIsNot(cast(ast.Field, cloned_field).chain, cast(ast.Field, field).chain)
+
+    def test_clone_expr_clears_types_and_locations(self):
+        node = ast.Call(
+            name="f",
+            args=[ast.Constant(value=1, start=2, end=3, type=ast.IntegerType())],
+            start=0,
+            end=4,
+            type=ast.CallType(name="f", arg_types=[], return_type=ast.UnknownType()),
+        )
+
+        clone = cast(ast.Call, clone_expr(node, clear_types=True))
+        self.assertEqual((clone.start, clone.end, clone.type), (0, 4, None))
+        self.assertEqual((clone.args[0].start, clone.args[0].end, clone.args[0].type), (2, 3, None))
+
+        clone = cast(ast.Call, clone_expr(node, clear_locations=True))
+        self.assertEqual((clone.start, clone.end, clone.type), (None, None, node.type))
+        self.assertEqual((clone.args[0].start, clone.args[0].end, clone.args[0].type), (None, None, ast.IntegerType()))
+        self.assertEqual(node.args[0].start, 2)
+
+
+def _all_nodes(node: ast.Expr) -> list[ast.Expr]:
+    nodes = []
+
+    class Collector(TraversingVisitor):
+        def visit(self, node):
+            if node is not None:
+                nodes.append(node)
+            return super().visit(node)
+
+    Collector().visit(node)
+    return nodes
@@ -85,6 +85,8 @@ class MultipleInCohortResolver(TraversingVisitor):
     ) -> list[tuple[int, StaticOrDynamic, int]]:
         from posthog.models import Cohort
 
+        self.context.printed_query_cacheable = False
+
         cohorts: list[tuple[int, StaticOrDynamic, int]] = []
 
         for node in compare_operations:
@@ -286,6 +288,8 @@ class InCohortResolver(TraversingVisitor):
 
             from posthog.models import Cohort
 
+            self.context.printed_query_cacheable = False
+
             if (isinstance(arg.value, int) or isinstance(arg.value, float)) and not isinstance(arg.value, bool):
                 cohorts = Cohort.objects.filter(id=int(arg.value), team_id=self.context.team_id).values_list(
                     "id", "is_static", "version", "name"
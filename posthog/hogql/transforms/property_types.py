@@ -1,21 +1,58 @@
 from typing import Literal, Optional, cast
 
+from django.core.cache import cache
+from prometheus_client import Counter
+
 from posthog.hogql import ast
+from posthog.hogql.cache import LRUCache
 from posthog.hogql.context import HogQLContext
 from posthog.hogql.database.models import (
     DateTimeDatabaseField,
     BooleanDatabaseField,
 )
 from posthog.hogql.escape_sql import escape_hogql_identifier
+from posthog.hogql.schema_version import get_team_schema_version
 from posthog.hogql.visitor import CloningVisitor, TraversingVisitor
 from posthog.models.property import PropertyName, TableColumn
 from posthog.schema import PersonsOnEventsMode
 from posthog.hogql.database.s3_table import S3Table
 
 
-def resolve_property_types(node: ast.Expr, context: HogQLContext) -> ast.Expr:
-    from posthog.models import PropertyDefinition
+# (PropertyDefinition.Type, group type index, name) -> property type, for all typed property definitions of a team
+PropertyTypes = dict[tuple[int, Optional[int], str], str]
+
+# Teams with more property definitions than this aren't cached as a whole. Instead, the properties each query uses
+# are looked up. Keeps both the per-process cache and the Redis values small.
+PROPERTY_TYPES_CACHE_MAX_DEFINITIONS = 2_000
+# Marks teams with too many property definitions, so that they aren't loaded again to find that out
+TOO_MANY_PROPERTY_DEFINITIONS = "too_many"
+
+# Property types, keyed by team and schema version, which signals on property definitions bump. The TTLs cover
+# property definitions that don't go through Django, e.g. the ones the plugin server creates while ingesting events.
+PROPERTY_TYPES_CACHE_TTL = 5 * 60
+# The in-memory cache is bounded by the property definitions it holds across teams, rather than by its number of teams
+PROPERTY_TYPES_CACHE_MAX_ENTRIES = 100_000
+PROPERTY_TYPES_CACHE: LRUCache[PropertyTypes | str] = LRUCache(
+    max_size=PROPERTY_TYPES_CACHE_MAX_ENTRIES,
+    ttl=60,
+    weigh=lambda property_types: 1 + (len(property_types) if isinstance(property_types, dict) else 0),
+)
+# Event, person and group property types of the properties queries use, for teams with too many property definitions
+FoundPropertyTypes = tuple[dict[str, str], dict[str, str], dict[str, str]]
+QUERIED_PROPERTY_TYPES_CACHE: LRUCache[FoundPropertyTypes] = LRUCache(
+    max_size=PROPERTY_TYPES_CACHE_MAX_ENTRIES,
+    ttl=60,
+    weigh=lambda found_property_types: 1 + sum(len(property_types) for property_types in found_property_types),
+)
+
+PROPERTY_TYPES_CACHE_COUNTER = Counter(
+    "hogql_property_types_cache_total",
+    "Where the property types of a team were found: in memory, in Redis or not at all (miss).",
+    labelnames=["result"],
+)
 
+
+def resolve_property_types(node: ast.Expr, context: HogQLContext) -> ast.Expr:
     if not context or not context.team_id:
         return node
 
@@ -23,11 +60,117 @@ def resolve_property_types(node: ast.Expr, context: HogQLContext) -> ast.Expr:
     property_finder = PropertyFinder(context)
     property_finder.visit(node)
 
-    # fetch them
+    # look up their types
+    property_types = get_team_property_types(context.team_id)
+    if property_types == TOO_MANY_PROPERTY_DEFINITIONS:
+        event_properties, person_properties, group_properties = _get_queried_property_types(
+            property_finder, context.team_id
+        )
+    else:
+        event_properties, person_properties, group_properties = _find_property_types(
+            property_finder, cast(PropertyTypes, property_types)
+        )
+
+    timezone = context.database.get_timezone() if context and context.database else "UTC"
+    property_swapper = PropertySwapper(
+        timezone=timezone,
+        event_properties=event_properties,
+        person_properties=person_properties,
+        group_properties=group_properties,
+        context=context,
+    )
+    return property_swapper.visit(node)
+
+
+def get_team_property_types(team_id: int) -> PropertyTypes | str:
+    """The types of all of the team's property definitions, or TOO_MANY_PROPERTY_DEFINITIONS."""
+    version = get_team_schema_version(team_id)
+    property_types = PROPERTY_TYPES_CACHE.get((team_id, version))
+    if property_types is not None:
+        PROPERTY_TYPES_CACHE_COUNTER.labels(result="memory").inc()
+        return property_types
+
+    cache_key = f"hogql_property_types_{team_id}_{version}"
+    property_types = cache.get(cache_key)
+    if property_types is not None:
+        PROPERTY_TYPES_CACHE_COUNTER.labels(result="redis").inc()
+    else:
+        PROPERTY_TYPES_CACHE_COUNTER.labels(result="miss").inc()
+        property_types = _load_property_types(team_id)
+        cache.set(cache_key, property_types, PROPERTY_TYPES_CACHE_TTL)
+
+    PROPERTY_TYPES_CACHE.set((team_id, version), property_types)
+    return property_types
+
+
+def _load_property_types(team_id: int) -> PropertyTypes | str:
+    from posthog.models import PropertyDefinition
+
+    property_definitions = list(
+        PropertyDefinition.objects.filter(
+            team_id=team_id,
+            type__in=[PropertyDefinition.Type.EVENT, PropertyDefinition.Type.PERSON, PropertyDefinition.Type.GROUP],
+            property_type__isnull=False,
+        ).values_list("type", "group_type_index", "name", "property_type")[: PROPERTY_TYPES_CACHE_MAX_DEFINITIONS + 1]
+    )
+    if len(property_definitions) > PROPERTY_TYPES_CACHE_MAX_DEFINITIONS:
+        return TOO_MANY_PROPERTY_DEFINITIONS
+
+    return {
+        (type, group_type_index if type == PropertyDefinition.Type.GROUP else None, name): property_type
+        for type, group_type_index, name, property_type in property_definitions
+        if property_type
+    }
+
+
+def _find_property_types(
+    property_finder: "PropertyFinder", property_types: PropertyTypes
+) -> tuple[dict[str, str], dict[str, str], dict[str, str]]:
+    from posthog.models import PropertyDefinition
+
+    event_properties = {
+        name: property_types[(PropertyDefinition.Type.EVENT, None, name)]
+        for name in property_finder.event_properties
+        if (PropertyDefinition.Type.EVENT, None, name) in property_types
+    }
+    person_properties = {
+        name: property_types[(PropertyDefinition.Type.PERSON, None, name)]
+        for name in property_finder.person_properties
+        if (PropertyDefinition.Type.PERSON, None, name) in property_types
+    }
+    group_properties = {
+        f"{group_id}_{name}": property_types[(PropertyDefinition.Type.GROUP, group_id, name)]
+        for group_id, properties in property_finder.group_properties.items()
+        for name in properties
+        if (PropertyDefinition.Type.GROUP, group_id, name) in property_types
+    }
+    return event_properties, person_properties, group_properties
+
+
+def _get_queried_property_types(property_finder: "PropertyFinder", team_id: int) -> FoundPropertyTypes:
+    cache_key = (
+        team_id,
+        get_team_schema_version(team_id),
+        frozenset(property_finder.event_properties),
+        frozenset(property_finder.person_properties),
+        frozenset((group_id, frozenset(names)) for group_id, names in property_finder.group_properties.items()),
+    )
+    found_property_types = QUERIED_PROPERTY_TYPES_CACHE.get(cache_key)
+    if found_property_types is None:
+        found_property_types = _query_property_types(property_finder, team_id)
+        QUERIED_PROPERTY_TYPES_CACHE.set(cache_key, found_property_types)
+    return found_property_types
+
+
+def _query_property_types(
+    property_finder: "PropertyFinder", team_id: int
+) -> tuple[dict[str, str], dict[str, str], dict[str, str]]:
+    from posthog.models import PropertyDefinition
+
     event_property_values = (
         PropertyDefinition.objects.filter(
             name__in=property_finder.event_properties,
-            team_id=context.team_id,
+            team_id=team_id,
             type__in=[None, PropertyDefinition.Type.EVENT],
         ).values_list("name", "property_type")
         if property_finder.event_properties
@@ -38,7 +181,7 @@ def resolve_property_types(node: ast.Expr, context: HogQLContext) -> ast.Expr:
     person_property_values = (
         PropertyDefinition.objects.filter(
             name__in=property_finder.person_properties,
-            team_id=context.team_id,
+            team_id=team_id,
             type=PropertyDefinition.Type.PERSON,
         ).values_list("name", "property_type")
         if property_finder.person_properties
@@ -52,7 +195,7 @@ def resolve_property_types(node: ast.Expr, context: HogQLContext) -> ast.Expr:
             continue
         group_property_values = PropertyDefinition.objects.filter(
             name__in=properties,
-            team_id=context.team_id,
+            team_id=team_id,
             type=PropertyDefinition.Type.GROUP,
             group_type_index=group_id,
         ).values_list("name", "property_type")
@@ -60,15 +203,7 @@ def resolve_property_types(node: ast.Expr, context: HogQLContext) -> ast.Expr:
             {f"{group_id}_{name}": property_type for name, property_type in group_property_values if property_type}
         )
 
-    timezone = context.database.get_timezone() if context and context.database else "UTC"
-    property_swapper = PropertySwapper(
-        timezone=timezone,
-        event_properties=event_properties,
-        person_properties=person_properties,
-        group_properties=group_properties,
-        context=context,
-    )
-    return property_swapper.visit(node)
+    return event_properties, person_properties, group_properties
 
 
 class PropertyFinder(TraversingVisitor):
@@ -1,12 +1,19 @@
 import pytest
 from typing import Any
+from unittest.mock import patch
 
 from django.test import override_settings
 
 from posthog.hogql.context import HogQLContext
 from posthog.hogql.parser import parse_select
 from posthog.hogql.printer import print_ast
+from posthog.hogql.schema_version import invalidate_team_schema
 from posthog.hogql.test.utils import pretty_print_in_tests
+from posthog.hogql.transforms.property_types import (
+    QUERIED_PROPERTY_TYPES_CACHE,
+    TOO_MANY_PROPERTY_DEFINITIONS,
+    get_team_property_types,
+)
 from posthog.models import PropertyDefinition, GroupTypeMapping
 from posthog.models.group.util import create_group
 from posthog.test.base import BaseTest
@@ -148,6 +155,39 @@ class TestPropertyTypes(BaseTest):
 
         assert printed == self.snapshot
 
+    def test_property_types_are_cached_per_team(self):
+        property_types = get_team_property_types(self.team.pk)
+        assert isinstance(property_types, dict)
+        assert property_types[(PropertyDefinition.Type.EVENT, None, "$screen_width")] == "Numeric"
+        assert property_types[(PropertyDefinition.Type.PERSON, None, "provided_timestamp")] == "DateTime"
+        assert property_types[(PropertyDefinition.Type.GROUP, 0, "inty")] == "Numeric"
+
+        with self.assertNumQueries(0):
+            assert get_team_property_types(self.team.pk) == property_types
+
+        property_definition = PropertyDefinition.objects.get(team=self.team, name="$screen_width")
+        property_definition.property_type = "String"
+        property_definition.save()
+
+        property_types = get_team_property_types(self.team.pk)
+        assert isinstance(property_types, dict)
+        assert property_types[(PropertyDefinition.Type.EVENT, None, "$screen_width")] == "String"
+
+    def test_teams_with_too_many_property_definitions_query_the_properties_they_use(self):
+        select = "select properties.$screen_width * properties.$screen_height, properties.bool from events"
+        printed = self._print_select(select)
+
+        invalidate_team_schema(self.team.pk)
+        QUERIED_PROPERTY_TYPES_CACHE.clear()
+        with patch("posthog.hogql.transforms.property_types.PROPERTY_TYPES_CACHE_MAX_DEFINITIONS", 2):
+            assert get_team_property_types(self.team.pk) == TOO_MANY_PROPERTY_DEFINITIONS
+            assert self._print_select(select) == printed
+
+            # the types of the properties the query uses are cached
+            with patch("posthog.hogql.transforms.property_types._query_property_types") as query_property_types:
+                assert self._print_select(select) == printed
+            query_property_types.assert_not_called()
+
     def _print_select(self, select: str):
         expr = parse_select(select)
         query = print_ast(
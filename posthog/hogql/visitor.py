@@ -15,6 +15,7 @@ def clear_locations(expr: Expr) -> Expr:
 
 
 T = TypeVar("T")
+E = TypeVar("E", bound=Expr)
 
 
 class Visitor(Generic[T]):
@@ -310,6 +311,18 @@ class CloningVisitor(Visitor[Any]):
         self.clear_types = clear_types
         self.clear_locations = clear_locations
 
+    def _copy_node(self, node: E) -> E:
+        # A shallow copy, for the visit methods to replace the child nodes of. Copying the attributes of the most
+        # common nodes is quicker than constructing them field by field, and big queries have thousands of them.
+        clone = object.__new__(node.__class__)
+        clone.__dict__ = node.__dict__.copy()
+        if self.clear_types:
+            clone.type = None
+        if self.clear_locations:
+            clone.start = None
+            clone.end = None
+        return clone
+
     def visit_cte(self, node: ast.CTE):
         return ast.CTE(
             start=None if self.clear_locations else node.start,
@@ -321,58 +334,36 @@ class CloningVisitor(Visitor[Any]):
         )
 
     def visit_alias(self, node: ast.Alias):
-        return ast.Alias(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            alias=node.alias,
-            hidden=node.hidden,
-            expr=self.visit(node.expr),
-        )
+        clone = self._copy_node(node)
+        clone.expr = self.visit(node.expr)
+        return clone
 
     def visit_arithmetic_operation(self, node: ast.ArithmeticOperation):
-        return ast.ArithmeticOperation(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            left=self.visit(node.left),
-            right=self.visit(node.right),
-            op=node.op,
-        )
+        clone = self._copy_node(node)
+        clone.left = self.visit(node.left)
+        clone.right = self.visit(node.right)
+        return clone
 
     def visit_and(self, node: ast.And):
-        return ast.And(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            exprs=[self.visit(expr) for expr in node.exprs],
-        )
+        clone = self._copy_node(node)
+        clone.exprs = [self.visit(expr) for expr in node.exprs]
+        return clone
 
     def visit_or(self, node: ast.Or):
-        return ast.Or(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            exprs=[self.visit(expr) for expr in node.exprs],
-        )
+        clone = self._copy_node(node)
+        clone.exprs = [self.visit(expr) for expr in node.exprs]
+        return clone
 
     def visit_compare_operation(self, node: ast.CompareOperation):
-        return ast.CompareOperation(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            left=self.visit(node.left),
-            right=self.visit(node.right),
-            op=node.op,
-        )
+        clone = self._copy_node(node)
+        clone.left = self.visit(node.left)
+        clone.right = self.visit(node.right)
+        return clone
 
     def visit_not(self, node: ast.Not):
-        return ast.Not(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            expr=self.visit(node.expr),
-        )
+        clone = self._copy_node(node)
+        clone.expr = self.visit(node.expr)
+        return clone
 
     def visit_order_expr(self, node: ast.OrderExpr):
         return ast.OrderExpr(
@@ -393,12 +384,9 @@ class CloningVisitor(Visitor[Any]):
         )
 
     def visit_tuple(self, node: ast.Tuple):
-        return ast.Tuple(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            exprs=[self.visit(expr) for expr in node.exprs],
-        )
+        clone = self._copy_node(node)
+        clone.exprs = [self.visit(expr) for expr in node.exprs]
+        return clone
 
     def visit_lambda(self, node: ast.Lambda):
         return ast.Lambda(
@@ -419,47 +407,26 @@ class CloningVisitor(Visitor[Any]):
         )
 
     def visit_array(self, node: ast.Array):
-        return ast.Array(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            exprs=[self.visit(expr) for expr in node.exprs],
-        )
+        clone = self._copy_node(node)
+        clone.exprs = [self.visit(expr) for expr in node.exprs]
+        return clone
 
     def visit_constant(self, node: ast.Constant):
-        return ast.Constant(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            value=node.value,
-        )
+        return self._copy_node(node)
 
     def visit_field(self, node: ast.Field):
-        return ast.Field(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            chain=node.chain.copy(),
-        )
+        clone = self._copy_node(node)
+        clone.chain = node.chain.copy()
+        return clone
 
     def visit_placeholder(self, node: ast.Placeholder):
-        return ast.Placeholder(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            field=node.field,
-        )
+        return self._copy_node(node)
 
     def visit_call(self, node: ast.Call):
-        return ast.Call(
-            start=None if self.clear_locations else node.start,
-            end=None if self.clear_locations else node.end,
-            type=None if self.clear_types else node.type,
-            name=node.name,
-            args=[self.visit(arg) for arg in node.args],
-            params=[self.visit(param) for param in node.params] if node.params is not None else None,
-            distinct=node.distinct,
-        )
+        clone = self._copy_node(node)
+        clone.args = [self.visit(arg) for arg in node.args]
+        clone.params = [self.visit(param) for param in node.params] if node.params is not None else None
+        return clone
 
     def visit_ratio_expr(self, node: ast.RatioExpr):
         return ast.RatioExpr(
@@ -570,6 +537,10 @@ class CloningVisitor(Visitor[Any]):
         return ast.HogQLXTag(kind=node.kind, attributes=[self.visit(a) for a in node.attributes])
 
     def visit_hogqlx_attribute(self, node: ast.HogQLXAttribute):
+        if isinstance(node.value, list):
+            return ast.HogQLXAttribute(name=node.name, value=[self.visit(v) for v in node.value])
+        if not isinstance(node.value, AST):
+            return ast.HogQLXAttribute(name=node.name, value=node.value)
         return ast.HogQLXAttribute(name=node.name, value=self.visit(node.value))
 
     def visit_program(self, node: ast.Program):
@@ -11,6 +11,7 @@ from posthog.hogql.constants import MAX_SELECT_RETURNED_ROWS, LimitContext
 from posthog.hogql.modifiers import create_default_modifiers_for_team
 from posthog.hogql_queries.insights.trends.breakdown_values import BREAKDOWN_OTHER_DISPLAY
 from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner
+from posthog.hogql_queries.query_runner import ExecutionMode
 from posthog.models.cohort.cohort import Cohort
 from posthog.models.property_definition import PropertyDefinition
 
@@ -20,7 +21,9 @@ from posthog.schema import (
     BreakdownFilter,
     BreakdownItem,
     BreakdownType,
+    CachedTrendsQueryResponse,
     ChartDisplayType,
+    CohortPropertyFilter,
     CompareItem,
     CountPerActorMathType,
     DateRange,
@@ -29,7 +32,9 @@ from posthog.schema import (
     HogQLQueryModifiers,
     InCohortVia,
     IntervalType,
+    PersonPropertyFilter,
     PropertyMathType,
+    PropertyOperator,
     TrendsFilter,
     TrendsQuery,
 )
@@ -1519,6 +1524,146 @@ class TestTrendsQueryRunner(ClickhouseTestMixin, APIBaseTest):
 
         assert response.results[0]["data"] == [1, 0, 0, 1, 1, 1, 1, 1, 1, 1, 0, 0]
 
+    def test_batch_trends_series(self):
+        self._create_test_events()
+        series: list[EventsNode | ActionsNode] = [
+            EventsNode(event="$pageview"),
+            EventsNode(event="$pageleave", math=BaseMathType.dau),
+            EventsNode(event="$pageview", math=PropertyMathType.sum, math_property="prop"),
+        ]
+
+        for trends_filter in [
+            TrendsFilter(),
+            TrendsFilter(compare=True),
+            TrendsFilter(smoothingIntervals=3),
+            TrendsFilter(display=ChartDisplayType.ActionsLineGraphCumulative),
+            TrendsFilter(display=ChartDisplayType.BoldNumber),
+            TrendsFilter(formula="A+2*B"),
+        ]:
+            with self.subTest(trends_filter=trends_filter):
+                responses = [
+                    self._run_trends_query(
+                        "2020-01-11",
+                        "2020-01-19",
+                        IntervalType.day,
+                        series,
+                        trends_filter,
+                        hogql_modifiers=HogQLQueryModifiers(batchTrendsSeries=batch_trends_series),
+                    )
+                    for batch_trends_series in (False, True)
+                ]
+
+                self.assertEqual(
+                    [
+                        (result["label"], result.get("data"), result["count"], result.get("aggregated_value"))
+                        for result in responses[0].results
+                    ],
+                    [
+                        (result["label"], result.get("data"), result["count"], result.get("aggregated_value"))
+                        for result in responses[1].results
+                    ],
+                )
+
+    def test_batch_trends_series_queries(self):
+        def queries(trends_filter: Optional[TrendsFilter], breakdown: Optional[BreakdownFilter] = None):
+            return self._create_query_runner(
+                self.default_date_from,
+                self.default_date_to,
+                IntervalType.day,
+                [
+                    EventsNode(event="$pageview"),
+                    EventsNode(event="$pageleave", math=BaseMathType.dau),
+                    EventsNode(event="$pageview", math=BaseMathType.weekly_active),
+                ],
+                trends_filter,
+                breakdown,
+                hogql_modifiers=HogQLQueryModifiers(batchTrendsSeries=True),
+            ).to_queries()
+
+        # Weekly active users need query orchestration, so only the first two series share a query
+        self.assertEqual(len(queries(None)), 2)
+        self.assertEqual(len(queries(TrendsFilter(compare=True))), 4)
+        breakdown = BreakdownFilter(breakdown_type=BreakdownType.event, breakdown="$browser")
+        self.assertEqual(len(queries(None, breakdown)), 3)
+
+    @override_settings(TRENDS_BUCKET_CACHE_ENABLED=True)
+    def test_bucket_cache_only_queries_open_intervals(self):
+        self._create_test_events()
+
+        def run_query() -> list[float]:
+            with freeze_time("2020-01-19T18:00:00Z"):
+                response = self._run_trends_query("2020-01-13", None, IntervalType.day, [EventsNode(event="$pageview")])
+                return response.results[0]["data"]
+
+        self.assertEqual(run_query(), [1, 0, 2, 0, 1, 0, 1])
+
+        # One event in a closed interval, one in the open interval of today
+        _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp="2020-01-15T12:00:00Z")
+        _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp="2020-01-19T12:00:00Z")
+        flush_persons_and_events()
+
+        self.assertEqual(run_query(), [1, 0, 2, 0, 1, 0, 2])
+        with override_settings(TRENDS_BUCKET_CACHE_ENABLED=False):
+            self.assertEqual(run_query(), [1, 0, 3, 0, 1, 0, 2])
+
+    @override_settings(TRENDS_BUCKET_CACHE_ENABLED=True)
+    def test_bucket_cache_is_not_used_with_breakdowns_or_smoothing(self):
+        self._create_test_events()
+
+        def run_query(trends_filter: Optional[TrendsFilter], breakdown: Optional[BreakdownFilter]) -> list[float]:
+            with freeze_time("2020-01-19T18:00:00Z"):
+                return self._run_trends_query(
+                    "2020-01-13", None, IntervalType.day, [EventsNode(event="$pageview")], trends_filter, breakdown
+                ).results[0]["data"]
+
+        for trends_filter, breakdown in [
+            (TrendsFilter(smoothingIntervals=2), None),
+            (None, BreakdownFilter(breakdown_type=BreakdownType.event, breakdown="$browser")),
+        ]:
+            with self.subTest(trends_filter=trends_filter, breakdown=breakdown):
+                data = run_query(trends_filter, breakdown)
+                _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp="2020-01-15T12:00:00Z")
+                flush_persons_and_events()
+                self.assertNotEqual(run_query(trends_filter, breakdown), data)
+
+    @override_settings(TRENDS_BUCKET_CACHE_ENABLED=True)
+    def test_bucket_cache_is_not_read_on_forced_refresh(self):
+        self._create_test_events()
+
+        def run_query(execution_mode: ExecutionMode) -> list[float]:
+            with freeze_time("2020-01-19T18:00:00Z"):
+                series = [EventsNode(event="$pageview")]
+                runner = self._create_query_runner("2020-01-13", None, IntervalType.day, series)
+                response = runner.run(execution_mode)
+                assert isinstance(response, CachedTrendsQueryResponse)
+                return response.results[0]["data"]
+
+        self.assertEqual(run_query(ExecutionMode.CALCULATION_ALWAYS), [1, 0, 2, 0, 1, 0, 1])
+
+        _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp="2020-01-15T12:00:00Z")
+        flush_persons_and_events()
+
+        self.assertEqual(run_query(ExecutionMode.CALCULATION_ALWAYS), [1, 0, 3, 0, 1, 0, 1])
+
+    @override_settings(TRENDS_BUCKET_CACHE_ENABLED=True)
+    def test_bucket_cache_is_not_used_with_cohort_or_person_filters(self):
+        cohort = Cohort.objects.create(team=self.team, groups=[], is_static=True)
+
+        for series in [
+            EventsNode(event="$pageview", properties=[CohortPropertyFilter(value=cohort.pk)]),
+            EventsNode(
+                event="$pageview",
+                properties=[PersonPropertyFilter(key="name", value="p1", operator=PropertyOperator.exact)],
+            ),
+        ]:
+            with self.subTest(series=series), freeze_time("2020-01-19T18:00:00Z"):
+                runner = self._create_query_runner("2020-01-13", None, IntervalType.day, [series])
+                self.assertIsNone(runner._bucket_cache(runner.series[0]))
+
+        with freeze_time("2020-01-19T18:00:00Z"):
+            runner = self._create_query_runner("2020-01-13", None, IntervalType.day, [EventsNode(event="$pageview")])
+            self.assertIsNotNone(runner._bucket_cache(runner.series[0]))
+
     @patch("posthog.hogql_queries.query_runner.create_default_modifiers_for_team")
     def test_cohort_modifier(self, patch_create_default_modifiers_for_team):
         self._create_test_events()
@@ -0,0 +1,310 @@
+from typing import Optional, cast
+
+from posthog.hogql import ast
+from posthog.hogql.parser import parse_expr
+from posthog.hogql.property import action_to_expr, property_to_expr
+from posthog.hogql_queries.insights.trends.trends_query_builder import TrendsQueryBuilder
+from posthog.hogql_queries.insights.trends.utils import series_event_name
+from posthog.models.action.action import Action
+from posthog.schema import ActionsNode, ChartDisplayType, EventsNode, HogQLQueryResponse
+
+# Aggregations that keep their meaning when only rows matching the series are aggregated with the -If combinator.
+# `avg` and quantiles are left out, as they return nan for days where only other series have events.
+BATCHABLE_AGGREGATIONS = {"count", "sum", "min", "max"}
+
+
+class TrendsBatchedQueryBuilder:
+    """
+    Calculates several series that share a date range in a single query.
+
+    Instead of scanning events once per series, events matching any of the series are scanned once and each series
+    is aggregated with a conditional aggregate, e.g. `countIf(e.uuid, event = '$pageview')` into `total_0`.
+    `split_response` then turns the result back into the response each series would have had on its own.
+    """
+
+    query_builders: list[TrendsQueryBuilder]
+
+    def __init__(self, query_builders: list[TrendsQueryBuilder]):
+        assert len(query_builders) > 0
+        self.query_builders = query_builders
+
+    @staticmethod
+    def can_batch(query_builder: TrendsQueryBuilder) -> bool:
+        series = query_builder.series
+        query = query_builder.query
+        aggregation_operation = query_builder._aggregation_operation
+
+        if not isinstance(series, EventsNode) and not isinstance(series, ActionsNode):
+            return False
+        if query.breakdownFilter is not None and query.breakdownFilter.breakdown is not None:
+            return False
+        if (
+            series.math == "hogql"
+            or aggregation_operation.requires_query_orchestration()
+            or aggregation_operation.aggregating_on_session_duration()
+        ):
+            return False
+        # Cumulative unique users or groups are counted once per query rather than per day, see `TrendsQueryBuilder`
+        if query_builder._trends_display.display_type == ChartDisplayType.ActionsLineGraphCumulative and (
+            series.math == "dau" or series.math == "unique_group"
+        ):
+            return False
+
+        aggregation = aggregation_operation.select_aggregation()
+        return (
+            isinstance(aggregation, ast.Call) and aggregation.name in BATCHABLE_AGGREGATIONS and not aggregation.params
+        )
+
+    def build_query(self) -> ast.SelectQuery:
+        events_query = self._events_query()
+
+        if self._trends_display.is_total_value():
+            return events_query
+
+        dates_query = self._date_subqueries()
+        inner_query = self._inner_select_query(
+            ast.SelectUnionQuery(select_queries=[*dates_query.select_queries, events_query])
+        )
+        return ast.SelectQuery(
+            select=[
+                ast.Alias(alias="date", expr=ast.Call(name="groupArray", args=[ast.Field(chain=["day_start"])])),
+                *[
+                    ast.Alias(
+                        alias=self._total_column(position),
+                        expr=ast.Call(name="groupArray", args=[ast.Field(chain=[self._count_column(position)])]),
+                    )
+                    for position in range(len(self.query_builders))
+                ],
+            ],
+            select_from=ast.JoinExpr(table=inner_query),
+        )
+
+    def split_response(self, response: HogQLQueryResponse) -> list[HogQLQueryResponse]:
+        """Responses for each of the series, in the shape `TrendsQueryBuilder.build_query` queries return."""
+        columns = response.columns or []
+        has_dates = "date" in columns
+
+        responses = []
+        for position in range(len(self.query_builders)):
+            total_index = columns.index(self._total_column(position))
+            if has_dates:
+                date_index = columns.index("date")
+                results = [[row[date_index], row[total_index]] for row in response.results]
+            else:
+                results = [[row[total_index]] for row in response.results]
+
+            responses.append(
+                response.model_copy(
+                    update={
+                        "columns": ["date", "total"] if has_dates else ["total"],
+                        "results": results,
+                        # Timings and errors are reported once, with the first series
+                        "timings": response.timings if position == 0 else None,
+                        "error": response.error if position == 0 else None,
+                    }
+                )
+            )
+        return responses
+
+    @property
+    def _first_query_builder(self) -> TrendsQueryBuilder:
+        return self.query_builders[0]
+
+    @property
+    def _trends_display(self):
+        return self._first_query_builder._trends_display
+
+    @staticmethod
+    def _total_column(position: int) -> str:
+        return f"total_{position}"
+
+    @staticmethod
+    def _count_column(position: int) -> str:
+        return f"count_{position}"
+
+    def _events_query(self) -> ast.SelectQuery:
+        query_builder = self._first_query_builder
+        series_filters = [self._series_filter(series_query_builder) for series_query_builder in self.query_builders]
+
+        query = ast.SelectQuery(
+            select=[
+                ast.Alias(
+                    alias=self._total_column(position),
+                    expr=self._conditional_aggregation(series_query_builder, series_filter),
+                )
+                for position, (series_query_builder, series_filter) in enumerate(
+                    zip(self.query_builders, series_filters)
+                )
+            ],
+            select_from=ast.JoinExpr(
+                table=query_builder._table_expr,
+                alias="e",
+                sample=ast.SampleExpr(sample_value=query_builder._sample_value()),
+            ),
+            where=ast.And(exprs=[*self._shared_filters(), ast.Or(exprs=series_filters)]),
+            group_by=[],
+        )
+
+        if not self._trends_display.is_total_value():
+            query.select.append(
+                ast.Alias(
+                    alias="day_start",
+                    expr=ast.Call(
+                        name=f"toStartOf{query_builder.query_date_range.interval_name.title()}",
+                        args=[ast.Field(chain=["timestamp"])],
+                    ),
+                )
+            )
+            query.group_by = [ast.Field(chain=["day_start"])]
+
+        return query
+
+    def _conditional_aggregation(self, query_builder: TrendsQueryBuilder, series_filter: ast.Expr) -> ast.Call:
+        aggregation = cast(ast.Call, query_builder._aggregation_operation.select_aggregation())
+        if aggregation.distinct:
+            return ast.Call(name="uniqExactIf", args=[*aggregation.args, series_filter])
+        return ast.Call(name=f"{aggregation.name}If", args=[*aggregation.args, series_filter])
+
+    def _shared_filters(self) -> list[ast.Expr]:
+        query_builder = self._first_query_builder
+        query = query_builder.query
+        team = query_builder.team
+        date_range_placeholders = query_builder.query_date_range.to_placeholders()
+
+        filters: list[ast.Expr] = [
+            parse_expr(
+                "timestamp >= {date_from_with_adjusted_start_of_interval}", placeholders=date_range_placeholders
+            ),
+            parse_expr("timestamp <= {date_to}", placeholders=date_range_placeholders),
+        ]
+
+        # Filter Test Accounts
+        if query.filterTestAccounts and isinstance(team.test_account_filters, list) and len(team.test_account_filters):
+            for property in team.test_account_filters:
+                filters.append(property_to_expr(property, team))
+
+        # Properties
+        if query.properties is not None and query.properties != []:
+            filters.append(property_to_expr(query.properties, team))
+
+        return filters
+
+    def _series_filter(self, query_builder: TrendsQueryBuilder) -> ast.Expr:
+        series = query_builder.series
+        team = query_builder.team
+        filters: list[ast.Expr] = []
+
+        if series_event_name(series) is not None:
+            filters.append(
+                parse_expr("event = {event}", placeholders={"event": ast.Constant(value=series_event_name(series))})
+            )
+
+        if series.properties is not None and series.properties != []:
+            filters.append(property_to_expr(series.properties, team))
+
+        if isinstance(series, ActionsNode):
+            try:
+                action = Action.objects.get(pk=int(series.id), team=team)
+                filters.append(action_to_expr(action))
+            except Action.DoesNotExist:
+                # If an action doesn't exist, we want to return no events
+                filters.append(parse_expr("1 = 2"))
+
+        # Ignore empty groups
+        if series.math == "unique_group" and series.math_group_type_index is not None:
+            filters.append(
+                ast.CompareOperation(
+                    op=ast.CompareOperationOp.NotEq,
+                    left=ast.Field(chain=["e", f"$group_{int(series.math_group_type_index)}"]),
+                    right=ast.Constant(value=""),
+                )
+            )
+
+        if len(filters) == 0:
+            return ast.Constant(value=True)
+        if len(filters) == 1:
+            return filters[0]
+        return ast.And(exprs=filters)
+
+    def _date_subqueries(self) -> ast.SelectUnionQuery:
+        # The same zero rows `TrendsQueryBuilder` fills empty intervals with, with a zero for every series
+        query_builder = self._first_query_builder
+        date_subqueries = query_builder._get_date_subqueries(
+            breakdown=query_builder._breakdown(is_actors_query=False), ignore_breakdowns=True
+        )
+        for date_subquery in date_subqueries:
+            date_subquery.select = [
+                *[
+                    ast.Alias(alias=self._total_column(position), expr=ast.Constant(value=0))
+                    for position in range(len(self.query_builders))
+                ],
+                *[expr for expr in date_subquery.select if not (isinstance(expr, ast.Alias) and expr.alias == "total")],
+            ]
+        return ast.SelectUnionQuery(select_queries=date_subqueries)
+
+    def _inner_select_query(self, inner_query: ast.SelectUnionQuery) -> ast.SelectQuery:
+        query = self._first_query_builder.query
+        smoothing_intervals: Optional[int] = (
+            int(query.trendsFilter.smoothingIntervals)
+            if query.trendsFilter is not None
+            and query.trendsFilter.smoothingIntervals is not None
+            and query.trendsFilter.smoothingIntervals > 1
+            else None
+        )
+
+        select: list[ast.Expr] = []
+        for position in range(len(self.query_builders)):
+            total = ast.Call(name="sum", args=[ast.Field(chain=[self._total_column(position)])])
+            if smoothing_intervals is not None:
+                count: ast.Expr = ast.Call(
+                    name="floor",
+                    args=[
+                        ast.WindowFunction(
+                            name="avg",
+                            args=[total],
+                            over_expr=ast.WindowExpr(
+                                order_by=[ast.OrderExpr(expr=ast.Field(chain=["day_start"]), order="ASC")],
+                                frame_method="ROWS",
+                                frame_start=ast.WindowFrameExpr(
+                                    frame_type="PRECEDING", frame_value=smoothing_intervals - 1
+                                ),
+                                frame_end=ast.WindowFrameExpr(frame_type="CURRENT ROW"),
+                            ),
+                        )
+                    ],
+                )
+            else:
+                count = total
+            select.append(ast.Alias(alias=self._count_column(position), expr=count))
+
+        inner_select = ast.SelectQuery(
+            select=[*select, ast.Field(chain=["day_start"])],
+            select_from=ast.JoinExpr(table=inner_query),
+            group_by=[ast.Field(chain=["day_start"])],
+            order_by=[ast.OrderExpr(expr=ast.Field(chain=["day_start"]), order="ASC")],
+        )
+
+        if self._trends_display.should_wrap_inner_query():
+            # Cumulative, see `TrendsDisplay._get_cumulative_query`
+            inner_select = ast.SelectQuery(
+                select=[
+                    ast.Field(chain=["day_start"]),
+                    *[
+                        ast.Alias(
+                            alias=self._count_column(position),
+                            expr=ast.WindowFunction(
+                                name="sum",
+                                args=[ast.Field(chain=[self._count_column(position)])],
+                                over_expr=ast.WindowExpr(
+                                    order_by=[ast.OrderExpr(expr=ast.Field(chain=["day_start"]), order="ASC")]
+                                ),
+                            ),
+                        )
+                        for position in range(len(self.query_builders))
+                    ],
+                ],
+                select_from=ast.JoinExpr(table=inner_select),
+                order_by=[ast.OrderExpr(expr=ast.Field(chain=["day_start"]), order="ASC")],
+            )
+
+        return inner_select
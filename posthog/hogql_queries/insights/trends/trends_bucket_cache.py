@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
+from typing import Any, Optional
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import Counter
+
+from posthog.hogql_queries.utils.query_date_range import QueryDateRange
+from posthog.schema import DateRange, HogQLQueryResponse
+from posthog.utils import generate_cache_key
+
+logger = structlog.get_logger(__name__)
+
+TRENDS_BUCKET_CACHE_COUNTER = Counter(
+    "posthog_trends_bucket_cache_total",
+    "Closed trends intervals that were read from the bucket cache (hit) or had to be queried (miss).",
+    labelnames=["result"],
+)
+
+
+class TrendsBucketCache:
+    """
+    Totals of a single trends series, cached per closed interval ("bucket").
+
+    Buckets are keyed by everything the series' totals depend on except the date range, plus the start of the
+    bucket. A refresh of e.g. "last 90 days" then only has to query the intervals after the last cached one, and
+    overlapping date ranges share buckets. Only series whose total for an interval depends on that interval's events
+    alone can be cached this way, which `TrendsQueryRunner` checks before creating one.
+    """
+
+    def __init__(self, fingerprint: str, query_date_range: QueryDateRange):
+        self.fingerprint = generate_cache_key(f"trends_bucket_{fingerprint}")
+        self.query_date_range = query_date_range
+
+    @cached_property
+    def buckets(self) -> list[datetime]:
+        return self.query_date_range.all_values()
+
+    def load(self) -> list[Any]:
+        """Totals of the leading buckets that are closed and cached, in order."""
+        closed_buckets = [bucket for bucket in self.buckets if self._is_closed(bucket)]
+        if not closed_buckets:
+            return []
+
+        try:
+            cached = cache.get_many([self._bucket_key(bucket) for bucket in closed_buckets])
+        except Exception:
+            logger.exception("Could not load cached trends buckets")
+            return []
+
+        totals = []
+        for bucket in closed_buckets:
+            key = self._bucket_key(bucket)
+            if key not in cached:
+                break
+            totals.append(cached[key])
+
+        TRENDS_BUCKET_CACHE_COUNTER.labels(result="hit").inc(len(totals))
+        TRENDS_BUCKET_CACHE_COUNTER.labels(result="miss").inc(len(closed_buckets) - len(totals))
+        return totals
+
+    def remaining_date_range(self, cached_count: int) -> Optional[QueryDateRange]:
+        """The date range left to query when the first `cached_count` buckets are cached, None if there's none."""
+        if cached_count >= len(self.buckets):
+            return None
+        if cached_count == 0:
+            return self.query_date_range
+
+        query_date_range = self.query_date_range
+        return QueryDateRange(
+            date_range=DateRange(
+                date_from=self.buckets[cached_count].isoformat(),
+                date_to=query_date_range.date_to().isoformat(),
+                explicitDate=True,
+            ),
+            team=query_date_range._team,
+            interval=query_date_range.interval_type,
+            now=query_date_range._now_without_timezone,
+        )
+
+    def store(self, response: HogQLQueryResponse) -> None:
+        """Cache the closed buckets of a response to a query for (part of) this cache's date range."""
+        columns = response.columns or []
+        if response.error or len(response.results) != 1 or "date" not in columns or "total" not in columns:
+            return
+
+        row = response.results[0]
+        values = {
+            self._bucket_key(bucket): total
+            for bucket, total in zip(row[columns.index("date")], row[columns.index("total")])
+            if self._is_closed(bucket)
+        }
+        if not values:
+            return
+
+        try:
+            cache.set_many(values, settings.TRENDS_BUCKET_CACHE_TTL)
+        except Exception:
+            logger.exception("Could not cache trends buckets")
+
+    def merge(self, cached_totals: list[Any], response: Optional[HogQLQueryResponse]) -> HogQLQueryResponse:
+        """Prepend cached totals to the response for the rest of the date range, see `remaining_date_range`."""
+        dates: list[datetime] = self.buckets[: len(cached_totals)]
+        totals: list[Any] = list(cached_totals)
+
+        if response is None:
+            return HogQLQueryResponse(columns=["date", "total"], results=[[dates, totals]], timings=[])
+
+        columns = response.columns or []
+        for row in response.results:
+            dates = dates + list(row[columns.index("date")])
+            totals = totals + list(row[columns.index("total")])
+        return response.model_copy(update={"columns": ["date", "total"], "results": [[dates, totals]]})
+
+    def _bucket_key(self, bucket: datetime) -> str:
+        # ClickHouse and `QueryDateRange` may return the same bucket in different timezones
+        if bucket.tzinfo is None:
+            bucket = bucket.replace(tzinfo=self.query_date_range._team.timezone_info)
+        return f"{self.fingerprint}_{bucket.astimezone(timezone.utc).isoformat()}"
+
+    def _is_closed(self, bucket: datetime) -> bool:
+        if bucket.tzinfo is None:
+            bucket = bucket.replace(tzinfo=self.query_date_range._team.timezone_info)
+        bucket_end = bucket + self.query_date_range.interval_relativedelta()
+        # `date_to` is the last microsecond of the range, so a bucket ending right after it is still complete
+        return bucket_end <= self.query_date_range.date_to() + timedelta(microseconds=1) and (
+            bucket_end <= self._closed_before
+        )
+
+    @cached_property
+    def _closed_before(self) -> datetime:
+        return self.query_date_range.now_with_timezone - timedelta(seconds=settings.TRENDS_BUCKET_CACHE_CLOSED_AFTER)
@@ -4,8 +4,7 @@ from copy import deepcopy
 from datetime import timedelta
 from math import ceil
 from operator import itemgetter
-import threading
-from typing import Optional, Any
+from typing import Optional, Any, cast
 from django.conf import settings
 
 from django.utils.timezone import datetime
@@ -19,6 +18,7 @@ from posthog.caching.utils import is_stale
 from posthog.hogql import ast
 from posthog.hogql.constants import LimitContext, MAX_SELECT_RETURNED_ROWS, BREAKDOWN_VALUES_LIMIT
 from posthog.hogql.printer import to_printed_hogql
+from posthog.hogql.schema_version import get_team_schema_version
 from posthog.hogql.query import execute_hogql_query
 from posthog.hogql.timings import HogQLTimings
 from posthog.hogql_queries.insights.trends.breakdown_values import (
@@ -28,10 +28,13 @@ from posthog.hogql_queries.insights.trends.breakdown_values import (
     BREAKDOWN_OTHER_STRING_LABEL,
 )
 from posthog.hogql_queries.insights.trends.display import TrendsDisplay
+from posthog.hogql_queries.insights.trends.trends_batched_query_builder import TrendsBatchedQueryBuilder
+from posthog.hogql_queries.insights.trends.trends_bucket_cache import TrendsBucketCache
 from posthog.hogql_queries.insights.trends.trends_query_builder import TrendsQueryBuilder
 from posthog.hogql_queries.insights.trends.trends_actors_query_builder import TrendsActorsQueryBuilder
 from posthog.hogql_queries.insights.trends.series_with_extras import SeriesWithExtras
-from posthog.hogql_queries.query_runner import QueryRunner
+from posthog.hogql_queries.query_executor import get_query_executor
+from posthog.hogql_queries.query_runner import ExecutionMode, QueryRunner
 from posthog.hogql_queries.utils.formula_ast import FormulaAST
 from posthog.hogql_queries.utils.query_date_range import QueryDateRange
 from posthog.hogql_queries.utils.query_previous_period_date_range import (
@@ -43,6 +46,7 @@ from posthog.models.cohort.cohort import Cohort
 from posthog.models.filters.mixins.utils import cached_property
 from posthog.models.property_definition import PropertyDefinition
 from posthog.queries.util import correct_result_for_sampling
+from posthog.schema_helpers import to_json
 from posthog.schema import (
     ActionsNode,
     BreakdownItem,
@@ -67,6 +71,27 @@ from posthog.schema import (
 from posthog.warehouse.models import DataWarehouseTable
 from posthog.utils import format_label_date, multisort
 
+# Which events these filters match changes for intervals that are long closed, e.g. when a cohort is recalculated
+BUCKET_CACHE_UNSAFE_PROPERTY_TYPES = {
+    "cohort",
+    "precalculated-cohort",
+    "static-cohort",
+    "person",
+    "group",
+    "hogql",
+    "data_warehouse_person_property",
+}
+
+
+def _filters_on_bucket_cache_unsafe_properties(value: Any) -> bool:
+    if isinstance(value, dict):
+        return value.get("type") in BUCKET_CACHE_UNSAFE_PROPERTY_TYPES or any(
+            _filters_on_bucket_cache_unsafe_properties(item) for item in value.values()
+        )
+    if isinstance(value, list):
+        return any(_filters_on_bucket_cache_unsafe_properties(item) for item in value)
+    return False
+
 
 class TrendsQueryRunner(QueryRunner):
     query: TrendsQuery
@@ -120,32 +145,136 @@ class TrendsQueryRunner(QueryRunner):
         return ast.SelectUnionQuery(select_queries=queries)
 
     def to_queries(self) -> list[ast.SelectQuery | ast.SelectUnionQuery]:
-        queries = []
+        """One query per batch of series, see `_series_batches`."""
         with self.timings.measure("trends_to_query"):
-            for series in self.series:
-                if not series.is_previous_period_series:
-                    query_date_range = self.query_date_range
-                else:
-                    query_date_range = self.query_previous_date_range
+            return [self._series_batch_query(series_indexes) for series_indexes in self._series_batches()]
 
-                query_builder = TrendsQueryBuilder(
-                    trends_query=series.overriden_query or self.query,
-                    team=self.team,
-                    query_date_range=query_date_range,
-                    series=series.series,
-                    timings=self.timings,
-                    modifiers=self.modifiers,
-                    limit_context=self.limit_context,
-                )
-                query = query_builder.build_query()
+    def _series_batch_query(
+        self, series_indexes: list[int], query_date_range: Optional[QueryDateRange] = None
+    ) -> ast.SelectQuery | ast.SelectUnionQuery:
+        query: ast.SelectQuery | ast.SelectUnionQuery
+        if len(series_indexes) == 1:
+            query = self._query_builder(self.series[series_indexes[0]], query_date_range).build_query()
+        else:
+            query = self._batched_query_builder(series_indexes, query_date_range).build_query()
 
-                # Get around the default 100 limit, bump to the max 10000.
-                # This is useful for the world map view and other cases with a lot of breakdowns.
-                if isinstance(query, ast.SelectQuery) and query.limit is None:
-                    query.limit = ast.Constant(value=MAX_SELECT_RETURNED_ROWS)
-                queries.append(query)
+        # Get around the default 100 limit, bump to the max 10000.
+        # This is useful for the world map view and other cases with a lot of breakdowns.
+        if isinstance(query, ast.SelectQuery) and query.limit is None:
+            query.limit = ast.Constant(value=MAX_SELECT_RETURNED_ROWS)
+        return query
 
-        return queries
+    def _query_builder(
+        self, series: SeriesWithExtras, query_date_range: Optional[QueryDateRange] = None
+    ) -> TrendsQueryBuilder:
+        if query_date_range is None:
+            query_date_range = (
+                self.query_previous_date_range if series.is_previous_period_series else self.query_date_range
+            )
+
+        return TrendsQueryBuilder(
+            trends_query=series.overriden_query or self.query,
+            team=self.team,
+            query_date_range=query_date_range,
+            series=series.series,
+            timings=self.timings,
+            modifiers=self.modifiers,
+            limit_context=self.limit_context,
+        )
+
+    def _batched_query_builder(
+        self, series_indexes: list[int], query_date_range: Optional[QueryDateRange] = None
+    ) -> TrendsBatchedQueryBuilder:
+        return TrendsBatchedQueryBuilder(
+            [self._query_builder(self.series[index], query_date_range) for index in series_indexes]
+        )
+
+    def _bucket_cache(self, series: SeriesWithExtras) -> Optional[TrendsBucketCache]:
+        """Cache for the closed intervals of the series, if its total for an interval only depends on that interval."""
+        if not settings.TRENDS_BUCKET_CACHE_ENABLED:
+            return None
+        if self._trends_display.is_total_value() or self._trends_display.should_wrap_inner_query():
+            return None
+        if (
+            self.query.trendsFilter is not None
+            and self.query.trendsFilter.smoothingIntervals is not None
+            and self.query.trendsFilter.smoothingIntervals > 1
+        ):
+            return None
+        if self.query.breakdownFilter is not None and self.query.breakdownFilter.breakdown is not None:
+            return None
+        if series.overriden_query is not None or isinstance(series.series, DataWarehouseNode):
+            return None
+
+        query_builder = self._query_builder(series)
+        if (
+            query_builder._aggregation_operation.requires_query_orchestration()
+            or not query_builder.query_date_range.use_start_of_interval()
+        ):
+            return None
+
+        # Everything the totals depend on, other than the date range
+        fingerprint_query = self.query.model_copy(
+            update={
+                "dateRange": None,
+                "series": [series.series],
+                "interval": query_builder.query_date_range.interval_type,
+                "trendsFilter": None,
+                "breakdownFilter": None,
+            }
+        )
+        # Filters that match different events after the fact would serve stale buckets
+        filters: list[Any] = [fingerprint_query.model_dump(mode="json")]
+        if self.query.filterTestAccounts:
+            filters.append(self.team.test_account_filters)
+        action: Optional[tuple[Any, Any]] = None
+        if isinstance(series.series, ActionsNode):
+            action = (
+                Action.objects.filter(pk=int(series.series.id), team=self.team)
+                .values_list("updated_at", "steps_json")
+                .first()
+            )
+            filters.append(action[1] if action is not None else None)
+        if _filters_on_bucket_cache_unsafe_properties(filters):
+            return None
+
+        fingerprint = "_".join(
+            [
+                to_json(fingerprint_query),
+                str(self.team.pk),
+                self.team.timezone,
+                str(self.team.week_start_day),
+                to_json(self.modifiers),
+                get_team_schema_version(self.team.pk),
+            ]
+        )
+        if self.query.filterTestAccounts:
+            fingerprint += f"_{self.team.test_account_filters}"
+        if isinstance(series.series, ActionsNode):
+            fingerprint += f"_{action[0] if action is not None else None}"
+
+        return TrendsBucketCache(fingerprint, query_builder.query_date_range)
+
+    def _series_batches(self) -> list[list[int]]:
+        """
+        Indexes of the series calculated by each query. With the `batchTrendsSeries` modifier, series of the same
+        period that `TrendsBatchedQueryBuilder` supports share a query, the rest get a query each.
+        """
+        if not self.modifiers.batchTrendsSeries:
+            return [[index] for index in range(len(self.series))]
+
+        batches: list[list[int]] = []
+        batch_by_period: dict[bool, list[int]] = {}
+        for index, series in enumerate(self.series):
+            if series.overriden_query is None and TrendsBatchedQueryBuilder.can_batch(self._query_builder(series)):
+                is_previous_period_series = bool(series.is_previous_period_series)
+                if is_previous_period_series not in batch_by_period:
+                    batch_by_period[is_previous_period_series] = []
+                    batches.append(batch_by_period[is_previous_period_series])
+                batch_by_period[is_previous_period_series].append(index)
+            else:
+                batches.append([index])
+        return batches
 
     def to_actors_query(
         self,
@@ -265,6 +394,7 @@ class TrendsQueryRunner(QueryRunner):
         )
 
     def calculate(self):
+        series_batches = self._series_batches()
         queries = self.to_queries()
 
         if len(queries) == 1:
@@ -280,54 +410,35 @@ class TrendsQueryRunner(QueryRunner):
         with self.timings.measure("printing_hogql_for_response"):
             response_hogql = to_printed_hogql(response_hogql_query, self.team, self.modifiers)
 
-        res_matrix: list[list[Any] | Any | None] = [None] * len(queries)
-        timings_matrix: list[list[QueryTiming] | None] = [None] * len(queries)
+        res_matrix: list[list[Any] | Any | None] = [None] * len(self.series)
+        timings_matrix: list[list[QueryTiming] | None] = [None] * len(self.series)
         errors: list[Exception] = []
         debug_errors: list[str] = []
 
-        def run(index: int, query: ast.SelectQuery | ast.SelectUnionQuery, is_parallel: bool):
+        def run(index: int, query: ast.SelectQuery | ast.SelectUnionQuery):
             try:
-                series_with_extra = self.series[index]
-
-                response = execute_hogql_query(
-                    query_type="TrendsQuery",
-                    query=query,
-                    team=self.team,
-                    timings=self.timings,
-                    modifiers=self.modifiers,
-                    limit_context=self.limit_context,
-                )
-
-                timings_matrix[index] = response.timings
-                res_matrix[index] = self.build_series_response(response, series_with_extra, len(queries))
-                if response.error:
-                    debug_errors.append(response.error)
+                series_indexes = series_batches[index]
+                series_responses = self._calculate_series_batch(series_indexes, query)
+
+                for series_index, series_response in zip(series_indexes, series_responses):
+                    if series_response.error:
+                        debug_errors.append(series_response.error)
+                    timings_matrix[series_index] = series_response.timings
+                    res_matrix[series_index] = self.build_series_response(
+                        series_response, self.series[series_index], len(self.series)
+                    )
             except Exception as e:
                 errors.append(e)
-            finally:
-                if is_parallel:
-                    from django.db import connection
-
-                    # This will only close the DB connection for the newly spawned thread and not the whole app
-                    connection.close()
 
         # This exists so that we're not spawning threads during unit tests. We can't do
         # this right now due to the lack of multithreaded support of Django
         if settings.IN_UNIT_TESTING:
             for index, query in enumerate(queries):
-                run(index, query, False)
+                run(index, query)
         elif len(queries) == 1:
-            run(0, queries[0], False)
+            run(0, queries[0])
         else:
-            jobs = [threading.Thread(target=run, args=(index, query, True)) for index, query in enumerate(queries)]
-
-            # Start the threads
-            for j in jobs:
-                j.start()
-
-            # Ensure all of the threads have finished
-            for j in jobs:
-                j.join()
+            get_query_executor().map(lambda job: run(*job), enumerate(queries), team_id=self.team.pk)
 
         # Raise any errors raised in a seperate thread
         if len(errors) > 0:
@@ -378,6 +489,59 @@ class TrendsQueryRunner(QueryRunner):
             error=". ".join(debug_errors),
         )
 
+    def _calculate_series_batch(
+        self, series_indexes: list[int], query: ast.SelectQuery | ast.SelectUnionQuery
+    ) -> list[HogQLQueryResponse]:
+        """
+        Responses for each series of the batch. Intervals that are cached for every series of the batch aren't
+        queried again, and closed intervals that are queried are cached for next time.
+        """
+        bucket_caches = [self._bucket_cache(self.series[series_index]) for series_index in series_indexes]
+        cached_totals: list[list[Any]] = [[] for _ in series_indexes]
+        cached_count = 0
+        query_to_run: Optional[ast.SelectQuery | ast.SelectUnionQuery] = query
+
+        # Forced refreshes query every interval again, and replace the cached buckets with the results
+        if self.execution_mode != ExecutionMode.CALCULATION_ALWAYS and all(
+            bucket_cache is not None for bucket_cache in bucket_caches
+        ):
+            cached_totals = [cast(TrendsBucketCache, bucket_cache).load() for bucket_cache in bucket_caches]
+            cached_count = min(len(totals) for totals in cached_totals)
+            if cached_count > 0:
+                remaining_date_range = cast(TrendsBucketCache, bucket_caches[0]).remaining_date_range(cached_count)
+                query_to_run = (
+                    self._series_batch_query(series_indexes, remaining_date_range)
+                    if remaining_date_range is not None
+                    else None
+                )
+
+        series_responses: list[Optional[HogQLQueryResponse]] = [None] * len(series_indexes)
+        if query_to_run is not None:
+            response = execute_hogql_query(
+                query_type="TrendsQuery",
+                query=query_to_run,
+                team=self.team,
+                timings=self.timings,
+                modifiers=self.modifiers,
+                limit_context=self.limit_context,
+            )
+            if len(series_indexes) == 1:
+                series_responses = [response]
+            else:
+                batched_query_builder = self._batched_query_builder(series_indexes)
+                series_responses = list(batched_query_builder.split_response(response))
+
+        responses: list[HogQLQueryResponse] = []
+        for position, series_response in enumerate(series_responses):
+            bucket_cache = bucket_caches[position]
+            if bucket_cache is not None:
+                if series_response is not None:
+                    bucket_cache.store(series_response)
+                if cached_count > 0:
+                    series_response = bucket_cache.merge(cached_totals[position][:cached_count], series_response)
+            responses.append(cast(HogQLQueryResponse, series_response))
+        return responses
+
     def build_series_response(self, response: HogQLQueryResponse, series: SeriesWithExtras, series_count: int):
         def get_value(name: str, val: Any):
             if name not in ["date", "total", "breakdown_value"]:
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, TypeVar
+
+from django.conf import settings
+from django.db import close_old_connections
+from prometheus_client import Counter, Histogram
+
+from posthog.clickhouse.client.connection import Workload
+from posthog.clickhouse.query_tagging import get_query_tags, reset_query_tags, tag_queries
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+QUERY_EXECUTOR_WAIT_TIME = Histogram(
+    "query_executor_wait_time_seconds",
+    "Time from a query being submitted to the shared query executor to it starting, including the team limit wait",
+    labelnames=["workload"],
+)
+QUERY_EXECUTOR_TEAM_LIMIT_REACHED = Counter(
+    "query_executor_team_limit_reached_total",
+    "Queries that had to wait for other queries of the same team to finish before being submitted",
+    labelnames=["workload"],
+)
+
+
+class QueryExecutor:
+    """
+    Bounded thread pool that query runners share to run independent queries in parallel.
+
+    Worker threads are long-lived, so their database connections are reused between queries, subject to
+    CONN_MAX_AGE as for any other thread. Each team can only have `max_concurrency_per_team` queries running or
+    queued at once, so that a single large dashboard can't take up every worker. Submitting beyond that limit
+    blocks the caller until one of the team's queries finishes, so functions run by the executor must not submit
+    to it themselves.
+    """
+
+    def __init__(self, workload: Workload, max_workers: int, max_concurrency_per_team: int):
+        self.workload = workload
+        self.max_concurrency_per_team = max_concurrency_per_team
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"query-executor-{workload.value.lower()}"
+        )
+        self._team_semaphores: dict[int, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _get_team_semaphore(self, team_id: int) -> threading.BoundedSemaphore:
+        with self._lock:
+            if team_id not in self._team_semaphores:
+                self._team_semaphores[team_id] = threading.BoundedSemaphore(self.max_concurrency_per_team)
+            return self._team_semaphores[team_id]
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T], team_id: int) -> list[R]:
+        """
+        Run `fn` for every item in parallel and return the results in order.
+
+        All items are run even if some of them fail. Afterwards, the exception of the first failed item is raised.
+        """
+        team_semaphore = self._get_team_semaphore(team_id)
+        query_tags = dict(get_query_tags())
+        futures: list[Future] = []
+
+        for item in items:
+            submitted_at = time.monotonic()
+            if not team_semaphore.acquire(blocking=False):
+                QUERY_EXECUTOR_TEAM_LIMIT_REACHED.labels(workload=self.workload.value).inc()
+                team_semaphore.acquire()
+
+            try:
+                future = self._executor.submit(self._run, fn, item, query_tags, submitted_at)
+            except Exception:
+                team_semaphore.release()
+                raise
+            future.add_done_callback(lambda _: team_semaphore.release())
+            futures.append(future)
+
+        wait(futures)
+        return [future.result() for future in futures]
+
+    def _run(self, fn: Callable[[T], R], item: T, query_tags: dict[str, Any], submitted_at: float) -> R:
+        QUERY_EXECUTOR_WAIT_TIME.labels(workload=self.workload.value).observe(time.monotonic() - submitted_at)
+
+        # Worker threads don't go through the request cycle, which is what normally closes stale connections
+        close_old_connections()
+        reset_query_tags()
+        tag_queries(**query_tags)
+        try:
+            return fn(item)
+        finally:
+            reset_query_tags()
+            close_old_connections()
+
+
+_query_executors: dict[Workload, QueryExecutor] = {}
+_query_executors_lock = threading.Lock()
+
+
+def get_query_executor(workload: Workload = Workload.ONLINE) -> QueryExecutor:
+    """The process-wide `QueryExecutor` for `workload`, so that e.g. offline queries can't starve online ones."""
+    with _query_executors_lock:
+        if workload not in _query_executors:
+            _query_executors[workload] = QueryExecutor(
+                workload,
+                max_workers=settings.QUERY_EXECUTOR_MAX_WORKERS,
+                max_concurrency_per_team=settings.QUERY_EXECUTOR_MAX_CONCURRENCY_PER_TEAM,
+            )
+        return _query_executors[workload]
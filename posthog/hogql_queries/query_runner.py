@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 from enum import IntEnum
-from typing import Any, Generic, Optional, TypeVar, Union, cast, TypeGuard
+import functools
+from time import monotonic, sleep
+from types import UnionType
+from typing import Any, Generic, Optional, TypeVar, Union, cast, TypeGuard, get_args, get_origin
+import uuid
 
 from django.conf import settings
 from django.core.cache import cache
@@ -10,7 +14,8 @@ from pydantic import BaseModel, ConfigDict
 from sentry_sdk import capture_exception, push_scope
 import structlog
 
-from posthog.cache_utils import OrjsonJsonSerializer
+from posthog import redis
+from posthog.cache_utils import CompressedOrjsonSerializer, OrjsonJsonSerializer
 from posthog.clickhouse.query_tagging import tag_queries
 from posthog.hogql import ast
 from posthog.hogql.constants import LimitContext
@@ -66,8 +71,41 @@ QUERY_CACHE_HIT_COUNTER = Counter(
     labelnames=[LABEL_TEAM_ID, "cache_hit"],
 )
 
+QUERY_ASYNC_REFRESH_COUNTER = Counter(
+    "posthog_query_async_refresh_total",
+    "Stale results served while recalculating in the background, by whether this call enqueued the recalculation.",
+    labelnames=[LABEL_TEAM_ID, "enqueued"],
+)
+
+QUERY_COALESCED_COUNTER = Counter(
+    "posthog_query_coalesced_total",
+    "Calculations that waited for an identical in-flight calculation, by whether they could use its results.",
+    labelnames=[LABEL_TEAM_ID, "outcome"],
+)
+
+# Identical queries calculated at the same time only hit ClickHouse once. The first caller holds the in-flight lock,
+# the others wait for it to cache the results. Waiting stops after the timeout and the caller calculates itself.
+QUERY_IN_FLIGHT_LOCK_PREFIX = "query_in_flight"
+QUERY_IN_FLIGHT_LOCK_TTL = 60 * 10
+QUERY_IN_FLIGHT_WAIT_TIMEOUT = 60
+# Deletes the lock only if it still holds the caller's token, atomically, as the lock may have expired and been taken
+QUERY_IN_FLIGHT_LOCK_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Only one background recalculation per cache key at a time. The lock is released once the results are written,
+# the TTL covers recalculations that never finish.
+QUERY_ASYNC_REFRESH_LOCK_PREFIX = "query_async_refresh_lock"
+QUERY_ASYNC_REFRESH_LOCK_TTL = 60 * 10
+
 
 class ExecutionMode(IntEnum):
+    RECENT_CACHE_CALCULATE_ASYNC_IF_STALE = 3
+    """Use cache. If the results are stale, return them anyway and recalculate in the background.
+    If the results are missing, calculate right away."""
     CALCULATION_ALWAYS = 2
     """Always recalculate."""
     RECENT_CACHE_CALCULATE_IF_STALE = 1
@@ -98,6 +136,25 @@ RunnableQueryNode = Union[
 ]
 
 
+_PLAIN_JSON_TYPES = (Any, list, dict, str, int, float, bool, type(None))
+
+
+def _is_plain_json_annotation(annotation: Any) -> bool:
+    origin = get_origin(annotation)
+    if origin is None:
+        return annotation in _PLAIN_JSON_TYPES
+    return (origin in (Union, UnionType) or origin in _PLAIN_JSON_TYPES) and all(
+        _is_plain_json_annotation(arg) for arg in get_args(annotation)
+    )
+
+
+@functools.cache
+def _results_are_plain_json(response_type: type[BaseModel]) -> bool:
+    """Whether `results` holds only JSON values, so validating a cached copy would return it unchanged."""
+    field = response_type.model_fields.get("results")
+    return field is not None and _is_plain_json_annotation(field.annotation)
+
+
 def get_query_runner(
     query: dict[str, Any] | RunnableQueryNode | BaseModel,
     team: Team,
@@ -302,6 +359,8 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
     timings: HogQLTimings
     modifiers: HogQLQueryModifiers
     limit_context: LimitContext
+    # How `run` was asked to use the cache, so that calculations can skip their own caches on forced refreshes
+    execution_mode: ExecutionMode
 
     def __init__(
         self,
@@ -314,6 +373,7 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
         self.team = team
         self.timings = timings or HogQLTimings()
         self.limit_context = limit_context or LimitContext.QUERY
+        self.execution_mode = ExecutionMode.RECENT_CACHE_CALCULATE_IF_STALE
         _modifiers = modifiers or (query.modifiers if hasattr(query, "modifiers") else None)
         self.modifiers = create_default_modifiers_for_team(team, _modifiers)
 
@@ -352,34 +412,16 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
     def run(
         self, execution_mode: ExecutionMode = ExecutionMode.RECENT_CACHE_CALCULATE_IF_STALE
     ) -> CR | CacheMissResponse:
+        self.execution_mode = execution_mode
         cache_key = self.get_cache_key()
         tag_queries(cache_key=cache_key)
         CachedResponse: type[CR] = self.cached_response_type
 
         if execution_mode != ExecutionMode.CALCULATION_ALWAYS:
             # Let's look in the cache first
-            cached_response: CR | CacheMissResponse
-            cached_response_candidate_bytes: Optional[bytes] = get_safe_cache(cache_key)
-            cached_response_candidate: Optional[dict] = (
-                OrjsonJsonSerializer({}).loads(cached_response_candidate_bytes)
-                if cached_response_candidate_bytes
-                else None
-            )
-            if self.is_cached_response(cached_response_candidate):
-                cached_response_candidate["is_cached"] = True
-                cached_response = CachedResponse(**cached_response_candidate)
-            elif cached_response_candidate is None:
-                cached_response = CacheMissResponse(cache_key=cache_key)
-            else:
-                # Whatever's in cache is malformed, so let's treat is as non-existent
-                cached_response = CacheMissResponse(cache_key=cache_key)
-                with push_scope() as scope:
-                    scope.set_tag("cache_key", cache_key)
-                    capture_exception(
-                        ValueError(f"Cached response is of unexpected type {type(cached_response)}, ignoring it")
-                    )
+            cached_response = self._load_cached_response(cache_key)
 
-            if self.is_cached_response(cached_response_candidate):
+            if isinstance(cached_response, CachedResponse):
                 if not self._is_stale(cached_response):
                     QUERY_CACHE_HIT_COUNTER.labels(team_id=self.team.pk, cache_hit="hit").inc()
                     # We have a valid result that's fresh enough, let's return it
@@ -390,6 +432,12 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
                     # – otherwise let's proceed to calculation
                     if execution_mode == ExecutionMode.CACHE_ONLY_NEVER_CALCULATE:
                         return cached_response
+                    # If we may calculate in the background, return the stale result and leave refreshing to a task
+                    if (
+                        execution_mode == ExecutionMode.RECENT_CACHE_CALCULATE_ASYNC_IF_STALE
+                        and self.enqueue_async_calculation(cache_key)
+                    ):
+                        return cached_response
             else:
                 QUERY_CACHE_HIT_COUNTER.labels(team_id=self.team.pk, cache_hit="miss").inc()
                 # We have no cached result. If we aren't allowed to calculate, let's return the cache miss
@@ -397,26 +445,138 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
                 if execution_mode == ExecutionMode.CACHE_ONLY_NEVER_CALCULATE:
                     return cached_response
 
-        fresh_response_dict = self.calculate().model_dump()
-        fresh_response_dict["is_cached"] = False
-        fresh_response_dict["last_refresh"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
-        fresh_response_dict["next_allowed_client_refresh"] = (datetime.now() + self._refresh_frequency()).strftime(
-            "%Y-%m-%dT%H:%M:%SZ"
-        )
-        fresh_response_dict["cache_key"] = cache_key
-        fresh_response_dict["timezone"] = self.team.timezone
-        fresh_response = CachedResponse(**fresh_response_dict)
-
-        # Dont cache debug queries with errors and export queries
-        has_error: Optional[list] = fresh_response_dict.get("error", None)
-        if (has_error is None or len(has_error) == 0) and self.limit_context != LimitContext.EXPORT:
-            # TODO: Use JSON serializer in general for redis cache
-            fresh_response_serialized = OrjsonJsonSerializer({}).dumps(fresh_response.model_dump())
-            cache.set(cache_key, fresh_response_serialized, settings.CACHED_RESULTS_TTL)
+        # Export results aren't cached, so there's nothing to share with identical in-flight calculations
+        in_flight_lock_token: Optional[str] = None
+        if self.limit_context != LimitContext.EXPORT:
+            calculation_requested_at = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+            in_flight_lock_token = self._acquire_in_flight_lock(cache_key)
+            if in_flight_lock_token is None:
+                # Someone else is calculating this exact query right now, let's use their results
+                coalesced_response = self._wait_for_in_flight_calculation(cache_key, calculation_requested_at)
+                if coalesced_response is not None:
+                    return coalesced_response
+                in_flight_lock_token = self._acquire_in_flight_lock(cache_key)
+
+        try:
+            fresh_response_dict = self.calculate().model_dump()
+            fresh_response_dict["is_cached"] = False
+            fresh_response_dict["last_refresh"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+            fresh_response_dict["next_allowed_client_refresh"] = (datetime.now() + self._refresh_frequency()).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            )
+            fresh_response_dict["cache_key"] = cache_key
+            fresh_response_dict["timezone"] = self.team.timezone
+            fresh_response = CachedResponse(**fresh_response_dict)
+
+            # Dont cache debug queries with errors and export queries
+            has_error: Optional[list] = fresh_response_dict.get("error", None)
+            if (has_error is None or len(has_error) == 0) and self.limit_context != LimitContext.EXPORT:
+                serializer = (
+                    CompressedOrjsonSerializer({})
+                    if settings.QUERY_CACHE_COMPRESSION_ENABLED
+                    else OrjsonJsonSerializer({})
+                )
+                fresh_response_serialized = serializer.dumps(fresh_response.model_dump())
+                cache.set(cache_key, fresh_response_serialized, settings.CACHED_RESULTS_TTL)
+                redis.get_client().delete(self._async_refresh_lock_key(cache_key))
+        finally:
+            if in_flight_lock_token is not None:
+                self._release_in_flight_lock(cache_key, in_flight_lock_token)
 
         QUERY_CACHE_WRITE_COUNTER.labels(team_id=self.team.pk).inc()
         return fresh_response
 
+    def _load_cached_response(self, cache_key: str) -> CR | CacheMissResponse:
+        CachedResponse: type[CR] = self.cached_response_type
+        cached_response_candidate_bytes: Optional[bytes] = get_safe_cache(cache_key)
+        cached_response_candidate: Optional[dict] = (
+            CompressedOrjsonSerializer({}).loads(cached_response_candidate_bytes)
+            if cached_response_candidate_bytes
+            else None
+        )
+        if self.is_cached_response(cached_response_candidate):
+            cached_response_candidate["is_cached"] = True
+            if "results" in cached_response_candidate and _results_are_plain_json(CachedResponse):
+                # Results were validated before they were cached, and for plain JSON validation returns them unchanged.
+                # They can be megabytes, so skip validating them again on every hit. The rest is small and validated.
+                results = cached_response_candidate.pop("results")
+                cached_response = CachedResponse(**cached_response_candidate, results=[])
+                cached_response.results = results  # type: ignore[attr-defined]
+                return cached_response
+            return CachedResponse(**cached_response_candidate)
+        elif cached_response_candidate is None:
+            return CacheMissResponse(cache_key=cache_key)
+        else:
+            # Whatever's in cache is malformed, so let's treat is as non-existent
+            with push_scope() as scope:
+                scope.set_tag("cache_key", cache_key)
+                capture_exception(
+                    ValueError(f"Cached response is of unexpected type {type(cached_response_candidate)}, ignoring it")
+                )
+            return CacheMissResponse(cache_key=cache_key)
+
+    def _in_flight_lock_key(self, cache_key: str) -> str:
+        return f"{QUERY_IN_FLIGHT_LOCK_PREFIX}:{cache_key}"
+
+    def _acquire_in_flight_lock(self, cache_key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if redis.get_client().set(self._in_flight_lock_key(cache_key), token, nx=True, ex=QUERY_IN_FLIGHT_LOCK_TTL):
+            return token
+        return None
+
+    def _release_in_flight_lock(self, cache_key: str, token: str) -> None:
+        # Only release our own lock – if ours expired, someone else may hold it by now
+        redis.get_client().eval(QUERY_IN_FLIGHT_LOCK_RELEASE_SCRIPT, 1, self._in_flight_lock_key(cache_key), token)
+
+    def _wait_for_in_flight_calculation(self, cache_key: str, calculation_requested_at: str) -> Optional[CR]:
+        """Wait for an identical calculation to finish, then return its results if it cached any."""
+        redis_client = redis.get_client()
+        lock_key = self._in_flight_lock_key(cache_key)
+        deadline = monotonic() + QUERY_IN_FLIGHT_WAIT_TIMEOUT
+        poll_interval = 0.05
+        while monotonic() < deadline and redis_client.exists(lock_key):
+            sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, 1.0)
+
+        cached_response = self._load_cached_response(cache_key)
+        if isinstance(cached_response, CacheMissResponse) or (
+            getattr(cached_response, "last_refresh", "") < calculation_requested_at
+        ):
+            # Timed out, or the calculation failed
+            QUERY_COALESCED_COUNTER.labels(team_id=self.team.pk, outcome="no_result").inc()
+            return None
+        QUERY_COALESCED_COUNTER.labels(team_id=self.team.pk, outcome="coalesced").inc()
+        return cached_response
+
+    def _async_refresh_lock_key(self, cache_key: str) -> str:
+        return f"{QUERY_ASYNC_REFRESH_LOCK_PREFIX}:{cache_key}"
+
+    def enqueue_async_calculation(self, cache_key: str) -> bool:
+        """
+        Make sure the results for `cache_key` are being recalculated in the background.
+        Returns False if that's not possible and the caller should calculate synchronously instead.
+        """
+        from posthog.clickhouse.client.execute_async import enqueue_process_query_task
+
+        query_json = self.query.model_dump(exclude_none=True)
+        # The background task rebuilds the runner from JSON. Only refresh in the background if that results in
+        # the same cache key, otherwise the recalculated results would never be read.
+        try:
+            async_runner = get_query_runner(query_json, self.team, limit_context=LimitContext.QUERY_ASYNC)
+        except ValueError:
+            return False
+        if async_runner.get_cache_key() != cache_key:
+            return False
+
+        lock_acquired = redis.get_client().set(
+            self._async_refresh_lock_key(cache_key), 1, nx=True, ex=QUERY_ASYNC_REFRESH_LOCK_TTL
+        )
+        QUERY_ASYNC_REFRESH_COUNTER.labels(team_id=self.team.pk, enqueued=bool(lock_acquired)).inc()
+        if lock_acquired:
+            # refresh_requested skips the task's own cache lookup, which would only find the stale results
+            enqueue_process_query_task(team=self.team, user=None, query_json=query_json, refresh_requested=True)
+        return True
+
     @abstractmethod
     def to_query(self) -> ast.SelectQuery | ast.SelectUnionQuery:
         raise NotImplementedError()
@@ -0,0 +1,67 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from posthog.clickhouse.client.connection import Workload
+from posthog.clickhouse.query_tagging import get_query_tags, reset_query_tags, tag_queries
+from posthog.hogql_queries.query_executor import QueryExecutor
+
+
+class TestQueryExecutor(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.executor = QueryExecutor(Workload.ONLINE, max_workers=4, max_concurrency_per_team=2)
+
+    def tearDown(self):
+        self.executor._executor.shutdown(wait=True)
+        reset_query_tags()
+        super().tearDown()
+
+    def test_map_returns_results_in_order(self):
+        def square(value: int) -> int:
+            # Finish later items first
+            time.sleep((5 - value) / 1000)
+            return value * value
+
+        self.assertEqual(self.executor.map(square, range(5), team_id=1), [0, 1, 4, 9, 16])
+
+    def test_map_runs_every_item_before_raising(self):
+        ran = []
+
+        def run(value: int) -> int:
+            ran.append(value)
+            if value == 1:
+                raise ValueError("failed")
+            return value
+
+        with self.assertRaises(ValueError):
+            self.executor.map(run, range(4), team_id=1)
+        self.assertEqual(sorted(ran), [0, 1, 2, 3])
+
+    def test_map_limits_concurrency_per_team(self):
+        lock = threading.Lock()
+        running = 0
+        max_running = 0
+
+        def run(value: int) -> int:
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+            return value
+
+        self.assertEqual(self.executor.map(run, range(8), team_id=1), list(range(8)))
+        self.assertEqual(max_running, 2)
+
+    def test_map_propagates_query_tags(self):
+        tag_queries(kind="TrendsQuery", team_id=1)
+
+        results = self.executor.map(lambda _: dict(get_query_tags()), range(2), team_id=1)
+
+        for tags in results:
+            self.assertEqual(tags["kind"], "TrendsQuery")
+            self.assertEqual(tags["team_id"], 1)
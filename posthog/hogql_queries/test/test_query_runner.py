@@ -1,12 +1,17 @@
 from datetime import datetime, timedelta
 from typing import Any, Literal, Optional
+from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
 from dateutil.parser import isoparse
 from freezegun import freeze_time
 from pydantic import BaseModel
+from django.core.cache import cache
+from django.test import override_settings
+import orjson
 
-from posthog.hogql_queries.query_runner import ExecutionMode, QueryRunner
+from posthog import redis
+from posthog.hogql_queries.query_runner import QUERY_IN_FLIGHT_LOCK_PREFIX, ExecutionMode, QueryRunner
 from posthog.models.team.team import Team
 from posthog.schema import (
     CacheMissResponse,
@@ -164,3 +169,154 @@ class TestQueryRunner(BaseTest):
         response = runner.calculate()
         assert response.clickhouse is not None
         assert "events.`mat_$browser" not in response.clickhouse
+
+    def test_stale_while_revalidate(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "stale_while_revalidate"}, team=self.team)
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37, 42)):
+            # calculates synchronously if uncached
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_ASYNC_IF_STALE)
+            self.assertIsInstance(response, TestCachedBasicQueryResponse)
+            self.assertEqual(response.is_cached, False)
+
+        with (
+            freeze_time(datetime(2023, 2, 4, 13, 37 + 11, 42)),
+            patch(
+                "posthog.hogql_queries.query_runner.get_query_runner",
+                side_effect=lambda query, team, **kwargs: TestQueryRunner(query=query, team=team, **kwargs),
+            ),
+            patch("posthog.clickhouse.client.execute_async.enqueue_process_query_task") as mock_enqueue,
+        ):
+            # returns stale response and enqueues a refresh
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_ASYNC_IF_STALE)
+            self.assertIsInstance(response, TestCachedBasicQueryResponse)
+            self.assertEqual(response.is_cached, True)
+            self.assertEqual(response.last_refresh, "2023-02-04T13:37:42Z")
+            mock_enqueue.assert_called_once_with(
+                team=self.team, user=None, query_json=runner.query.model_dump(exclude_none=True), refresh_requested=True
+            )
+
+            # doesn't enqueue the same refresh again while it's running
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_ASYNC_IF_STALE)
+            self.assertEqual(response.is_cached, True)
+            self.assertEqual(mock_enqueue.call_count, 1)
+
+            # the refresh itself writes fresh results and releases the lock
+            runner.run(execution_mode=ExecutionMode.CALCULATION_ALWAYS)
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_ASYNC_IF_STALE)
+            self.assertEqual(response.is_cached, True)
+            self.assertEqual(response.last_refresh, "2023-02-04T13:48:42Z")
+            self.assertEqual(mock_enqueue.call_count, 1)
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37 + 22, 42)):
+            # stale again, so the next refresh can be enqueued
+            with (
+                patch(
+                    "posthog.hogql_queries.query_runner.get_query_runner",
+                    side_effect=lambda query, team, **kwargs: TestQueryRunner(query=query, team=team, **kwargs),
+                ),
+                patch("posthog.clickhouse.client.execute_async.enqueue_process_query_task") as mock_enqueue,
+            ):
+                runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_ASYNC_IF_STALE)
+                self.assertEqual(mock_enqueue.call_count, 1)
+
+    def test_stale_while_revalidate_falls_back_to_sync_calculation(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "sync_fallback"}, team=self.team)
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37, 42)):
+            runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_IF_STALE)
+
+        with (
+            freeze_time(datetime(2023, 2, 4, 13, 37 + 11, 42)),
+            patch("posthog.clickhouse.client.execute_async.enqueue_process_query_task") as mock_enqueue,
+        ):
+            # TestQuery can't be rebuilt by the background task, so it's calculated right away
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_ASYNC_IF_STALE)
+            self.assertEqual(response.is_cached, False)
+            mock_enqueue.assert_not_called()
+
+    def test_identical_in_flight_calculations_are_coalesced(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "in_flight"}, team=self.team)
+        other_runner = TestQueryRunner(query={"some_attr": "in_flight"}, team=self.team)
+        lock_key = f"{QUERY_IN_FLIGHT_LOCK_PREFIX}:{runner.get_cache_key()}"
+        redis.get_client().set(lock_key, "other")
+
+        def finish_other_calculation(_seconds):
+            # The other caller is done: it releases the lock after caching its results
+            redis.get_client().delete(lock_key)
+            other_runner.run(execution_mode=ExecutionMode.CALCULATION_ALWAYS)
+
+        with (
+            patch("posthog.hogql_queries.query_runner.sleep", side_effect=finish_other_calculation) as mock_sleep,
+            patch.object(runner, "calculate", wraps=runner.calculate) as mock_calculate,
+        ):
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_IF_STALE)
+
+        mock_sleep.assert_called_once()
+        mock_calculate.assert_not_called()
+        self.assertIsInstance(response, TestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, True)
+        self.assertIsNone(redis.get_client().get(lock_key))
+
+    def test_in_flight_calculation_timeout(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "in_flight_timeout"}, team=self.team)
+        lock_key = f"{QUERY_IN_FLIGHT_LOCK_PREFIX}:{runner.get_cache_key()}"
+        redis.get_client().set(lock_key, "other")
+
+        with (
+            patch("posthog.hogql_queries.query_runner.QUERY_IN_FLIGHT_WAIT_TIMEOUT", 0),
+            patch.object(runner, "calculate", wraps=runner.calculate) as mock_calculate,
+        ):
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_IF_STALE)
+
+        # Calculated without waiting any longer, and the other caller's lock is left alone
+        mock_calculate.assert_called_once()
+        self.assertEqual(response.is_cached, False)
+        self.assertEqual(redis.get_client().get(lock_key), b"other")
+
+    def test_in_flight_lock_is_only_released_by_its_holder(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "in_flight_release"}, team=self.team)
+        cache_key = runner.get_cache_key()
+        lock_key = f"{QUERY_IN_FLIGHT_LOCK_PREFIX}:{cache_key}"
+
+        token = runner._acquire_in_flight_lock(cache_key)
+        assert token is not None
+        runner._release_in_flight_lock(cache_key, "other")
+        self.assertEqual(redis.get_client().get(lock_key), token.encode())
+
+        runner._release_in_flight_lock(cache_key, token)
+        self.assertIsNone(redis.get_client().get(lock_key))
+
+    def test_cached_response_envelope_and_legacy_entries(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "envelope"}, team=self.team)
+        cache_key = runner.get_cache_key()
+
+        # Compressed writes are off until no deploy that can't read them is left
+        runner.run(execution_mode=ExecutionMode.CALCULATION_ALWAYS)
+        self.assertTrue(cache.get(cache_key).startswith(b"{"))
+
+        with override_settings(QUERY_CACHE_COMPRESSION_ENABLED=True):
+            runner.run(execution_mode=ExecutionMode.CALCULATION_ALWAYS)
+        self.assertTrue(cache.get(cache_key).startswith(b"PHC\x01"))
+
+        cached_response = runner.run(execution_mode=ExecutionMode.CACHE_ONLY_NEVER_CALCULATE)
+        assert isinstance(cached_response, TestCachedBasicQueryResponse)
+        self.assertEqual(cached_response.results, [["row", 1, 2, 3], list(range(10))])
+
+        # Entries written before the envelope existed are plain orjson
+        cache.set(cache_key, orjson.dumps(cached_response.model_dump()))
+        legacy_response = runner.run(execution_mode=ExecutionMode.CACHE_ONLY_NEVER_CALCULATE)
+        assert isinstance(legacy_response, TestCachedBasicQueryResponse)
+        self.assertEqual(legacy_response.results, cached_response.results)
+        self.assertEqual(legacy_response.is_cached, True)
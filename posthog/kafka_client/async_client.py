@@ -0,0 +1,186 @@
+import asyncio
+import weakref
+from typing import Any, Optional
+from collections.abc import Callable
+
+from aiokafka import AIOKafkaProducer
+from aiokafka.helpers import create_ssl_context
+from django.conf import settings
+from statshog.defaults.django import statsd
+from structlog import get_logger
+
+from posthog.kafka_client import helper
+from posthog.kafka_client.client import _KafkaSecurityProtocol, _sasl_params, json_dumps
+
+logger = get_logger(__name__)
+
+
+class AsyncKafkaProducerForTests:
+    async def start(self):
+        return
+
+    async def stop(self):
+        return
+
+    async def flush(self):
+        return
+
+    async def send(
+        self,
+        topic: str,
+        value: Any,
+        key: Any = None,
+        headers: Optional[list[tuple[str, bytes]]] = None,
+    ) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        # NOTE: like `KafkaProducerForTests`, we only use the future to reraise on error
+        future.set_result(None)
+        return future
+
+
+class _AsyncKafkaProducer:
+    """
+    The asyncio counterpart of `_KafkaProducer`, for producing from an event loop, e.g. the async capture view.
+
+    `produce` returns as soon as the message is added to the batch of its partition, and the returned future resolves
+    once the broker acknowledged it. Batches are sent when they are full or `linger_ms` after their first message, so
+    that concurrent requests share produce requests instead of each doing their own round trip.
+    """
+
+    def __init__(
+        self,
+        test=settings.TEST,
+        # the default producer uses these defaulted environment variables,
+        # but the session recording producer needs to override them
+        kafka_base64_keys=None,
+        kafka_hosts=None,
+        kafka_security_protocol=None,
+        max_request_size=None,
+        compression_type=None,
+    ):
+        if kafka_security_protocol is None:
+            kafka_security_protocol = settings.KAFKA_SECURITY_PROTOCOL
+        if kafka_hosts is None:
+            kafka_hosts = settings.KAFKA_HOSTS
+        if kafka_base64_keys is None:
+            kafka_base64_keys = settings.KAFKA_BASE64_KEYS
+
+        self._started = False
+        # concurrent requests wait for the first one to start the producer, instead of sending with one that isn't
+        self._start_lock = asyncio.Lock()
+
+        if test:
+            self.producer: AIOKafkaProducer | AsyncKafkaProducerForTests = AsyncKafkaProducerForTests()
+            return
+
+        if kafka_base64_keys:
+            kafka_security_protocol = _KafkaSecurityProtocol.SSL
+            ssl_context = helper.get_kafka_ssl_context()
+        elif kafka_security_protocol in [_KafkaSecurityProtocol.SSL, _KafkaSecurityProtocol.SASL_SSL]:
+            ssl_context = create_ssl_context()
+        else:
+            ssl_context = None
+
+        self.producer = AIOKafkaProducer(
+            bootstrap_servers=kafka_hosts,
+            security_protocol=kafka_security_protocol or _KafkaSecurityProtocol.PLAINTEXT,
+            ssl_context=ssl_context,
+            compression_type=compression_type,
+            linger_ms=settings.CAPTURE_ASYNC_KAFKA_LINGER_MS,
+            max_batch_size=settings.CAPTURE_ASYNC_KAFKA_MAX_BATCH_SIZE,
+            **{"max_request_size": max_request_size} if max_request_size else {},
+            **_sasl_params(),
+        )
+
+    @staticmethod
+    def json_serializer(d):
+        return json_dumps(d)
+
+    async def start(self):
+        if self._started:
+            return
+        async with self._start_lock:
+            if not self._started:
+                # if starting fails, the next produce tries again
+                await self.producer.start()
+                self._started = True
+
+    def on_send_done(self, topic: str, future: asyncio.Future):
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is None:
+            statsd.incr("posthog_cloud_kafka_send_success", tags={"topic": topic})
+        else:
+            statsd.incr(
+                "posthog_cloud_kafka_send_failure",
+                tags={"topic": topic, "exception": exc.__class__.__name__},
+            )
+
+    async def produce(
+        self,
+        topic: str,
+        data: Any,
+        key: Any = None,
+        value_serializer: Optional[Callable[[Any], Any]] = None,
+        headers: Optional[list[tuple[str, str]]] = None,
+    ) -> asyncio.Future:
+        await self.start()
+
+        if not value_serializer:
+            value_serializer = self.json_serializer
+        b = value_serializer(data)
+        if key is not None:
+            key = key.encode("utf-8")
+        encoded_headers = (
+            [(header[0], header[1].encode("utf-8")) for header in headers] if headers is not None else None
+        )
+        future = await self.producer.send(topic, value=b, key=key, headers=encoded_headers)
+        # Record if the send request was successful or not
+        future.add_done_callback(lambda f: self.on_send_done(topic=topic, future=f))
+        return future
+
+    async def flush(self):
+        await self.producer.flush()
+
+    async def close(self):
+        async with self._start_lock:
+            if self._started:
+                self._started = False
+                await self.producer.stop()
+
+
+# aiokafka producers are bound to the event loop they were started in, so there's one of each per loop
+_producers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, _AsyncKafkaProducer]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _loop_producer(name: str, **kwargs) -> _AsyncKafkaProducer:
+    loop_producers = _producers.setdefault(asyncio.get_running_loop(), {})
+    if name not in loop_producers:
+        loop_producers[name] = _AsyncKafkaProducer(**kwargs)
+    return loop_producers[name]
+
+
+async def close_async_kafka_producers() -> None:
+    """Send what's left in the batches of the running loop's producers and stop them, e.g. on server shutdown."""
+    loop_producers = _producers.pop(asyncio.get_running_loop(), {})
+    results = await asyncio.gather(*(producer.close() for producer in loop_producers.values()), return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.exception("Could not close async Kafka producer", exc_info=result)
+
+
+def asyncKafkaProducer() -> _AsyncKafkaProducer:
+    return _loop_producer("default")
+
+
+def asyncSessionRecordingKafkaProducer() -> _AsyncKafkaProducer:
+    return _loop_producer(
+        "session_recording",
+        kafka_hosts=settings.SESSION_RECORDING_KAFKA_HOSTS,
+        kafka_security_protocol=settings.SESSION_RECORDING_KAFKA_SECURITY_PROTOCOL,
+        max_request_size=settings.SESSION_RECORDING_KAFKA_MAX_REQUEST_SIZE_BYTES,
+        compression_type=settings.SESSION_RECORDING_KAFKA_COMPRESSION,
+    )
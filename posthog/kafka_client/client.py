@@ -3,6 +3,7 @@ from enum import Enum
 from typing import Any, Optional
 from collections.abc import Callable
 
+import orjson
 from django.conf import settings
 from kafka import KafkaConsumer as KC
 from kafka import KafkaProducer as KP
@@ -24,6 +25,17 @@ KAFKA_PRODUCER_RETRIES = 5
 logger = get_logger(__name__)
 
 
+def json_dumps(d: Any) -> bytes:
+    """
+    JSON encode a message with orjson, which is several times faster than the stdlib for capture's event envelopes.
+    Falls back to the stdlib for what orjson can't encode, e.g. integers over 64 bits or lone surrogates.
+    """
+    try:
+        return orjson.dumps(d, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        return json.dumps(d).encode("utf-8")
+
+
 class KafkaProducerForTests:
     def __init__(self):
         pass
@@ -141,8 +153,7 @@ class _KafkaProducer:
 
     @staticmethod
     def json_serializer(d):
-        b = json.dumps(d).encode("utf-8")
-        return b
+        return json_dumps(d)
 
     def on_send_success(self, record_metadata: RecordMetadata):
         statsd.incr("posthog_cloud_kafka_send_success", tags={"topic": record_metadata.topic})
@@ -0,0 +1,56 @@
+import asyncio
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from posthog.kafka_client.async_client import _AsyncKafkaProducer, asyncKafkaProducer, close_async_kafka_producers
+
+
+class AsyncKafkaClientTestCase(SimpleTestCase):
+    async def test_concurrent_produces_wait_for_the_producer_to_start(self):
+        producer = _AsyncKafkaProducer(test=True)
+        calls: list[str] = []
+        can_start = asyncio.Event()
+
+        async def start():
+            calls.append("start")
+            await can_start.wait()
+
+        async def send(*args, **kwargs):
+            calls.append("send")
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(None)
+            return future
+
+        with (
+            patch.object(producer.producer, "start", side_effect=start),
+            patch.object(producer.producer, "send", side_effect=send),
+        ):
+            produces = asyncio.gather(producer.produce("topic", {}), producer.produce("topic", {}))
+            await asyncio.sleep(0)
+            self.assertEqual(calls, ["start"])
+
+            can_start.set()
+            await produces
+
+        self.assertEqual(calls, ["start", "send", "send"])
+
+    async def test_failed_start_is_retried(self):
+        producer = _AsyncKafkaProducer(test=True)
+
+        with patch.object(producer.producer, "start", side_effect=[ConnectionError(), None]) as start:
+            with self.assertRaises(ConnectionError):
+                await producer.produce("topic", {})
+            await producer.produce("topic", {})
+
+        self.assertEqual(start.await_count, 2)
+
+    async def test_close_async_kafka_producers(self):
+        producer = asyncKafkaProducer()
+        await producer.produce("topic", {})
+
+        with patch.object(producer.producer, "stop") as stop:
+            await close_async_kafka_producers()
+
+        stop.assert_awaited_once()
+        self.assertIsNot(asyncKafkaProducer(), producer)
@@ -1,3 +1,4 @@
+import json
 from unittest.mock import patch
 
 import kafka
@@ -32,6 +33,15 @@ class KafkaClientTestCase(TestCase):
         payload = next(consumer)
         self.assertEqual(payload.value, self.payload)
 
+    def test_json_serializer(self):
+        payload = {"a": "💻", 1: [1.5, None]}
+        self.assertEqual(json.loads(_KafkaProducer.json_serializer(payload)), {"a": "💻", "1": [1.5, None]})
+
+    def test_json_serializer_falls_back_to_stdlib_json(self):
+        # orjson can't encode integers over 64 bits or lone surrogates
+        payload = {"big": 2**70, "surrogate": "\ud83d"}
+        self.assertEqual(json.loads(_KafkaProducer.json_serializer(payload)), payload)
+
     def test_kafka_default_security_protocol(self):
         producer = _KafkaProducer(test=False)
         self.assertEqual(producer.producer.config["security_protocol"], "PLAINTEXT")  # type: ignore
@@ -1,4 +1,5 @@
 import functools
+import inspect
 from time import time
 from typing import Any, Optional
 
@@ -10,6 +11,18 @@ logger = structlog.get_logger(__name__)
 
 def timed(name: str):
     def timed_decorator(func: Any) -> Any:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                timer = statsd.timer(name).start()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    timer.stop()
+
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             timer = statsd.timer(name).start()
@@ -0,0 +1,75 @@
+import json
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand
+
+from posthog.api.capture import build_kafka_event_data
+from posthog.kafka_client.client import json_dumps
+from posthog.models.utils import UUIDT
+
+
+def _build_event(index: int) -> dict:
+    # Roughly what posthog-js sends for an autocapture event
+    return {
+        "event": "$autocapture",
+        "properties": {
+            "$os": "Mac OS X",
+            "$browser": "Chrome",
+            "$current_url": f"https://example.com/products/{index}?utm_source=newsletter",
+            "$pathname": f"/products/{index}",
+            "$screen_height": 1117,
+            "$screen_width": 1728,
+            "$lib": "web",
+            "$lib_version": "1.116.6",
+            "$time": 1711972800.123 + index,
+            "$session_id": "018e9a4b-5c20-7d4b-8a2f-3e5f7b9d1f23",
+            "$elements": [
+                {"tag_name": "button", "$el_text": "Add to cart 🛒", "attr__class": "btn btn-primary", "nth_child": 2},
+                {"tag_name": "div", "attr__class": "product-card", "nth_child": 1, "nth_of_type": 1},
+            ],
+        },
+        "timestamp": "2024-04-01T12:00:00.123Z",
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure CPU time and bytes per event of encoding capture's Kafka messages, with stdlib json and orjson"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=20000, help="Number of events to encode")
+
+    def handle(self, *args, **options):
+        events = [(_build_event(index), UUIDT()) for index in range(options["events"])]
+        now = datetime.now(tz=timezone.utc)
+        envelope = {"distinct_id": "user-1", "ip": "127.0.0.1", "site_url": "https://example.com", "token": "phc_test"}
+
+        start = time.process_time()
+        stdlib_bytes = 0
+        for event, event_uuid in events:
+            # How capture encoded messages before, with the event encoded to a string first and then escaped again
+            message = {
+                "uuid": str(event_uuid),
+                **envelope,
+                "data": json.dumps(event),
+                "now": now.isoformat(),
+                "sent_at": "",
+            }
+            stdlib_bytes += len(json.dumps(message).encode("utf-8"))
+        stdlib_duration = time.process_time() - start
+
+        start = time.process_time()
+        orjson_bytes = 0
+        for event, event_uuid in events:
+            message = build_kafka_event_data(data=event, now=now, sent_at=None, event_uuid=event_uuid, **envelope)
+            orjson_bytes += len(json_dumps(message))
+        orjson_duration = time.process_time() - start
+
+        count = len(events)
+        self.stdout.write(
+            f"stdlib json: {stdlib_duration / count * 1e6:.1f} µs/event, {stdlib_bytes / count:.0f} bytes/event"
+        )
+        self.stdout.write(
+            f"orjson: {orjson_duration / count * 1e6:.1f} µs/event, {orjson_bytes / count:.0f} bytes/event"
+        )
+        self.stdout.write(f"Speedup: {stdlib_duration / orjson_duration:.1f}x")
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posthog.models import FeatureFlag
+from posthog.models.feature_flag.flag_matching import FeatureFlagMatcher
+from posthog.models.feature_flag.local_evaluation import compile_feature_flag
+
+
+def _build_feature_flags(count: int) -> list[FeatureFlag]:
+    # Unsaved flags, evaluation with property overrides never touches the database
+    return [
+        FeatureFlag(
+            id=index,
+            team_id=1,
+            key=f"flag-{index}",
+            filters={
+                "groups": [
+                    {
+                        "properties": [
+                            {"key": "email", "value": "posthog.com", "operator": "icontains", "type": "person"},
+                            {"key": "plan", "value": ["scale", "enterprise"], "operator": "exact", "type": "person"},
+                        ],
+                        "rollout_percentage": 50,
+                    },
+                    {"properties": [{"key": "age", "value": 30, "operator": "gt", "type": "person"}]},
+                ],
+                "multivariate": {
+                    "variants": [
+                        {"key": "control", "rollout_percentage": 50},
+                        {"key": "test", "rollout_percentage": 50},
+                    ]
+                }
+                if index % 2
+                else None,
+            },
+        )
+        for index in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Measure single core feature flag evaluation throughput, with and without precompiled flags"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flags", type=int, default=50, help="Number of flags per evaluation")
+        parser.add_argument("--iterations", type=int, default=200, help="Number of distinct_ids to evaluate")
+
+    def handle(self, *args, **options):
+        feature_flags = _build_feature_flags(options["flags"])
+        distinct_ids = [f"user_{index}" for index in range(options["iterations"])]
+        property_values = {"email": "someone@posthog.com", "plan": "scale", "age": 42}
+        evaluations = len(feature_flags) * len(distinct_ids)
+
+        start = time.perf_counter()
+        for distinct_id in distinct_ids:
+            FeatureFlagMatcher(feature_flags, distinct_id, property_value_overrides=property_values).get_matches()
+        matcher_duration = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compiled_feature_flags = [compile_feature_flag(feature_flag) for feature_flag in feature_flags]
+        for distinct_id in distinct_ids:
+            for compiled_feature_flag in compiled_feature_flags:
+                compiled_feature_flag.match(distinct_id, property_values)
+        compiled_duration = time.perf_counter() - start
+
+        self.stdout.write(f"FeatureFlagMatcher: {evaluations / matcher_duration:,.0f} flags/second")
+        self.stdout.write(
+            f"Compiled flags (including compilation): {evaluations / compiled_duration:,.0f} flags/second"
+        )
+        self.stdout.write(f"Speedup: {matcher_duration / compiled_duration:.1f}x")
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hogvm.python.compiler import compile_bytecode, execute_compiled_bytecode
+from hogvm.python.execute import execute_bytecode
+from posthog.hogql.bytecode import create_bytecode
+from posthog.hogql.parser import parse_expr, parse_program
+
+# Filter expressions, in the shapes the hogvm tests run
+EXPRESSIONS = {
+    "arithmetic": "1 + 2 * 3 - 4 / 2 % 3",
+    "comparison": "properties.foo == 'bar' and properties.count > 3",
+    "like": "properties.url like '%/products/%' or properties.url ilike '%CHECKOUT%'",
+    "regex": "properties.email =~ '^[a-z]+@posthog\\\\.com$' and not properties.email !~* 'POSTHOG'",
+    "in": "properties.plan in 'scale enterprise' and properties.country not in 'US CA'",
+    "functions": "concat(upper(properties.foo), toString(properties.count)) == 'BAR42'",
+    "nested fields": "properties.nested.deep.value == 'x' or ifNull(properties.nullValue, 'default') == 'default'",
+}
+
+# Programs like the hogvm tests run, with locals, loops and declared functions
+PROGRAMS = {
+    "variables": "var a := 1 + 2; var b := a * 3; var c := b - a; return c * properties.count;",
+    "while loop": "var i := 0; var total := 0; while (i < 100) { total := total + i; i := i + 1; } return total;",
+    "if else": "var a := properties.count; if (a > 10) { return 'big'; } else { return 'small'; }",
+    "functions": "fn add(a, b) { return a + b; } return add(add(1, 2), add(properties.count, 4));",
+    "recursion": """
+        fn fibonacci(number) {
+            if (number < 2) {
+                return number;
+            } else {
+                return fibonacci(number - 1) + fibonacci(number - 2);
+            }
+        }
+        return fibonacci(12);
+    """,
+}
+
+FIELDS = {
+    "properties": {
+        "foo": "bar",
+        "count": 42,
+        "nullValue": None,
+        "url": "https://example.com/products/123?step=checkout",
+        "email": "someone@posthog.com",
+        "plan": "scale",
+        "country": "DE",
+        "nested": {"deep": {"value": "x"}},
+    }
+}
+
+
+class Command(BaseCommand):
+    help = "Measure Hog bytecode throughput, interpreted and compiled to Python"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20000, help="Number of runs of each program")
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        bytecodes = {name: create_bytecode(parse_expr(expr)) for name, expr in EXPRESSIONS.items()}
+        bytecodes.update({name: create_bytecode(parse_program(code)) for name, code in PROGRAMS.items()})
+
+        for name, bytecode in bytecodes.items():
+            assert compile_bytecode(bytecode) is not None, f"{name} can't be compiled"
+            assert execute_compiled_bytecode(bytecode, FIELDS).result == execute_bytecode(bytecode, FIELDS).result
+
+            durations = {}
+            for compiled in (False, True):
+                execute = execute_compiled_bytecode if compiled else execute_bytecode
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    execute(bytecode, FIELDS)
+                durations[compiled] = time.perf_counter() - start
+
+            self.stdout.write(
+                f"{name}: {iterations / durations[False]:,.0f} runs/second interpreted, "
+                f"{iterations / durations[True]:,.0f} runs/second compiled, "
+                f"{durations[False] / durations[True]:.1f}x faster"
+            )
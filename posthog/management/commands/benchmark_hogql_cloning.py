@@ -0,0 +1,85 @@
+import time
+from typing import cast
+
+from django.core.management.base import BaseCommand
+
+from posthog.constants import INSIGHT_FUNNELS, INSIGHT_TRENDS
+from posthog.hogql import ast
+from posthog.hogql.visitor import TraversingVisitor, clone_expr
+from posthog.hogql_queries.insights.funnels.funnels_query_runner import FunnelsQueryRunner
+from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner
+from posthog.hogql_queries.legacy_compatibility.filter_to_query import filter_to_query
+from posthog.hogql_queries.web_analytics.stats_table import WebStatsTableQueryRunner
+from posthog.models import Team
+from posthog.schema import DateRange, FunnelsQuery, TrendsQuery, WebStatsBreakdown, WebStatsTableQuery
+
+
+class _NodeCounter(TraversingVisitor):
+    def __init__(self):
+        self.count = 0
+
+    def visit(self, node):
+        if node is not None:
+            self.count += 1
+        return super().visit(node)
+
+
+def _build_queries(team: Team, steps: int) -> dict[str, ast.Expr]:
+    # The queries of the runners the snapshot tests cover, in sizes that are slow to compile
+    events = [
+        {
+            "id": f"step {index}",
+            "type": "events",
+            "order": index,
+            "properties": [{"key": "$browser", "value": "Chrome", "operator": "exact", "type": "event"}],
+        }
+        for index in range(steps)
+    ]
+    funnel = cast(
+        FunnelsQuery, filter_to_query({"insight": INSIGHT_FUNNELS, "events": events, "funnel_window_days": 14})
+    )
+    trends = cast(TrendsQuery, filter_to_query({"insight": INSIGHT_TRENDS, "events": events, "breakdown": "$browser"}))
+    web_stats = WebStatsTableQuery(
+        dateRange=DateRange(date_from="-7d"),
+        properties=[],
+        breakdownBy=WebStatsBreakdown.Page,
+        doPathCleaning=True,
+        includeBounceRate=True,
+        includeScrollDepth=True,
+    )
+    return {
+        f"funnel with {steps} steps": FunnelsQueryRunner(query=funnel, team=team).to_query(),
+        f"trends with {steps} series": TrendsQueryRunner(query=trends, team=team).to_query(),
+        "web analytics stats table": WebStatsTableQueryRunner(query=web_stats, team=team).to_query(),
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure how quickly the ASTs of big HogQL queries are cloned"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--team-id", default=None, type=int, help="Team to build the queries for")
+        parser.add_argument("--steps", type=int, default=20, help="Number of funnel steps and trends series")
+        parser.add_argument("--iterations", type=int, default=200, help="Number of clones of each query")
+
+    def handle(self, *args, **options):
+        team = Team.objects.get(pk=options["team_id"]) if options["team_id"] else Team.objects.first()
+        if team is None:
+            self.stdout.write("No team to build the queries for")
+            return
+        iterations = options["iterations"]
+
+        for name, query in _build_queries(team, options["steps"]).items():
+            counter = _NodeCounter()
+            counter.visit(query)
+
+            for clear in (False, True):
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    clone_expr(query, clear_types=clear, clear_locations=clear)
+                duration = (time.perf_counter() - start) / iterations
+
+                self.stdout.write(
+                    f"{name}{' (clearing types and locations)' if clear else ''}: {counter.count:,} nodes, "
+                    f"{duration * 1000:.2f}ms per clone, {counter.count / duration:,.0f} nodes/second"
+                )
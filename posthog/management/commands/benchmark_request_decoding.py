@@ -0,0 +1,93 @@
+import base64
+import gzip
+import json
+import time
+from typing import Any
+
+import lzstring
+from django.core.management.base import BaseCommand
+
+from posthog.utils import decompress
+
+
+def _build_batch(count: int) -> list[dict[str, Any]]:
+    # Roughly what posthog-js sends to /e/ for a page load
+    return [
+        {
+            "event": "$autocapture" if index % 3 else "$pageview",
+            "properties": {
+                "$os": "Mac OS X",
+                "$browser": "Chrome",
+                "$device_type": "Desktop",
+                "$current_url": f"https://example.com/products/{index}?utm_source=newsletter",
+                "$host": "example.com",
+                "$pathname": f"/products/{index}",
+                "$browser_version": 122,
+                "$screen_height": 1117,
+                "$screen_width": 1728,
+                "$viewport_height": 959,
+                "$viewport_width": 1728,
+                "$lib": "web",
+                "$lib_version": "1.116.6",
+                "$insert_id": f"insert-{index}",
+                "$time": 1711972800.123 + index,
+                "distinct_id": "018e9a4b-5c1f-7c3a-9b1e-2f4d6a8c0e12",
+                "$device_id": "018e9a4b-5c1f-7c3a-9b1e-2f4d6a8c0e12",
+                "$referrer": "https://www.google.com/",
+                "$referring_domain": "www.google.com",
+                "token": "phc_benchmark",
+                "$session_id": "018e9a4b-5c20-7d4b-8a2f-3e5f7b9d1f23",
+                "$window_id": "018e9a4b-5c20-7d4b-8a2f-3e5f7b9d1f24",
+                "$elements": [
+                    {
+                        "tag_name": "button",
+                        "$el_text": "Add to cart 🛒",
+                        "attr__class": "btn btn-primary",
+                        "nth_child": 2,
+                    },
+                    {"tag_name": "div", "attr__class": "product-card", "nth_child": 1, "nth_of_type": 1},
+                ]
+                if index % 3
+                else None,
+            },
+            "timestamp": "2024-04-01T12:00:00.123Z",
+        }
+        for index in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Measure capture request body decoding throughput per encoding, with and without the fast path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=20, help="Number of events per request")
+        parser.add_argument("--iterations", type=int, default=2000, help="Number of requests to decode per encoding")
+
+    def handle(self, *args, **options):
+        payload = json.dumps(_build_batch(options["events"]))
+        iterations = options["iterations"]
+
+        # (encoding, request data, compression), in the shapes `load_data_from_request` passes to `decompress`
+        encodings: list[tuple[str, Any, str]] = [
+            ("plain", payload.encode("utf-8"), ""),
+            ("base64", base64.b64encode(payload.encode("utf-8")).decode("ascii"), ""),
+            ("gzip-js", gzip.compress(payload.encode("utf-8")), "gzip-js"),
+            ("gzip without flag", gzip.compress(payload.encode("utf-8")), ""),
+            ("lz64", lzstring.LZString().compressToBase64(payload), "lz64"),
+        ]
+
+        for name, data, compression in encodings:
+            assert decompress(data, compression) == decompress(data, compression, fast_path=False)
+
+            durations = {}
+            for fast_path in (False, True):
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    decompress(data, compression, fast_path=fast_path)
+                durations[fast_path] = time.perf_counter() - start
+
+            events_per_second = options["events"] * iterations / durations[True]
+            self.stdout.write(
+                f"{name}: {events_per_second:,.0f} events/second, "
+                f"{durations[False] / durations[True]:.1f}x faster than without the fast path"
+            )
@@ -26,7 +26,7 @@ from rest_framework import status
 from statshog.defaults.django import statsd
 
 from posthog.api.capture import get_event
-from posthog.api.decide import get_decide
+from posthog.api.decide import get_bulk_decide, get_decide
 from posthog.api.shared import UserBasicSerializer
 from posthog.clickhouse.client.execute import clickhouse_query_counter
 from posthog.clickhouse.query_tagging import QueryCounter, reset_query_tags, tag_queries
@@ -384,9 +384,19 @@ class ShortCircuitMiddleware:
             replenish_rate=settings.DECIDE_BUCKET_REPLENISH_RATE,
             bucket_capacity=settings.DECIDE_BUCKET_CAPACITY,
         )
+        self.decide_bulk_throttler = DecideRateThrottle(
+            replenish_rate=settings.DECIDE_BULK_BUCKET_REPLENISH_RATE,
+            bucket_capacity=settings.DECIDE_BULK_BUCKET_CAPACITY,
+        )
 
     def __call__(self, request: HttpRequest):
+        decide_view = None
         if request.path == "/decide/" or request.path == "/decide":
+            decide_view, throttler = get_decide, self.decide_throttler
+        elif request.path == "/decide/bulk/" or request.path == "/decide/bulk":
+            decide_view, throttler = get_bulk_decide, self.decide_bulk_throttler
+
+        if decide_view is not None:
             try:
                 # :KLUDGE: Manually tag ClickHouse queries as CHMiddleware is skipped
                 tag_queries(
@@ -397,8 +407,8 @@ class ShortCircuitMiddleware:
                     http_referer=request.META.get("HTTP_REFERER"),
                     http_user_agent=request.META.get("HTTP_USER_AGENT"),
                 )
-                if self.decide_throttler.allow_request(request, None):
-                    return get_decide(request)
+                if throttler.allow_request(request, None):
+                    return decide_view(request)
                 else:
                     return cors_response(
                         request,
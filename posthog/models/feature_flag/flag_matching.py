@@ -1,4 +1,5 @@
 import hashlib
+from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
 import time
@@ -43,6 +44,8 @@ logger = structlog.get_logger(__name__)
 __LONG_SCALE__ = float(0xFFFFFFFFFFFFFFF)
 
 FLAG_MATCHING_QUERY_TIMEOUT_MS = 300  # 300 ms. Any longer and we'll just error out.
+# Bulk evaluation queries scan persons and groups for many distinct_ids at once, so they get more time.
+BULK_FLAG_MATCHING_QUERY_TIMEOUT_MS = 3000
 
 FLAG_EVALUATION_ERROR_COUNTER = Counter(
     "flag_evaluation_error_total",
@@ -65,6 +68,8 @@ FLAG_CACHE_HIT_COUNTER = Counter(
 
 ENTITY_EXISTS_PREFIX = "flag_entity_exists_"
 PERSON_KEY = "person"
+# Properties that are filled in for every distinct_id and group locally, see `add_local_person_and_group_properties`
+LOCAL_PROPERTY_KEYS = ("distinct_id", "$group_key")
 
 
 class FeatureFlagMatchReason(str, Enum):
@@ -142,6 +147,7 @@ class FeatureFlagMatcher:
         group_property_value_overrides: Optional[dict[str, dict[str, Union[str, int]]]] = None,
         skip_database_flags: bool = False,
         cohorts_cache: Optional[dict[int, CohortOrEmpty]] = None,
+        query_conditions: Optional[dict[str, bool]] = None,
     ):
         if group_property_value_overrides is None:
             group_property_value_overrides = {}
@@ -159,6 +165,8 @@ class FeatureFlagMatcher:
         self.property_value_overrides = property_value_overrides
         self.group_property_value_overrides = group_property_value_overrides
         self.skip_database_flags = skip_database_flags
+        # Conditions already fetched for this distinct_id, e.g. by a bulk evaluation
+        self.preloaded_query_conditions = query_conditions
 
         if cohorts_cache is None:
             self.cohorts_cache = {}
@@ -406,6 +414,8 @@ class FeatureFlagMatcher:
 
     @cached_property
     def query_conditions(self) -> dict[str, bool]:
+        if self.preloaded_query_conditions is not None:
+            return self.preloaded_query_conditions
         try:
             # Some extra wiggle room here for timeouts because this depends on the number of flags as well,
             # and not just the database query.
@@ -431,8 +441,6 @@ class FeatureFlagMatcher:
                             [],
                         )
 
-                person_fields: list[str] = []
-
                 for existence_condition_key in self.has_pure_is_not_conditions:
                     if existence_condition_key == PERSON_KEY:
                         person_exists = person_query.exists()
@@ -447,138 +455,10 @@ class FeatureFlagMatcher:
                         group_exists = group_query.exists()
                         all_conditions[f"{ENTITY_EXISTS_PREFIX}{existence_condition_key}"] = group_exists
 
-                def condition_eval(key, condition):
-                    team_id = self.feature_flags[0].team_id
-                    expr = None
-                    annotate_query = True
-                    nonlocal person_query
-
-                    property_list = Filter(data=condition).property_groups.flat
-                    properties_with_math_operators = get_all_properties_with_math_operators(
-                        property_list, self.cohorts_cache, team_id
-                    )
-
-                    if len(condition.get("properties", {})) > 0:
-                        # Feature Flags don't support OR filtering yet
-                        target_properties = self.property_value_overrides
-                        if feature_flag.aggregation_group_type_index is not None:
-                            if feature_flag.aggregation_group_type_index not in self.cache.group_type_index_to_name:
-                                target_properties = {}
-                            else:
-                                target_properties = self.group_property_value_overrides.get(
-                                    self.cache.group_type_index_to_name[feature_flag.aggregation_group_type_index],
-                                    {},
-                                )
-
-                        expr = properties_to_Q(
-                            team_id,
-                            property_list,
-                            override_property_values=target_properties,
-                            cohorts_cache=self.cohorts_cache,
-                            using_database=DATABASE_FOR_FLAG_MATCHING,
-                        )
-
-                        # TRICKY: Due to property overrides for cohorts, we sometimes shortcircuit the condition check.
-                        # In that case, the expression is either an explicit True or explicit False, or multiple conditions.
-                        # We can skip going to the database in explicit True|False conditions. This is important
-                        # as it allows resolving flags correctly for non-ingested persons.
-                        # However, this doesn't work for the multiple condition case (when expr has multiple Q objects),
-                        # but it's better than nothing.
-                        # TODO: A proper fix would be to handle cohorts with property overrides before we get to this point.
-                        # Unskip test test_complex_cohort_filter_with_override_properties when we fix this.
-                        if expr == Q(pk__isnull=False):
-                            all_conditions[key] = True
-                            annotate_query = False
-                        elif expr == Q(pk__isnull=True):
-                            all_conditions[key] = False
-                            annotate_query = False
-
-                    if annotate_query:
-                        if feature_flag.aggregation_group_type_index is None:
-                            # :TRICKY: Flag matching depends on type of property when doing >, <, >=, <= comparisons.
-                            # This requires a generated field to query in Q objects, which sadly don't allow inlining fields,
-                            # hence we need to annotate the query here, even though these annotations are used much deeper,
-                            # in properties_to_q, in empty_or_null_with_value_q
-                            # These need to come in before the expr so they're available to use inside the expr.
-                            # Same holds for the group queries below.
-                            type_property_annotations = {
-                                prop_key: Func(F(prop_field), function="JSONB_TYPEOF", output_field=CharField())
-                                for prop_key, prop_field in properties_with_math_operators
-                            }
-                            person_query = person_query.annotate(
-                                **type_property_annotations,
-                                **{
-                                    key: ExpressionWrapper(
-                                        expr if expr else RawSQL("true", []),
-                                        output_field=BooleanField(),
-                                    ),
-                                },
-                            )
-                            person_fields.append(key)
-                        else:
-                            if feature_flag.aggregation_group_type_index not in group_query_per_group_type_mapping:
-                                # ignore flags that didn't have the right groups passed in
-                                return
-                            (
-                                group_query,
-                                group_fields,
-                            ) = group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index]
-                            type_property_annotations = {
-                                prop_key: Func(F(prop_field), function="JSONB_TYPEOF", output_field=CharField())
-                                for prop_key, prop_field in properties_with_math_operators
-                            }
-                            group_query = group_query.annotate(
-                                **type_property_annotations,
-                                **{
-                                    key: ExpressionWrapper(
-                                        expr if expr else RawSQL("true", []),
-                                        output_field=BooleanField(),
-                                    )
-                                },
-                            )
-                            group_fields.append(key)
-                            group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index] = (
-                                group_query,
-                                group_fields,
-                            )
-
-                # only fetch all cohorts if not passed in any cached cohorts
-                if not self.cohorts_cache and any(feature_flag.uses_cohorts for feature_flag in self.feature_flags):
-                    all_cohorts = {
-                        cohort.pk: cohort
-                        for cohort in Cohort.objects.using(DATABASE_FOR_FLAG_MATCHING).filter(
-                            team_id=team_id, deleted=False
-                        )
-                    }
-                    self.cohorts_cache.update(all_cohorts)
-                # release conditions
-                for feature_flag in self.feature_flags:
-                    # super release conditions
-                    if feature_flag.super_conditions and len(feature_flag.super_conditions) > 0:
-                        condition = feature_flag.super_conditions[0]
-                        prop_key = (condition.get("properties") or [{}])[0].get("key")
-                        if prop_key:
-                            key = f"flag_{feature_flag.pk}_super_condition"
-                            condition_eval(key, condition)
-
-                            is_set_key = f"flag_{feature_flag.pk}_super_condition_is_set"
-                            is_set_condition = {
-                                "properties": [
-                                    {
-                                        "key": prop_key,
-                                        "operator": "is_set",
-                                    }
-                                ]
-                            }
-                            condition_eval(is_set_key, is_set_condition)
-
-                    with start_span(
-                        op="parse_feature_flag_conditions",
-                        description=f"feature_flag={feature_flag.pk} key={feature_flag.key}",
-                    ):
-                        for index, condition in enumerate(feature_flag.conditions):
-                            key = f"flag_{feature_flag.pk}_condition_{index}"
-                            condition_eval(key, condition)
+                person_query, person_fields, static_conditions = self.annotate_condition_queries(
+                    person_query, group_query_per_group_type_mapping
+                )
+                all_conditions = {**all_conditions, **static_conditions}
 
                 if len(person_fields) > 0:
                     person_query = person_query.values(*person_fields)
@@ -605,6 +485,153 @@ class FeatureFlagMatcher:
             # Covers all cases like invalid JSON, invalid operator, invalid property name, invalid group input format, etc.
             raise e
 
+    def annotate_condition_queries(
+        self,
+        person_query: QuerySet,
+        group_query_per_group_type_mapping: dict[GroupTypeIndex, tuple[QuerySet, list[str]]],
+    ) -> tuple[QuerySet, list[str], dict[str, bool]]:
+        """
+        Annotates the person query and the group queries (in place) with one boolean field per flag condition.
+
+        Returns the annotated person query, its condition fields, and the conditions that were resolved
+        without going to the database.
+        """
+        all_conditions: dict[str, bool] = {}
+        person_fields: list[str] = []
+        team_id = self.feature_flags[0].team_id
+
+        def condition_eval(key, condition):
+            expr = None
+            annotate_query = True
+            nonlocal person_query
+
+            property_list = Filter(data=condition).property_groups.flat
+            properties_with_math_operators = get_all_properties_with_math_operators(
+                property_list, self.cohorts_cache, team_id
+            )
+
+            if len(condition.get("properties", {})) > 0:
+                # Feature Flags don't support OR filtering yet
+                target_properties = self.property_value_overrides
+                if feature_flag.aggregation_group_type_index is not None:
+                    if feature_flag.aggregation_group_type_index not in self.cache.group_type_index_to_name:
+                        target_properties = {}
+                    else:
+                        target_properties = self.group_property_value_overrides.get(
+                            self.cache.group_type_index_to_name[feature_flag.aggregation_group_type_index],
+                            {},
+                        )
+
+                expr = properties_to_Q(
+                    team_id,
+                    property_list,
+                    override_property_values=target_properties,
+                    cohorts_cache=self.cohorts_cache,
+                    using_database=DATABASE_FOR_FLAG_MATCHING,
+                )
+
+                # TRICKY: Due to property overrides for cohorts, we sometimes shortcircuit the condition check.
+                # In that case, the expression is either an explicit True or explicit False, or multiple conditions.
+                # We can skip going to the database in explicit True|False conditions. This is important
+                # as it allows resolving flags correctly for non-ingested persons.
+                # However, this doesn't work for the multiple condition case (when expr has multiple Q objects),
+                # but it's better than nothing.
+                # TODO: A proper fix would be to handle cohorts with property overrides before we get to this point.
+                # Unskip test test_complex_cohort_filter_with_override_properties when we fix this.
+                if expr == Q(pk__isnull=False):
+                    all_conditions[key] = True
+                    annotate_query = False
+                elif expr == Q(pk__isnull=True):
+                    all_conditions[key] = False
+                    annotate_query = False
+
+            if annotate_query:
+                if feature_flag.aggregation_group_type_index is None:
+                    # :TRICKY: Flag matching depends on type of property when doing >, <, >=, <= comparisons.
+                    # This requires a generated field to query in Q objects, which sadly don't allow inlining fields,
+                    # hence we need to annotate the query here, even though these annotations are used much deeper,
+                    # in properties_to_q, in empty_or_null_with_value_q
+                    # These need to come in before the expr so they're available to use inside the expr.
+                    # Same holds for the group queries below.
+                    type_property_annotations = {
+                        prop_key: Func(F(prop_field), function="JSONB_TYPEOF", output_field=CharField())
+                        for prop_key, prop_field in properties_with_math_operators
+                    }
+                    person_query = person_query.annotate(
+                        **type_property_annotations,
+                        **{
+                            key: ExpressionWrapper(
+                                expr if expr else RawSQL("true", []),
+                                output_field=BooleanField(),
+                            ),
+                        },
+                    )
+                    person_fields.append(key)
+                else:
+                    if feature_flag.aggregation_group_type_index not in group_query_per_group_type_mapping:
+                        # ignore flags that didn't have the right groups passed in
+                        return
+                    (
+                        group_query,
+                        group_fields,
+                    ) = group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index]
+                    type_property_annotations = {
+                        prop_key: Func(F(prop_field), function="JSONB_TYPEOF", output_field=CharField())
+                        for prop_key, prop_field in properties_with_math_operators
+                    }
+                    group_query = group_query.annotate(
+                        **type_property_annotations,
+                        **{
+                            key: ExpressionWrapper(
+                                expr if expr else RawSQL("true", []),
+                                output_field=BooleanField(),
+                            )
+                        },
+                    )
+                    group_fields.append(key)
+                    group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index] = (
+                        group_query,
+                        group_fields,
+                    )
+
+        # only fetch all cohorts if not passed in any cached cohorts
+        if not self.cohorts_cache and any(feature_flag.uses_cohorts for feature_flag in self.feature_flags):
+            all_cohorts = {
+                cohort.pk: cohort
+                for cohort in Cohort.objects.using(DATABASE_FOR_FLAG_MATCHING).filter(team_id=team_id, deleted=False)
+            }
+            self.cohorts_cache.update(all_cohorts)
+        # release conditions
+        for feature_flag in self.feature_flags:
+            # super release conditions
+            if feature_flag.super_conditions and len(feature_flag.super_conditions) > 0:
+                condition = feature_flag.super_conditions[0]
+                prop_key = (condition.get("properties") or [{}])[0].get("key")
+                if prop_key:
+                    key = f"flag_{feature_flag.pk}_super_condition"
+                    condition_eval(key, condition)
+
+                    is_set_key = f"flag_{feature_flag.pk}_super_condition_is_set"
+                    is_set_condition = {
+                        "properties": [
+                            {
+                                "key": prop_key,
+                                "operator": "is_set",
+                            }
+                        ]
+                    }
+                    condition_eval(is_set_key, is_set_condition)
+
+            with start_span(
+                op="parse_feature_flag_conditions",
+                description=f"feature_flag={feature_flag.pk} key={feature_flag.key}",
+            ):
+                for index, condition in enumerate(feature_flag.conditions):
+                    key = f"flag_{feature_flag.pk}_condition_{index}"
+                    condition_eval(key, condition)
+
+        return person_query, person_fields, all_conditions
+
     def hashed_identifier(self, feature_flag: FeatureFlag) -> Optional[str]:
         """
         If aggregating by people, returns distinct_id.
@@ -724,6 +751,7 @@ def _get_all_feature_flags(
     property_value_overrides: Optional[dict[str, Union[str, int]]] = None,
     group_property_value_overrides: Optional[dict[str, dict[str, Union[str, int]]]] = None,
     skip_database_flags: bool = False,
+    local_matches: Optional[dict[str, FeatureFlagMatch]] = None,
 ) -> tuple[dict[str, Union[str, bool]], dict[str, dict], dict[str, object], bool]:
     if group_property_value_overrides is None:
         group_property_value_overrides = {}
@@ -733,8 +761,19 @@ def _get_all_feature_flags(
         groups = {}
     cache = FlagsMatcherCache(team_id)
 
+    flag_values: dict[str, Union[str, bool]] = {}
+    flag_evaluation_reasons: dict[str, dict] = {}
+    flag_payloads: dict[str, object] = {}
+    faced_error_computing_flags = False
+    # Flags already matched from the request's properties alone, see `local_evaluation`
+    for key, flag_match in (local_matches or {}).items():
+        flag_values[key] = (flag_match.variant or True) if flag_match.match else False
+        if flag_match.payload:
+            flag_payloads[key] = flag_match.payload
+        flag_evaluation_reasons[key] = {"reason": flag_match.reason, "condition_index": flag_match.condition_index}
+
     if feature_flags:
-        return FeatureFlagMatcher(
+        values, reasons, payloads, faced_error_computing_flags = FeatureFlagMatcher(
             feature_flags,
             distinct_id,
             groups,
@@ -744,8 +783,11 @@ def _get_all_feature_flags(
             group_property_value_overrides,
             skip_database_flags,
         ).get_matches()
+        flag_values.update(values)
+        flag_evaluation_reasons.update(reasons)
+        flag_payloads.update(payloads)
 
-    return {}, {}, {}, False
+    return flag_values, flag_evaluation_reasons, flag_payloads, faced_error_computing_flags
 
 
 # Return feature flags
@@ -766,11 +808,23 @@ def get_all_feature_flags(
     property_value_overrides, group_property_value_overrides = add_local_person_and_group_properties(
         distinct_id, groups, property_value_overrides, group_property_value_overrides
     )
-    all_feature_flags = get_feature_flags_for_team_in_cache(team_id)
+    # Imported here because local evaluation builds on this module
+    from .local_evaluation import get_compiled_feature_flags_for_team, match_feature_flags_locally
+
+    compiled_feature_flags = get_compiled_feature_flags_for_team(team_id)
     cache_hit = True
-    if all_feature_flags is None:
+    if compiled_feature_flags is None:
         cache_hit = False
         all_feature_flags = set_feature_flags_for_team_in_cache(team_id)
+        local_matches: dict[str, FeatureFlagMatch] = {}
+    else:
+        # Flags that can be matched from the request's properties alone never reach the matcher or the database
+        local_matches, all_feature_flags = match_feature_flags_locally(
+            compiled_feature_flags.compiled_feature_flags,
+            compiled_feature_flags.feature_flags,
+            distinct_id,
+            property_value_overrides,
+        )
 
     FLAG_CACHE_HIT_COUNTER.labels(team_id=label_for_team_id_to_track(team_id), cache_hit=cache_hit).inc()
 
@@ -790,6 +844,7 @@ def get_all_feature_flags(
                 property_value_overrides=property_value_overrides,
                 group_property_value_overrides=group_property_value_overrides,
                 skip_database_flags=not is_database_alive,
+                local_matches=local_matches,
             )
 
     with start_span(op="with_experience_continuity_write_path"):
@@ -894,6 +949,7 @@ def get_all_feature_flags(
                 property_value_overrides=property_value_overrides,
                 group_property_value_overrides=group_property_value_overrides,
                 skip_database_flags=True,
+                local_matches=local_matches,
             )
 
     return _get_all_feature_flags(
@@ -904,7 +960,251 @@ def get_all_feature_flags(
         groups=groups,
         property_value_overrides=property_value_overrides,
         group_property_value_overrides=group_property_value_overrides,
+        local_matches=local_matches,
+    )
+
+
+def get_all_feature_flags_for_distinct_ids(
+    team_id: int,
+    distinct_ids: list[str],
+    groups: Optional[dict[str, dict[GroupTypeName, str]]] = None,
+) -> dict[str, tuple[dict[str, Union[str, bool]], dict[str, dict], dict[str, object], bool]]:
+    """
+    Evaluates all flags for many distinct_ids at once, returning the same tuple as `get_all_feature_flags`
+    for each of them. `groups` maps a distinct_id to the groups its group flags are evaluated with.
+
+    Persons, groups and hash key overrides are loaded with a fixed number of set-based queries, no matter how many
+    distinct_ids are passed in. Only flags whose conditions use properties filled in per distinct_id
+    (see `LOCAL_PROPERTY_KEYS`) still query per distinct_id. Property overrides and hash key override writes
+    aren't supported here, use `get_all_feature_flags` for those.
+    """
+    if groups is None:
+        groups = {}
+    all_feature_flags = get_feature_flags_for_team_in_cache(team_id)
+    cache_hit = True
+    if all_feature_flags is None:
+        cache_hit = False
+        all_feature_flags = set_feature_flags_for_team_in_cache(team_id)
+
+    FLAG_CACHE_HIT_COUNTER.labels(team_id=label_for_team_id_to_track(team_id), cache_hit=cache_hit).inc()
+
+    if not all_feature_flags:
+        return {distinct_id: ({}, {}, {}, False) for distinct_id in distinct_ids}
+
+    cache = FlagsMatcherCache(team_id)
+    cohorts_cache: dict[int, CohortOrEmpty] = {}
+    bulk_feature_flags, individual_feature_flags = all_feature_flags, []
+    query_conditions_per_distinct_id: Optional[dict[str, dict[str, bool]]] = None
+    hash_key_overrides_per_distinct_id: dict[str, dict[str, str]] = {}
+
+    is_database_alive = (not settings.DECIDE_SKIP_POSTGRES_FLAGS) and postgres_healthcheck.is_connected()
+    if is_database_alive:
+        try:
+            # Fetched up front, because it sets its own shorter timeout on the transaction
+            group_types_to_indexes = cache.group_types_to_indexes if any(groups.values()) else {}
+            with execute_with_timeout(BULK_FLAG_MATCHING_QUERY_TIMEOUT_MS, DATABASE_FOR_FLAG_MATCHING):
+                bulk_feature_flags, individual_feature_flags = _partition_flags_for_bulk_matching(
+                    all_feature_flags, team_id, cohorts_cache
+                )
+                person_ids = dict(
+                    PersonDistinctId.objects.using(DATABASE_FOR_FLAG_MATCHING)
+                    .filter(team_id=team_id, distinct_id__in=distinct_ids)
+                    .values_list("distinct_id", "person_id")
+                )
+                query_conditions_per_distinct_id = _get_bulk_query_conditions(
+                    bulk_feature_flags,
+                    team_id,
+                    distinct_ids,
+                    person_ids,
+                    groups,
+                    group_types_to_indexes,
+                    cache,
+                    cohorts_cache,
+                )
+                if any(feature_flag.ensure_experience_continuity for feature_flag in all_feature_flags):
+                    hash_key_overrides_per_distinct_id = _get_bulk_feature_flag_hash_key_overrides(team_id, person_ids)
+        except Exception as e:
+            handle_feature_flag_exception(e, "[Feature Flags] Error fetching conditions for bulk flag evaluation")
+            query_conditions_per_distinct_id = None
+
+    skip_database_flags = query_conditions_per_distinct_id is None
+    all_flags: dict[str, tuple[dict[str, Union[str, bool]], dict[str, dict], dict[str, object], bool]] = {}
+    for distinct_id in distinct_ids:
+        distinct_id_groups = groups.get(distinct_id) or {}
+        property_value_overrides, group_property_value_overrides = add_local_person_and_group_properties(
+            distinct_id, distinct_id_groups, {}, {}
+        )
+        matchers = []
+        if bulk_feature_flags:
+            matchers.append(
+                FeatureFlagMatcher(
+                    bulk_feature_flags,
+                    distinct_id,
+                    distinct_id_groups,
+                    cache,
+                    hash_key_overrides_per_distinct_id.get(distinct_id),
+                    property_value_overrides,
+                    group_property_value_overrides,
+                    skip_database_flags=skip_database_flags,
+                    cohorts_cache=cohorts_cache,
+                    query_conditions=(query_conditions_per_distinct_id or {}).get(distinct_id, {}),
+                )
+            )
+        if individual_feature_flags:
+            matchers.append(
+                FeatureFlagMatcher(
+                    individual_feature_flags,
+                    distinct_id,
+                    distinct_id_groups,
+                    cache,
+                    hash_key_overrides_per_distinct_id.get(distinct_id),
+                    property_value_overrides,
+                    group_property_value_overrides,
+                    skip_database_flags=skip_database_flags,
+                    cohorts_cache=cohorts_cache,
+                )
+            )
+
+        flag_values: dict[str, Union[str, bool]] = {}
+        flag_evaluation_reasons: dict[str, dict] = {}
+        flag_payloads: dict[str, object] = {}
+        faced_error_computing_flags = False
+        for matcher in matchers:
+            values, reasons, payloads, errors = matcher.get_matches()
+            flag_values.update(values)
+            flag_evaluation_reasons.update(reasons)
+            flag_payloads.update(payloads)
+            faced_error_computing_flags = faced_error_computing_flags or errors
+        all_flags[distinct_id] = (flag_values, flag_evaluation_reasons, flag_payloads, faced_error_computing_flags)
+
+    return all_flags
+
+
+def _partition_flags_for_bulk_matching(
+    feature_flags: list[FeatureFlag], team_id: int, cohorts_cache: dict[int, CohortOrEmpty]
+) -> tuple[list[FeatureFlag], list[FeatureFlag]]:
+    """
+    Splits flags into those whose conditions are the same query for every distinct_id,
+    and those that depend on properties filled in per distinct_id.
+    """
+    if any(feature_flag.uses_cohorts for feature_flag in feature_flags):
+        cohorts_cache.update(
+            {
+                cohort.pk: cohort
+                for cohort in Cohort.objects.using(DATABASE_FOR_FLAG_MATCHING).filter(team_id=team_id, deleted=False)
+            }
+        )
+
+    bulk_feature_flags, individual_feature_flags = [], []
+    for feature_flag in feature_flags:
+        properties = [
+            prop
+            for condition in [*feature_flag.conditions, *feature_flag.super_conditions]
+            for prop in Filter(data=condition).property_groups.flat
+        ]
+        if _uses_local_properties(properties, cohorts_cache):
+            individual_feature_flags.append(feature_flag)
+        else:
+            bulk_feature_flags.append(feature_flag)
+    return bulk_feature_flags, individual_feature_flags
+
+
+def _uses_local_properties(properties: list[Property], cohorts_cache: dict[int, CohortOrEmpty]) -> bool:
+    for prop in properties:
+        if prop.type == "cohort":
+            cohort = cohorts_cache.get(int(cast(Union[str, int], prop.value)))
+            if cohort and _uses_local_properties(cohort.properties.flat, cohorts_cache):
+                return True
+        elif prop.key in LOCAL_PROPERTY_KEYS:
+            return True
+    return False
+
+
+def _get_bulk_query_conditions(
+    feature_flags: list[FeatureFlag],
+    team_id: int,
+    distinct_ids: list[str],
+    person_ids: dict[str, int],
+    groups: dict[str, dict[GroupTypeName, str]],
+    group_types_to_indexes: dict[GroupTypeName, GroupTypeIndex],
+    cache: FlagsMatcherCache,
+    cohorts_cache: dict[int, CohortOrEmpty],
+) -> dict[str, dict[str, bool]]:
+    """Same as `FeatureFlagMatcher.query_conditions`, for all distinct_ids at once."""
+    if not feature_flags:
+        return {distinct_id: {} for distinct_id in distinct_ids}
+
+    # Without per distinct_id properties, the condition annotations are the same for everyone
+    matcher = FeatureFlagMatcher(feature_flags, "", cache=cache, cohorts_cache=cohorts_cache)
+
+    group_keys_per_group_type: dict[GroupTypeIndex, set[str]] = defaultdict(set)
+    for distinct_id in distinct_ids:
+        for group_type, group_key in (groups.get(distinct_id) or {}).items():
+            group_type_index = group_types_to_indexes.get(group_type)
+            if group_type_index is not None:
+                group_keys_per_group_type[group_type_index].add(str(group_key))
+
+    group_query_per_group_type_mapping: dict[GroupTypeIndex, tuple[QuerySet, list[str]]] = {
+        group_type_index: (
+            Group.objects.using(DATABASE_FOR_FLAG_MATCHING).filter(
+                team_id=team_id, group_type_index=group_type_index, group_key__in=group_keys
+            ),
+            [],
+        )
+        for group_type_index, group_keys in group_keys_per_group_type.items()
+    }
+    person_query: QuerySet = Person.objects.using(DATABASE_FOR_FLAG_MATCHING).filter(
+        team_id=team_id, id__in=set(person_ids.values())
     )
+    person_query, person_fields, static_conditions = matcher.annotate_condition_queries(
+        person_query, group_query_per_group_type_mapping
+    )
+
+    conditions_per_person: dict[int, dict[str, bool]] = {}
+    if len(person_fields) > 0 and len(person_ids) > 0:
+        for row in person_query.values("id", *person_fields):
+            conditions_per_person[row.pop("id")] = row
+
+    conditions_per_group: dict[tuple[GroupTypeIndex, str], dict[str, bool]] = {}
+    for group_type_index, (group_query, group_fields) in group_query_per_group_type_mapping.items():
+        # Only query groups if there's a field to query, or we need to know whether they exist
+        if len(group_fields) > 0 or group_type_index in matcher.has_pure_is_not_conditions:
+            for row in group_query.values("group_key", *group_fields):
+                conditions_per_group[(group_type_index, row.pop("group_key"))] = row
+
+    query_conditions_per_distinct_id: dict[str, dict[str, bool]] = {}
+    for distinct_id in distinct_ids:
+        person_id = person_ids.get(distinct_id)
+        conditions = {**static_conditions}
+        if PERSON_KEY in matcher.has_pure_is_not_conditions:
+            conditions[f"{ENTITY_EXISTS_PREFIX}{PERSON_KEY}"] = person_id is not None
+        if person_id is not None:
+            conditions.update(conditions_per_person.get(person_id, {}))
+        for group_type, group_key in (groups.get(distinct_id) or {}).items():
+            group_type_index = group_types_to_indexes.get(group_type)
+            if group_type_index is None:
+                continue
+            group_conditions = conditions_per_group.get((group_type_index, str(group_key)))
+            if group_type_index in matcher.has_pure_is_not_conditions:
+                conditions[f"{ENTITY_EXISTS_PREFIX}{group_type_index}"] = group_conditions is not None
+            conditions.update(group_conditions or {})
+        query_conditions_per_distinct_id[distinct_id] = conditions
+    return query_conditions_per_distinct_id
+
+
+def _get_bulk_feature_flag_hash_key_overrides(team_id: int, person_ids: dict[str, int]) -> dict[str, dict[str, str]]:
+    overrides_per_person: dict[int, dict[str, str]] = defaultdict(dict)
+    for feature_flag, override, person_id in (
+        FeatureFlagHashKeyOverride.objects.using(DATABASE_FOR_FLAG_MATCHING)
+        .filter(person_id__in=set(person_ids.values()), team_id=team_id)
+        .values_list("feature_flag_key", "hash_key", "person_id")
+    ):
+        overrides_per_person[person_id][feature_flag] = override
+    return {
+        distinct_id: overrides_per_person[person_id]
+        for distinct_id, person_id in person_ids.items()
+        if person_id in overrides_per_person
+    }
 
 
 def set_feature_flag_hash_key_overrides(team_id: int, distinct_ids: list[str], hash_key_override: str) -> bool:
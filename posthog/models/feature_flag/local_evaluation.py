@@ -0,0 +1,204 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+from django.core.cache import cache
+import structlog
+
+from posthog.hogql.cache import LRUCache
+from posthog.models.filters import Filter
+from posthog.models.property.property import Property
+from posthog.queries.base import match_property
+
+from .feature_flag import FeatureFlag, get_feature_flags_for_team_in_cache
+from .flag_matching import __LONG_SCALE__, FeatureFlagMatch, FeatureFlagMatchReason
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    index: int
+    properties: tuple[Property, ...]
+    property_keys: frozenset[str]
+    uses_cohorts: bool
+    rollout_percentage: Optional[float]
+    variant: Optional[str]
+
+    def can_compute_locally(self, property_values: dict[str, Any]) -> bool:
+        return not self.uses_cohorts and self.property_keys.issubset(property_values.keys())
+
+
+@dataclass(frozen=True)
+class CompiledFeatureFlag:
+    """
+    A flag parsed once into what `FeatureFlagMatcher.get_match` needs to evaluate it from request properties alone.
+
+    Conditions are kept in evaluation order, i.e. conditions with variant overrides first.
+    """
+
+    key: str
+    conditions: tuple[CompiledCondition, ...]
+    # (variant key, value_min, value_max), see `FeatureFlagMatcher.variant_lookup_table`
+    variants: tuple[tuple[str, float, float], ...]
+    payloads: dict[str, Any]
+    # Group flags, experience continuity and super conditions all need the database
+    supports_local_evaluation: bool
+
+    def match(self, distinct_id: str, property_values: dict[str, Any]) -> Optional[FeatureFlagMatch]:
+        """Same as `FeatureFlagMatcher.get_match`, or None if the flag can't be evaluated from `property_values`."""
+        if not self.supports_local_evaluation or not all(
+            condition.can_compute_locally(property_values) for condition in self.conditions
+        ):
+            return None
+
+        highest_priority_evaluation_reason = FeatureFlagMatchReason.NO_CONDITION_MATCH
+        highest_priority_index = 0
+        for condition in self.conditions:
+            evaluation_reason = self._condition_match_reason(condition, distinct_id, property_values)
+            if evaluation_reason == FeatureFlagMatchReason.CONDITION_MATCH:
+                variant = condition.variant or self._matching_variant(distinct_id)
+                return FeatureFlagMatch(
+                    match=True,
+                    variant=variant,
+                    reason=evaluation_reason,
+                    condition_index=condition.index,
+                    payload=self.payloads.get(variant or "true"),
+                )
+            if highest_priority_evaluation_reason <= evaluation_reason:
+                highest_priority_evaluation_reason, highest_priority_index = evaluation_reason, condition.index
+
+        return FeatureFlagMatch(
+            match=False,
+            reason=highest_priority_evaluation_reason,
+            condition_index=highest_priority_index,
+            payload=None,
+        )
+
+    def _condition_match_reason(
+        self, condition: CompiledCondition, distinct_id: str, property_values: dict[str, Any]
+    ) -> FeatureFlagMatchReason:
+        if condition.properties:
+            if not all(match_property(prop, property_values) for prop in condition.properties):
+                return FeatureFlagMatchReason.NO_CONDITION_MATCH
+            if condition.rollout_percentage is None:
+                return FeatureFlagMatchReason.CONDITION_MATCH
+
+        if condition.rollout_percentage is not None and self._hash(distinct_id) > condition.rollout_percentage / 100:
+            return FeatureFlagMatchReason.OUT_OF_ROLLOUT_BOUND
+        return FeatureFlagMatchReason.CONDITION_MATCH
+
+    def _matching_variant(self, distinct_id: str) -> Optional[str]:
+        variant_hash = self._hash(distinct_id, salt="variant")
+        for variant, value_min, value_max in self.variants:
+            if value_min <= variant_hash < value_max:
+                return variant
+        return None
+
+    def _hash(self, distinct_id: str, salt: str = "") -> float:
+        hash_key = f"{self.key}.{distinct_id}{salt}"
+        return int(hashlib.sha1(hash_key.encode("utf-8")).hexdigest()[:15], 16) / __LONG_SCALE__
+
+
+@dataclass(frozen=True)
+class CompiledTeamFeatureFlags:
+    feature_flags: list[FeatureFlag]
+    compiled_feature_flags: dict[str, CompiledFeatureFlag]
+
+
+def compile_feature_flag(feature_flag: FeatureFlag) -> CompiledFeatureFlag:
+    variants = []
+    value_min = 0.0
+    for variant in feature_flag.variants:
+        value_max = value_min + variant["rollout_percentage"] / 100
+        variants.append((variant["key"], value_min, value_max))
+        value_min = value_max
+    variant_keys = {variant["key"] for variant in feature_flag.variants}
+
+    conditions = []
+    # Stable sort conditions with variant overrides to the top, like `FeatureFlagMatcher.get_match`
+    for index, condition in sorted(
+        enumerate(feature_flag.conditions),
+        key=lambda condition_tuple: 0 if condition_tuple[1].get("variant") else 1,
+    ):
+        properties = tuple(Filter(data=condition).property_groups.flat) if condition.get("properties") else ()
+        variant = condition.get("variant")
+        conditions.append(
+            CompiledCondition(
+                index=index,
+                properties=properties,
+                property_keys=frozenset(prop.key for prop in properties),
+                uses_cohorts=any(prop.type == "cohort" for prop in properties),
+                rollout_percentage=condition.get("rollout_percentage"),
+                variant=variant if variant in variant_keys else None,
+            )
+        )
+
+    return CompiledFeatureFlag(
+        key=feature_flag.key,
+        conditions=tuple(conditions),
+        variants=tuple(variants),
+        payloads=feature_flag._payloads,
+        supports_local_evaluation=(
+            feature_flag.aggregation_group_type_index is None
+            and not feature_flag.ensure_experience_continuity
+            and not feature_flag.filters.get("super_groups", None)
+        ),
+    )
+
+
+# Keyed by team, the entry holds a digest of the cached flags it was compiled from
+COMPILED_FEATURE_FLAGS_CACHE: LRUCache[tuple[str, CompiledTeamFeatureFlags]] = LRUCache(max_size=1024)
+
+
+def get_compiled_feature_flags_for_team(team_id: int) -> Optional[CompiledTeamFeatureFlags]:
+    """
+    Compiled version of `get_feature_flags_for_team_in_cache`. Flags are only parsed and compiled again when
+    the cached flags change, so most requests skip building `FeatureFlag` and `Filter` objects entirely.
+    """
+    try:
+        flag_data = cache.get(f"team_feature_flags_{team_id}")
+    except Exception:
+        # redis is unavailable
+        logger.exception("Redis is unavailable")
+        return None
+    if flag_data is None:
+        return None
+
+    digest = hashlib.sha1(flag_data.encode("utf-8")).hexdigest()
+    cached = COMPILED_FEATURE_FLAGS_CACHE.get(team_id)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+
+    feature_flags = get_feature_flags_for_team_in_cache(team_id)
+    if feature_flags is None:
+        return None
+    compiled = CompiledTeamFeatureFlags(
+        feature_flags=feature_flags,
+        compiled_feature_flags={feature_flag.key: compile_feature_flag(feature_flag) for feature_flag in feature_flags},
+    )
+    COMPILED_FEATURE_FLAGS_CACHE.set(team_id, (digest, compiled))
+    return compiled
+
+
+def match_feature_flags_locally(
+    compiled_feature_flags: dict[str, CompiledFeatureFlag],
+    feature_flags: list[FeatureFlag],
+    distinct_id: str,
+    property_values: dict[str, Union[str, int]],
+) -> tuple[dict[str, FeatureFlagMatch], list[FeatureFlag]]:
+    """Matches every flag that can be evaluated from `property_values` alone, returning the rest unevaluated."""
+    matches: dict[str, FeatureFlagMatch] = {}
+    remaining_feature_flags: list[FeatureFlag] = []
+    for feature_flag in feature_flags:
+        compiled_feature_flag = compiled_feature_flags.get(feature_flag.key)
+        try:
+            flag_match = compiled_feature_flag.match(distinct_id, property_values) if compiled_feature_flag else None
+        except Exception:
+            # Leave it to `FeatureFlagMatcher`, which reports evaluation errors
+            flag_match = None
+        if flag_match is None:
+            remaining_feature_flags.append(feature_flag)
+        else:
+            matches[feature_flag.key] = flag_match
+    return matches, remaining_feature_flags
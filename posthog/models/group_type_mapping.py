@@ -1,4 +1,8 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+
+from posthog.hogql.schema_version import invalidate_team_schema
+from posthog.models.signals import mutable_receiver
 
 
 # This table is responsible for mapping between group types for a Team/Project and event columns
@@ -23,3 +27,8 @@ class GroupTypeMapping(models.Model):
     # Used to display in UI
     name_singular: models.CharField = models.CharField(max_length=400, null=True, blank=True)
     name_plural: models.CharField = models.CharField(max_length=400, null=True, blank=True)
+
+
+@mutable_receiver([post_save, post_delete], sender=GroupTypeMapping)
+def group_type_mapping_changed(sender, instance: GroupTypeMapping, **kwargs):
+    invalidate_team_schema(instance.team_id)
@@ -2,7 +2,10 @@ from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.db.models.expressions import F
 from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
 
+from posthog.hogql.schema_version import invalidate_team_schema
+from posthog.models.signals import mutable_receiver
 from posthog.models.team import Team
 from posthog.models.utils import UniqueConstraintByExpression, UUIDModel
 
@@ -109,3 +112,8 @@ class PropertyDefinition(UUIDModel):
     # This is a dynamically calculated field in api/property_definition.py. Defaults to `True` here to help serializers.
     def is_seen_on_filtered_events(self) -> None:
         return None
+
+
+@mutable_receiver([post_save, post_delete], sender=PropertyDefinition)
+def property_definition_changed(sender, instance: PropertyDefinition, **kwargs):
+    invalidate_team_schema(instance.team_id)
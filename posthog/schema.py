@@ -528,6 +528,7 @@ class HogQLQueryModifiers(BaseModel):
     model_config = ConfigDict(
         extra="forbid",
     )
+    batchTrendsSeries: Optional[bool] = None
     dataWarehouseEventsModifiers: Optional[list[DataWarehouseEventsModifier]] = None
     debug: Optional[bool] = None
     inCohortVia: Optional[InCohortVia] = None
@@ -164,6 +164,9 @@ class SessionRecording(UUIDModel):
     def _build_session_blob_path(self, root_prefix: str) -> str:
         return f"{root_prefix}/team_id/{self.team_id}/session_id/{self.session_id}/data"
 
+    def build_blob_sources_cache_key(self) -> str:
+        return f"session_recording_blob_sources_{self.team_id}_{self.session_id}"
+
     @staticmethod
     def get_or_build(session_id: str, team: Team) -> "SessionRecording":
         try:
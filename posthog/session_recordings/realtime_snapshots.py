@@ -1,4 +1,7 @@
+import gzip
 import json
+from collections.abc import Generator
+from dataclasses import dataclass
 from time import sleep
 from typing import Optional
 
@@ -7,6 +10,7 @@ from prometheus_client import Counter
 
 from posthog import settings
 from posthog.redis import get_client
+from posthog.utils import GZIP_MAGIC_BYTES
 from sentry_sdk import capture_exception
 
 logger = structlog.get_logger(__name__)
@@ -54,17 +58,88 @@ def publish_subscription(team_id: str, session_id: str) -> None:
         raise e
 
 
-def get_realtime_snapshots(team_id: str, session_id: str, attempt_count=0) -> Optional[list[str]]:
+@dataclass(frozen=True)
+class RealtimeSnapshotsCursor:
+    """
+    Where a page of realtime snapshots ended: the score (the time it was written to Redis) of its last member,
+    and how many of the members with that score it included, as several can be written in the same millisecond.
+    """
+
+    score: float
+    count: int
+
+    def __str__(self) -> str:
+        return f"{self.score}:{self.count}"
+
+    @staticmethod
+    def parse(value: str) -> "RealtimeSnapshotsCursor":
+        score, count = value.split(":")
+        return RealtimeSnapshotsCursor(score=float(score), count=int(count))
+
+
+@dataclass(frozen=True)
+class RealtimeSnapshotsPage:
+    lines: list[bytes]
+    # where the next page starts, None if there were no snapshots at all
+    cursor: Optional[RealtimeSnapshotsCursor]
+    has_more: bool
+
+
+def _decode_member(member: bytes) -> bytes:
+    # Mr Blobby can store members gzipped, see SESSION_RECORDING_REALTIME_COMPRESSION in the plugin server
+    if member[:2] == GZIP_MAGIC_BYTES:
+        return gzip.decompress(member)
+    return member
+
+
+def get_realtime_snapshots_page(
+    team_id: str, session_id: str, cursor: Optional[RealtimeSnapshotsCursor] = None, limit: Optional[int] = None
+) -> RealtimeSnapshotsPage:
+    """The snapshot lines of up to `limit` members of the session's sorted set, in the order they were written."""
+    if limit is None:
+        limit = settings.REALTIME_SNAPSHOTS_PAGE_SIZE
+
+    redis = get_client(settings.SESSION_RECORDING_REDIS_URL)
+    members = redis.zrangebyscore(
+        get_key(team_id, session_id),
+        cursor.score if cursor else "-inf",
+        "+inf",
+        start=cursor.count if cursor else 0,
+        num=limit,
+        withscores=True,
+    )
+
+    lines: list[bytes] = []
+    next_cursor = cursor
+    for member, score in members:
+        lines.extend(_decode_member(member).splitlines())
+        if next_cursor is not None and next_cursor.score == score:
+            next_cursor = RealtimeSnapshotsCursor(score=score, count=next_cursor.count + 1)
+        else:
+            next_cursor = RealtimeSnapshotsCursor(score=score, count=1)
+
+    return RealtimeSnapshotsPage(lines=lines, cursor=next_cursor, has_more=len(members) == limit)
+
+
+def load_realtime_snapshots_page(
+    team_id: str, session_id: str, cursor: Optional[RealtimeSnapshotsCursor] = None, limit: Optional[int] = None
+) -> RealtimeSnapshotsPage:
+    """
+    Like `get_realtime_snapshots_page`, but publishes a subscription so that Mr Blobby syncs the session to Redis,
+    and waits for that when loading the first page and there are no snapshots yet.
+    """
+    attempt_count = 0
     try:
-        redis = get_client(settings.SESSION_RECORDING_REDIS_URL)
-        key = get_key(team_id, session_id)
-        encoded_snapshots = redis.zrange(key, 0, -1, withscores=True)
+        while True:
+            page = get_realtime_snapshots_page(team_id, session_id, cursor=cursor, limit=limit)
 
-        # We always publish as it could be that a rebalance has occurred
-        # and the consumer doesn't know it should be sending data to redis
-        publish_subscription(team_id, session_id)
+            # We always publish as it could be that a rebalance has occurred
+            # and the consumer doesn't know it should be sending data to redis
+            publish_subscription(team_id, session_id)
+
+            if page.lines or cursor is not None or attempt_count >= settings.REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_MAX:
+                break
 
-        if not encoded_snapshots and attempt_count < settings.REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_MAX:
             logger.info(
                 "No realtime snapshots found, publishing subscription and retrying",
                 team_id=team_id,
@@ -79,21 +154,11 @@ def get_realtime_snapshots(team_id: str, session_id: str, attempt_count=0) -> Op
                 if attempt_count < 4
                 else settings.REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_TIMEOUT_SECONDS * 2
             )
-            return get_realtime_snapshots(team_id, session_id, attempt_count + 1)
-
-        if encoded_snapshots:
-            snapshots = []
-
-            for s in encoded_snapshots:
-                # s[0] is the content
-                # s[1] is the time the content was written to redis
-                for line in s[0].splitlines():
-                    snapshots.append(line.decode("utf8"))
+            attempt_count += 1
 
+        if page.lines:
             REALTIME_SUBSCRIPTIONS_LOADED_COUNTER.labels(attempt_count=attempt_count).inc()
-            return snapshots
-
-        return None
+        return page
     except Exception as e:
         # very broad capture to see if there are any unexpected errors
         capture_exception(
@@ -105,3 +170,14 @@ def get_realtime_snapshots(team_id: str, session_id: str, attempt_count=0) -> Op
             tags={"team_id": team_id, "session_id": session_id},
         )
         raise e
+
+
+def iter_realtime_snapshot_pages(
+    team_id: str, session_id: str, page: RealtimeSnapshotsPage
+) -> Generator[list[bytes], None, None]:
+    """The lines of a page and of each of the pages after it, a page at a time."""
+    while True:
+        yield page.lines
+        if not page.has_more:
+            return
+        page = get_realtime_snapshots_page(team_id, session_id, cursor=page.cursor)
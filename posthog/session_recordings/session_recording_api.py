@@ -1,11 +1,12 @@
 import os
 import time
-from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from prometheus_client import Histogram
 import json
 from typing import Any, cast
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 
 from django.conf import settings
 
@@ -13,9 +14,11 @@ import posthoganalytics
 import requests
 from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
 from drf_spectacular.utils import extend_schema
 from loginas.utils import is_impersonated_session
+from requests.adapters import HTTPAdapter
 from rest_framework import exceptions, request, serializers, viewsets
 from rest_framework.decorators import action
 from rest_framework.renderers import JSONRenderer
@@ -27,6 +30,7 @@ from posthog.api.routing import TeamAndOrgViewSetMixin
 from posthog.api.utils import safe_clickhouse_string
 from posthog.auth import SharingAccessTokenAuthentication
 from posthog.cloud_utils import is_cloud
+from posthog.hogql.cache import LRUCache
 from posthog.constants import SESSION_RECORDINGS_FILTER_IDS
 from posthog.models import User
 from posthog.models.filters.session_recordings_filter import SessionRecordingsFilter
@@ -52,7 +56,12 @@ from posthog.rate_limit import (
     ClickHouseSustainedRateThrottle,
 )
 from posthog.session_recordings.queries.session_replay_events import SessionReplayEvents
-from posthog.session_recordings.realtime_snapshots import get_realtime_snapshots, publish_subscription
+from posthog.session_recordings.realtime_snapshots import (
+    RealtimeSnapshotsCursor,
+    iter_realtime_snapshot_pages,
+    load_realtime_snapshots_page,
+    publish_subscription,
+)
 from ee.session_recordings.session_summary.summarize_session import summarize_recording
 from ee.session_recordings.ai.similar_recordings import similar_recordings
 from ee.session_recordings.ai.error_clustering import error_clustering
@@ -79,9 +88,23 @@ GET_REALTIME_SNAPSHOTS_FROM_REDIS = Histogram(
 
 STREAM_RESPONSE_TO_CLIENT_HISTOGRAM = Histogram(
     "session_snapshots_stream_response_to_client_histogram",
-    "Time taken to stream a session snapshot to the client",
+    "Time taken to start streaming a session snapshot to the client",
+)
+
+SESSION_RECORDING_BLOB_CACHE_COUNTER = Counter(
+    "session_snapshots_blob_cache_total",
+    "Blob snapshots served from the in-memory cache (hit) or loaded from object storage (miss).",
+    labelnames=["result"],
 )
 
+SESSION_RECORDING_BLOB_SOURCES_CACHE_COUNTER = Counter(
+    "session_snapshots_blob_sources_cache_total",
+    "Listings of a recording's blobs read from the cache (hit) or from object storage (miss).",
+    labelnames=["result"],
+)
+
+BLOB_STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class SurrogatePairSafeJSONEncoder(JSONEncoder):
     def encode(self, o):
@@ -231,10 +254,23 @@ def ensure_not_weak(etag: str) -> str:
     return etag
 
 
-@contextmanager
-def stream_from(url: str, headers: dict | None = None) -> Generator[requests.Response, None, None]:
+def etags_match(first: str, second: str) -> bool:
+    return ensure_not_weak(first).strip('"') == ensure_not_weak(second).strip('"')
+
+
+@lru_cache(maxsize=1)
+def _object_storage_session() -> requests.Session:
+    # Shared by all requests, so that connections to object storage are kept alive and reused
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=settings.SESSION_RECORDING_BLOB_HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def stream_from(url: str, headers: dict | None = None) -> requests.Response:
     """
-    Stream data from a URL using optional headers.
+    Stream data from a URL using optional headers. The caller must close the response to release the connection.
 
     Tricky: mocking the requests library, so we can control the response here is a bit of a pain.
     the mocks are complex to write, so tests fail when the code actually works
@@ -244,13 +280,29 @@ def stream_from(url: str, headers: dict | None = None) -> Generator[requests.Res
     if headers is None:
         headers = {}
 
-    session = requests.Session()
+    return _object_storage_session().get(url, headers=headers, stream=True)
 
+
+def _iter_blob(streaming_response: requests.Response, decode_content: bool = True) -> Generator[bytes, None, None]:
     try:
-        response = session.get(url, headers=headers, stream=True)
-        yield response
+        # blobs are stored with `Content-Encoding: gzip`, which is decoded unless the encoded bytes are passed through
+        yield from streaming_response.raw.stream(BLOB_STREAM_CHUNK_SIZE, decode_content=decode_content)
     finally:
-        session.close()
+        streaming_response.close()
+
+
+@dataclass(frozen=True)
+class CachedBlob:
+    content: bytes
+    etag: str | None
+    cache_control: str | None
+
+
+# Blobs are immutable, so small ones can be served from memory,
+# e.g. when a recording shared in Slack is opened by many people at once
+SESSION_RECORDING_BLOB_CACHE: LRUCache[CachedBlob] = LRUCache(
+    max_size=settings.SESSION_RECORDING_BLOB_CACHE_MAX_ENTRIES
+)
 
 
 # NOTE: Could we put the sharing stuff in the shared mixin :thinking:
@@ -360,6 +412,9 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet):
         First without a source parameter to get a list of sources supported by the given session.
         And then once for each source in the returned list to get the actual snapshots.
 
+        Or once, with `source=all`, to get the snapshots of all sources in a single JSONL response.
+        `blob_keys` (comma separated) limits that to some of the blob sources, and `realtime=false` leaves realtime out.
+
         NB version 1 of this API has been deprecated and ClickHouse stored snapshots are no longer supported.
         """
 
@@ -394,21 +449,31 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet):
             return self._send_realtime_snapshots_to_client(recording, request, event_properties)
         elif source == "blob":
             return self._stream_blob_to_client(recording, request, event_properties)
+        elif source == "all":
+            return self._stream_all_sources_to_client(recording, request, event_properties)
         else:
-            raise exceptions.ValidationError("Invalid source must be one of [realtime, blob]")
+            raise exceptions.ValidationError("Invalid source must be one of [realtime, blob, all]")
 
     def _gather_session_recording_sources(self, recording: SessionRecording) -> Response:
+        sources = self._session_recording_sources(recording)
+        if any(source["source"] == "realtime" for source in sources):
+            # the UI will use this to try to load realtime snapshots
+            # so, we can publish the request for Mr. Blobby to start syncing to Redis now
+            # it takes a short while for the subscription to be sync'd into redis
+            # let's use the network round trip time to get started
+            publish_subscription(team_id=str(self.team.pk), session_id=str(recording.session_id))
+        serializer = SessionRecordingSourcesSerializer({"sources": sources})
+        return Response(serializer.data)
+
+    def _session_recording_sources(self, recording: SessionRecording) -> list[dict]:
+        """The blob sources of a recording, in order, and a realtime source if it might still be in Redis."""
         might_have_realtime = True
         newest_timestamp = None
-        response_data = {}
         sources: list[dict] = []
-        blob_keys: list[str] | None = None
-        blob_prefix = ""
 
         if recording.object_storage_path:
             if recording.storage_version == "2023-08-01":
-                blob_prefix = recording.object_storage_path
-                blob_keys = object_storage.list_objects(cast(str, blob_prefix))
+                sources = self._blob_sources(recording, recording.object_storage_path, persisted=True)
             else:
                 # originally LTS files were in a single file
                 # TODO this branch can be deleted after 01-08-2024
@@ -422,26 +487,9 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet):
                 )
                 might_have_realtime = False
         else:
-            blob_prefix = recording.build_blob_ingestion_storage_path()
-            blob_keys = object_storage.list_objects(blob_prefix)
+            sources = self._blob_sources(recording, recording.build_blob_ingestion_storage_path(), persisted=False)
 
-        if blob_keys:
-            for full_key in blob_keys:
-                # Keys are like 1619712000-1619712060
-                blob_key = full_key.replace(blob_prefix.rstrip("/") + "/", "")
-                blob_key_base = blob_key.split(".")[0]  # Remove the extension if it exists
-                time_range = [datetime.fromtimestamp(int(x) / 1000, tz=timezone.utc) for x in blob_key_base.split("-")]
-
-                sources.append(
-                    {
-                        "source": "blob",
-                        "start_timestamp": time_range[0],
-                        "end_timestamp": time_range.pop(),
-                        "blob_key": blob_key,
-                    }
-                )
         if sources:
-            sources = sorted(sources, key=lambda x: x["start_timestamp"])
             oldest_timestamp = min(sources, key=lambda k: k["start_timestamp"])["start_timestamp"]
             newest_timestamp = min(sources, key=lambda k: k["end_timestamp"])["end_timestamp"]
 
@@ -455,14 +503,44 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet):
                     "end_timestamp": None,
                 }
             )
-            # the UI will use this to try to load realtime snapshots
-            # so, we can publish the request for Mr. Blobby to start syncing to Redis now
-            # it takes a short while for the subscription to be sync'd into redis
-            # let's use the network round trip time to get started
-            publish_subscription(team_id=str(self.team.pk), session_id=str(recording.session_id))
-        response_data["sources"] = sources
-        serializer = SessionRecordingSourcesSerializer(response_data)
-        return Response(serializer.data)
+        return sources
+
+    def _blob_sources(self, recording: SessionRecording, blob_prefix: str, persisted: bool) -> list[dict]:
+        """The blob sources under a prefix, in order, cached so that they aren't listed on every load."""
+        cache_key = recording.build_blob_sources_cache_key()
+        cached_sources = cache.get(cache_key)
+        if cached_sources is not None:
+            SESSION_RECORDING_BLOB_SOURCES_CACHE_COUNTER.labels(result="hit").inc()
+            return list(cached_sources)
+        SESSION_RECORDING_BLOB_SOURCES_CACHE_COUNTER.labels(result="miss").inc()
+
+        sources: list[dict] = []
+        for full_key in object_storage.list_objects(blob_prefix) or []:
+            # Keys are like 1619712000-1619712060
+            blob_key = full_key.replace(blob_prefix.rstrip("/") + "/", "")
+            blob_key_base = blob_key.split(".")[0]  # Remove the extension if it exists
+            time_range = [datetime.fromtimestamp(int(x) / 1000, tz=timezone.utc) for x in blob_key_base.split("-")]
+
+            sources.append(
+                {
+                    "source": "blob",
+                    "start_timestamp": time_range[0],
+                    "end_timestamp": time_range.pop(),
+                    "blob_key": blob_key,
+                }
+            )
+        sources = sorted(sources, key=lambda x: x["start_timestamp"])
+
+        # the blobs of persisted recordings don't change anymore, while those of recordings being ingested are added to.
+        # `persist_recording` clears this, as the blobs move to another prefix then
+        if sources:
+            timeout = (
+                settings.SESSION_RECORDING_PERSISTED_BLOB_SOURCES_CACHE_TTL
+                if persisted
+                else settings.SESSION_RECORDING_BLOB_SOURCES_CACHE_TTL
+            )
+            cache.set(cache_key, sources, timeout=timeout)
+        return list(sources)
 
     @staticmethod
     def _validate_blob_key(blob_key: Any) -> None:
@@ -609,24 +687,27 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet):
 
     def _stream_blob_to_client(
         self, recording: SessionRecording, request: request.Request, event_properties: dict
-    ) -> HttpResponse:
+    ) -> HttpResponseBase:
         blob_key = request.GET.get("blob_key", "")
         self._validate_blob_key(blob_key)
+        file_key = self._blob_file_key(recording, blob_key)
 
-        # very short-lived pre-signed URL
-        with GENERATE_PRE_SIGNED_URL_HISTOGRAM.time():
-            if recording.object_storage_path:
-                if recording.storage_version == "2023-08-01":
-                    file_key = f"{recording.object_storage_path}/{blob_key}"
-                else:
-                    # this is a legacy recording, we need to load the file from the old path
-                    file_key = convert_original_version_lts_recording(recording)
-            else:
-                blob_prefix = settings.OBJECT_STORAGE_SESSION_RECORDING_BLOB_INGESTION_FOLDER
-                file_key = f"{blob_prefix}/team_id/{self.team.pk}/session_id/{recording.session_id}/data/{blob_key}"
-            url = object_storage.get_presigned_url(file_key, expiration=60)
-            if not url:
-                raise exceptions.NotFound("Snapshot file not found")
+        if_none_match = request.headers.get("If-None-Match")
+        # ranges are only requested for large blobs, which aren't cached anyway
+        range_header = request.headers.get("Range")
+
+        cached_blob = None
+        if not range_header:
+            cached_blob = SESSION_RECORDING_BLOB_CACHE.get(file_key)
+            SESSION_RECORDING_BLOB_CACHE_COUNTER.labels(result="hit" if cached_blob else "miss").inc()
+
+        url = None
+        if cached_blob is None:
+            # very short-lived pre-signed URL
+            with GENERATE_PRE_SIGNED_URL_HISTOGRAM.time():
+                url = object_storage.get_presigned_url(file_key, expiration=60)
+                if not url:
+                    raise exceptions.NotFound("Snapshot file not found")
 
         event_properties["source"] = "blob"
         event_properties["blob_key"] = blob_key
@@ -636,85 +717,276 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet):
             event_properties,
         )
 
+        if cached_blob is not None:
+            if if_none_match and cached_blob.etag and etags_match(if_none_match, cached_blob.etag):
+                response: HttpResponseBase = HttpResponse(status=304)
+            else:
+                response = HttpResponse(content=cached_blob.content)
+            return self._with_blob_headers(response, etag=cached_blob.etag, cache_control=cached_blob.cache_control)
+
+        assert url is not None
         with STREAM_RESPONSE_TO_CLIENT_HISTOGRAM.time():
-            # streams the file from S3 to the client
-            # will not decompress the possibly large file because of `stream=True`
+            # streams the file from S3 to the client, a chunk at a time, without holding it in memory
             #
             # we pass some headers through to the client
-            # particularly we should signal the content-encoding
-            # to help the client know it needs to decompress
             #
             # if the client provides an e-tag we can use it to check if the file has changed
             # object store will respect this and send back 304 if the file hasn't changed,
             # and we don't need to send the large file over the wire
 
-            if_none_match = request.headers.get("If-None-Match")
             headers = {}
             if if_none_match:
                 headers["If-None-Match"] = ensure_not_weak(if_none_match)
+            if range_header:
+                headers["Range"] = range_header
 
-            with stream_from(url=url, headers=headers) as streaming_response:
+            streaming_response = stream_from(url=url, headers=headers)
+            try:
                 streaming_response.raise_for_status()
 
-                response = HttpResponse(content=streaming_response.raw, status=streaming_response.status_code)
-
                 etag = streaming_response.headers.get("ETag")
-                if etag:
-                    response["ETag"] = ensure_not_weak(etag)
+                etag = ensure_not_weak(etag) if etag else None
+                cache_control = streaming_response.headers.get("Cache-Control")
+                content_length = streaming_response.headers.get("Content-Length")
+
+                if streaming_response.status_code == 304:
+                    streaming_response.close()
+                    return self._with_blob_headers(HttpResponse(status=304), etag=etag, cache_control=cache_control)
+
+                if (
+                    streaming_response.status_code == 200
+                    and content_length
+                    and int(content_length) <= settings.SESSION_RECORDING_BLOB_CACHE_MAX_BYTES
+                ):
+                    content = b"".join(_iter_blob(streaming_response))
+                    # the limit applies to the gzipped size, so check the decoded size before keeping it around
+                    if len(content) <= settings.SESSION_RECORDING_BLOB_CACHE_MAX_BYTES:
+                        SESSION_RECORDING_BLOB_CACHE.set(
+                            file_key, CachedBlob(content=content, etag=etag, cache_control=cache_control)
+                        )
+                    return self._with_blob_headers(
+                        HttpResponse(content=content), etag=etag, cache_control=cache_control
+                    )
+
+                # ranges are of the stored, gzipped, bytes, so those are passed through with their encoding
+                partial = streaming_response.status_code == 206
+                content_encoding = streaming_response.headers.get("Content-Encoding")
+                passed_through_headers = ["Content-Range", "Accept-Ranges"]
+                if partial:
+                    passed_through_headers += ["Content-Encoding", "Content-Length"]
+                elif not content_encoding:
+                    passed_through_headers += ["Content-Length"]
+
+                streaming = StreamingHttpResponse(
+                    streaming_content=_iter_blob(streaming_response, decode_content=not partial),
+                    status=streaming_response.status_code,
+                )
+                for header in passed_through_headers:
+                    value = streaming_response.headers.get(header)
+                    if value:
+                        streaming[header] = value
+                return self._with_blob_headers(streaming, etag=etag, cache_control=cache_control)
+            except Exception:
+                streaming_response.close()
+                raise
+
+    def _blob_file_key(self, recording: SessionRecording, blob_key: str) -> str:
+        if recording.object_storage_path:
+            if recording.storage_version == "2023-08-01":
+                return f"{recording.object_storage_path}/{blob_key}"
+            # this is a legacy recording, we need to load the file from the old path
+            return convert_original_version_lts_recording(recording)
+
+        blob_prefix = settings.OBJECT_STORAGE_SESSION_RECORDING_BLOB_INGESTION_FOLDER
+        return f"{blob_prefix}/team_id/{self.team.pk}/session_id/{recording.session_id}/data/{blob_key}"
+
+    def _stream_all_sources_to_client(
+        self, recording: SessionRecording, request: request.Request, event_properties: dict
+    ) -> StreamingHttpResponse:
+        sources = self._session_recording_sources(recording)
+        blob_keys = [source["blob_key"] for source in sources if source["source"] == "blob"]
+        include_realtime = request.GET.get("realtime", "true").lower() != "false" and any(
+            source["source"] == "realtime" for source in sources
+        )
+
+        requested_blob_keys = request.GET.get("blob_keys")
+        if requested_blob_keys:
+            requested = requested_blob_keys.split(",")
+            for blob_key in requested:
+                self._validate_blob_key(blob_key)
+                if blob_key not in blob_keys:
+                    raise exceptions.ValidationError(f"Unknown blob_key {blob_key}")
+            blob_keys = [blob_key for blob_key in blob_keys if blob_key in requested]
+
+        if include_realtime:
+            # start syncing to Redis now, so that the realtime snapshots are there by the time the blobs are sent
+            publish_subscription(team_id=str(self.team.pk), session_id=str(recording.session_id))
+
+        event_properties["source"] = "all"
+        event_properties["blob_keys_count"] = len(blob_keys)
+        event_properties["includes_realtime"] = include_realtime
+        posthoganalytics.capture(
+            self._distinct_id_from_request(request),
+            "session recording snapshots v2 loaded",
+            event_properties,
+        )
+
+        # cached blobs and pre-signed URLs of the others, resolved before the response starts so it can still 404
+        blobs: list[CachedBlob | str] = []
+        for blob_key in blob_keys:
+            file_key = self._blob_file_key(recording, blob_key)
+            cached_blob = SESSION_RECORDING_BLOB_CACHE.get(file_key)
+            SESSION_RECORDING_BLOB_CACHE_COUNTER.labels(result="hit" if cached_blob else "miss").inc()
+            if cached_blob is not None:
+                blobs.append(cached_blob)
+                continue
+            with GENERATE_PRE_SIGNED_URL_HISTOGRAM.time():
+                url = object_storage.get_presigned_url(file_key, expiration=60)
+            if not url:
+                raise exceptions.NotFound("Snapshot file not found")
+            blobs.append(url)
+
+        response = StreamingHttpResponse(
+            streaming_content=self._iter_all_sources(recording, blobs=blobs, include_realtime=include_realtime),
+            content_type="application/json",
+        )
+        # realtime snapshots change, so the browser is not allowed to cache this at all
+        response["Cache-Control"] = "no-store" if include_realtime else "max-age=3600"
+        response["Content-Disposition"] = "inline"
+        return response
+
+    def _iter_all_sources(
+        self, recording: SessionRecording, blobs: list[CachedBlob | str], include_realtime: bool
+    ) -> Generator[bytes, None, None]:
+        """The JSONL lines of each of the blobs in turn, followed by those in Redis."""
+        ends_with_newline = True
+
+        for blob in blobs:
+            if isinstance(blob, CachedBlob):
+                chunks: Iterable[bytes] = [blob.content]
+            else:
+                streaming_response = stream_from(url=blob)
+                try:
+                    streaming_response.raise_for_status()
+                except Exception:
+                    streaming_response.close()
+                    raise
+                chunks = _iter_blob(streaming_response)
+
+            # blobs arrive in chunks that split lines, so separators only go between blobs
+            is_first_chunk = True
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if is_first_chunk and not ends_with_newline:
+                    yield b"\n"
+                is_first_chunk = False
+                yield chunk
+                ends_with_newline = chunk.endswith(b"\n")
+
+        if include_realtime:
+            with GET_REALTIME_SNAPSHOTS_FROM_REDIS.time():
+                page = load_realtime_snapshots_page(team_id=self.team.pk, session_id=str(recording.session_id))
+            pages = iter_realtime_snapshot_pages(self.team.pk, str(recording.session_id), page)
+            for chunk in _join_realtime_snapshot_pages(pages, b"\n"):
+                if not ends_with_newline:
+                    yield b"\n"
+                    ends_with_newline = True
+                yield chunk
 
-                # blobs are immutable, _really_ we can cache forever
-                # but let's cache for an hour since people won't re-watch too often
-                # we're setting cache control and ETag which might be considered overkill,
-                # but it helps avoid network latency from the client to PostHog, then to object storage, and back again
-                # when a client has a fresh copy
-                response["Cache-Control"] = streaming_response.headers.get("Cache-Control") or "max-age=3600"
+    @staticmethod
+    def _with_blob_headers(response: HttpResponseBase, etag: str | None, cache_control: str | None) -> HttpResponseBase:
+        if etag:
+            response["ETag"] = etag
+
+        # blobs are immutable, _really_ we can cache forever
+        # but let's cache for an hour since people won't re-watch too often
+        # we're setting cache control and ETag which might be considered overkill,
+        # but it helps avoid network latency from the client to PostHog, then to object storage, and back again
+        # when a client has a fresh copy
+        response["Cache-Control"] = cache_control or "max-age=3600"
 
-                response["Content-Type"] = "application/json"
-                response["Content-Disposition"] = "inline"
+        response["Content-Type"] = "application/json"
+        response["Content-Disposition"] = "inline"
 
-                return response
+        return response
 
     def _send_realtime_snapshots_to_client(
         self, recording: SessionRecording, request: request.Request, event_properties: dict
-    ) -> HttpResponse | Response:
+    ) -> HttpResponseBase:
         version = request.GET.get("version", "og")
+        if version not in ("og", "2024-04-30"):
+            raise exceptions.ValidationError(f"Invalid version: {version}")
+
+        # clients can load the snapshots a page at a time, the response headers have the cursor of the next page.
+        # Otherwise, all of them are streamed
+        paginated = "cursor" in request.GET or "limit" in request.GET
+        try:
+            cursor = RealtimeSnapshotsCursor.parse(request.GET["cursor"]) if request.GET.get("cursor") else None
+            limit = int(request.GET["limit"]) if request.GET.get("limit") else None
+        except ValueError:
+            raise exceptions.ValidationError("Invalid cursor or limit")
+        if limit is not None and not 0 < limit <= settings.REALTIME_SNAPSHOTS_PAGE_SIZE:
+            raise exceptions.ValidationError(f"limit must be between 1 and {settings.REALTIME_SNAPSHOTS_PAGE_SIZE}")
 
         with GET_REALTIME_SNAPSHOTS_FROM_REDIS.time():
-            snapshot_lines = (
-                get_realtime_snapshots(
-                    team_id=self.team.pk,
-                    session_id=str(recording.session_id),
-                )
-                or []
+            page = load_realtime_snapshots_page(
+                team_id=self.team.pk,
+                session_id=str(recording.session_id),
+                cursor=cursor,
+                limit=limit,
             )
 
         event_properties["source"] = "realtime"
-        event_properties["snapshots_length"] = len(snapshot_lines)
+        event_properties["snapshots_length"] = len(page.lines)
+        event_properties["paginated"] = paginated
         posthoganalytics.capture(
             self._distinct_id_from_request(request),
             "session recording snapshots v2 loaded",
             event_properties,
         )
 
+        pages: Iterable[list[bytes]] = (
+            [page.lines] if paginated else iter_realtime_snapshot_pages(self.team.pk, str(recording.session_id), page)
+        )
         if version == "og":
             # originally we returned a list of dictionaries
             # under a snapshot key
             # we keep doing this here for a little while
             # so that existing browser sessions, that don't know about the new format
             # can carry on working until the next refresh
-            serializer = SessionRecordingSourcesSerializer({"snapshots": [json.loads(s) for s in snapshot_lines]})
-            return Response(serializer.data)
-        elif version == "2024-04-30":
-            response = HttpResponse(
-                # convert list to a jsonl response
-                content=("\n".join(snapshot_lines)),
-                content_type="application/json",
-            )
-            # the browser is not allowed to cache this at all
-            response["Cache-Control"] = "no-store"
-            return response
+            #
+            # the lines are JSON already, so they're passed through as they are rather than parsed and re-serialized
+            content = _iter_snapshots_json(pages)
         else:
-            raise exceptions.ValidationError(f"Invalid version: {version}")
+            # convert list to a jsonl response
+            content = _join_realtime_snapshot_pages(pages, b"\n")
+
+        if paginated:
+            response: HttpResponseBase = HttpResponse(content=b"".join(content), content_type="application/json")
+            response["X-Realtime-Snapshots-Cursor"] = str(page.cursor) if page.cursor else ""
+            response["X-Realtime-Snapshots-Has-More"] = "true" if page.has_more else "false"
+        else:
+            response = StreamingHttpResponse(streaming_content=content, content_type="application/json")
+        # the browser is not allowed to cache this at all
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+def _join_realtime_snapshot_pages(pages: Iterable[list[bytes]], separator: bytes) -> Generator[bytes, None, None]:
+    """The lines of all pages joined by the separator, a chunk per page."""
+    is_first = True
+    for lines in pages:
+        if not lines:
+            continue
+        yield separator.join(lines) if is_first else separator + separator.join(lines)
+        is_first = False
+
+
+def _iter_snapshots_json(pages: Iterable[list[bytes]]) -> Generator[bytes, None, None]:
+    yield b'{"snapshots":['
+    yield from _join_realtime_snapshot_pages(pages, b",")
+    yield b"]}"
 
 
 def list_recordings(
@@ -0,0 +1,60 @@
+import gzip
+import uuid
+
+from django.test import SimpleTestCase
+
+from posthog import settings
+from posthog.redis import get_client
+from posthog.session_recordings.realtime_snapshots import (
+    RealtimeSnapshotsCursor,
+    get_key,
+    get_realtime_snapshots_page,
+    iter_realtime_snapshot_pages,
+)
+
+
+class TestRealtimeSnapshots(SimpleTestCase):
+    def setUp(self) -> None:
+        self.session_id = str(uuid.uuid4())
+        self.redis = get_client(settings.SESSION_RECORDING_REDIS_URL)
+        self.key = get_key("1", self.session_id)
+        # several members can be written in the same millisecond
+        self.redis.zadd(self.key, {b'{"line": 1}\n{"line": 2}': 1000, b'{"line": 3}': 1000})
+        self.redis.zadd(self.key, {gzip.compress(b'{"line": 4}'): 1000, b'{"line": 5}': 2000})
+
+    def tearDown(self) -> None:
+        self.redis.delete(self.key)
+
+    def test_pages_through_the_snapshots_in_the_order_they_were_written(self) -> None:
+        first_page = get_realtime_snapshots_page("1", self.session_id, limit=2)
+        assert first_page.has_more
+        assert first_page.cursor == RealtimeSnapshotsCursor(score=1000, count=2)
+
+        second_page = get_realtime_snapshots_page("1", self.session_id, cursor=first_page.cursor, limit=2)
+        assert second_page.has_more
+        assert second_page.cursor == RealtimeSnapshotsCursor(score=2000, count=1)
+
+        last_page = get_realtime_snapshots_page("1", self.session_id, cursor=second_page.cursor, limit=2)
+        assert last_page.lines == []
+        assert not last_page.has_more
+        assert last_page.cursor == second_page.cursor
+
+        lines = first_page.lines + second_page.lines
+        assert sorted(lines) == [b'{"line": 1}', b'{"line": 2}', b'{"line": 3}', b'{"line": 4}', b'{"line": 5}']
+        assert lines[-1] == b'{"line": 5}'
+
+    def test_iterates_all_pages(self) -> None:
+        first_page = get_realtime_snapshots_page("1", self.session_id, limit=1)
+        pages = list(iter_realtime_snapshot_pages("1", self.session_id, first_page))
+
+        assert sorted(line for lines in pages for line in lines) == [
+            b'{"line": 1}',
+            b'{"line": 2}',
+            b'{"line": 3}',
+            b'{"line": 4}',
+            b'{"line": 5}',
+        ]
+
+    def test_cursors_round_trip(self) -> None:
+        cursor = RealtimeSnapshotsCursor(score=1682608337071.0, count=3)
+        assert RealtimeSnapshotsCursor.parse(str(cursor)) == cursor
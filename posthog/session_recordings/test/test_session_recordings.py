@@ -33,6 +33,7 @@ from posthog.test.base import (
     _create_event,
 )
 from posthog.session_recordings.test import setup_stream_from
+from posthog.session_recordings.realtime_snapshots import RealtimeSnapshotsCursor, RealtimeSnapshotsPage
 
 
 class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest):
@@ -690,6 +691,31 @@ class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest)
             ]
         }
 
+    @freeze_time("2023-01-01T00:00:00Z")
+    @patch(
+        "posthog.session_recordings.queries.session_replay_events.SessionReplayEvents.exists",
+        return_value=True,
+    )
+    @patch("posthog.session_recordings.session_recording_api.object_storage.list_objects")
+    def test_get_snapshots_v2_caches_blob_listing(self, mock_list_objects, _mock_exists) -> None:
+        session_id = str(uuid.uuid4())
+        timestamp = round(now().timestamp() * 1000)
+        mock_list_objects.return_value = [
+            f"session_recordings/team_id/{self.team.pk}/session_id/{session_id}/data/{timestamp - 5000}-{timestamp}",
+        ]
+
+        first_response = self.client.get(f"/api/projects/{self.team.id}/session_recordings/{session_id}/snapshots")
+        second_response = self.client.get(f"/api/projects/{self.team.id}/session_recordings/{session_id}/snapshots")
+
+        assert first_response.json() == second_response.json()
+        assert [source["source"] for source in second_response.json()["sources"]] == ["blob", "realtime"]
+        assert mock_list_objects.call_count == 1
+
+        # while the recording is ingested, more blobs are added, so the listing is only cached briefly
+        with freeze_time("2023-01-01T00:01:00Z"):
+            self.client.get(f"/api/projects/{self.team.id}/session_recordings/{session_id}/snapshots")
+        assert mock_list_objects.call_count == 2
+
     @patch(
         "posthog.session_recordings.queries.session_replay_events.SessionReplayEvents.exists",
         return_value=True,
@@ -787,6 +813,85 @@ class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest)
         assert response.headers.get("etag") == "represents the file contents"  # we don't allow weak etags
         assert response.headers.get("cache-control") == "more specific cache control"
 
+    @patch(
+        "posthog.session_recordings.queries.session_replay_events.SessionReplayEvents.exists",
+        return_value=True,
+    )
+    @patch("posthog.session_recordings.session_recording_api.SessionRecording.get_or_build")
+    @patch("posthog.session_recordings.session_recording_api.object_storage.get_presigned_url")
+    @patch(
+        "posthog.session_recordings.session_recording_api.stream_from",
+        return_value=setup_stream_from({"ETag": '"the-etag"', "Content-Length": "15"}),
+    )
+    def test_serves_small_blobs_from_memory(
+        self,
+        mock_stream_from,
+        mock_presigned_url,
+        mock_get_session_recording,
+        _mock_exists,
+    ) -> None:
+        session_id = str(uuid.uuid4())
+        url = f"/api/projects/{self.team.pk}/session_recordings/{session_id}/snapshots/?source=blob&blob_key=1682608337071"
+        mock_get_session_recording.return_value = SessionRecording(session_id=session_id, team=self.team, deleted=False)
+        mock_presigned_url.return_value = "https://test.com/"
+
+        first_response = self.client.get(url)
+        second_response = self.client.get(url)
+        not_modified_response = self.client.get(url, HTTP_IF_NONE_MATCH='W/"the-etag"')
+
+        assert first_response.status_code == status.HTTP_200_OK
+        assert second_response.status_code == status.HTTP_200_OK
+        assert first_response.content == second_response.content == b"Example content"
+        assert second_response.headers.get("etag") == '"the-etag"'
+        assert not_modified_response.status_code == status.HTTP_304_NOT_MODIFIED
+        # only the first request went to object storage
+        assert mock_stream_from.call_count == 1
+        assert mock_presigned_url.call_count == 1
+
+    @patch(
+        "posthog.session_recordings.queries.session_replay_events.SessionReplayEvents.exists",
+        return_value=True,
+    )
+    @patch("posthog.session_recordings.session_recording_api.SessionRecording.get_or_build")
+    @patch("posthog.session_recordings.session_recording_api.object_storage.get_presigned_url")
+    @patch(
+        "posthog.session_recordings.session_recording_api.stream_from",
+        return_value=setup_stream_from(
+            {
+                "Content-Length": "7",
+                "Content-Range": "bytes 0-6/10000000",
+                "Accept-Ranges": "bytes",
+                "Content-Encoding": "gzip",
+            },
+            status_code=206,
+            content=b"Example",
+        ),
+    )
+    def test_streams_ranges_of_blobs(
+        self,
+        mock_stream_from,
+        mock_presigned_url,
+        mock_get_session_recording,
+        _mock_exists,
+    ) -> None:
+        session_id = str(uuid.uuid4())
+        url = f"/api/projects/{self.team.pk}/session_recordings/{session_id}/snapshots/?source=blob&blob_key=1682608337071"
+        mock_get_session_recording.return_value = SessionRecording(session_id=session_id, team=self.team, deleted=False)
+        mock_presigned_url.return_value = "https://test.com/"
+
+        response = self.client.get(url, HTTP_RANGE="bytes=0-6")
+
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response.streaming
+        assert b"".join(response.streaming_content) == b"Example"  # type: ignore
+        assert response.headers.get("content-range") == "bytes 0-6/10000000"
+        assert response.headers.get("content-length") == "7"
+        # the range is of the gzipped blob, so it's passed through without decoding
+        assert response.headers.get("content-encoding") == "gzip"
+        mock_stream_from.return_value.raw.stream.assert_called_once_with(ANY, decode_content=False)
+        mock_stream_from.assert_called_once_with(url="https://test.com/", headers={"Range": "bytes=0-6"})
+        mock_stream_from.return_value.close.assert_called_once()
+
     @patch(
         "posthog.session_recordings.queries.session_replay_events.SessionReplayEvents.exists",
         return_value=True,
@@ -839,7 +944,8 @@ class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest)
             (
                 "version=None",
                 None,
-                b'{"snapshots":[{"some":"\xf0\x90\x90\xb7 probably from console logs"},{"some":"more data"}]}',
+                # the lines from Redis are passed through as they are
+                b'{"snapshots":[{"some": "\\ud801\\udc37 probably from console logs"},{"some": "more data"}]}',
             ),
         ]
     )
@@ -848,7 +954,7 @@ class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest)
         return_value=True,
     )
     @patch("posthog.session_recordings.session_recording_api.SessionRecording.get_or_build")
-    @patch("posthog.session_recordings.session_recording_api.get_realtime_snapshots")
+    @patch("posthog.session_recordings.session_recording_api.load_realtime_snapshots_page")
     @patch("posthog.session_recordings.session_recording_api.stream_from")
     def test_can_get_session_recording_realtime(
         self,
@@ -872,15 +978,170 @@ class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest)
         # by default a session recording is deleted, so we have to explicitly mark the mock as not deleted
         mock_get_session_recording.return_value = SessionRecording(session_id=session_id, team=self.team, deleted=False)
 
-        mock_realtime_snapshots.return_value = [
-            json.dumps({"some": "\ud801\udc37 probably from console logs"}),
-            json.dumps({"some": "more data"}),
-        ]
+        mock_realtime_snapshots.return_value = RealtimeSnapshotsPage(
+            lines=[
+                json.dumps({"some": "\ud801\udc37 probably from console logs"}).encode("utf-8"),
+                json.dumps({"some": "more data"}).encode("utf-8"),
+            ],
+            cursor=RealtimeSnapshotsCursor(score=1682608337071, count=2),
+            has_more=False,
+        )
 
         response = self.client.get(url)
-        assert response.status_code == status.HTTP_200_OK, response.json()
+        assert response.status_code == status.HTTP_200_OK
         assert response.headers.get("content-type") == "application/json"
-        assert response.content == expected_response
+        assert b"".join(response.streaming_content) == expected_response  # type: ignore
+
+    @patch(
+        "posthog.session_recordings.queries.session_replay_events.SessionReplayEvents.exists",
+        return_value=True,
+    )
+    @patch("posthog.session_recordings.session_recording_api.SessionRecording.get_or_build")
+    @patch("posthog.session_recordings.session_recording_api.load_realtime_snapshots_page")
+    def test_can_get_session_recording_realtime_a_page_at_a_time(
+        self,
+        mock_realtime_snapshots,
+        mock_get_session_recording,
+        _mock_exists,
+    ) -> None:
+        session_id = str(uuid.uuid4())
+        url = (
+            f"/api/projects/{self.team.pk}/session_recordings/{session_id}/snapshots/"
+            f"?source=realtime&version=2024-04-30"
+        )
+        mock_get_session_recording.return_value = SessionRecording(session_id=session_id, team=self.team, deleted=False)
+        mock_realtime_snapshots.return_value = RealtimeSnapshotsPage(
+            lines=[b'{"some": "data"}', b'{"some": "more data"}'],
+            cursor=RealtimeSnapshotsCursor(score=1682608337071, count=2),
+            has_more=True,
+        )
+
+        response = self.client.get(f"{url}&limit=2&cursor=1682608337000.0:1")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b'{"some": "data"}\n{"some": "more data"}'
+        assert response.headers.get("X-Realtime-Snapshots-Cursor") == "1682608337071:2"
+        assert response.headers.get("X-Realtime-Snapshots-Has-More") == "true"
+        assert response.headers.get("Cache-Control") == "no-store"
+        mock_realtime_snapshots.assert_called_once_with(
+            team_id=self.team.pk,
+            session_id=session_id,
+            cursor=RealtimeSnapshotsCursor(score=1682608337000, count=1),
+            limit=2,
+        )
+
+        response = self.client.get(f"{url}&cursor=not-a-cursor")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @freeze_time("2023-01-01T00:00:00Z")
+    @patch(
+        "posthog.session_recordings.queries.session_replay_events.SessionReplayEvents.exists",
+        return_value=True,
+    )
+    @patch("posthog.session_recordings.session_recording_api.object_storage.list_objects")
+    @patch("posthog.session_recordings.session_recording_api.object_storage.get_presigned_url")
+    @patch("posthog.session_recordings.session_recording_api.stream_from")
+    @patch("posthog.session_recordings.session_recording_api.load_realtime_snapshots_page")
+    @patch("posthog.session_recordings.session_recording_api.publish_subscription")
+    def test_can_get_all_snapshot_sources_at_once(
+        self,
+        mock_publish_subscription,
+        mock_realtime_snapshots,
+        mock_stream_from,
+        mock_presigned_url,
+        mock_list_objects,
+        mock_exists,
+    ) -> None:
+        session_id = str(uuid.uuid4())
+        timestamp = round(now().timestamp() * 1000)
+        blob_prefix = f"session_recordings/team_id/{self.team.pk}/session_id/{session_id}/data"
+        mock_list_objects.return_value = [
+            f"{blob_prefix}/{timestamp - 5000}-{timestamp}",
+            f"{blob_prefix}/{timestamp - 10000}-{timestamp - 5000}",
+        ]
+        mock_presigned_url.side_effect = lambda key, **kwargs: f"https://test.com/{key.split('/')[-1]}"
+        blob_contents = {
+            f"https://test.com/{timestamp - 10000}-{timestamp - 5000}": b'{"blob": 1}\n{"blob": 2}',
+            f"https://test.com/{timestamp - 5000}-{timestamp}": b'{"blob": 3}\n',
+        }
+        mock_stream_from.side_effect = lambda url, **kwargs: setup_stream_from(content=blob_contents[url])
+        mock_realtime_snapshots.return_value = RealtimeSnapshotsPage(
+            lines=[b'{"realtime": 4}', b'{"realtime": 5}'],
+            cursor=RealtimeSnapshotsCursor(score=timestamp, count=2),
+            has_more=False,
+        )
+
+        response = self.client.get(
+            f"/api/projects/{self.team.pk}/session_recordings/{session_id}/snapshots/?source=all"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers.get("content-type") == "application/json"
+        assert response.headers.get("cache-control") == "no-store"
+        assert b"".join(response.streaming_content).split(b"\n") == [  # type: ignore
+            b'{"blob": 1}',
+            b'{"blob": 2}',
+            b'{"blob": 3}',
+            b'{"realtime": 4}',
+            b'{"realtime": 5}',
+        ]
+        # the session is checked and the blobs are listed once for all sources
+        assert mock_exists.call_count == 1
+        assert mock_list_objects.call_count == 1
+        assert mock_stream_from.call_count == 2
+        mock_publish_subscription.assert_called_once_with(team_id=str(self.team.pk), session_id=session_id)
+
+        # some of the blobs, without realtime snapshots
+        response = self.client.get(
+            f"/api/projects/{self.team.pk}/session_recordings/{session_id}/snapshots/"
+            f"?source=all&blob_keys={timestamp - 5000}-{timestamp}&realtime=false"
+        )
+        assert b"".join(response.streaming_content) == b'{"blob": 3}\n'  # type: ignore
+
+        # only blobs the session has can be requested
+        response = self.client.get(
+            f"/api/projects/{self.team.pk}/session_recordings/{session_id}/snapshots/?source=all&blob_keys=1234-5678"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @freeze_time("2023-01-01T00:00:00Z")
+    @patch(
+        "posthog.session_recordings.queries.session_replay_events.SessionReplayEvents.exists",
+        return_value=True,
+    )
+    @patch("posthog.session_recordings.session_recording_api.object_storage.list_objects")
+    @patch("posthog.session_recordings.session_recording_api.object_storage.get_presigned_url")
+    @patch("posthog.session_recordings.session_recording_api.stream_from")
+    def test_all_snapshot_sources_keeps_lines_split_across_chunks_intact(
+        self,
+        mock_stream_from,
+        mock_presigned_url,
+        mock_list_objects,
+        mock_exists,
+    ) -> None:
+        session_id = str(uuid.uuid4())
+        timestamp = round(now().timestamp() * 1000)
+        blob_prefix = f"session_recordings/team_id/{self.team.pk}/session_id/{session_id}/data"
+        mock_list_objects.return_value = [
+            f"{blob_prefix}/{timestamp - 5000}-{timestamp}",
+            f"{blob_prefix}/{timestamp - 10000}-{timestamp - 5000}",
+        ]
+        mock_presigned_url.side_effect = lambda key, **kwargs: f"https://test.com/{key.split('/')[-1]}"
+        blob_contents = {
+            f"https://test.com/{timestamp - 10000}-{timestamp - 5000}": b'{"blob": 1}\n{"blob": 2}',
+            f"https://test.com/{timestamp - 5000}-{timestamp}": b'{"blob": 3}\n{"blob": 4}\n',
+        }
+        # chunks end in the middle of lines
+        mock_stream_from.side_effect = lambda url, **kwargs: setup_stream_from(content=blob_contents[url], chunk_size=5)
+
+        response = self.client.get(
+            f"/api/projects/{self.team.pk}/session_recordings/{session_id}/snapshots/?source=all&realtime=false"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert b"".join(response.streaming_content) == (  # type: ignore
+            b'{"blob": 1}\n{"blob": 2}\n{"blob": 3}\n{"blob": 4}\n'
+        )
 
     @patch("posthog.session_recordings.session_recording_api.SessionRecording.get_or_build")
     @patch("posthog.session_recordings.session_recording_api.object_storage.get_presigned_url")
@@ -114,6 +114,23 @@ IN_UNIT_TESTING: bool = get_from_env("IN_UNIT_TESTING", False, type_cast=str_to_
 
 HOGQL_INCREASED_MAX_EXECUTION_TIME: int = get_from_env("HOGQL_INCREASED_MAX_EXECUTION_TIME", 600, type_cast=int)
 
+# Shared thread pool for queries that query runners run in parallel, e.g. one per trends series. One pool per workload.
+QUERY_EXECUTOR_MAX_WORKERS: int = get_from_env("QUERY_EXECUTOR_MAX_WORKERS", 32, type_cast=int)
+# How many of those queries a single team can have running or queued at once, per process and workload
+QUERY_EXECUTOR_MAX_CONCURRENCY_PER_TEAM: int = get_from_env("QUERY_EXECUTOR_MAX_CONCURRENCY_PER_TEAM", 8, type_cast=int)
+
+# Compress cached query results when writing them. Every deploy since the compressed format was introduced reads both
+# formats, but older ones can't read compressed results, so this is only turned on once none of them are left running.
+QUERY_CACHE_COMPRESSION_ENABLED: bool = get_from_env("QUERY_CACHE_COMPRESSION_ENABLED", False, type_cast=str_to_bool)
+
+# Trends cache the results of closed intervals separately, so that refreshes only query the intervals still open.
+# Off by default, as closed intervals still change when events are ingested late or persons are merged.
+TRENDS_BUCKET_CACHE_ENABLED: bool = get_from_env("TRENDS_BUCKET_CACHE_ENABLED", False, type_cast=str_to_bool)
+# How long after its end an interval is considered closed, to allow for events that are ingested late
+TRENDS_BUCKET_CACHE_CLOSED_AFTER: int = get_from_env("TRENDS_BUCKET_CACHE_CLOSED_AFTER", 60 * 60, type_cast=int)
+# Closed intervals still change when persons are merged or updated, so they are recalculated at least this often
+TRENDS_BUCKET_CACHE_TTL: int = get_from_env("TRENDS_BUCKET_CACHE_TTL", 24 * 60 * 60, type_cast=int)
+
 # Extend and override these settings with EE's ones
 if "ee.apps.EnterpriseConfig" in INSTALLED_APPS:
     from ee.settings import *  # noqa: F401, F403
@@ -54,3 +54,10 @@ NEW_CAPTURE_ENDPOINTS_SAMPLING_RATE = get_from_env("NEW_CAPTURE_ENDPOINTS_SAMPLI
 
 ELEMENT_CHAIN_AS_STRING_TEAMS = get_set(os.getenv("ELEMENT_CHAIN_AS_STRING_TEAMS", ""))
 ELEMENT_CHAIN_AS_STRING_EXCLUDED_TEAMS = get_set(os.getenv("ELEMENT_CHAIN_AS_STRING_EXCLUDED_TEAMS", ""))
+
+# Serve capture with an async view when running under ASGI (see posthog/asgi.py), so that workers aren't held while
+# waiting for Kafka to acknowledge events. Has no effect under WSGI.
+CAPTURE_ASYNC_ENABLED = get_from_env("CAPTURE_ASYNC_ENABLED", False, type_cast=str_to_bool)
+# How long the async capture producer waits for more messages to add to a partition's batch before sending it
+CAPTURE_ASYNC_KAFKA_LINGER_MS = get_from_env("CAPTURE_ASYNC_KAFKA_LINGER_MS", 5, type_cast=int)
+CAPTURE_ASYNC_KAFKA_MAX_BATCH_SIZE = get_from_env("CAPTURE_ASYNC_KAFKA_MAX_BATCH_SIZE", 256 * 1024, type_cast=int)
@@ -16,6 +16,9 @@ REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_TIMEOUT_SECONDS = get_from_env(
     "REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_TIMEOUT_SECONDS", 0.2, type_cast=float
 )
 
+# realtime snapshots are read from Redis this many members (lines written by Mr Blobby) at a time
+REALTIME_SNAPSHOTS_PAGE_SIZE = get_from_env("REALTIME_SNAPSHOTS_PAGE_SIZE", 500, type_cast=int)
+
 REPLAY_EMBEDDINGS_ALLOWED_TEAMS: list[str] = get_list(get_from_env("REPLAY_EMBEDDINGS_ALLOWED_TEAM", "", type_cast=str))
 REPLAY_EMBEDDINGS_BATCH_SIZE = get_from_env("REPLAY_EMBEDDINGS_BATCH_SIZE", 10, type_cast=int)
 REPLAY_EMBEDDINGS_MIN_DURATION_SECONDS = get_from_env("REPLAY_EMBEDDINGS_MIN_DURATION_SECONDS", 30, type_cast=int)
@@ -26,3 +29,18 @@ REPLAY_EMBEDDINGS_CLUSTERING_DBSCAN_EPS = get_from_env("REPLAY_EMBEDDINGS_CLUSTE
 REPLAY_EMBEDDINGS_CLUSTERING_DBSCAN_MIN_SAMPLES = get_from_env(
     "REPLAY_EMBEDDINGS_CLUSTERING_DBSCAN_MIN_SAMPLES", 10, type_cast=int
 )
+
+# Blob snapshots are streamed from object storage over a shared pool of connections
+SESSION_RECORDING_BLOB_HTTP_POOL_SIZE = get_from_env("SESSION_RECORDING_BLOB_HTTP_POOL_SIZE", 20, type_cast=int)
+# Blobs up to this size, gzipped as well as decoded, are kept in an in-memory LRU of
+# SESSION_RECORDING_BLOB_CACHE_MAX_ENTRIES per process. Larger ones are streamed. Set either to 0 to disable it.
+SESSION_RECORDING_BLOB_CACHE_MAX_BYTES = get_from_env(
+    "SESSION_RECORDING_BLOB_CACHE_MAX_BYTES", 512 * 1024, type_cast=int
+)
+SESSION_RECORDING_BLOB_CACHE_MAX_ENTRIES = get_from_env("SESSION_RECORDING_BLOB_CACHE_MAX_ENTRIES", 64, type_cast=int)
+# The blobs listed for a recording are cached, for as long as this while it's still being ingested, and for
+# SESSION_RECORDING_PERSISTED_BLOB_SOURCES_CACHE_TTL once it's persisted, as its blobs can't change anymore then
+SESSION_RECORDING_BLOB_SOURCES_CACHE_TTL = get_from_env("SESSION_RECORDING_BLOB_SOURCES_CACHE_TTL", 15, type_cast=int)
+SESSION_RECORDING_PERSISTED_BLOB_SOURCES_CACHE_TTL = get_from_env(
+    "SESSION_RECORDING_PERSISTED_BLOB_SOURCES_CACHE_TTL", 7 * 24 * 60 * 60, type_cast=int
+)
@@ -17,6 +17,21 @@ BATCH_EXPORT_POSTGRES_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 50  # 50MB
 BATCH_EXPORT_BIGQUERY_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 100  # 100MB
 BATCH_EXPORT_HTTP_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 10  # 10MB
 BATCH_EXPORT_HTTP_BATCH_SIZE: int = 1000
+# How many Arrow record batches are read ahead from ClickHouse while a batch export is writing and uploading
+BATCH_EXPORT_MAX_QUEUED_RECORD_BATCHES: int = get_from_env("BATCH_EXPORT_MAX_QUEUED_RECORD_BATCHES", 10, type_cast=int)
+# How many files may be uploading in the background while a batch export writes the next one
+BATCH_EXPORT_MAX_PENDING_FLUSHES: int = get_from_env("BATCH_EXPORT_MAX_PENDING_FLUSHES", 1, type_cast=int)
+# How many concurrent ClickHouse queries a batch export interval is split into when reading records. Each one is
+# de-duplicated on its own, so above 1, duplicates of an event inserted in different sub-intervals are all exported
+BATCH_EXPORT_READ_PARTITIONS_DEFAULT: int = get_from_env("BATCH_EXPORT_READ_PARTITIONS_DEFAULT", 1, type_cast=int)
+# Comma separated list of overrides in the format "team_id:partitions"
+BATCH_EXPORT_READ_PARTITIONS_OVERRIDES: dict[int, int] = dict(
+    [map(int, o.split(":")) for o in os.getenv("BATCH_EXPORT_READ_PARTITIONS_OVERRIDES", "").split(",") if o]  # type: ignore
+)
+# How many bytes of record batches read ahead by the partitions after the first may be spilled to disk at once
+BATCH_EXPORT_READ_PARTITIONS_MAX_SPILLED_BYTES: int = get_from_env(
+    "BATCH_EXPORT_READ_PARTITIONS_MAX_SPILLED_BYTES", 1024 * 1024 * 1024, type_cast=int
+)
 
 UNCONSTRAINED_TIMESTAMP_TEAM_IDS: list[str] = get_list(os.getenv("UNCONSTRAINED_TIMESTAMP_TEAM_IDS", ""))
 UNCONSTRAINED_TIMESTAMP_TEAM_IDS = get_list(os.getenv("UNCONSTRAINED_TIMESTAMP_TEAM_IDS", ""))
@@ -28,6 +28,12 @@ DECIDE_BUCKET_REPLENISH_RATE = get_from_env("DECIDE_BUCKET_REPLENISH_RATE", type
 
 DECIDE_SKIP_POSTGRES_FLAGS = get_from_env("DECIDE_SKIP_POSTGRES_FLAGS", False, type_cast=str_to_bool)
 
+# Max distinct_ids evaluated by a single bulk decide request
+DECIDE_BULK_MAX_DISTINCT_IDS = get_from_env("DECIDE_BULK_MAX_DISTINCT_IDS", type_cast=int, default=1000)
+# Bulk decide requests each evaluate up to DECIDE_BULK_MAX_DISTINCT_IDS distinct_ids, so they have a bucket of their own
+DECIDE_BULK_BUCKET_CAPACITY = get_from_env("DECIDE_BULK_BUCKET_CAPACITY", type_cast=int, default=20)
+DECIDE_BULK_BUCKET_REPLENISH_RATE = get_from_env("DECIDE_BULK_BUCKET_REPLENISH_RATE", type_cast=float, default=1.0)
+
 # Decide billing analytics
 
 DECIDE_BILLING_SAMPLING_RATE = get_from_env("DECIDE_BILLING_SAMPLING_RATE", 0.1, type_cast=float)
@@ -47,7 +47,7 @@ def redis_heartbeat() -> None:
 )
 def process_query_task(
     team_id: int,
-    user_id: int,
+    user_id: Optional[int],
     query_id: str,
     query_json: dict,
     limit_context: Optional[LimitContext] = None,
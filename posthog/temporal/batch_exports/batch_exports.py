@@ -1,6 +1,9 @@
 import collections.abc
 import dataclasses
 import datetime as dt
+import functools
+import tempfile
+import threading
 import typing
 import uuid
 from string import Template
@@ -41,6 +44,7 @@ SELECT_QUERY_TEMPLATE = Template(
         AND COALESCE(inserted_at, _timestamp) < toDateTime64({data_interval_end}, 6, 'UTC')
         AND team_id = {team_id}
         $timestamp
+        $partition
         $exclude_events
         $include_events
     $order_by
@@ -59,6 +63,12 @@ AND timestamp < toDateTime64({data_interval_end}, 6, 'UTC') + INTERVAL 1 DAY
 )
 
 
+PARTITION_PREDICATES = """
+AND COALESCE(inserted_at, _timestamp) >= toDateTime64({partition_start}, 6, 'UTC')
+AND COALESCE(inserted_at, _timestamp) < toDateTime64({partition_end}, 6, 'UTC')
+"""
+
+
 def get_timestamp_predicates_for_team(team_id: int) -> str:
     if str(team_id) in settings.UNCONSTRAINED_TIMESTAMP_TEAM_IDS:
         return ""
@@ -102,6 +112,7 @@ async def get_rows_count(
         format="",
         distinct="",
         timestamp=timestamp_predicates,
+        partition="",
         exclude_events=exclude_events_statement,
         include_events=include_events_statement,
     )
@@ -150,6 +161,25 @@ RecordsGenerator = collections.abc.Generator[pa.RecordBatch, None, None]
 # AsyncRecordsGenerator = collections.abc.AsyncGenerator[pa.RecordBatch, None]
 
 
+def get_read_partitions_for_team(team_id: int) -> int:
+    return settings.BATCH_EXPORT_READ_PARTITIONS_OVERRIDES.get(team_id, settings.BATCH_EXPORT_READ_PARTITIONS_DEFAULT)
+
+
+def split_interval(
+    interval_start: dt.datetime, interval_end: dt.datetime, partitions: int
+) -> list[tuple[dt.datetime, dt.datetime]]:
+    """Split an interval into up to `partitions` contiguous sub-intervals of whole seconds, in order."""
+    duration_seconds = int((interval_end - interval_start).total_seconds())
+    partitions = max(1, min(partitions, duration_seconds))
+
+    boundaries = [
+        interval_start + dt.timedelta(seconds=duration_seconds * index // partitions) for index in range(partitions)
+    ]
+    boundaries.append(interval_end)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
 def iter_records(
     client: ClickHouseClient,
     team_id: int,
@@ -159,9 +189,16 @@ def iter_records(
     include_events: collections.abc.Iterable[str] | None = None,
     fields: list[BatchExportField] | None = None,
     extra_query_parameters: dict[str, typing.Any] | None = None,
+    partitions: int | None = None,
 ) -> RecordsGenerator:
     """Iterate over Arrow batch records for a batch export.
 
+    With more than one partition, the interval is split into sub-intervals by `_inserted_at` that are
+    queried concurrently. Record batches are still yielded in sub-interval order, so `_inserted_at` keeps
+    increasing across batches and resuming from the last `_inserted_at` seen stays correct. As each
+    sub-interval is deduplicated on its own, duplicates inserted in different sub-intervals are not removed,
+    the same as when resuming an export.
+
     Args:
         client: The ClickHouse client used to query for the batch records.
         team_id: The ID of the team whose data we are querying.
@@ -172,12 +209,26 @@ def iter_records(
         fields: The fields that will be queried from ClickHouse. Will call default_fields if not set.
         extra_query_parameters: A dictionary of additional query parameters to pass to the query execution.
             Useful if fields contains any fields with placeholders.
+        partitions: How many concurrent queries to split the interval into. Defaults to the team's
+            setting, see `get_read_partitions_for_team`. DISTINCT ON only de-duplicates within each of them,
+            so duplicates of an event inserted in different sub-intervals are all exported with more than one.
 
     Returns:
         A generator that yields tuples of batch records as Python dictionaries and their schema.
     """
-    data_interval_start_ch = dt.datetime.fromisoformat(interval_start).strftime("%Y-%m-%d %H:%M:%S")
-    data_interval_end_ch = dt.datetime.fromisoformat(interval_end).strftime("%Y-%m-%d %H:%M:%S")
+    data_interval_start_dt = dt.datetime.fromisoformat(interval_start)
+    data_interval_end_dt = dt.datetime.fromisoformat(interval_end)
+    data_interval_start_ch = data_interval_start_dt.strftime("%Y-%m-%d %H:%M:%S")
+    data_interval_end_ch = data_interval_end_dt.strftime("%Y-%m-%d %H:%M:%S")
+
+    if partitions is None:
+        partitions = get_read_partitions_for_team(team_id)
+    # Sub-intervals are built from the same whole seconds the query filters on.
+    sub_intervals = split_interval(
+        dt.datetime.strptime(data_interval_start_ch, "%Y-%m-%d %H:%M:%S"),
+        dt.datetime.strptime(data_interval_end_ch, "%Y-%m-%d %H:%M:%S"),
+        partitions,
+    )
 
     if exclude_events:
         exclude_events_statement = "AND event NOT IN {exclude_events}"
@@ -211,6 +262,7 @@ def iter_records(
         format="FORMAT ArrowStream",
         distinct="DISTINCT ON (event, cityHash64(distinct_id), cityHash64(uuid))",
         timestamp=timestamp_predicates,
+        partition=PARTITION_PREDICATES if len(sub_intervals) > 1 else "",
         exclude_events=exclude_events_statement,
         include_events=include_events_statement,
     )
@@ -227,7 +279,113 @@ def iter_records(
     else:
         query_parameters = base_query_parameters
 
-    yield from client.stream_query_as_arrow(query, query_parameters=query_parameters)
+    if len(sub_intervals) == 1:
+        yield from client.stream_query_as_arrow(query, query_parameters=query_parameters)
+        return
+
+    yield from iter_partitions_concurrently(
+        [
+            functools.partial(
+                client.stream_query_as_arrow,
+                query,
+                query_parameters=query_parameters
+                | {
+                    "partition_start": partition_start.strftime("%Y-%m-%d %H:%M:%S"),
+                    "partition_end": partition_end.strftime("%Y-%m-%d %H:%M:%S"),
+                },
+            )
+            for partition_start, partition_end in sub_intervals
+        ]
+    )
+
+
+def iter_partitions_concurrently(
+    partitions: collections.abc.Sequence[collections.abc.Callable[[], collections.abc.Iterator[pa.RecordBatch]]],
+    max_spilled_bytes: int | None = None,
+) -> RecordsGenerator:
+    """Read all partitions concurrently, yielding every record batch of the first, then the second, and so on.
+
+    The first partition is streamed directly. The others are read in background threads and spilled to temporary
+    Arrow IPC files as fast as ClickHouse can send them, so that reading them is not held back by how fast
+    the first one is consumed. Their files are read back once the consumer gets to them.
+
+    Spilling is paused once the unread spilled record batches add up to `max_spilled_bytes`, defaulting to
+    `BATCH_EXPORT_READ_PARTITIONS_MAX_SPILLED_BYTES`, until the consumer has read some of them back. Only the
+    earliest partition still being read keeps spilling past it, as the consumer can't go on until it's done.
+    """
+    if max_spilled_bytes is None:
+        max_spilled_bytes = settings.BATCH_EXPORT_READ_PARTITIONS_MAX_SPILLED_BYTES
+
+    stopped = threading.Event()
+    spill_files = [tempfile.TemporaryFile() for _ in partitions[1:]]
+    spill_threads: list[threading.Thread] = []
+    spill_errors: list[BaseException | None] = [None] * len(spill_files)
+    spill_record_batches = [0] * len(spill_files)
+    spill_bytes = [0] * len(spill_files)
+    spill_done = [False] * len(spill_files)
+    spilled = threading.Condition()
+
+    def can_spill(index: int, nbytes: int) -> bool:
+        if stopped.is_set() or sum(spill_bytes) + nbytes <= max_spilled_bytes:
+            return True
+        return all(spill_done[:index])
+
+    def spill(index: int, partition: collections.abc.Callable[[], collections.abc.Iterator[pa.RecordBatch]]) -> None:
+        writer = None
+        try:
+            for record_batch in partition():
+                with spilled:
+                    spilled.wait_for(functools.partial(can_spill, index, record_batch.nbytes))
+                    spill_bytes[index] += record_batch.nbytes
+                if stopped.is_set():
+                    return
+                if writer is None:
+                    writer = pa.ipc.new_stream(spill_files[index], record_batch.schema)
+                writer.write_batch(record_batch)
+                spill_record_batches[index] += 1
+        except BaseException as e:
+            spill_errors[index] = e
+        finally:
+            if writer is not None and not stopped.is_set():
+                writer.close()
+            with spilled:
+                spill_done[index] = True
+                spilled.notify_all()
+
+    try:
+        for index, partition in enumerate(partitions[1:]):
+            thread = threading.Thread(target=spill, args=(index, partition), daemon=True)
+            thread.start()
+            spill_threads.append(thread)
+
+        yield from partitions[0]()
+
+        for index, thread in enumerate(spill_threads):
+            thread.join()
+
+            if (error := spill_errors[index]) is not None:
+                raise error
+            if spill_record_batches[index] == 0:
+                continue
+
+            spill_files[index].seek(0)
+            with pa.ipc.open_stream(spill_files[index]) as reader:
+                for record_batch in reader:
+                    yield record_batch
+                    with spilled:
+                        spill_bytes[index] = max(spill_bytes[index] - record_batch.nbytes, 0)
+                        spilled.notify_all()
+            spill_files[index].close()
+            with spilled:
+                spill_bytes[index] = 0
+                spilled.notify_all()
+
+    finally:
+        with spilled:
+            stopped.set()
+            spilled.notify_all()
+        for spill_file in spill_files:
+            spill_file.close()
 
 
 def get_data_interval(interval: str, data_interval_end: str | None) -> tuple[dt.datetime, dt.datetime]:
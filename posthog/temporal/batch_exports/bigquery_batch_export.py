@@ -2,6 +2,7 @@ import asyncio
 import contextlib
 import dataclasses
 import datetime as dt
+import functools
 import json
 
 import pyarrow as pa
@@ -34,9 +35,10 @@ from posthog.temporal.batch_exports.metrics import (
     get_rows_exported_metric,
 )
 from posthog.temporal.batch_exports.temporary_file import (
+    BackgroundFlusher,
     BatchExportTemporaryFile,
 )
-from posthog.temporal.batch_exports.utils import peek_first_and_rewind
+from posthog.temporal.batch_exports.utils import iter_in_background_thread, peek_first_and_rewind
 from posthog.temporal.common.clickhouse import get_client
 from posthog.temporal.common.logger import bind_temporal_worker_logger
 from posthog.temporal.common.utils import (
@@ -267,16 +269,31 @@ async def insert_into_bigquery_activity(inputs: BigQueryInsertInputs) -> Records
                 rows_exported = get_rows_exported_metric()
                 bytes_exported = get_bytes_exported_metric()
 
-                async def flush_to_bigquery(bigquery_table, table_schema):
+                async def flush_to_bigquery(flushed_file, bigquery_table, table_schema, flushed_inserted_at):
+                    nonlocal last_inserted_at
+
                     logger.debug(
                         "Loading %s records of size %s bytes",
-                        jsonl_file.records_since_last_reset,
-                        jsonl_file.bytes_since_last_reset,
+                        flushed_file.records_since_last_reset,
+                        flushed_file.bytes_since_last_reset,
                     )
-                    await load_jsonl_file_to_bigquery_table(jsonl_file, bigquery_table, table_schema, bq_client)
+                    await load_jsonl_file_to_bigquery_table(flushed_file, bigquery_table, table_schema, bq_client)
+
+                    rows_exported.add(flushed_file.records_since_last_reset)
+                    bytes_exported.add(flushed_file.bytes_since_last_reset)
 
-                    rows_exported.add(jsonl_file.records_since_last_reset)
-                    bytes_exported.add(jsonl_file.bytes_since_last_reset)
+                    last_inserted_at = flushed_inserted_at.isoformat()
+                    activity.heartbeat(last_inserted_at)
+
+                async def submit_flush(flusher, bigquery_table, table_schema, flushed_inserted_at):
+                    """Load what has been written so far in the background, while writing continues."""
+                    flushed_file = jsonl_file.detach()
+                    await flusher.submit(
+                        functools.partial(
+                            flush_to_bigquery, flushed_file, bigquery_table, table_schema, flushed_inserted_at
+                        ),
+                        flushed_file,
+                    )
 
                 first_record, records_iterator = peek_first_and_rewind(records_iterator)
 
@@ -319,32 +336,25 @@ async def insert_into_bigquery_activity(inputs: BigQueryInsertInputs) -> Records
                 # Columns need to be sorted according to BigQuery schema.
                 record_columns = [field.name for field in schema] + ["_inserted_at"]
 
-                for record_batch in records_iterator:
-                    for record in record_batch.select(record_columns).to_pylist():
-                        inserted_at = record.pop("_inserted_at")
+                async with BackgroundFlusher(settings.BATCH_EXPORT_MAX_PENDING_FLUSHES) as flusher:
+                    async for record_batch in iter_in_background_thread(
+                        records_iterator, settings.BATCH_EXPORT_MAX_QUEUED_RECORD_BATCHES
+                    ):
+                        for record in record_batch.select(record_columns).to_pylist():
+                            inserted_at = record.pop("_inserted_at")
 
-                        for json_column in json_columns:
-                            if json_column in record and (json_str := record.get(json_column, None)) is not None:
-                                record[json_column] = json.loads(json_str)
+                            for json_column in json_columns:
+                                if json_column in record and (json_str := record.get(json_column, None)) is not None:
+                                    record[json_column] = json.loads(json_str)
 
-                        # TODO: Parquet is a much more efficient format to send data to BigQuery.
-                        jsonl_file.write_records_to_jsonl([record])
+                            # TODO: Parquet is a much more efficient format to send data to BigQuery.
+                            jsonl_file.write_records_to_jsonl([record])
 
-                        if jsonl_file.tell() > settings.BATCH_EXPORT_BIGQUERY_UPLOAD_CHUNK_SIZE_BYTES:
-                            await flush_to_bigquery(bigquery_table, schema)
-
-                            last_inserted_at = inserted_at.isoformat()
-                            activity.heartbeat(last_inserted_at)
-
-                            jsonl_file.reset()
-
-                if jsonl_file.tell() > 0 and inserted_at is not None:
-                    await flush_to_bigquery(bigquery_table, schema)
-
-                    last_inserted_at = inserted_at.isoformat()
-                    activity.heartbeat(last_inserted_at)
+                            if jsonl_file.tell() > settings.BATCH_EXPORT_BIGQUERY_UPLOAD_CHUNK_SIZE_BYTES:
+                                await submit_flush(flusher, bigquery_table, schema, inserted_at)
 
-                    jsonl_file.reset()
+                    if jsonl_file.tell() > 0 and inserted_at is not None:
+                        await submit_flush(flusher, bigquery_table, schema, inserted_at)
 
                 return jsonl_file.records_total
 
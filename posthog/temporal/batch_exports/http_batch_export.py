@@ -34,6 +34,7 @@ from posthog.temporal.batch_exports.temporary_file import (
     BatchExportTemporaryFile,
     json_dumps_bytes,
 )
+from posthog.temporal.batch_exports.utils import iter_in_background_thread
 from posthog.temporal.common.clickhouse import get_client
 from posthog.temporal.common.logger import bind_temporal_worker_logger
 
@@ -258,7 +259,9 @@ async def insert_into_http_activity(inputs: HttpInsertInputs) -> RecordsComplete
                 activity.heartbeat(last_uploaded_timestamp)
 
             async with aiohttp.ClientSession() as session:
-                for record_batch in record_iterator:
+                async for record_batch in iter_in_background_thread(
+                    record_iterator, settings.BATCH_EXPORT_MAX_QUEUED_RECORD_BATCHES
+                ):
                     for row in record_batch.select(columns).to_pylist():
                         # Format result row as PostHog event, write JSON to the batch file.
 
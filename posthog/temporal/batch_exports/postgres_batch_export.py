@@ -38,7 +38,11 @@ from posthog.temporal.batch_exports.metrics import (
 from posthog.temporal.batch_exports.temporary_file import (
     BatchExportTemporaryFile,
 )
-from posthog.temporal.batch_exports.utils import peek_first_and_rewind, try_set_batch_export_run_to_running
+from posthog.temporal.batch_exports.utils import (
+    iter_in_background_thread,
+    peek_first_and_rewind,
+    try_set_batch_export_run_to_running,
+)
 from posthog.temporal.common.clickhouse import get_client
 from posthog.temporal.common.logger import bind_temporal_worker_logger
 
@@ -335,7 +339,9 @@ async def insert_into_postgres_activity(inputs: PostgresInsertInputs) -> Records
                     rows_exported.add(pg_file.records_since_last_reset)
                     bytes_exported.add(pg_file.bytes_since_last_reset)
 
-                for record_batch in record_iterator:
+                async for record_batch in iter_in_background_thread(
+                    record_iterator, settings.BATCH_EXPORT_MAX_QUEUED_RECORD_BATCHES
+                ):
                     for result in record_batch.select(schema_columns).to_pylist():
                         row = result
 
@@ -44,7 +44,11 @@ from posthog.temporal.batch_exports.temporary_file import (
     ParquetBatchExportWriter,
     UnsupportedFileFormatError,
 )
-from posthog.temporal.batch_exports.utils import peek_first_and_rewind, try_set_batch_export_run_to_running
+from posthog.temporal.batch_exports.utils import (
+    iter_in_background_thread,
+    peek_first_and_rewind,
+    try_set_batch_export_run_to_running,
+)
 from posthog.temporal.common.clickhouse import get_client
 from posthog.temporal.common.heartbeat import Heartbeatter
 from posthog.temporal.common.logger import bind_temporal_worker_logger
@@ -511,7 +515,9 @@ async def insert_into_s3_activity(inputs: S3InsertInputs) -> RecordsCompleted:
                     rows_exported = get_rows_exported_metric()
                     bytes_exported = get_bytes_exported_metric()
 
-                    for record_batch in record_iterator:
+                    async for record_batch in iter_in_background_thread(
+                        record_iterator, settings.BATCH_EXPORT_MAX_QUEUED_RECORD_BATCHES
+                    ):
                         record_batch = cast_record_batch_json_columns(record_batch)
 
                         await writer.write_record_batch(record_batch)
@@ -537,12 +543,14 @@ def get_batch_export_writer(
             flush_callable=flush_callable,
             compression=inputs.compression,
             schema=schema,
+            max_pending_flushes=settings.BATCH_EXPORT_MAX_PENDING_FLUSHES,
         )
     elif inputs.file_format == "JSONLines":
         writer = JSONLBatchExportWriter(
             max_bytes=settings.BATCH_EXPORT_S3_UPLOAD_CHUNK_SIZE_BYTES,
             flush_callable=flush_callable,
             compression=inputs.compression,
+            max_pending_flushes=settings.BATCH_EXPORT_MAX_PENDING_FLUSHES,
         )
     else:
         raise UnsupportedFileFormatError(inputs.file_format, "S3")
@@ -37,9 +37,10 @@ from posthog.temporal.batch_exports.metrics import (
     get_rows_exported_metric,
 )
 from posthog.temporal.batch_exports.temporary_file import (
+    BackgroundFlusher,
     BatchExportTemporaryFile,
 )
-from posthog.temporal.batch_exports.utils import peek_first_and_rewind
+from posthog.temporal.batch_exports.utils import iter_in_background_thread, peek_first_and_rewind
 from posthog.temporal.common.clickhouse import get_client
 from posthog.temporal.common.logger import bind_temporal_worker_logger
 from posthog.temporal.common.utils import (
@@ -448,6 +449,21 @@ async def insert_into_snowflake_activity(inputs: SnowflakeInsertInputs) -> Recor
             rows_exported.add(file.records_since_last_reset)
             bytes_exported.add(file.bytes_since_last_reset)
 
+        async def flush_and_heartbeat(
+            connection: SnowflakeConnection,
+            file: BatchExportTemporaryFile,
+            table_name: str,
+            flushed_file_no: int,
+            flushed_inserted_at: dt.datetime,
+            last: bool = False,
+        ):
+            nonlocal last_inserted_at
+
+            await flush_to_snowflake(connection, file, table_name, flushed_file_no, last=last)
+
+            last_inserted_at = flushed_inserted_at
+            activity.heartbeat(str(last_inserted_at), flushed_file_no + 1)
+
         if inputs.batch_export_schema is None:
             fields = snowflake_default_fields()
             query_parameters = None
@@ -515,33 +531,51 @@ async def insert_into_snowflake_activity(inputs: SnowflakeInsertInputs) -> Recor
             inserted_at = None
 
             with BatchExportTemporaryFile() as local_results_file:
-                for record_batch in record_iterator:
-                    for record in record_batch.select(record_columns).to_pylist():
-                        inserted_at = record.pop("_inserted_at")
-
-                        for variant_column in known_variant_columns:
-                            if (json_str := record.get(variant_column, None)) is not None:
-                                record[variant_column] = json.loads(json_str)
-
-                        local_results_file.write_records_to_jsonl([record])
-
-                        if local_results_file.tell() > settings.BATCH_EXPORT_SNOWFLAKE_UPLOAD_CHUNK_SIZE_BYTES:
-                            await flush_to_snowflake(connection, local_results_file, inputs.table_name, file_no)
-
-                            last_inserted_at = inserted_at
-                            file_no += 1
-
-                            activity.heartbeat(str(last_inserted_at), file_no)
-
-                            local_results_file.reset()
-
-                if local_results_file.tell() > 0 and record is not None and inserted_at is not None:
-                    await flush_to_snowflake(connection, local_results_file, inputs.table_name, file_no, last=True)
-
-                    last_inserted_at = inserted_at
-                    file_no += 1
-
-                    activity.heartbeat(str(last_inserted_at), file_no)
+                # Files are PUT in the background while the next one is written. `file_no` is assigned as files are
+                # submitted, but `last_inserted_at` only moves forward once a file has been PUT.
+                async with BackgroundFlusher(settings.BATCH_EXPORT_MAX_PENDING_FLUSHES) as flusher:
+                    async for record_batch in iter_in_background_thread(
+                        record_iterator, settings.BATCH_EXPORT_MAX_QUEUED_RECORD_BATCHES
+                    ):
+                        for record in record_batch.select(record_columns).to_pylist():
+                            inserted_at = record.pop("_inserted_at")
+
+                            for variant_column in known_variant_columns:
+                                if (json_str := record.get(variant_column, None)) is not None:
+                                    record[variant_column] = json.loads(json_str)
+
+                            local_results_file.write_records_to_jsonl([record])
+
+                            if local_results_file.tell() > settings.BATCH_EXPORT_SNOWFLAKE_UPLOAD_CHUNK_SIZE_BYTES:
+                                flushed_file = local_results_file.detach()
+                                await flusher.submit(
+                                    functools.partial(
+                                        flush_and_heartbeat,
+                                        connection,
+                                        flushed_file,
+                                        inputs.table_name,
+                                        file_no,
+                                        inserted_at,
+                                    ),
+                                    flushed_file,
+                                )
+                                file_no += 1
+
+                    if local_results_file.tell() > 0 and record is not None and inserted_at is not None:
+                        flushed_file = local_results_file.detach()
+                        await flusher.submit(
+                            functools.partial(
+                                flush_and_heartbeat,
+                                connection,
+                                flushed_file,
+                                inputs.table_name,
+                                file_no,
+                                inserted_at,
+                                last=True,
+                            ),
+                            flushed_file,
+                        )
+                        file_no += 1
 
             await copy_loaded_files_to_snowflake_table(connection, inputs.table_name)
 
@@ -1,10 +1,12 @@
 """This module contains a temporary file to stage data in batch exports."""
 
 import abc
+import asyncio
 import collections.abc
 import contextlib
 import csv
 import datetime as dt
+import functools
 import gzip
 import tempfile
 import typing
@@ -57,16 +59,17 @@ class BatchExportTemporaryFile:
         *,
         errors: str | None = None,
     ):
-        self._file = tempfile.NamedTemporaryFile(
-            mode=mode,
-            encoding=encoding,
-            newline=newline,
-            buffering=buffering,
-            suffix=suffix,
-            prefix=prefix,
-            dir=dir,
-            errors=errors,
-        )
+        self._file_kwargs = {
+            "mode": mode,
+            "encoding": encoding,
+            "newline": newline,
+            "buffering": buffering,
+            "suffix": suffix,
+            "prefix": prefix,
+            "dir": dir,
+            "errors": errors,
+        }
+        self._file = tempfile.NamedTemporaryFile(**self._file_kwargs)
         self.compression = compression
         self.bytes_total = 0
         self.records_total = 0
@@ -225,6 +228,27 @@ class BatchExportTemporaryFile:
         """Rewind the file before reading it."""
         self._file.seek(0)
 
+    def detach(self) -> "BatchExportTemporaryFile":
+        """Move everything written since the last reset to a new file, and continue writing to an empty one.
+
+        This allows flushing the returned file while writes continue. The returned file is not
+        tied to any context manager: Whoever flushes it must also close it.
+
+        Compression state, like an unfinished brotli stream, stays with this file, which keeps being written to.
+        """
+        detached = BatchExportTemporaryFile(compression=self.compression, **self._file_kwargs)
+        self._file, detached._file = detached._file, self._file
+
+        detached.bytes_total = self.bytes_total
+        detached.records_total = self.records_total
+        detached.bytes_since_last_reset = self.bytes_since_last_reset
+        detached.records_since_last_reset = self.records_since_last_reset
+
+        self.bytes_since_last_reset = 0
+        self.records_since_last_reset = 0
+
+        return detached
+
     def reset(self):
         """Reset underlying file by truncating it.
 
@@ -247,6 +271,87 @@ FlushCallable = collections.abc.Callable[
 ]
 
 
+class BackgroundFlusher:
+    """Flush detached `BatchExportTemporaryFile`s in the background while the next file is written.
+
+    Flushes run one at a time in the order they were submitted: Heartbeats record the last `_inserted_at`
+    flushed and S3 parts are numbered as they are uploaded, so a flush may only overlap with the writes
+    that follow it, never with other flushes.
+
+    Attributes:
+        max_pending: How many flushes may be pending before `submit` waits for the oldest one to finish.
+            This bounds how much data is staged on disk. With 0, flushes run inline when submitted.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self._pending: collections.deque[asyncio.Task] = collections.deque()
+
+    async def submit(
+        self,
+        flush: collections.abc.Callable[[], collections.abc.Awaitable[None]],
+        file: BatchExportTemporaryFile,
+    ) -> None:
+        """Schedule `flush` after any pending flushes and close `file` once it's done.
+
+        Raises:
+            Any exception raised by a previously submitted flush that has finished.
+        """
+        while self._pending and (self._pending[0].done() or len(self._pending) >= self.max_pending):
+            await self._pending.popleft()
+
+        if self.max_pending == 0:
+            await self._flush_after(None, flush, file)
+            return
+
+        previous = self._pending[-1] if self._pending else None
+        self._pending.append(asyncio.create_task(self._flush_after(previous, flush, file)))
+
+    async def _flush_after(
+        self,
+        previous: asyncio.Task | None,
+        flush: collections.abc.Callable[[], collections.abc.Awaitable[None]],
+        file: BatchExportTemporaryFile,
+    ) -> None:
+        try:
+            if previous is not None:
+                # If the previous flush failed, so does this one, as flushing it would leave a gap.
+                await previous
+
+            file.rewind()
+            await flush()
+        finally:
+            file.close()
+
+    async def join(self) -> None:
+        """Wait for all pending flushes to finish, raising the first exception encountered."""
+        try:
+            while self._pending:
+                await self._pending.popleft()
+        except BaseException:
+            self.cancel()
+            raise
+
+    def cancel(self) -> None:
+        """Cancel all pending flushes."""
+        while self._pending:
+            self._pending.popleft().cancel()
+
+    async def __aenter__(self):
+        """Async context manager protocol enter method."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        """Async context manager protocol exit method.
+
+        Pending flushes are waited for when exiting normally, but cancelled on errors.
+        """
+        if exc_value is None:
+            await self.join()
+        else:
+            self.cancel()
+
+
 class UnsupportedFileFormatError(Exception):
     """Raised when a writer for an unsupported file format is requested."""
 
@@ -275,6 +380,8 @@ class BatchExportWriter(abc.ABC):
             since the last flush, the latest recorded `_inserted_at`, and a `bool` indicating if
             this is the last flush (when exiting the context manager).
         file_kwargs: Optional keyword arguments passed when initializing `_batch_export_file`.
+        max_pending_flushes: How many flushes may run in the background while writes continue, see
+            `BackgroundFlusher`. With the default of 0, writes wait for each flush to finish.
         last_inserted_at: Latest `_inserted_at` written. This attribute leaks some implementation
             details, as we are assuming assume `_inserted_at` is present, as it's added to all
             batch export queries.
@@ -289,12 +396,15 @@ class BatchExportWriter(abc.ABC):
         flush_callable: FlushCallable,
         max_bytes: int,
         file_kwargs: collections.abc.Mapping[str, typing.Any] | None = None,
+        max_pending_flushes: int = 0,
     ):
         self.flush_callable = flush_callable
         self.max_bytes = max_bytes
         self.file_kwargs: collections.abc.Mapping[str, typing.Any] = file_kwargs or {}
+        self.max_pending_flushes = max_pending_flushes
 
         self._batch_export_file: BatchExportTemporaryFile | None = None
+        self._background_flusher = BackgroundFlusher(max_pending_flushes)
         self.reset_writer_tracking()
 
     def reset_writer_tracking(self):
@@ -323,6 +433,7 @@ class BatchExportWriter(abc.ABC):
             try:
                 yield
             finally:
+                await self._background_flusher.join()
                 self.track_bytes_written(temp_file)
 
                 if self.last_inserted_at is not None and self.bytes_since_last_flush > 0:
@@ -382,23 +493,29 @@ class BatchExportWriter(abc.ABC):
             await self.flush(last_inserted_at)
 
     async def flush(self, last_inserted_at: dt.datetime, is_last: bool = False) -> None:
-        """Call the provided `flush_callable` and reset underlying file.
+        """Call the provided `flush_callable` with the contents of the underlying file.
 
-        The underlying batch export temporary file will be reset after calling `flush_callable`.
+        The contents are detached from the underlying batch export temporary file, which is left empty,
+        so that writes may continue while `flush_callable` runs in the background. The last flush always
+        waits for all flushes to finish.
         """
         if is_last is True and self.batch_export_file.compression == "brotli":
             self.batch_export_file.finish_brotli_compressor()
 
-        self.batch_export_file.seek(0)
-
-        await self.flush_callable(
-            self.batch_export_file,
-            self.records_since_last_flush,
-            self.bytes_since_last_flush,
-            last_inserted_at,
-            is_last,
+        flushed_file = self.batch_export_file.detach()
+        await self._background_flusher.submit(
+            functools.partial(
+                self.flush_callable,
+                flushed_file,
+                self.records_since_last_flush,
+                self.bytes_since_last_flush,
+                last_inserted_at,
+                is_last,
+            ),
+            flushed_file,
         )
-        self.batch_export_file.reset()
+        if is_last is True:
+            await self._background_flusher.join()
 
         self.records_since_last_flush = 0
         self.bytes_since_last_flush = 0
@@ -418,11 +535,13 @@ class JSONLBatchExportWriter(BatchExportWriter):
         flush_callable: FlushCallable,
         compression: None | str = None,
         default: typing.Callable = str,
+        max_pending_flushes: int = 0,
     ):
         super().__init__(
             max_bytes=max_bytes,
             flush_callable=flush_callable,
             file_kwargs={"compression": compression},
+            max_pending_flushes=max_pending_flushes,
         )
 
         self.default = default
@@ -459,11 +578,13 @@ class CSVBatchExportWriter(BatchExportWriter):
         line_terminator: str = "\n",
         quoting=csv.QUOTE_NONE,
         compression: str | None = None,
+        max_pending_flushes: int = 0,
     ):
         super().__init__(
             max_bytes=max_bytes,
             flush_callable=flush_callable,
             file_kwargs={"compression": compression},
+            max_pending_flushes=max_pending_flushes,
         )
         self.field_names = field_names
         self.extras_action: typing.Literal["raise", "ignore"] = extras_action
@@ -520,11 +641,13 @@ class ParquetBatchExportWriter(BatchExportWriter):
         flush_callable: FlushCallable,
         schema: pa.Schema,
         compression: str | None = "snappy",
+        max_pending_flushes: int = 0,
     ):
         super().__init__(
             max_bytes=max_bytes,
             flush_callable=flush_callable,
             file_kwargs={"compression": None},  # ParquetWriter handles compression
+            max_pending_flushes=max_pending_flushes,
         )
         self.schema = schema
         self.compression = compression
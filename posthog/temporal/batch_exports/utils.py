@@ -1,5 +1,6 @@
 import asyncio
 import collections.abc
+import threading
 import typing
 import uuid
 from posthog.batch_exports.models import BatchExportRun
@@ -29,6 +30,67 @@ def peek_first_and_rewind(
     return (first, rewind_gen())
 
 
+class _IteratorFinished:
+    """Put in the queue by `iter_in_background_thread` once the iterator is exhausted or raises."""
+
+    def __init__(self, exception: BaseException | None = None):
+        self.exception = exception
+
+
+async def iter_in_background_thread(
+    iterator: collections.abc.Iterator[T], max_queue_size: int
+) -> collections.abc.AsyncGenerator[T, None]:
+    """Consume a blocking iterator in a background thread, yielding its items as they become available.
+
+    This keeps the event loop free while, for example, `iter_records` waits on ClickHouse, and lets reading
+    the next items overlap with writing and uploading the previous ones. At most `max_queue_size` items are
+    read ahead: After that, the background thread blocks until the consumer catches up.
+
+    Exceptions raised by the iterator are re-raised to the consumer. If the consumer stops iterating early,
+    the background thread stops reading and closes the iterator.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[T | _IteratorFinished] = asyncio.Queue(maxsize=max_queue_size)
+    stopped = threading.Event()
+
+    def put(item: T | _IteratorFinished) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce() -> None:
+        try:
+            for item in iterator:
+                if stopped.is_set():
+                    return
+                put(item)
+            put(_IteratorFinished())
+        except BaseException as e:
+            if not stopped.is_set():
+                put(_IteratorFinished(e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = await queue.get()
+
+            if isinstance(item, _IteratorFinished):
+                if item.exception is not None:
+                    raise item.exception
+                return
+
+            yield item
+    finally:
+        stopped.set()
+        # Unblock the background thread if it's waiting on a full queue, so it can notice we are done.
+        while not queue.empty():
+            queue.get_nowait()
+
+
 async def try_set_batch_export_run_to_running(run_id: str | None, logger, timeout: float = 10.0) -> None:
     """Try to set a batch export run to 'RUNNING' status, but do nothing if we fail or if 'run_id' is 'None'.
 
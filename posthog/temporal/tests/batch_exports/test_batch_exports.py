@@ -1,16 +1,22 @@
+import asyncio
 import datetime as dt
 import json
 import operator
+import threading
 from random import randint
 
+import pyarrow as pa
 import pytest
 from django.test import override_settings
 
 from posthog.temporal.batch_exports.batch_exports import (
     get_data_interval,
     get_rows_count,
+    iter_partitions_concurrently,
     iter_records,
+    split_interval,
 )
+from posthog.temporal.batch_exports.utils import iter_in_background_thread
 from posthog.temporal.tests.utils.events import generate_test_events_in_clickhouse
 
 pytestmark = [pytest.mark.asyncio, pytest.mark.django_db]
@@ -230,6 +236,173 @@ async def test_iter_records(clickhouse_client):
     assert_records_match_events(records, events)
 
 
+async def test_iter_records_in_background_thread(clickhouse_client):
+    """Test iter_records yields the same rows when read ahead in a background thread."""
+    team_id = randint(1, 1000000)
+    data_interval_end = dt.datetime.fromisoformat("2023-04-25T14:31:00.000000+00:00")
+    data_interval_start = dt.datetime.fromisoformat("2023-04-25T14:30:00.000000+00:00")
+
+    (events, _, _) = await generate_test_events_in_clickhouse(
+        client=clickhouse_client,
+        team_id=team_id,
+        start_time=data_interval_start,
+        end_time=data_interval_end,
+        count=10000,
+        count_outside_range=0,
+        count_other_team=0,
+        duplicate=False,
+        person_properties={"$browser": "Chrome", "$os": "Mac OS X"},
+    )
+
+    records = [
+        record
+        async for record_batch in iter_in_background_thread(
+            iter_records(
+                clickhouse_client,
+                team_id,
+                data_interval_start.isoformat(),
+                data_interval_end.isoformat(),
+            ),
+            max_queue_size=1,
+        )
+        for record in record_batch.to_pylist()
+    ]
+
+    assert_records_match_events(records, events)
+
+
+async def test_iter_in_background_thread_raises_iterator_exceptions():
+    """Test exceptions raised while reading in the background are raised to the consumer."""
+
+    def fail_after_one():
+        yield 1
+        raise ValueError("Failed reading")
+
+    items = []
+    with pytest.raises(ValueError, match="Failed reading"):
+        async for item in iter_in_background_thread(fail_after_one(), max_queue_size=1):
+            items.append(item)
+
+    assert items == [1]
+
+
+async def test_iter_in_background_thread_closes_iterator_when_consumer_stops():
+    """Test the background thread stops reading and closes the iterator if the consumer stops early."""
+    closed = threading.Event()
+    read = 0
+
+    def count_forever():
+        nonlocal read
+        try:
+            while True:
+                read += 1
+                yield read
+        finally:
+            closed.set()
+
+    iterator = iter_in_background_thread(count_forever(), max_queue_size=2)
+    async for item in iterator:
+        if item == 5:
+            break
+    await iterator.aclose()
+
+    assert await asyncio.to_thread(closed.wait, 5)
+    # The thread can't read much further ahead than the queue allows
+    assert read <= 5 + 2 + 2
+
+
+async def test_iter_records_with_partitions(clickhouse_client):
+    """Test iter_records returns the same rows, still ordered by _inserted_at, when reading partitions concurrently."""
+    team_id = randint(1, 1000000)
+    data_interval_end = dt.datetime.fromisoformat("2023-04-25T14:31:00.000000+00:00")
+    data_interval_start = dt.datetime.fromisoformat("2023-04-25T14:30:00.000000+00:00")
+
+    (events, _, _) = await generate_test_events_in_clickhouse(
+        client=clickhouse_client,
+        team_id=team_id,
+        start_time=data_interval_start,
+        end_time=data_interval_end,
+        count=10000,
+        count_outside_range=0,
+        count_other_team=0,
+        duplicate=False,
+        person_properties={"$browser": "Chrome", "$os": "Mac OS X"},
+    )
+
+    records = [
+        record
+        for record_batch in iter_records(
+            clickhouse_client,
+            team_id,
+            data_interval_start.isoformat(),
+            data_interval_end.isoformat(),
+            partitions=4,
+        )
+        for record in record_batch.to_pylist()
+    ]
+
+    assert_records_match_events(records, events)
+    inserted_ats = [record["_inserted_at"] for record in records]
+    assert inserted_ats == sorted(inserted_ats)
+
+
+async def test_iter_partitions_concurrently_stops_spilling_at_max_spilled_bytes():
+    """Test partitions wait for spilled record batches to be read back, except the next one the consumer needs."""
+    last_partition_waiting = threading.Event()
+    second_partition_can_finish = threading.Event()
+    read = [0, 0, 0]
+
+    def partition(index: int):
+        def read_record_batches():
+            for value in range(10):
+                if index == 1 and value == 9:
+                    second_partition_can_finish.wait(5)
+                read[index] += 1
+                if index == 2:
+                    last_partition_waiting.set()
+                yield pa.RecordBatch.from_pylist([{"value": index * 10 + value}])
+
+        return read_record_batches
+
+    record_batches = iter_partitions_concurrently([partition(0), partition(1), partition(2)], max_spilled_bytes=0)
+    values = [next(record_batches).column("value")[0].as_py()]
+
+    assert await asyncio.to_thread(last_partition_waiting.wait, 5)
+    await asyncio.sleep(0.1)
+    # Only the second partition keeps spilling, as the consumer needs it next
+    assert read[2] == 1
+
+    second_partition_can_finish.set()
+    values += [value for record_batch in record_batches for value in record_batch.column("value").to_pylist()]
+
+    assert values == list(range(30))
+
+
+@pytest.mark.parametrize(
+    "partitions,expected",
+    [
+        (1, [("14:30:00", "14:31:00")]),
+        (3, [("14:30:00", "14:30:20"), ("14:30:20", "14:30:40"), ("14:30:40", "14:31:00")]),
+        (7, [("14:30:00", "14:30:08"), ("14:30:08", "14:30:17")]),
+        (120, [("14:30:00", "14:30:01"), ("14:30:01", "14:30:02")]),
+    ],
+)
+def test_split_interval(partitions, expected):
+    """Test split_interval returns contiguous sub-intervals of whole seconds covering the whole interval."""
+    interval_start = dt.datetime.fromisoformat("2023-04-25T14:30:00+00:00")
+    interval_end = dt.datetime.fromisoformat("2023-04-25T14:31:00+00:00")
+
+    sub_intervals = split_interval(interval_start, interval_end, partitions)
+
+    assert sub_intervals[0][0] == interval_start
+    assert sub_intervals[-1][1] == interval_end
+    assert all(previous[1] == current[0] for previous, current in zip(sub_intervals, sub_intervals[1:]))
+    assert len(sub_intervals) == min(partitions, 60)
+    assert [
+        (start.strftime("%H:%M:%S"), end.strftime("%H:%M:%S")) for start, end in sub_intervals[: len(expected)]
+    ] == expected
+
+
 async def test_iter_records_handles_duplicates(clickhouse_client):
     """Test the rows returned by iter_records are de-duplicated."""
     team_id = randint(1, 1000000)
@@ -1,3 +1,4 @@
+import asyncio
 import csv
 import datetime as dt
 import io
@@ -8,6 +9,7 @@ import pyarrow.parquet as pq
 import pytest
 
 from posthog.temporal.batch_exports.temporary_file import (
+    BackgroundFlusher,
     BatchExportTemporaryFile,
     CSVBatchExportWriter,
     JSONLBatchExportWriter,
@@ -396,3 +398,80 @@ async def test_flushing_parquet_writer_resets_underlying_file(record_batch):
         assert writer.records_since_last_flush == 0
 
     assert flush_counter == 2
+
+
+def test_batch_export_temporary_file_detach():
+    """Test detaching moves written contents to a new file and leaves an empty one to continue writing."""
+    with BatchExportTemporaryFile() as be_file:
+        be_file.write_records_to_jsonl([{"a": 1}, {"a": 2}])
+        bytes_written = be_file.bytes_since_last_reset
+
+        detached = be_file.detach()
+
+        assert be_file.tell() == 0
+        assert be_file.bytes_since_last_reset == 0
+        assert be_file.records_since_last_reset == 0
+        assert be_file.records_total == 2
+        assert detached.bytes_since_last_reset == bytes_written
+        assert detached.records_since_last_reset == 2
+
+        be_file.write_records_to_jsonl([{"a": 3}])
+        detached.rewind()
+
+        assert [json.loads(line) for line in detached.readlines()] == [{"a": 1}, {"a": 2}]
+        detached.close()
+
+
+@pytest.mark.parametrize(
+    "record_batch",
+    TEST_RECORD_BATCHES,
+)
+@pytest.mark.asyncio
+async def test_writer_flushes_in_order_while_writes_continue(record_batch):
+    """Test background flushes run in order and don't block writes while pending."""
+    flushes_started = []
+    flushes_finished = []
+    allow_flushes = asyncio.Event()
+
+    async def slow_flush(
+        batch_export_file, records_since_last_flush, bytes_since_last_flush, last_inserted_at, is_last
+    ):
+        flushes_started.append(last_inserted_at)
+        await allow_flushes.wait()
+        flushes_finished.append((last_inserted_at, batch_export_file.read()))
+
+    writer = JSONLBatchExportWriter(max_bytes=1, flush_callable=slow_flush, max_pending_flushes=2)
+
+    async with writer.open_temporary_file():
+        await writer.write_record_batch(record_batch.slice(offset=0, length=1))
+        await writer.write_record_batch(record_batch.slice(offset=1, length=1))
+        await asyncio.sleep(0)
+
+        # Both writes returned, but only the first flush has started as flushes never overlap.
+        assert flushes_started == [0]
+        assert flushes_finished == []
+
+        allow_flushes.set()
+
+    assert [last_inserted_at for last_inserted_at, _ in flushes_finished] == [0, 1]
+    assert [json.loads(content) for _, content in flushes_finished] == record_batch.select(
+        ["event", "properties"]
+    ).to_pylist()[:2]
+
+
+@pytest.mark.asyncio
+async def test_background_flusher_does_not_flush_after_a_failure():
+    """Test a failed flush is raised and prevents later flushes, which would leave a gap."""
+    flushed = []
+
+    async def flush(value):
+        if value == 1:
+            raise ValueError("Failed flushing")
+        flushed.append(value)
+
+    with pytest.raises(ValueError, match="Failed flushing"):
+        async with BackgroundFlusher(max_pending=3) as flusher:
+            for value in range(3):
+                await flusher.submit(lambda value=value: flush(value), BatchExportTemporaryFile())
+
+    assert flushed == [0]
@@ -34,6 +34,8 @@ from posthog.clickhouse.plugin_log_entries import TRUNCATE_PLUGIN_LOG_ENTRIES_TA
 from posthog.cloud_utils import (
     TEST_clear_instance_license_cache,
 )
+from posthog.hogql.database.database import DATABASE_CACHE
+from posthog.hogql.query import PRINTED_QUERY_CACHE
 from posthog.models import Dashboard, DashboardTile, Insight, Organization, Team, User
 from posthog.models.channel_type.sql import (
     CHANNEL_DEFINITION_TABLE_SQL,
@@ -49,6 +51,7 @@ from posthog.models.event.sql import (
     EVENTS_TABLE_SQL,
 )
 from posthog.models.event.util import bulk_create_events
+from posthog.models.feature_flag.local_evaluation import COMPILED_FEATURE_FLAGS_CACHE
 from posthog.models.group.sql import TRUNCATE_GROUPS_TABLE_SQL
 from posthog.models.instance_setting import get_instance_setting
 from posthog.models.organization import OrganizationMembership
@@ -226,6 +229,9 @@ class PostHogTestCase(SimpleTestCase):
 
     def setUp(self):
         get_instance_setting.cache_clear()
+        DATABASE_CACHE.clear()
+        PRINTED_QUERY_CACHE.clear()
+        COMPILED_FEATURE_FLAGS_CACHE.clear()
 
         if get_instance_setting("PERSON_ON_EVENTS_ENABLED"):
             from posthog.models.team import util
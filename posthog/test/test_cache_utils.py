@@ -3,7 +3,9 @@ from time import sleep
 from typing import Optional
 from unittest.mock import Mock
 
-from posthog.cache_utils import cache_for
+import orjson
+
+from posthog.cache_utils import CompressedOrjsonSerializer, cache_for
 from posthog.test.base import APIBaseTest
 
 mocked_dependency = Mock()
@@ -93,3 +95,30 @@ class TestCacheUtils(APIBaseTest):
             "Background task finished",
             "Post refresh call 1",
         ]
+
+
+class TestCompressedOrjsonSerializer(APIBaseTest):
+    serializer = CompressedOrjsonSerializer({})
+
+    def test_small_values_are_not_compressed(self) -> None:
+        serialized = self.serializer.dumps({"results": [1, 2, 3]})
+        self.assertEqual(serialized, b"PHC\x01\x00" + orjson.dumps({"results": [1, 2, 3]}))
+        self.assertEqual(self.serializer.loads(serialized), {"results": [1, 2, 3]})
+
+    def test_large_values_are_compressed(self) -> None:
+        value = {"results": [{"label": "$pageview", "data": list(range(100))}] * 100}
+        serialized = self.serializer.dumps(value)
+        self.assertTrue(serialized.startswith(b"PHC\x01\x01"))
+        self.assertLess(len(serialized), len(orjson.dumps(value)) / 10)
+        self.assertEqual(self.serializer.loads(serialized), value)
+
+    def test_reads_values_written_without_envelope(self) -> None:
+        self.assertEqual(self.serializer.loads(orjson.dumps({"results": []})), {"results": []})
+
+    def test_unknown_version_is_a_miss(self) -> None:
+        self.assertIsNone(self.serializer.loads(b"PHC\x02\x00{}"))
+
+    def test_undecodable_value_is_a_miss(self) -> None:
+        self.assertIsNone(self.serializer.loads(b"PHC\x01\x01not zlib"))
+        self.assertIsNone(self.serializer.loads(b"PHC"))
+        self.assertIsNone(self.serializer.loads(b"not json"))
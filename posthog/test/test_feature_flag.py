@@ -6,6 +6,7 @@ from unittest.mock import patch
 from django.core.cache import cache
 from django.db import IntegrityError, connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from freezegun import freeze_time
 import pytest
@@ -20,9 +21,15 @@ from posthog.models.feature_flag.flag_matching import (
     FeatureFlagMatchReason,
     FlagsMatcherCache,
     get_all_feature_flags,
+    get_all_feature_flags_for_distinct_ids,
     get_feature_flag_hash_key_overrides,
     set_feature_flag_hash_key_overrides,
 )
+from posthog.models.feature_flag.local_evaluation import (
+    COMPILED_FEATURE_FLAGS_CACHE,
+    compile_feature_flag,
+    get_compiled_feature_flags_for_team,
+)
 from posthog.models.group import Group
 from posthog.models.organization import Organization
 from posthog.models.team import Team
@@ -5678,6 +5685,203 @@ class TestFeatureFlagMatcher(BaseTest, QueryMatchingTest):
         )
 
 
+@patch(
+    "posthog.models.feature_flag.flag_matching.postgres_healthcheck.is_connected",
+    return_value=True,
+)
+class TestBulkFeatureFlagMatching(BaseTest, QueryMatchingTest):
+    def setUp(self):
+        super().setUp()
+        GroupTypeMapping.objects.create(team=self.team, group_type="organization", group_type_index=0)
+        Group.objects.create(
+            team=self.team,
+            group_type_index=0,
+            group_key="posthog",
+            group_properties={"plan": "enterprise"},
+            version=0,
+        )
+        cohort = Cohort.objects.create(
+            team=self.team,
+            groups=[
+                {"properties": [{"key": "email", "value": "@posthog.com", "type": "person", "operator": "icontains"}]}
+            ],
+        )
+        for index in range(5):
+            Person.objects.create(
+                team=self.team,
+                distinct_ids=[f"person_{index}", f"alias_{index}"],
+                properties={"email": f"user{index}@{'posthog.com' if index % 2 else 'example.com'}", "age": index * 10},
+            )
+        flags = {
+            "email-flag": {
+                "groups": [{"properties": [{"key": "email", "value": "example.com", "operator": "icontains"}]}]
+            },
+            "age-flag": {"groups": [{"properties": [{"key": "age", "value": 15, "operator": "gt"}]}]},
+            "rollout-flag": {"groups": [{"properties": [], "rollout_percentage": 50}]},
+            "variant-flag": {
+                "groups": [{"properties": [], "rollout_percentage": 100}],
+                "multivariate": {
+                    "variants": [
+                        {"key": "control", "rollout_percentage": 50},
+                        {"key": "test", "rollout_percentage": 50},
+                    ]
+                },
+            },
+            "not-set-flag": {"groups": [{"properties": [{"key": "beta", "operator": "is_not_set"}]}]},
+            "cohort-flag": {"groups": [{"properties": [{"key": "id", "value": cohort.pk, "type": "cohort"}]}]},
+            "group-flag": {
+                "aggregation_group_type_index": 0,
+                "groups": [
+                    {"properties": [{"key": "plan", "value": "enterprise", "type": "group", "group_type_index": 0}]}
+                ],
+            },
+            "distinct-id-flag": {
+                "groups": [
+                    {
+                        "properties": [
+                            {"key": "distinct_id", "value": "person_1", "operator": "exact"},
+                            {"key": "email", "value": "posthog.com", "operator": "icontains"},
+                        ]
+                    }
+                ]
+            },
+        }
+        for key, filters in flags.items():
+            FeatureFlag.objects.create(team=self.team, key=key, created_by=self.user, filters=filters)
+
+    def test_bulk_evaluation_matches_individual_evaluation(self, *args):
+        distinct_ids = [f"person_{index}" for index in range(5)] + ["alias_3", "not_ingested"]
+        groups = {"person_1": {"organization": "posthog"}, "person_2": {"organization": "not_ingested"}}
+
+        all_flags = get_all_feature_flags_for_distinct_ids(self.team.pk, distinct_ids, groups)
+
+        self.assertEqual(list(all_flags.keys()), distinct_ids)
+        for distinct_id in distinct_ids:
+            self.assertEqual(
+                all_flags[distinct_id],
+                get_all_feature_flags(self.team.pk, distinct_id, groups.get(distinct_id)),
+            )
+        self.assertEqual(all_flags["person_1"][0]["distinct-id-flag"], True)
+        self.assertEqual(all_flags["person_1"][0]["group-flag"], True)
+        self.assertEqual(all_flags["not_ingested"][0]["not-set-flag"], True)
+
+    def test_bulk_evaluation_queries_do_not_grow_with_distinct_ids(self, *args):
+        # Conditions on the distinct_id property are the only ones still evaluated per distinct_id
+        FeatureFlag.objects.filter(team=self.team, key="distinct-id-flag").delete()
+        groups = {f"person_{index}": {"organization": "posthog"} for index in range(5)}
+        get_all_feature_flags_for_distinct_ids(self.team.pk, ["person_0"], groups)  # warm the flags cache
+
+        with CaptureQueriesContext(connection) as single_distinct_id_queries:
+            get_all_feature_flags_for_distinct_ids(self.team.pk, ["person_0"], groups)
+        with CaptureQueriesContext(connection) as many_distinct_ids_queries:
+            get_all_feature_flags_for_distinct_ids(self.team.pk, list(groups.keys()), groups)
+
+        self.assertEqual(len(many_distinct_ids_queries), len(single_distinct_id_queries))
+
+    def test_bulk_evaluation_when_database_is_down(self, mock_is_connected):
+        mock_is_connected.return_value = False
+        get_all_feature_flags_for_distinct_ids(self.team.pk, ["person_0"])  # warm the flags cache
+
+        with self.assertNumQueries(0):
+            all_flags = get_all_feature_flags_for_distinct_ids(self.team.pk, ["person_0", "person_1"])
+
+        flags, _, _, errors = all_flags["person_0"]
+        self.assertTrue(errors)
+        self.assertIn("rollout-flag", flags)
+        self.assertNotIn("email-flag", flags)
+
+
+@patch(
+    "posthog.models.feature_flag.flag_matching.postgres_healthcheck.is_connected",
+    return_value=True,
+)
+class TestLocalFeatureFlagEvaluation(BaseTest, QueryMatchingTest):
+    def setUp(self):
+        super().setUp()
+        flags = {
+            "email-flag": {
+                "groups": [
+                    {"properties": [{"key": "email", "value": "posthog.com", "operator": "icontains"}]},
+                    {"properties": [{"key": "age", "value": 30, "operator": "gt"}], "rollout_percentage": 50},
+                ]
+            },
+            "rollout-flag": {"groups": [{"properties": [], "rollout_percentage": 50}]},
+            "variant-flag": {
+                "groups": [
+                    {"properties": [{"key": "email", "value": "vip@posthog.com"}], "variant": "test"},
+                    {"properties": [], "rollout_percentage": 100},
+                ],
+                "multivariate": {
+                    "variants": [
+                        {"key": "control", "rollout_percentage": 50},
+                        {"key": "test", "rollout_percentage": 50},
+                    ]
+                },
+                "payloads": {"test": {"color": "blue"}},
+            },
+            "not-set-flag": {"groups": [{"properties": [{"key": "beta", "operator": "is_not_set"}]}]},
+        }
+        for key, filters in flags.items():
+            FeatureFlag.objects.create(team=self.team, key=key, created_by=self.user, filters=filters)
+
+    def test_compiled_flags_match_feature_flag_matcher(self, *args):
+        feature_flags = list(FeatureFlag.objects.filter(team=self.team))
+        for distinct_id in [f"person_{index}" for index in range(20)]:
+            for properties in [
+                {"email": "a@posthog.com", "age": 20, "beta": True},
+                {"email": "vip@posthog.com", "age": 40, "beta": None},
+                {"email": "b@example.com", "age": 40, "beta": False},
+            ]:
+                for feature_flag in feature_flags:
+                    self.assertEqual(
+                        compile_feature_flag(feature_flag).match(distinct_id, properties),
+                        FeatureFlagMatcher([feature_flag], distinct_id, property_value_overrides=properties).get_match(
+                            feature_flag
+                        ),
+                    )
+
+    def test_compiled_flags_defer_to_matcher_without_enough_properties(self, *args):
+        feature_flag = FeatureFlag.objects.get(team=self.team, key="email-flag")
+        self.assertIsNone(compile_feature_flag(feature_flag).match("person_0", {"email": "a@posthog.com"}))
+
+        feature_flag.ensure_experience_continuity = True
+        self.assertIsNone(compile_feature_flag(feature_flag).match("person_0", {"email": "a@posthog.com", "age": 1}))
+
+    def test_flags_matched_from_overrides_skip_the_database(self, *args):
+        get_all_feature_flags(self.team.pk, "person_0")  # warm the flags cache
+
+        with self.assertNumQueries(0):
+            all_flags, reasons, payloads, errors = get_all_feature_flags(
+                self.team.pk,
+                "person_0",
+                property_value_overrides={"email": "vip@posthog.com", "age": 40, "beta": None},
+            )
+
+        self.assertEqual(all_flags["email-flag"], True)
+        self.assertEqual(all_flags["variant-flag"], "test")
+        self.assertEqual(all_flags["not-set-flag"], False)
+        self.assertEqual(payloads, {"variant-flag": {"color": "blue"}})
+        self.assertEqual(
+            reasons["variant-flag"], {"reason": FeatureFlagMatchReason.CONDITION_MATCH, "condition_index": 0}
+        )
+        self.assertFalse(errors)
+
+    def test_compiled_flags_are_reused_until_cached_flags_change(self, *args):
+        get_all_feature_flags(self.team.pk, "person_0")  # warm the flags cache
+
+        compiled = get_compiled_feature_flags_for_team(self.team.pk)
+        assert compiled is not None
+        self.assertIs(get_compiled_feature_flags_for_team(self.team.pk), compiled)
+
+        FeatureFlag.objects.get(team=self.team, key="rollout-flag").delete()
+
+        recompiled = get_compiled_feature_flags_for_team(self.team.pk)
+        assert recompiled is not None
+        self.assertIsNot(recompiled, compiled)
+        self.assertNotIn("rollout-flag", recompiled.compiled_feature_flags)
+        self.assertEqual(len(COMPILED_FEATURE_FLAGS_CACHE), 1)
+
+
 class TestFeatureFlagHashKeyOverrides(BaseTest, QueryMatchingTest):
     person: Person
 
@@ -1,13 +1,17 @@
+import base64
+import gzip
 from datetime import datetime
 from unittest.mock import call, patch
 from zoneinfo import ZoneInfo
 
+import lzstring
 import pytest
 from django.core.handlers.wsgi import WSGIRequest
 from django.http import HttpRequest
 from django.test import TestCase
 from django.test.client import RequestFactory
 from freezegun import freeze_time
+from parameterized import parameterized
 from rest_framework.request import Request
 
 from posthog.api.test.mock_sentry import mock_sentry_context_for_tagging
@@ -18,6 +22,7 @@ from posthog.test.base import BaseTest
 from posthog.utils import (
     PotentialSecurityProblemException,
     absolute_uri,
+    decompress,
     flatten,
     format_query_params_absolute_url,
     get_available_timezones_with_offsets,
@@ -409,6 +414,30 @@ class TestLoadDataFromRequest(TestCase):
         data = load_data_from_request(post_request)
         self.assertEqual({"what is it": "the decompressed value"}, data)
 
+    def test_detects_gzipped_body_from_magic_bytes(self):
+        rf = RequestFactory()
+        post_request = rf.post("/s/", gzip.compress(b'{"event": "$pageview"}'), "text/plain")
+
+        self.assertEqual({"event": "$pageview"}, load_data_from_request(post_request))
+
+    def test_falls_back_to_stdlib_json_for_values_orjson_rejects(self):
+        rf = RequestFactory()
+        post_request = rf.post("/s/", '{"nan": NaN, "big": 123456789012345678901234567890}', "text/plain")
+
+        self.assertEqual({"nan": None, "big": 123456789012345678901234567890}, load_data_from_request(post_request))
+
+    @parameterized.expand(
+        [
+            ("plain", b'{"event": "$pageview", "properties": {"emoji": "\xf0\x9f\x92\xbb"}}', ""),
+            ("list", b' [{"event": "$pageview"}]', ""),
+            ("base64", base64.b64encode(b'{"event": "$pageview"}').decode(), ""),
+            ("gzip", gzip.compress(b'[{"event": "$pageview"}]'), "gzip-js"),
+            ("lz64", lzstring.LZString().compressToBase64('{"event": "$pageview"}'), "lz64"),
+        ]
+    )
+    def test_fast_path_decodes_like_the_stdlib_path(self, _name, data, compression):
+        self.assertEqual(decompress(data, compression), decompress(data, compression, fast_path=False))
+
 
 class TestShouldRefresh(TestCase):
     def test_refresh_requested_by_client_with_refresh_true(self):
@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 from encrypted_fields.fields import EncryptedTextField
 
+from posthog.hogql.schema_version import invalidate_team_schema
+from posthog.models.signals import mutable_receiver
 from posthog.models.team import Team
 from posthog.models.utils import CreatedMetaFields, UUIDModel, sane_repr
 from posthog.warehouse.util import database_sync_to_async
@@ -21,3 +24,8 @@ def get_or_create_datawarehouse_credential(team_id, access_key, access_secret) -
     )
 
     return credential
+
+
+@mutable_receiver([post_save, post_delete], sender=DataWarehouseCredential)
+def data_warehouse_credential_changed(sender, instance: DataWarehouseCredential, **kwargs):
+    invalidate_team_schema(instance.team_id)
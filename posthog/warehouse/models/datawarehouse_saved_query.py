@@ -2,10 +2,13 @@ import re
 from sentry_sdk import capture_exception
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 
 from posthog.hogql.database.database import Database
 from posthog.hogql.database.models import SavedQuery
 from posthog.hogql import ast
+from posthog.hogql.schema_version import invalidate_team_schema
+from posthog.models.signals import mutable_receiver
 from posthog.models.team import Team
 from posthog.models.utils import CreatedMetaFields, DeletedMetaFields, UUIDModel
 from posthog.warehouse.models.util import remove_named_tuples
@@ -109,3 +112,8 @@ class DataWarehouseSavedQuery(CreatedMetaFields, UUIDModel, DeletedMetaFields):
             query=self.query["query"],
             fields=fields,
         )
+
+
+@mutable_receiver([post_save, post_delete], sender=DataWarehouseSavedQuery)
+def data_warehouse_saved_query_changed(sender, instance: DataWarehouseSavedQuery, **kwargs):
+    invalidate_team_schema(instance.team_id)
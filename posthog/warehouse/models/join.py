@@ -2,12 +2,15 @@ from typing import Optional
 from warnings import warn
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 
 from posthog.hogql.ast import SelectQuery
 from posthog.hogql.context import HogQLContext
 from posthog.hogql.database.models import LazyJoinToAdd
 from posthog.hogql.errors import ResolutionError
 from posthog.hogql.parser import parse_expr
+from posthog.hogql.schema_version import invalidate_team_schema
+from posthog.models.signals import mutable_receiver
 from posthog.models.team import Team
 from posthog.models.utils import CreatedMetaFields, DeletedMetaFields, UUIDModel
 from posthog.warehouse.models.datawarehouse_saved_query import DataWarehouseSavedQuery
@@ -89,3 +92,8 @@ class DataWarehouseJoin(CreatedMetaFields, UUIDModel, DeletedMetaFields):
             return join_expr
 
         return _join_function
+
+
+@mutable_receiver([post_save, post_delete], sender=DataWarehouseJoin)
+def data_warehouse_join_changed(sender, instance: DataWarehouseJoin, **kwargs):
+    invalidate_team_schema(instance.team_id)
@@ -1,6 +1,7 @@
 import re
 from typing import Optional, TypeAlias
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 
 from posthog.client import sync_execute
 from posthog.errors import wrap_query_error
@@ -17,6 +18,8 @@ from posthog.hogql.database.models import (
     StringJSONDatabaseField,
 )
 from posthog.hogql.database.s3_table import S3Table
+from posthog.hogql.schema_version import invalidate_team_schema
+from posthog.models.signals import mutable_receiver
 from posthog.models.team import Team
 from posthog.models.utils import (
     CreatedMetaFields,
@@ -316,3 +319,8 @@ def acreate_datawarehousetable(**kwargs):
 @database_sync_to_async
 def asave_datawarehousetable(table: DataWarehouseTable) -> None:
     table.save()
+
+
+@mutable_receiver([post_save, post_delete], sender=DataWarehouseTable)
+def data_warehouse_table_changed(sender, instance: DataWarehouseTable, **kwargs):
+    invalidate_team_schema(instance.team_id)